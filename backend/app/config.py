@@ -1,4 +1,5 @@
 """Application configuration."""
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -9,8 +10,56 @@ class Settings(BaseSettings):
     # Local LLM Configuration
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama2:latest"  # or mistral:7b-instruct
+    ollama_max_concurrency: int = 4  # match OLLAMA_NUM_PARALLEL on the Ollama server
+    ollama_timeout_seconds: float = 300.0
+    ollama_keep_alive: str = "30m"  # how long models (and their KV cache) stay loaded after a request
+    ollama_context_tokens: int = 4096  # num_ctx of every request; longer SOAP prompts use map-reduce
+    soap_chunk_tokens: int = 1200  # transcript tokens per map-reduce chunk
+    soap_structured_output: bool = True  # constrain SOAP JSON with a schema (Ollama >= 0.5)
+    soap_max_attempts: int = Field(2, ge=1)  # LLM calls per note before falling back to lenient parsing
+    llm_cache_backend: str = "sqlite"  # sqlite, memory, none
+    llm_cache_path: str = "cache/llm_responses.sqlite3"
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_max_entries: int = 1000
     use_local_whisper: bool = True
     whisper_model: str = "base"  # tiny, base, small, medium, large
+    whisper_backend: str = "openai"  # openai (PyTorch) or faster (faster-whisper / CTranslate2)
+    whisper_compute_type: str = "int8"  # faster backend weights: int8, int8_float16, float16, float32
+    whisper_parallel: bool = False  # chunked multi-process transcription for long audio
+    whisper_parallel_workers: int = 0  # 0 = half the CPU cores
+    whisper_parallel_min_seconds: float = 600.0  # shorter recordings use a single pass
+    whisper_chunk_seconds: float = 300.0
+    whisper_chunk_overlap_seconds: float = 1.0
+    transcript_cache_enabled: bool = True
+    transcript_cache_dir: str = "cache/transcripts"
+    transcript_cache_max_mb: int = 512
+    audio_pcm_dir: str = "cache/pcm"  # decoded 16 kHz mono int16 samples, one file per audio hash
+    audio_archive_opus: bool = False  # replace WAV/FLAC uploads with an Opus copy after ingest
+    audio_archive_bitrate: str = "32k"
+    vad_enabled: bool = True  # transcribe only the speech regions of a recording
+    vad_threshold_db: float = -45.0  # frames louder than this (dBFS) count as speech
+    vad_min_speech_ms: int = 250  # shorter bursts (clicks, bumps) are dropped
+    vad_min_silence_ms: int = 1000  # shorter pauses do not split a region
+    vad_pad_ms: int = 300  # context kept on each side of a region
+    vad_gap_ms: int = 300  # silence inserted between concatenated regions
+    
+    # Resumable uploads (long recordings, sent in chunks)
+    resumable_upload_dir: str = "uploads/.resumable"  # same filesystem as uploads/ (finalize renames)
+    resumable_upload_max_mb: int = 4096
+    resumable_upload_expiry_hours: float = 24.0  # unfinished uploads idle for this long are removed
+    
+    # Live transcription (WebSocket)
+    live_whisper_model: str = ""  # defaults to whisper_model; smaller models keep up more easily
+    live_window_seconds: float = 30.0  # longest span without a pause before a forced commit
+    live_step_seconds: float = 2.0  # new audio between Whisper passes
+    live_silence_db: float = -40.0  # frames quieter than this count as a pause
+    live_min_silence_ms: int = 500
+    
+    # Model registry
+    model_preload_on_startup: bool = True
+    preload_whisper_models: str = ""  # comma-separated, e.g. "base,small" (default: whisper_model)
+    preload_ollama_models: str = ""  # comma-separated (default: ollama_model)
+    model_ram_budget_mb: int = 4096  # resident Whisper models before LRU eviction (0 = no limit)
     
     # Security
     secret_key: str
@@ -25,6 +74,26 @@ class Settings(BaseSettings):
     api_port: int = 8001
     allowed_origins: str = "http://localhost:3000,http://127.0.0.1:3000"
     
+    # CPU execution (inference threads and core pinning)
+    cpu_threads_per_worker: int = 0  # torch/OpenMP/MKL threads per process (0 = cores / processes)
+    cpu_pin_workers: bool = False  # pin each transcription process to its own cores
+    cpu_cores: str = ""  # cores used for inference, e.g. "0-7" (default: all)
+    
+    # Job queue / worker pool
+    worker_transcription_concurrency: int = 1  # Whisper processes (CPU heavy)
+    worker_note_concurrency: int = 0  # note generation processes (0 = ollama_max_concurrency)
+    note_batch_max_recordings: int = 200  # recordings per POST /batch/notes request
+    job_lease_seconds: int = 300
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 30.0
+    job_retry_backoff_max_seconds: float = 900.0
+    job_poll_interval_seconds: float = 1.0
+    
+    # Metrics (Prometheus /metrics)
+    metrics_enabled: bool = True
+    metrics_dir: str = "cache/metrics"  # per-process snapshots merged by /metrics (workers, API processes)
+    metrics_snapshot_interval_seconds: float = 5.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,8 +1,11 @@
 """Database configuration and session management."""
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import get_settings
+from .services.metrics import get_metrics
 
 settings = get_settings()
 
@@ -15,6 +18,20 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# Time commits (flush included) for the metrics endpoint
+@event.listens_for(SessionLocal, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        get_metrics().db_commit_seconds.observe(time.perf_counter() - started)
+
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -1,8 +1,13 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
+import threading
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .config import get_settings
 from .database import init_db
+from .services.metrics import get_metrics
+from .services.model_registry import get_model_registry, preload_models
 
 settings = get_settings()
 
@@ -28,8 +33,20 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
+    """Initialize database and warm models on startup."""
     init_db()
+    if settings.metrics_enabled:
+        get_metrics().prune_snapshots()
+        get_metrics().start_snapshot_writer()
+    if settings.model_preload_on_startup:
+        # Transcription runs in the worker; the API only needs Ollama warm.
+        # Loads run in the background so the server accepts requests meanwhile.
+        threading.Thread(
+            target=preload_models,
+            kwargs={"whisper": False},
+            name="model-preload",
+            daemon=True
+        ).start()
 
 
 @app.get("/")
@@ -48,11 +65,42 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/models")
+def model_status():
+    """Resident models and their memory use, per API and worker process."""
+    from .services.ollama_service import get_ollama_service
+    # Registers this process's registry with the others' published stats
+    get_model_registry()
+    return {
+        "processes": get_metrics().published("models"),
+        "ollama": get_ollama_service().resident_models()
+    }
+
+
+@app.get("/health/notes")
+def note_generation_status():
+    """Schema validity of SOAP notes generated by the API and worker processes."""
+    from .services.medical_notes import structured_output_stats
+    return {"structured_output": structured_output_stats.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Pipeline metrics of the API and worker processes, in Prometheus text format."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(
+        get_metrics().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Import and include routers
-from .routers import auth, recordings, transcribe
+from .routers import auth, recordings, transcribe, live
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(recordings.router, prefix="/api/recordings", tags=["Recordings"])
 app.include_router(transcribe.router, prefix="/api/recordings", tags=["Transcription"])
+app.include_router(live.router, tags=["Live transcription"])
 
 
 if __name__ == "__main__":
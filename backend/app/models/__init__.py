@@ -2,5 +2,7 @@
 from .user import User
 from .recording import Recording
 from .medical_note import MedicalNote
+from .job import Job
+from .note_batch import NoteBatch
 
-__all__ = ["User", "Recording", "MedicalNote"]
+__all__ = ["User", "Recording", "MedicalNote", "Job", "NoteBatch"]
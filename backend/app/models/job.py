@@ -0,0 +1,37 @@
+"""Job model for the persistent processing queue."""
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..database import Base
+
+
+class Job(Base):
+    """Queued unit of work (transcription or note generation) for a recording."""
+    
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    recording_id = Column(Integer, ForeignKey("recordings.id"), nullable=False, index=True)
+    
+    # Work description
+    stage = Column(String, nullable=False, index=True)  # transcription, note_generation
+    status = Column(String, default="queued", index=True)  # queued, running, succeeded, failed
+    
+    # Retry bookkeeping
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    available_at = Column(DateTime, default=datetime.utcnow, index=True)  # not claimable before this time
+    last_error = Column(Text, nullable=True)
+    
+    # Lease held by the worker currently running the job
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    recording = relationship("Recording", back_populates="jobs")
+    batches = relationship("NoteBatch", secondary="note_batch_jobs", back_populates="jobs")
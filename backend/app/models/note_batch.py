@@ -0,0 +1,31 @@
+"""Note batch model for bulk SOAP note generation."""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Table
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from ..database import Base
+
+
+# Batch membership: a job already pending for a recording joins every
+# batch that asks for it, and stays in the batches it was already part of
+note_batch_jobs = Table(
+    "note_batch_jobs",
+    Base.metadata,
+    Column("batch_id", Integer, ForeignKey("note_batches.id"), primary_key=True),
+    Column("job_id", Integer, ForeignKey("jobs.id"), primary_key=True, index=True),
+)
+
+
+class NoteBatch(Base):
+    """Group of note generation jobs requested together (e.g. a day's recordings)."""
+    
+    __tablename__ = "note_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", back_populates="note_batches")
+    jobs = relationship("Job", secondary=note_batch_jobs, back_populates="batches")
@@ -18,13 +18,14 @@ class Recording(Base):
     original_filename = Column(String, nullable=False)
     file_size = Column(Integer, nullable=True)  # in bytes
     duration_seconds = Column(Float, nullable=True)
+    audio_sha256 = Column(String(64), nullable=True, index=True)  # content hash, keys the transcript cache
     
     # Transcription
     transcript = Column(Text, nullable=True)
     transcript_language = Column(String, default="en")
     
     # Status tracking
-    status = Column(String, default="uploaded")  # uploaded, transcribing, transcribed, processing, completed, failed
+    status = Column(String, default="uploaded")  # uploaded, queued, transcribing, transcribed, processing, completed, failed
     error_message = Column(Text, nullable=True)
     
     # Timestamps
@@ -34,3 +35,4 @@ class Recording(Base):
     # Relationships
     user = relationship("User", back_populates="recordings")
     medical_note = relationship("MedicalNote", back_populates="recording", uselist=False, cascade="all, delete-orphan")
+    jobs = relationship("Job", back_populates="recording", cascade="all, delete-orphan")
@@ -20,3 +20,4 @@ class User(Base):
     
     # Relationships
     recordings = relationship("Recording", back_populates="user", cascade="all, delete-orphan")
+    note_batches = relationship("NoteBatch", back_populates="user", cascade="all, delete-orphan")
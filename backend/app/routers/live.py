@@ -0,0 +1,205 @@
+"""Live recording router: streaming transcription over WebSocket."""
+import asyncio
+import json
+import logging
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models.recording import Recording
+from ..models.user import User
+from ..services.job_queue import get_job_queue, STAGE_NOTE_GENERATION
+from ..services.live_transcription import create_decoder, LiveTranscriber, WavWriter, FORMAT_PCM16
+from ..services.transcript_cache import compute_audio_hash
+from ..utils.auth import decode_access_token
+from .recordings import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _authenticate(token: Optional[str]) -> Optional[User]:
+    """Resolve the user of a bearer token passed as query parameter.
+
+    Browsers cannot set headers on WebSocket requests, so the token comes
+    in the URL instead of the Authorization header.
+    """
+    if not token:
+        return None
+    try:
+        payload = decode_access_token(token)
+    except HTTPException:
+        return None
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == payload.get("sub")).first()
+        return user if user is not None and user.is_active else None
+    finally:
+        db.close()
+
+
+def _persist_recording(
+    user_id: int,
+    audio_path: str,
+    duration: float,
+    transcript: str,
+    language: str
+) -> int:
+    """Store a finished live session as a transcribed Recording and queue its note.
+
+    Returns:
+        Recording ID
+    """
+    db = SessionLocal()
+    try:
+        recording = Recording(
+            user_id=user_id,
+            audio_file_path=audio_path,
+            original_filename=Path(audio_path).name,
+            file_size=Path(audio_path).stat().st_size,
+            duration_seconds=duration,
+            audio_sha256=compute_audio_hash(audio_path),
+            transcript=transcript,
+            transcript_language=language,
+            status="transcribed" if transcript else "uploaded"
+        )
+        db.add(recording)
+        db.flush()
+        if transcript:
+            get_job_queue().enqueue(db, recording.id, STAGE_NOTE_GENERATION)
+        db.commit()
+        return recording.id
+    finally:
+        db.close()
+
+
+@router.websocket("/ws/recordings/live")
+async def live_recording(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    language: str = "en",
+    format: str = FORMAT_PCM16,
+    sample_rate: int = 16000
+):
+    """Transcribe a consultation while it is being recorded.
+
+    Protocol:
+        - Connect with ``?token=<JWT>&language=en&format=pcm16&sample_rate=16000``
+          (``format=opus`` takes one raw Opus packet per message)
+        - Send audio frames as binary messages
+        - Send ``{"type": "stop"}`` (or close the socket) at the end
+        - Receive ``partial`` hypotheses for the current utterance, ``final``
+          segments once a pause commits them, then ``completed`` with the
+          recording ID. Note generation is queued immediately.
+
+    Args:
+        websocket: WebSocket connection
+        token: Access token
+        language: Language code
+        format: 'pcm16' (16-bit little-endian mono) or 'opus'
+        sample_rate: Sample rate of PCM frames
+    """
+    user = await run_in_threadpool(_authenticate, token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    try:
+        decoder = create_decoder(format, sample_rate)
+    except (ValueError, RuntimeError) as e:
+        await websocket.accept()
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+
+    await websocket.accept()
+
+    user_dir = UPLOAD_DIR / str(user.id)
+    user_dir.mkdir(exist_ok=True)
+    audio_path = str(user_dir / f"{uuid.uuid4()}.wav")
+    wav = WavWriter(audio_path)
+    transcriber = LiveTranscriber(language=language)
+    new_audio = asyncio.Event()
+    receiving = True
+    connected = True
+
+    async def send(event):
+        nonlocal connected
+        if connected:
+            try:
+                await websocket.send_json(event)
+            except Exception:
+                connected = False
+
+    async def transcribe_loop():
+        # Whisper runs in a thread; frames keep arriving meanwhile
+        while receiving:
+            await new_audio.wait()
+            new_audio.clear()
+            if transcriber.ready():
+                for event in await run_in_threadpool(transcriber.step_once):
+                    await send(event)
+
+    await send({"type": "ready", "sample_rate": 16000})
+    logger.info(f"Live session started for user {user.id}: {audio_path}")
+    loop_task = asyncio.create_task(transcribe_loop())
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                samples = decoder.decode(message["bytes"])
+                wav.write(samples)
+                transcriber.append(samples)
+                new_audio.set()
+            elif message.get("text"):
+                if json.loads(message["text"]).get("type") == "stop":
+                    break
+    except WebSocketDisconnect:
+        connected = False
+    except Exception as e:
+        logger.error(f"Live session failed: {e}")
+        await send({"type": "error", "detail": str(e)})
+    finally:
+        receiving = False
+        new_audio.set()
+        try:
+            await loop_task
+        except Exception as e:
+            logger.error(f"Live transcription pass failed: {e}")
+        wav.close()
+
+    # Transcribe what is left and hand over to note generation
+    try:
+        final = await run_in_threadpool(transcriber.flush)
+        if final is not None:
+            await send(final)
+        recording_id = await run_in_threadpool(
+            _persist_recording,
+            user.id,
+            audio_path,
+            wav.duration_seconds,
+            transcriber.transcript.text,
+            language
+        )
+        logger.info(f"Live session saved as recording {recording_id} ({wav.duration_seconds:.1f}s)")
+        await send({
+            "type": "completed",
+            "recording_id": recording_id,
+            "transcript": transcriber.transcript.text,
+            "duration_seconds": wav.duration_seconds
+        })
+    except Exception as e:
+        logger.error(f"Failed to save live session: {e}")
+        await send({"type": "error", "detail": f"Failed to save recording: {str(e)}"})
+
+    if connected:
+        await websocket.close()
@@ -1,16 +1,32 @@
 """Recordings router for audio upload and management."""
-import os
-import uuid
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, BackgroundTasks
+from typing import AsyncIterator, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, UploadFile, File, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import logging
+import time
 
 from ..database import get_db
 from ..models.user import User
 from ..models.recording import Recording
-from ..schemas.recording import RecordingResponse, RecordingList
+from ..schemas.recording import RecordingResponse, RecordingList, ResumableUploadCreate, ResumableUploadStatus
+from ..services.audio_upload import (
+    InvalidAudioError,
+    StoredUpload,
+    UploadTooLargeError,
+    UPLOAD_CHUNK_SIZE,
+    rechunk,
+    store_audio_stream,
+)
+from ..services.audio_ingest import pcm_path_for
+from ..services.metrics import get_metrics
+from ..services.resumable_upload import (
+    ResumableUpload,
+    UploadConflictError,
+    UploadNotFoundError,
+    get_resumable_upload_store,
+)
 from ..utils.auth import get_current_user
 from ..config import get_settings
 
@@ -53,40 +69,85 @@ def validate_audio_file(file: UploadFile) -> None:
         )
 
 
-def save_upload_file(file: UploadFile, user_id: int) -> tuple[str, int]:
-    """Save uploaded file to disk.
+async def iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    """Read an uploaded file in UPLOAD_CHUNK_SIZE pieces without blocking the loop.
     
     Args:
         file: Uploaded file
-        user_id: User ID for organizing files
+        
+    Yields:
+        File content chunks
+    """
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+async def store_recording(
+    chunks: AsyncIterator[bytes],
+    filename: str,
+    user: User,
+    db: Session,
+    method: str
+) -> Recording:
+    """Stream audio to disk and create its Recording.
+    
+    The content is hashed, checked against known audio headers and measured
+    while it is written, so nothing reads the file a second time.
+    
+    Args:
+        chunks: Audio content
+        filename: Original filename
+        user: Owner
+        db: Database session
+        method: Upload endpoint ('multipart' or 'stream'), for the metrics
         
     Returns:
-        Tuple of (file_path, file_size)
+        Created recording
+        
+    Raises:
+        HTTPException: If the content is not audio or is too large
     """
-    # Create user directory
-    user_dir = UPLOAD_DIR / str(user_id)
-    user_dir.mkdir(exist_ok=True)
+    start_time = time.perf_counter()
+    try:
+        stored = await store_audio_stream(chunks, UPLOAD_DIR / str(user.id), MAX_FILE_SIZE)
+    except InvalidAudioError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    get_metrics().upload_seconds.observe(time.perf_counter() - start_time, method=method)
+    get_metrics().upload_bytes.inc(stored.size, method=method)
     
-    # Generate unique filename
-    file_ext = Path(file.filename).suffix.lower()
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = user_dir / unique_filename
-    
-    # Save file
-    file_size = 0
-    with open(file_path, "wb") as f:
-        while chunk := file.file.read(8192):
-            file_size += len(chunk)
-            if file_size > MAX_FILE_SIZE:
-                # Clean up partial file
-                file_path.unlink(missing_ok=True)
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
-                )
-            f.write(chunk)
-    
-    return str(file_path), file_size
+    return create_recording(stored, filename, user, db)
+
+
+def create_recording(stored: StoredUpload, filename: str, user: User, db: Session) -> Recording:
+    """Create the Recording of a stored audio file.
+    
+    Args:
+        stored: Stored audio file
+        filename: Original filename
+        user: Owner
+        db: Database session
+        
+    Returns:
+        Created recording
+    """
+    recording = Recording(
+        user_id=user.id,
+        audio_file_path=stored.path,
+        original_filename=filename,
+        file_size=stored.size,
+        duration_seconds=stored.duration_seconds,
+        audio_sha256=stored.sha256,
+        status="uploaded"
+    )
+    
+    db.add(recording)
+    db.commit()
+    db.refresh(recording)
+    
+    logger.info(f"Recording created: {recording.id} ({stored.audio_format}, {stored.size} bytes)")
+    return recording
 
 
 @router.post("/upload", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
@@ -111,24 +172,56 @@ async def upload_recording(
         
         logger.info(f"Uploading file: {file.filename} for user {current_user.id}")
         
-        # Save file
-        file_path, file_size = save_upload_file(file, current_user.id)
+        recording = await store_recording(iter_upload_file(file), file.filename, current_user, db, "multipart")
         
-        # Create database record
-        recording = Recording(
-            user_id=current_user.id,
-            audio_file_path=file_path,
-            original_filename=file.filename,
-            file_size=file_size,
-            status="uploaded"
-        )
-        
-        db.add(recording)
-        db.commit()
-        db.refresh(recording)
+        return RecordingResponse.model_validate(recording)
         
-        logger.info(f"Recording created: {recording.id}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload file: {str(e)}"
+        )
+
+
+@router.post("/upload/stream", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
+async def upload_recording_stream(
+    request: Request,
+    filename: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Upload an audio recording sent as the raw request body.
+    
+    Unlike multipart uploads, which Starlette spools to a temporary file
+    before the handler runs, the body goes straight to its final location.
+    
+    Args:
+        request: Request whose body is the audio file
+        filename: Original filename
+        current_user: Current authenticated user
+        db: Database session
         
+    Returns:
+        Created recording
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
+    if Path(filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file format. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    
+    try:
+        logger.info(f"Streaming upload: {filename} for user {current_user.id}")
+        recording = await store_recording(rechunk(request.stream()), filename, current_user, db, "stream")
         return RecordingResponse.model_validate(recording)
         
     except HTTPException:
@@ -141,6 +234,190 @@ async def upload_recording(
         )
 
 
+def get_upload_or_404(upload_id: str, user: User) -> ResumableUpload:
+    """Load a resumable upload of the user.
+    
+    Raises:
+        HTTPException: If it does not exist
+    """
+    try:
+        return get_resumable_upload_store().get(upload_id, user.id)
+    except UploadNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+
+
+def upload_status(upload: ResumableUpload, response: Response) -> ResumableUploadStatus:
+    """Describe a resumable upload, also setting the Upload-Offset header.
+    
+    Args:
+        upload: Resumable upload
+        response: Response to add the header to
+        
+    Returns:
+        Upload state
+    """
+    store = get_resumable_upload_store()
+    received = store.received_ranges(upload)
+    offset = received[0][1] if received and received[0][0] == 0 else 0
+    response.headers["Upload-Offset"] = str(offset)
+    response.headers["Upload-Length"] = str(upload.length)
+    return ResumableUploadStatus(
+        upload_id=upload.upload_id,
+        filename=upload.filename,
+        length=upload.length,
+        offset=offset,
+        received_ranges=[[start, end] for start, end in received],
+        complete=offset == upload.length
+    )
+
+
+@router.post("/uploads", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    body: ResumableUploadCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable upload.
+    
+    Protocol:
+        1. ``POST /uploads`` with the filename and total length
+        2. ``PATCH /uploads/{upload_id}`` with an ``Upload-Offset`` header and
+           the chunk as raw body, as many times as needed. Chunks may be sent
+           in any order and in parallel.
+        3. ``GET /uploads/{upload_id}`` after an interruption, to see which
+           byte ranges arrived
+        4. ``POST /uploads/{upload_id}/finalize`` to create the recording
+    
+    Args:
+        body: Filename and length
+        response: Response (Location and Upload-Offset headers)
+        current_user: Current authenticated user
+        
+    Returns:
+        Upload state
+    """
+    if Path(body.filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file format. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    try:
+        upload = await run_in_threadpool(
+            get_resumable_upload_store().create, current_user.id, body.filename, body.length
+        )
+    except UploadConflictError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    response.headers["Location"] = f"/api/recordings/uploads/{upload.upload_id}"
+    return upload_status(upload, response)
+
+
+@router.get("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(
+    upload_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the received byte ranges of a resumable upload.
+    
+    Args:
+        upload_id: Upload ID
+        response: Response (Upload-Offset header)
+        current_user: Current authenticated user
+        
+    Returns:
+        Upload state
+    """
+    upload = get_upload_or_404(upload_id, current_user)
+    return upload_status(upload, response)
+
+
+@router.patch("/uploads/{upload_id}", response_model=ResumableUploadStatus)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: User = Depends(get_current_user)
+):
+    """Write a chunk of a resumable upload at ``Upload-Offset``.
+    
+    Args:
+        upload_id: Upload ID
+        request: Request whose body is the chunk
+        response: Response (Upload-Offset header)
+        upload_offset: Byte offset of the chunk
+        current_user: Current authenticated user
+        
+    Returns:
+        Upload state after the chunk
+    """
+    upload = get_upload_or_404(upload_id, current_user)
+    content_length = request.headers.get("content-length")
+    declared_length = int(content_length) if content_length and content_length.isdigit() else None
+    
+    try:
+        written = await get_resumable_upload_store().write_chunk(
+            upload, upload_offset, rechunk(request.stream()), declared_length
+        )
+    except UploadConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except FileNotFoundError:
+        # Finalized or aborted while the chunk was arriving
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is no longer open")
+    
+    logger.debug(f"Upload {upload_id}: {written} bytes at offset {upload_offset}")
+    return upload_status(upload, response)
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
+async def finalize_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Turn a complete resumable upload into a recording.
+    
+    Args:
+        upload_id: Upload ID
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        Created recording, as returned by ``POST /upload``
+    """
+    upload = get_upload_or_404(upload_id, current_user)
+    
+    try:
+        stored = await get_resumable_upload_store().finalize(upload, UPLOAD_DIR / str(current_user.id))
+    except UploadConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except InvalidAudioError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    recording = create_recording(stored, upload.filename, current_user, db)
+    return RecordingResponse.model_validate(recording)
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Abort a resumable upload and discard its chunks.
+    
+    Args:
+        upload_id: Upload ID
+        current_user: Current authenticated user
+    """
+    upload = get_upload_or_404(upload_id, current_user)
+    await run_in_threadpool(get_resumable_upload_store().abort, upload)
+    return None
+
+
 @router.get("/", response_model=RecordingList)
 async def list_recordings(
     skip: int = 0,
@@ -245,6 +522,16 @@ async def delete_recording(
     except Exception as e:
         logger.error(f"Failed to delete file: {e}")
     
+    # Decoded samples are shared by recordings with the same content
+    if recording.audio_sha256:
+        shared = (
+            db.query(Recording)
+            .filter(Recording.audio_sha256 == recording.audio_sha256, Recording.id != recording.id)
+            .count()
+        )
+        if not shared:
+            pcm_path_for(recording.audio_sha256).unlink(missing_ok=True)
+    
     # Delete from database
     db.delete(recording)
     db.commit()
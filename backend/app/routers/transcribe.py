@@ -1,106 +1,55 @@
 """Transcription router for processing recordings."""
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import json
 import logging
 from pathlib import Path
+from typing import Dict
 
-from ..database import get_db
+from ..config import get_settings
+from ..database import get_db, SessionLocal
 from ..models.user import User
 from ..models.recording import Recording
 from ..models.medical_note import MedicalNote
+from ..models.note_batch import NoteBatch
 from ..schemas.recording import RecordingResponse
-from ..schemas.medical_note import MedicalNoteResponse
+from ..schemas.medical_note import MedicalNoteResponse, NoteBatchCreate, NoteBatchItem, NoteBatchStatus
 from ..utils.auth import get_current_user
-from ..services.transcription import get_transcription_service
-from ..services.medical_notes import get_medical_note_service
+from ..services.medical_notes import get_medical_note_service, save_medical_note
+from ..services.job_queue import (
+    get_job_queue,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    STAGE_NOTE_GENERATION,
+    STAGE_TRANSCRIPTION,
+)
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 router = APIRouter()
 
 
-def process_recording_background(recording_id: int, db_session):
-    """Background task to process recording.
-    
-    Args:
-        recording_id: Recording ID to process
-        db_session: Database session
-    """
-    try:
-        # Get recording
-        recording = db_session.query(Recording).filter(Recording.id == recording_id).first()
-        if not recording:
-            logger.error(f"Recording {recording_id} not found")
-            return
-        
-        # Update status
-        recording.status = "transcribing"
-        db_session.commit()
-        
-        # Transcribe audio
-        logger.info(f"Transcribing recording {recording_id}")
-        transcription_service = get_transcription_service()
-        
-        result = transcription_service.transcribe_audio(
-            recording.audio_file_path,
-            language="en"
-        )
-        
-        # Update recording with transcript
-        recording.transcript = result['text']
-        recording.transcript_language = result['language']
-        recording.duration_seconds = result.get('duration', 0)
-        recording.status = "transcribed"
-        db_session.commit()
-        
-        logger.info(f"Transcription completed for recording {recording_id}")
-        
-        # Generate medical note
-        logger.info(f"Generating medical note for recording {recording_id}")
-        recording.status = "processing"
-        db_session.commit()
-        
-        medical_service = get_medical_note_service()
-        note_result = medical_service.generate_soap_note(result['text'])
-        
-        # Create medical note
-        medical_note = MedicalNote(
-            recording_id=recording.id,
-            soap_note=note_result['soap_note'],
-            chief_complaint=note_result['soap_note'].get('chief_complaint', ''),
-            allergies=note_result['soap_note'].get('allergies', []),
-            medications=note_result['soap_note'].get('medications', []),
-            model_used=note_result['model_used'],
-            tokens_used=note_result.get('prompt_tokens', 0) + note_result.get('completion_tokens', 0),
-            generation_time_seconds=note_result['generation_time_seconds']
-        )
-        
-        db_session.add(medical_note)
-        recording.status = "completed"
-        db_session.commit()
-        
-        logger.info(f"Medical note generated for recording {recording_id}")
-        
-    except Exception as e:
-        logger.error(f"Processing failed for recording {recording_id}: {e}")
-        if recording:
-            recording.status = "failed"
-            recording.error_message = str(e)
-            db_session.commit()
+def _sse(event: str, data: Dict) -> str:
+    """Format a Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 
 @router.post("/{recording_id}/transcribe", response_model=RecordingResponse)
 async def transcribe_recording(
     recording_id: int,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Start transcription for a recording.
+    """Queue a recording for transcription and note generation.
+    
+    The work itself is done by the worker pool (``python -m app.worker``).
     
     Args:
         recording_id: Recording ID
-        background_tasks: FastAPI background tasks
         current_user: Current authenticated user
         db: Database session
         
@@ -121,7 +70,7 @@ async def transcribe_recording(
         )
     
     # Check if already processed
-    if recording.status in ["transcribing", "processing", "completed"]:
+    if recording.status in ["queued", "transcribing", "processing", "completed"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Recording is already {recording.status}"
@@ -134,11 +83,10 @@ async def transcribe_recording(
             detail="Audio file not found"
         )
     
-    # Add background task
-    background_tasks.add_task(process_recording_background, recording_id, db)
-    
-    # Update status immediately
-    recording.status = "transcribing"
+    # Persist the job and the new status atomically
+    get_job_queue().enqueue(db, recording.id, STAGE_TRANSCRIPTION)
+    recording.status = "queued"
+    recording.error_message = None
     db.commit()
     db.refresh(recording)
     
@@ -192,16 +140,98 @@ async def get_medical_note(
     return MedicalNoteResponse.model_validate(medical_note)
 
 
+@router.get("/{recording_id}/note/stream")
+async def stream_medical_note(
+    recording_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Generate a medical note and stream it as Server-Sent Events.
+    
+    Events: ``token`` (raw model output), ``section`` (a SOAP field as soon
+    as it is complete), ``map`` (a chunk of a long transcript summarized),
+    ``retry`` (the answer broke the note schema: discard tokens and sections
+    received so far), ``done`` (the persisted note) or ``error``.
+    
+    Args:
+        recording_id: Recording ID
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        text/event-stream response
+    """
+    recording = (
+        db.query(Recording)
+        .filter(Recording.id == recording_id, Recording.user_id == current_user.id)
+        .first()
+    )
+    
+    if not recording:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recording not found"
+        )
+    
+    if not recording.transcript:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Recording must be transcribed first"
+        )
+    
+    transcript = recording.transcript
+    # Free the pooled connection now rather than when the stream ends
+    db.close()
+    medical_service = get_medical_note_service()
+    
+    def event_stream():
+        # Runs in the threadpool after the request session is gone: use our own
+        try:
+            for event in medical_service.generate_soap_note_stream(transcript):
+                if event["event"] != "done":
+                    yield _sse(event["event"], event["data"])
+                    continue
+                
+                stream_db = SessionLocal()
+                try:
+                    medical_note = save_medical_note(stream_db, recording_id, event["data"])
+                    stream_db.commit()
+                    stream_db.refresh(medical_note)
+                    note = MedicalNoteResponse.model_validate(medical_note).model_dump(mode="json")
+                finally:
+                    stream_db.close()
+                
+                logger.info(f"Streamed medical note saved for recording {recording_id}")
+                yield _sse("done", {
+                    "note": note,
+                    "time_to_first_token_seconds": event["data"].get("time_to_first_token_seconds")
+                })
+        except Exception as e:
+            logger.error(f"Note streaming failed for recording {recording_id}: {e}")
+            yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/{recording_id}/regenerate-note", response_model=MedicalNoteResponse)
 async def regenerate_medical_note(
     recording_id: int,
+    force: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Regenerate medical note for a recording.
     
+    Unchanged transcripts are answered from the LLM response cache;
+    pass ``force=true`` to sample a fresh note.
+    
     Args:
         recording_id: Recording ID
+        force: Bypass the LLM response cache
         current_user: Current authenticated user
         db: Database session
         
@@ -230,42 +260,144 @@ async def regenerate_medical_note(
     # Generate new medical note
     logger.info(f"Regenerating medical note for recording {recording_id}")
     
+    transcript = recording.transcript
+    # Hand the connection back to the pool while the LLM runs: requests
+    # holding one through the whole generation exhaust the pool, and the
+    # next request then blocks the event loop waiting for a connection
+    db.close()
+    
     medical_service = get_medical_note_service()
-    note_result = medical_service.generate_soap_note(recording.transcript)
+    note_result = await medical_service.agenerate_soap_note(transcript, force_regenerate=force)
     
-    # Get or create medical note
-    medical_note = (
-        db.query(MedicalNote)
-        .filter(MedicalNote.recording_id == recording_id)
-        .first()
+    medical_note = save_medical_note(db, recording.id, note_result)
+    db.commit()
+    db.refresh(medical_note)
+    
+    logger.info(f"Medical note regenerated for recording {recording_id}")
+    
+    return MedicalNoteResponse.model_validate(medical_note)
+
+
+def batch_status(batch: NoteBatch) -> NoteBatchStatus:
+    """Build the progress of a note batch from its jobs."""
+    items = [
+        NoteBatchItem(
+            recording_id=job.recording_id,
+            job_id=job.id,
+            status=job.status,
+            attempts=job.attempts,
+            error=job.last_error,
+            finished_at=job.finished_at
+        )
+        for job in sorted(batch.jobs, key=lambda job: job.id)
+    ]
+    counts = {status: sum(item.status == status for item in items)
+              for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)}
+    return NoteBatchStatus(
+        batch_id=batch.id,
+        created_at=batch.created_at,
+        total=len(items),
+        queued=counts[JOB_QUEUED],
+        running=counts[JOB_RUNNING],
+        succeeded=counts[JOB_SUCCEEDED],
+        failed=counts[JOB_FAILED],
+        complete=counts[JOB_SUCCEEDED] + counts[JOB_FAILED] == len(items),
+        items=items
+    )
+
+
+@router.post("/batch/notes", response_model=NoteBatchStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_note_batch(
+    request: NoteBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue note generation for several transcribed recordings.
+    
+    One note generation job is queued per recording; a recording whose
+    note is already queued or being generated (e.g. right after its
+    transcription, or by another batch) joins the batch with that job
+    instead, which stays in any batch it already belonged to. The note workers
+    (``python -m app.worker``, as many as OLLAMA_NUM_PARALLEL by default)
+    run them concurrently and save each note as soon as it is generated.
+    Poll ``GET /batch/notes/{batch_id}`` for per-recording progress.
+    
+    Args:
+        request: Recording IDs
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        Initial batch status
+    """
+    recording_ids = list(dict.fromkeys(request.recording_ids))
+    if len(recording_ids) > settings.note_batch_max_recordings:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.note_batch_max_recordings} recordings per batch"
+        )
+    
+    recordings = (
+        db.query(Recording)
+        .filter(Recording.id.in_(recording_ids), Recording.user_id == current_user.id)
+        .all()
     )
+    found = {recording.id: recording for recording in recordings}
+    missing = [recording_id for recording_id in recording_ids if recording_id not in found]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Recordings not found: {missing}"
+        )
     
-    if medical_note:
-        # Update existing
-        medical_note.soap_note = note_result['soap_note']
-        medical_note.chief_complaint = note_result['soap_note'].get('chief_complaint', '')
-        medical_note.allergies = note_result['soap_note'].get('allergies', [])
-        medical_note.medications = note_result['soap_note'].get('medications', [])
-        medical_note.model_used = note_result['model_used']
-        medical_note.tokens_used = note_result.get('prompt_tokens', 0) + note_result.get('completion_tokens', 0)
-        medical_note.generation_time_seconds = note_result['generation_time_seconds']
-    else:
-        # Create new
-        medical_note = MedicalNote(
-            recording_id=recording.id,
-            soap_note=note_result['soap_note'],
-            chief_complaint=note_result['soap_note'].get('chief_complaint', ''),
-            allergies=note_result['soap_note'].get('allergies', []),
-            medications=note_result['soap_note'].get('medications', []),
-            model_used=note_result['model_used'],
-            tokens_used=note_result.get('prompt_tokens', 0) + note_result.get('completion_tokens', 0),
-            generation_time_seconds=note_result['generation_time_seconds']
+    untranscribed = [recording_id for recording_id in recording_ids if not found[recording_id].transcript]
+    if untranscribed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Recordings must be transcribed first: {untranscribed}"
         )
-        db.add(medical_note)
     
+    # Persist the batch and all of its jobs atomically
+    batch = NoteBatch(user_id=current_user.id)
+    db.add(batch)
+    db.flush()
+    queue = get_job_queue()
+    for recording_id in recording_ids:
+        batch.jobs.append(queue.enqueue_or_reuse(db, recording_id, STAGE_NOTE_GENERATION))
     db.commit()
-    db.refresh(medical_note)
+    db.refresh(batch)
     
-    logger.info(f"Medical note regenerated for recording {recording_id}")
+    logger.info(f"Note batch {batch.id} queued: {len(recording_ids)} recordings")
     
-    return MedicalNoteResponse.model_validate(medical_note)
+    return batch_status(batch)
+
+
+@router.get("/batch/notes/{batch_id}", response_model=NoteBatchStatus)
+async def get_note_batch(
+    batch_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a note batch.
+    
+    Args:
+        batch_id: Batch ID
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        Batch status with one item per recording
+    """
+    batch = (
+        db.query(NoteBatch)
+        .filter(NoteBatch.id == batch_id, NoteBatch.user_id == current_user.id)
+        .first()
+    )
+    
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note batch not found"
+        )
+    
+    return batch_status(batch)
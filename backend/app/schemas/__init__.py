@@ -1,7 +1,20 @@
 """Pydantic schemas for request/response validation."""
 from .user import UserCreate, UserLogin, UserResponse, Token
-from .recording import RecordingCreate, RecordingResponse, RecordingList
-from .medical_note import MedicalNoteResponse, SOAPNote
+from .recording import (
+    RecordingCreate,
+    RecordingResponse,
+    RecordingList,
+    ResumableUploadCreate,
+    ResumableUploadStatus,
+)
+from .medical_note import (
+    MedicalNoteResponse,
+    SOAPNote,
+    SOAPNoteOutput,
+    NoteBatchCreate,
+    NoteBatchItem,
+    NoteBatchStatus,
+)
 
 __all__ = [
     "UserCreate",
@@ -11,6 +24,12 @@ __all__ = [
     "RecordingCreate",
     "RecordingResponse",
     "RecordingList",
+    "ResumableUploadCreate",
+    "ResumableUploadStatus",
     "MedicalNoteResponse",
     "SOAPNote",
+    "SOAPNoteOutput",
+    "NoteBatchCreate",
+    "NoteBatchItem",
+    "NoteBatchStatus",
 ]
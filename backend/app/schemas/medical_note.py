@@ -1,7 +1,7 @@
 """Medical note schemas."""
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, create_model
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union, get_args, get_origin
 
 
 class SOAPNote(BaseModel):
@@ -30,3 +30,61 @@ class MedicalNoteResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+# MedicalNoteResponse fields the model writes itself (the rest is metadata)
+LLM_NOTE_FIELDS = ("chief_complaint", "allergies", "medications")
+
+
+def _required(annotation: Any) -> Any:
+    """Strip Optional[...] so the field must be present and non-null."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+# Schema of the JSON the LLM returns for a SOAP note, passed to Ollama as
+# ``format`` to constrain decoding. The SOAP sections come from SOAPNote
+# and the extracted lists from MedicalNoteResponse, all required.
+SOAPNoteOutput = create_model(
+    "SOAPNoteOutput",
+    __doc__="Schema for the SOAP note JSON generated by the LLM.",
+    **{
+        name: (_required(field.annotation), ...)
+        for name, field in SOAPNote.model_fields.items()
+    },
+    **{
+        name: (_required(MedicalNoteResponse.model_fields[name].annotation), ...)
+        for name in LLM_NOTE_FIELDS
+    }
+)
+
+
+class NoteBatchCreate(BaseModel):
+    """Schema for requesting notes for several recordings at once."""
+    recording_ids: List[int] = Field(..., min_length=1, description="Transcribed recordings to generate notes for")
+
+
+class NoteBatchItem(BaseModel):
+    """Schema for the progress of one recording in a note batch."""
+    recording_id: int
+    job_id: int
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    attempts: int
+    error: Optional[str] = None
+    finished_at: Optional[datetime] = None
+
+
+class NoteBatchStatus(BaseModel):
+    """Schema for the progress of a note batch."""
+    batch_id: int
+    created_at: datetime
+    total: int
+    queued: int
+    running: int
+    succeeded: int
+    failed: int
+    complete: bool = Field(..., description="Every item has succeeded or permanently failed")
+    items: List[NoteBatchItem]
@@ -19,6 +19,7 @@ class RecordingResponse(BaseModel):
     original_filename: str
     file_size: Optional[int] = None
     duration_seconds: Optional[float] = None
+    audio_sha256: Optional[str] = None
     transcript: Optional[str] = None
     transcript_language: str
     status: str
@@ -36,3 +37,19 @@ class RecordingList(BaseModel):
     total: int
     page: int
     per_page: int
+
+
+class ResumableUploadCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    filename: str
+    length: int = Field(..., gt=0, description="Total size of the file in bytes")
+
+
+class ResumableUploadStatus(BaseModel):
+    """Schema for the state of a resumable upload."""
+    upload_id: str
+    filename: str
+    length: int
+    offset: int = Field(..., description="Contiguous bytes received from the start")
+    received_ranges: List[List[int]] = Field(..., description="Received [start, end) byte ranges")
+    complete: bool
@@ -0,0 +1,167 @@
+"""Audio helpers: decoding and silence-aware chunk planning."""
+import logging
+import time
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Whisper operates on 16 kHz mono float32 audio
+SAMPLE_RATE = 16000
+
+# Energy is computed this many frames at a time, so memory-mapped PCM is
+# converted to float a block at a time rather than all at once
+ENERGY_BLOCK_FRAMES = 2000
+
+
+@dataclass
+class AudioChunk:
+    """A window of audio to transcribe independently.
+
+    ``start``/``end`` delimit the samples fed to Whisper (including
+    overlap); ``keep_start``/``keep_end`` delimit the region whose
+    segments are kept when stitching, so that every instant of the
+    recording is owned by exactly one chunk.
+    """
+    index: int
+    start: int
+    end: int
+    keep_start: int
+    keep_end: int
+
+
+def load_audio(audio_path: str) -> np.ndarray:
+    """Decode an audio file to 16 kHz mono float32 samples.
+
+    Args:
+        audio_path: Path to audio file
+
+    Returns:
+        1-D float32 array in [-1, 1]
+    """
+    import whisper
+    start_time = time.perf_counter()
+    samples = whisper.load_audio(audio_path, sr=SAMPLE_RATE)
+    get_metrics().decode_seconds.observe(time.perf_counter() - start_time)
+    return samples
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """Convert samples to float32 in [-1, 1].
+
+    int16 PCM (e.g. a memory-mapped ingest file) is scaled in a single
+    allocation; float32 input is returned without copying.
+
+    Args:
+        samples: int16 or floating point samples
+
+    Returns:
+        float32 array
+    """
+    if samples.dtype == np.int16:
+        return np.multiply(samples, np.float32(1 / 32768), dtype=np.float32)
+    return np.asarray(samples, dtype=np.float32)
+
+
+def frame_energy_db(audio: np.ndarray, frame_ms: int = 30) -> np.ndarray:
+    """Compute per-frame RMS energy in dBFS.
+
+    Args:
+        audio: Mono samples at SAMPLE_RATE (float, or int16 PCM)
+        frame_ms: Frame length in milliseconds
+
+    Returns:
+        Array with one energy value per frame
+    """
+    frame_len = SAMPLE_RATE * frame_ms // 1000
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    energy = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, ENERGY_BLOCK_FRAMES):
+        last = min(first + ENERGY_BLOCK_FRAMES, n_frames)
+        frames = to_float32(audio[first * frame_len:last * frame_len]).reshape(last - first, frame_len)
+        energy[first:last] = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12))
+    return energy
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: float = 10.0,
+    frame_ms: int = 30,
+    quiet_ms: int = 300
+) -> List[int]:
+    """Choose chunk boundaries at the quietest point near each target length.
+
+    For every multiple of ``chunk_seconds`` the window of +/- ``search_seconds``
+    around it is scanned for the stretch of ``quiet_ms`` with the lowest
+    mean energy, and the boundary is placed in its middle. This keeps
+    cuts in pauses between utterances rather than mid-word.
+
+    Args:
+        audio: Mono samples at SAMPLE_RATE
+        chunk_seconds: Target chunk length
+        search_seconds: How far from the target a boundary may move
+        frame_ms: Energy frame length
+        quiet_ms: Length of the quiet stretch to look for
+
+    Returns:
+        Sorted sample offsets of the boundaries (excluding 0 and len(audio))
+    """
+    energy = frame_energy_db(audio, frame_ms)
+    if len(energy) == 0:
+        return []
+
+    frame_len = SAMPLE_RATE * frame_ms // 1000
+    frames_per_chunk = max(int(chunk_seconds * 1000 / frame_ms), 1)
+    search = int(search_seconds * 1000 / frame_ms)
+    quiet = max(quiet_ms // frame_ms, 1)
+
+    # Moving average of energy over the quiet window
+    smoothed = np.convolve(energy, np.ones(quiet) / quiet, mode="same")
+
+    splits = []
+    target = frames_per_chunk
+    last = 0
+    while target < len(energy) - frames_per_chunk // 4:
+        lo = max(target - search, last + 1)
+        hi = min(target + search, len(energy) - 1)
+        if hi <= lo:
+            break
+        best = lo + int(np.argmin(smoothed[lo:hi]))
+        splits.append(best * frame_len)
+        last = best
+        target = best + frames_per_chunk
+
+    return splits
+
+
+def plan_chunks(n_samples: int, split_points: List[int], overlap_samples: int) -> List[AudioChunk]:
+    """Turn boundaries into overlapping chunks.
+
+    Args:
+        n_samples: Total number of samples
+        split_points: Boundaries from find_split_points
+        overlap_samples: Extra context added on each side of a boundary
+
+    Returns:
+        Chunks in timeline order
+    """
+    bounds = [0] + list(split_points) + [n_samples]
+    chunks = []
+    for i in range(len(bounds) - 1):
+        keep_start, keep_end = bounds[i], bounds[i + 1]
+        chunks.append(AudioChunk(
+            index=i,
+            start=max(keep_start - overlap_samples, 0),
+            end=min(keep_end + overlap_samples, n_samples),
+            keep_start=keep_start,
+            keep_end=keep_end
+        ))
+    return chunks
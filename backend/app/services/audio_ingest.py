@@ -0,0 +1,199 @@
+"""Ingest stage: decode each recording once to 16 kHz mono PCM.
+
+Whisper consumes 16 kHz mono samples, and decoding an upload through
+ffmpeg used to happen again on every transcription. Ingest runs ffmpeg
+once and stores raw little-endian int16 samples named after the audio
+hash; transcription then memory-maps that file instead of decoding.
+Mapped files live in the OS page cache, so workers transcribing the
+same recording share its pages and each converts only the window it
+is working on to float32.
+The same ffmpeg pass can also re-encode lossless uploads (WAV, FLAC)
+to Opus, which is roughly ten times smaller, and drop the original.
+"""
+import logging
+import os
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from .audio import SAMPLE_RATE, load_audio
+from .metrics import get_metrics
+from .transcript_cache import compute_audio_hash
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PCM_DTYPE = "<i2"
+PCM_BYTES_PER_SAMPLE = 2
+
+# Re-encoding already-compressed uploads would lose quality for little gain
+ARCHIVE_SOURCE_EXTENSIONS = {".wav", ".flac"}
+
+
+@dataclass
+class IngestResult:
+    """Outcome of ingesting one recording."""
+    pcm_path: str
+    duration_seconds: float
+    archive_path: Optional[str] = None
+
+
+def pcm_path_for(audio_hash: str) -> Path:
+    """Location of the decoded samples of an audio file.
+
+    Args:
+        audio_hash: SHA-256 of the original audio file
+
+    Returns:
+        Path of the raw PCM file (may not exist yet)
+    """
+    return Path(settings.audio_pcm_dir) / f"{audio_hash}.pcm"
+
+
+def pcm_duration(path: Path) -> float:
+    """Duration in seconds of a raw PCM file."""
+    return os.path.getsize(path) / PCM_BYTES_PER_SAMPLE / SAMPLE_RATE
+
+
+def open_pcm(path: Path) -> np.ndarray:
+    """Memory-map decoded samples without reading them.
+
+    Args:
+        path: Raw PCM file written by ingest_audio
+
+    Returns:
+        Read-only 1-D int16 array backed by the file (see audio.to_float32)
+    """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(path, dtype=PCM_DTYPE, mode="r")
+
+
+def open_decoded_audio(audio_path: str, audio_hash: Optional[str] = None) -> Tuple[np.ndarray, Optional[Path]]:
+    """Samples of a recording, mapped from its ingested PCM when available.
+
+    Args:
+        audio_path: Original audio file (decoded with ffmpeg as a fallback)
+        audio_hash: SHA-256 of the original file, if known
+
+    Returns:
+        (samples, pcm_path): an int16 memmap and its file for ingested
+        recordings, otherwise float32 samples from ffmpeg and None
+    """
+    if audio_hash:
+        path = pcm_path_for(audio_hash)
+        if path.exists():
+            return open_pcm(path), path
+    return load_audio(audio_path), None
+
+
+def ingest_audio(audio_path: str, audio_hash: str, archive: Optional[bool] = None) -> IngestResult:
+    """Decode an audio file to PCM, optionally archiving it as Opus.
+
+    Both outputs come from a single ffmpeg run, with the same resampling
+    options as whisper.load_audio, so transcripts do not change.
+
+    Args:
+        audio_path: Original audio file
+        audio_hash: SHA-256 of the original file (names the PCM file)
+        archive: Re-encode WAV/FLAC originals to Opus (defaults to settings.audio_archive_opus)
+
+    Returns:
+        IngestResult; ``archive_path`` is set when an Opus copy was written
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    if archive is None:
+        archive = settings.audio_archive_opus
+    archive = archive and Path(audio_path).suffix.lower() in ARCHIVE_SOURCE_EXTENSIONS
+
+    pcm_path = pcm_path_for(audio_hash)
+    pcm_path.parent.mkdir(parents=True, exist_ok=True)
+    # Temporary names: concurrent workers never see a half-written file
+    tmp_pcm = pcm_path.with_name(f"{pcm_path.name}.{uuid.uuid4().hex}.tmp")
+    archive_path = Path(audio_path).with_suffix(".ogg")
+    tmp_archive = archive_path.with_name(f"{archive_path.stem}.{uuid.uuid4().hex}.tmp.ogg")
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-threads", "0",
+        "-i", audio_path,
+        "-map", "0:a:0", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", str(tmp_pcm),
+    ]
+    if archive:
+        cmd += [
+            "-map", "0:a:0", "-ac", "1",
+            "-c:a", "libopus", "-b:a", settings.audio_archive_bitrate, "-application", "voip",
+            str(tmp_archive),
+        ]
+
+    try:
+        start_time = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        get_metrics().decode_seconds.observe(time.perf_counter() - start_time)
+        os.replace(tmp_pcm, pcm_path)
+        if archive:
+            os.replace(tmp_archive, archive_path)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg is not installed")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace').strip()}")
+    finally:
+        tmp_pcm.unlink(missing_ok=True)
+        tmp_archive.unlink(missing_ok=True)
+
+    result = IngestResult(
+        pcm_path=str(pcm_path),
+        duration_seconds=pcm_duration(pcm_path),
+        archive_path=str(archive_path) if archive else None
+    )
+    logger.info(
+        f"Ingested {audio_path}: {result.duration_seconds:.1f}s of audio"
+        + (f", archived as {archive_path.name}" if archive else "")
+    )
+    return result
+
+
+def ingest_recording(db, recording, commit: Optional[Callable[[], None]] = None) -> IngestResult:
+    """Run the ingest stage for a recording and update its row.
+
+    Sets the audio hash (if missing) and the real duration. When the
+    original was archived to Opus, the recording points to the archive
+    and the original file is deleted after the commit.
+
+    Args:
+        db: Database session
+        recording: Recording to ingest
+        commit: Commits the row update (defaults to ``db.commit``); the
+            original file is only deleted once it succeeded
+
+    Returns:
+        IngestResult
+    """
+    if not recording.audio_sha256:
+        recording.audio_sha256 = compute_audio_hash(recording.audio_file_path)
+
+    pcm_path = pcm_path_for(recording.audio_sha256)
+    if pcm_path.exists():
+        result = IngestResult(pcm_path=str(pcm_path), duration_seconds=pcm_duration(pcm_path))
+    else:
+        result = ingest_audio(recording.audio_file_path, recording.audio_sha256)
+
+    original_path = recording.audio_file_path
+    recording.duration_seconds = result.duration_seconds
+    if result.archive_path:
+        recording.audio_file_path = result.archive_path
+        recording.file_size = os.path.getsize(result.archive_path)
+    (commit or db.commit)()
+
+    if result.archive_path and original_path != result.archive_path:
+        Path(original_path).unlink(missing_ok=True)
+        logger.info(f"Replaced {original_path} with its Opus archive")
+    return result
@@ -0,0 +1,296 @@
+"""Streaming storage of uploaded audio.
+
+Uploads are written to disk in large chunks from a thread pool, so the
+event loop never blocks on file I/O. The same pass hashes the content,
+checks the container header and works out the duration.
+"""
+import hashlib
+import os
+import struct
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB writes: few syscalls, page aligned
+HEADER_BYTES = 64 * 1024  # enough for WAV/FLAC/Ogg/MP3 headers
+
+# Sniffed container -> stored file extension
+AUDIO_FORMATS = {
+    "wav": ".wav",
+    "mp3": ".mp3",
+    "flac": ".flac",
+    "ogg": ".ogg",
+    "m4a": ".m4a",
+    "webm": ".webm",
+}
+
+# MPEG-1 Layer III bitrates (kbps) by header index
+_MP3_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0]
+
+
+class InvalidAudioError(ValueError):
+    """Raised when the content is not a recognized audio container."""
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the size limit."""
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """Identify the audio container from its first bytes.
+
+    Args:
+        header: Start of the file
+
+    Returns:
+        Format name (key of AUDIO_FORMATS) or None
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def _wav_duration(header: bytes, total_size: int) -> Optional[float]:
+    """Duration from the fmt and data chunks of a WAV header."""
+    pos = 12
+    byte_rate = None
+    while pos + 8 <= len(header):
+        chunk_id = header[pos:pos + 4]
+        (chunk_size,) = struct.unpack("<I", header[pos + 4:pos + 8])
+        if chunk_id == b"fmt " and pos + 20 <= len(header):
+            (byte_rate,) = struct.unpack("<I", header[pos + 16:pos + 20])
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF
+            data_size = chunk_size if 0 < chunk_size < 0xFFFFFFFF else total_size - pos - 8
+            return min(data_size, total_size - pos - 8) / byte_rate
+        pos += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _flac_duration(header: bytes) -> Optional[float]:
+    """Duration from the FLAC STREAMINFO block."""
+    if len(header) < 8 + 18 or header[4] & 0x7F != 0:
+        return None
+    (fields,) = struct.unpack(">Q", header[8 + 10:8 + 18])
+    sample_rate = fields >> 44
+    total_samples = fields & ((1 << 36) - 1)
+    return total_samples / sample_rate if sample_rate and total_samples else None
+
+
+def _mp3_duration(header: bytes, total_size: int) -> Optional[float]:
+    """Duration estimate from the first frame's bitrate (exact for CBR)."""
+    start = 0
+    if header[:3] == b"ID3" and len(header) >= 10:
+        size = header[6] << 21 | header[7] << 14 | header[8] << 7 | header[9]
+        start = 10 + size
+    for pos in range(start, len(header) - 4):
+        if header[pos] == 0xFF and header[pos + 1] & 0xE0 == 0xE0:
+            bitrate = _MP3_BITRATES[header[pos + 2] >> 4]
+            if bitrate:
+                return (total_size - pos) * 8 / (bitrate * 1000)
+    return None
+
+
+class AudioStreamInspector:
+    """Hashes, sniffs and measures an audio stream chunk by chunk."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.header = b""
+        self.audio_format: Optional[str] = None
+        # Ogg: last granule position and its clock
+        self._ogg_tail = b""
+        self._ogg_granule = 0
+        self._ogg_rate: Optional[int] = None
+        self._ogg_pre_skip = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Process the next chunk.
+
+        Raises:
+            InvalidAudioError: If the header is not a known audio container
+        """
+        self.digest.update(chunk)
+        self.size += len(chunk)
+
+        if len(self.header) < HEADER_BYTES:
+            self.header += chunk[:HEADER_BYTES - len(self.header)]
+            if self.audio_format is None and len(self.header) >= 12:
+                self.audio_format = sniff_audio_format(self.header)
+                if self.audio_format is None:
+                    raise InvalidAudioError("Not a recognized audio file")
+
+        if self.audio_format == "ogg":
+            self._scan_ogg(chunk)
+
+    def _scan_ogg(self, chunk: bytes) -> None:
+        """Track the granule position of the latest Ogg page."""
+        data = self._ogg_tail + chunk
+        pos = data.find(b"OggS")
+        while pos != -1 and pos + 27 <= len(data):
+            (granule,) = struct.unpack("<q", data[pos + 6:pos + 14])
+            if granule > 0:
+                self._ogg_granule = granule
+            if self._ogg_rate is None:
+                body = data[pos + 27 + data[pos + 26]:pos + 27 + data[pos + 26] + 20]
+                if body[:8] == b"OpusHead" and len(body) >= 12:
+                    self._ogg_rate = 48000  # Opus granules always count 48 kHz samples
+                    (self._ogg_pre_skip,) = struct.unpack("<H", body[10:12])
+                elif body[:7] == b"\x01vorbis" and len(body) >= 16:
+                    (self._ogg_rate,) = struct.unpack("<I", body[12:16])
+            pos = data.find(b"OggS", pos + 4)
+        self._ogg_tail = data[-64:]
+
+    @property
+    def sha256(self) -> str:
+        return self.digest.hexdigest()
+
+    def duration_seconds(self) -> Optional[float]:
+        """Duration of the stream, when the container allows it without decoding.
+
+        Returns:
+            Seconds, or None for containers needing a full parse (m4a, webm)
+        """
+        if self.audio_format == "wav":
+            return _wav_duration(self.header, self.size)
+        if self.audio_format == "flac":
+            return _flac_duration(self.header)
+        if self.audio_format == "mp3":
+            return _mp3_duration(self.header, self.size)
+        if self.audio_format == "ogg" and self._ogg_rate:
+            return max(self._ogg_granule - self._ogg_pre_skip, 0) / self._ogg_rate
+        return None
+
+
+@dataclass
+class StoredUpload:
+    """Result of storing an upload."""
+    path: str
+    size: int
+    sha256: str
+    audio_format: str
+    duration_seconds: Optional[float]
+
+
+async def rechunk(stream: AsyncIterator[bytes], chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Regroup an arbitrary byte stream into fixed-size chunks (last one shorter)."""
+    buffer = bytearray()
+    async for data in stream:
+        buffer += data
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _write_chunk(f, inspector: AudioStreamInspector, chunk: bytes) -> None:
+    """Inspect and write one chunk (runs in the thread pool)."""
+    inspector.feed(chunk)
+    f.write(chunk)
+
+
+async def store_audio_stream(
+    chunks: AsyncIterator[bytes],
+    directory: Path,
+    max_size: int
+) -> StoredUpload:
+    """Write an audio stream to ``directory`` under a unique name.
+
+    Args:
+        chunks: Audio bytes (ideally UPLOAD_CHUNK_SIZE pieces, see rechunk)
+        directory: Destination directory
+        max_size: Size limit in bytes
+
+    Returns:
+        StoredUpload with path, size, hash, format and duration
+
+    Raises:
+        InvalidAudioError: If the content is not audio
+        UploadTooLargeError: If the stream exceeds max_size
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    name = str(uuid.uuid4())
+    part_path = directory / f"{name}.part"
+    inspector = AudioStreamInspector()
+
+    f = await run_in_threadpool(open, part_path, "wb")
+    try:
+        async for chunk in chunks:
+            if inspector.size + len(chunk) > max_size:
+                raise UploadTooLargeError(f"File too large. Maximum size: {max_size / 1024 / 1024}MB")
+            await run_in_threadpool(_write_chunk, f, inspector, chunk)
+        await run_in_threadpool(f.close)
+
+        if inspector.audio_format is None:
+            raise InvalidAudioError("Not a recognized audio file")
+
+        final_path = directory / f"{name}{AUDIO_FORMATS[inspector.audio_format]}"
+        await run_in_threadpool(os.replace, part_path, final_path)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        part_path.unlink(missing_ok=True)
+        raise
+
+    return _stored_upload(final_path, inspector)
+
+
+def _inspect_file(path: Path, inspector: AudioStreamInspector) -> None:
+    """Feed a whole file to the inspector (runs in the thread pool)."""
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            inspector.feed(chunk)
+
+
+async def store_audio_file(source: Path, directory: Path) -> StoredUpload:
+    """Move a complete audio file into ``directory`` under a unique name.
+
+    The file is read once for the hash, header check and duration, then
+    renamed rather than copied (``source`` must be on the same filesystem).
+
+    Args:
+        source: File to adopt
+        directory: Destination directory
+
+    Returns:
+        StoredUpload with path, size, hash, format and duration
+
+    Raises:
+        InvalidAudioError: If the content is not audio
+    """
+    inspector = AudioStreamInspector()
+    await run_in_threadpool(_inspect_file, source, inspector)
+    if inspector.audio_format is None:
+        raise InvalidAudioError("Not a recognized audio file")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    final_path = directory / f"{uuid.uuid4()}{AUDIO_FORMATS[inspector.audio_format]}"
+    await run_in_threadpool(os.replace, source, final_path)
+    return _stored_upload(final_path, inspector)
+
+
+def _stored_upload(path: Path, inspector: AudioStreamInspector) -> StoredUpload:
+    """Build the result of a stored upload from its inspection."""
+    return StoredUpload(
+        path=str(path),
+        size=inspector.size,
+        sha256=inspector.sha256,
+        audio_format=inspector.audio_format,
+        duration_seconds=inspector.duration_seconds()
+    )
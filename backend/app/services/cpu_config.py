@@ -0,0 +1,167 @@
+"""CPU execution config: threads per inference process and core pinning.
+
+PyTorch, OpenMP, MKL and OpenBLAS each default to one thread per core.
+With several transcription processes on one machine every process
+starts that many threads, the processes fight over the same cores and
+throughput collapses. Each process is therefore given a thread budget
+(its share of the cores) and, optionally, its own disjoint set of cores.
+"""
+import logging
+import multiprocessing
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Read by the native thread pools when their library initializes
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+@dataclass
+class CpuPlan:
+    """Execution resources of one inference process."""
+    threads: int
+    cores: Optional[List[int]] = None  # None = not pinned
+
+
+def parse_cores(spec: str) -> List[int]:
+    """Parse a core list such as ``"0-3,8,10-11"``.
+
+    Args:
+        spec: Comma-separated core ids and inclusive ranges
+
+    Returns:
+        Sorted, de-duplicated core ids
+    """
+    cores = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cores.update(range(int(first), int(last or first) + 1))
+    return sorted(cores)
+
+
+def available_cores() -> List[int]:
+    """Cores this process may run on, restricted to settings.cpu_cores if set."""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    if settings.cpu_cores:
+        allowed = set(parse_cores(settings.cpu_cores))
+        cores = [core for core in cores if core in allowed] or cores
+    return cores
+
+
+def plan_cpu(
+    workers: int,
+    slot: int,
+    threads: Optional[int] = None,
+    pin: Optional[bool] = None,
+    cores: Optional[List[int]] = None
+) -> CpuPlan:
+    """Work out the threads and cores of one process among ``workers``.
+
+    Args:
+        workers: Processes sharing the machine (or the parent's cores)
+        slot: Index of this process among them
+        threads: Threads per process (defaults to settings.cpu_threads_per_worker,
+            then to an equal share of the cores)
+        pin: Pin the process to its own cores (defaults to settings.cpu_pin_workers)
+        cores: Cores to share (defaults to available_cores())
+
+    Returns:
+        CpuPlan for the process. Pinned slots get consecutive cores; when
+        workers x threads exceeds the cores, slots wrap around and share.
+    """
+    cores = cores or available_cores()
+    workers = max(workers, 1)
+    threads = threads or settings.cpu_threads_per_worker or max(len(cores) // workers, 1)
+    pin = settings.cpu_pin_workers if pin is None else pin
+    if not pin:
+        return CpuPlan(threads=threads)
+
+    first = (slot * threads) % len(cores)
+    assigned = [cores[(first + i) % len(cores)] for i in range(min(threads, len(cores)))]
+    return CpuPlan(threads=threads, cores=sorted(assigned))
+
+
+# Plan applied to this process (None until apply_cpu_plan is called)
+_applied_plan: Optional[CpuPlan] = None
+
+
+def apply_cpu_plan(plan: CpuPlan) -> None:
+    """Apply a plan to the current process.
+
+    Call it before models are loaded: the thread variables only affect
+    native libraries initialized afterwards (torch and CTranslate2 are
+    imported on first model load), and ``inference_threads`` tells the
+    model loaders what to configure explicitly.
+
+    Args:
+        plan: Threads and optional cores for this process
+    """
+    global _applied_plan
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(plan.threads)
+    if plan.cores is not None:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, plan.cores)
+        else:
+            logger.warning("Core pinning is not supported on this platform")
+    _applied_plan = plan
+    logger.info(
+        f"CPU plan: {plan.threads} threads"
+        + (f", pinned to cores {plan.cores}" if plan.cores is not None else "")
+    )
+
+
+def inference_threads() -> int:
+    """Threads model loaders should use in this process (0 = library default)."""
+    if _applied_plan is not None:
+        return _applied_plan.threads
+    return settings.cpu_threads_per_worker
+
+
+def slot_counter(context=None):
+    """Shared counter handing out pool slots.
+
+    Pass it in the pool's ``initargs`` and call take_pool_slot from the
+    initializer: every process of the pool gets its own slot, also when
+    the pool is started from a process that is itself a pool worker.
+
+    Args:
+        context: Multiprocessing context of the pool (defaults to the global one)
+
+    Returns:
+        Synchronized integer starting at 0
+    """
+    return (context or multiprocessing).Value("i", 0)
+
+
+def take_pool_slot(counter, workers: int) -> int:
+    """Claim the next slot of a pool (call from its initializer).
+
+    Args:
+        counter: Counter from slot_counter, received through initargs
+        workers: Pool size (slots wrap around beyond it)
+
+    Returns:
+        Slot index in [0, workers)
+    """
+    with counter.get_lock():
+        slot = counter.value % max(workers, 1)
+        counter.value += 1
+    return slot
@@ -0,0 +1,379 @@
+"""Persistent job queue with claim/lease semantics backed by the database."""
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..database import SessionLocal
+from ..models.job import Job
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Job stages
+STAGE_TRANSCRIPTION = "transcription"
+STAGE_NOTE_GENERATION = "note_generation"
+JOB_STAGES = (STAGE_TRANSCRIPTION, STAGE_NOTE_GENERATION)
+
+# Job statuses
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class JobQueue:
+    """Database-backed queue shared by the API and the worker processes.
+
+    Jobs are claimed with a conditional UPDATE so that several worker
+    processes (or hosts) can poll the same table without double-processing.
+    A claim grants a time-limited lease; a worker that dies without
+    completing its job simply lets the lease expire and the job becomes
+    claimable again.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        backoff_max_seconds: Optional[float] = None
+    ):
+        """Initialize job queue.
+
+        Args:
+            session_factory: Callable returning a new database session
+            lease_seconds: Lease duration granted on claim
+            max_attempts: Default attempt budget for new jobs
+            backoff_seconds: Base delay before retrying a failed job
+            backoff_max_seconds: Upper bound on the retry delay
+        """
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else settings.job_retry_backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds or settings.job_retry_backoff_max_seconds
+
+    def enqueue(
+        self,
+        db: Session,
+        recording_id: int,
+        stage: str,
+        max_attempts: Optional[int] = None
+    ) -> Job:
+        """Add a job to the queue.
+
+        The job is added to the caller's session; it becomes visible to
+        workers once the caller commits.
+
+        Args:
+            db: Database session
+            recording_id: Recording to process
+            stage: Job stage (transcription or note_generation)
+            max_attempts: Attempt budget (defaults to settings.job_max_attempts)
+
+        Returns:
+            Pending job
+        """
+        if stage not in JOB_STAGES:
+            raise ValueError(f"Unknown job stage: {stage}")
+
+        job = Job(
+            recording_id=recording_id,
+            stage=stage,
+            status=JOB_QUEUED,
+            attempts=0,
+            max_attempts=max_attempts or self.max_attempts,
+            available_at=datetime.utcnow()
+        )
+        db.add(job)
+        logger.info(f"Enqueued {stage} job for recording {recording_id}")
+        return job
+
+    def enqueue_or_reuse(self, db: Session, recording_id: int, stage: str) -> Job:
+        """Add a job unless one is already queued or running for the recording.
+
+        A pending job is returned instead: a second one would repeat the
+        work and race the first on its result.
+
+        Args:
+            db: Database session
+            recording_id: Recording to process
+            stage: Job stage (transcription or note_generation)
+
+        Returns:
+            Pending job, new or existing
+        """
+        job = (
+            db.query(Job)
+            .filter(
+                Job.recording_id == recording_id,
+                Job.stage == stage,
+                Job.status.in_((JOB_QUEUED, JOB_RUNNING))
+            )
+            .order_by(Job.id)
+            .first()
+        )
+        if job is None:
+            return self.enqueue(db, recording_id, stage)
+
+        logger.info(f"Reusing {job.status} {stage} job {job.id} for recording {recording_id}")
+        return job
+
+    def _claimable(self, now: datetime):
+        """SQL condition matching jobs a worker may claim at ``now``."""
+        return and_(
+            Job.attempts < Job.max_attempts,
+            or_(
+                and_(Job.status == JOB_QUEUED, Job.available_at <= now),
+                and_(Job.status == JOB_RUNNING, Job.lease_expires_at < now)
+            )
+        )
+
+    def claim(self, stage: str, worker_id: str) -> Optional[int]:
+        """Claim the oldest available job for a stage.
+
+        Args:
+            stage: Job stage to claim from
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            Claimed job ID, or None if nothing is available
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            candidates = (
+                db.query(Job.id)
+                .filter(Job.stage == stage, self._claimable(now))
+                .order_by(Job.available_at, Job.id)
+                .limit(5)
+                .all()
+            )
+
+            for (job_id,) in candidates:
+                # Conditional update: only one worker can win the race
+                result = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, self._claimable(now))
+                    .values(
+                        status=JOB_RUNNING,
+                        worker_id=worker_id,
+                        attempts=Job.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=now
+                    )
+                )
+                db.commit()
+                if result.rowcount == 1:
+                    logger.info(f"Worker {worker_id} claimed job {job_id} ({stage})")
+                    return job_id
+
+            return None
+        finally:
+            db.close()
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the lease on a running job.
+
+        Args:
+            job_id: Job ID
+            worker_id: Worker holding the lease
+
+        Returns:
+            False if the lease was lost (expired and reclaimed by another worker)
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            result = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == JOB_RUNNING)
+                .values(lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def hold_in_session(self, db: Session, job_id: int, worker_id: str) -> bool:
+        """Extend the lease on a running job within the caller's transaction.
+
+        Lets a worker commit intermediate progress only while it still
+        owns the job: the update matches nothing once the lease was
+        reclaimed, and the caller then rolls its changes back.
+
+        Args:
+            db: Session holding the progress (not committed here)
+            job_id: Job ID
+            worker_id: Worker holding the lease
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        now = datetime.utcnow()
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == JOB_RUNNING)
+            .values(lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+        )
+        return result.rowcount == 1
+
+    def complete_in_session(self, db: Session, job_id: int, worker_id: str) -> bool:
+        """Mark a job as succeeded within the caller's transaction.
+
+        Lets a worker commit its results and the job's completion
+        atomically: the update only matches while the job is still
+        running under this worker's lease, so a worker whose job was
+        reclaimed can roll its results back instead of committing them.
+
+        Args:
+            db: Session holding the job's results (not committed here)
+            job_id: Job ID
+            worker_id: Worker holding the lease
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        now = datetime.utcnow()
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == JOB_RUNNING)
+            .values(
+                status=JOB_SUCCEEDED,
+                lease_expires_at=None,
+                last_error=None,
+                finished_at=now,
+                updated_at=now
+            )
+        )
+        return result.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[bool]:
+        """Record a failed attempt and schedule a retry if attempts remain.
+
+        Args:
+            job_id: Job ID
+            worker_id: Worker holding the lease
+            error: Error message
+
+        Returns:
+            True if the job will be retried, False if it is permanently
+            failed, None if the lease was lost (the job is left untouched)
+        """
+        db = self.session_factory()
+        try:
+            job = (
+                db.query(Job)
+                .filter(Job.id == job_id, Job.worker_id == worker_id, Job.status == JOB_RUNNING)
+                .with_for_update()
+                .first()
+            )
+            if not job:
+                return None
+
+            now = datetime.utcnow()
+            job.last_error = error
+            job.lease_expires_at = None
+
+            if job.attempts < job.max_attempts:
+                delay = self.retry_delay(job.attempts)
+                job.status = JOB_QUEUED
+                job.available_at = now + timedelta(seconds=delay)
+                logger.warning(f"Job {job_id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay:.0f}s")
+                retry = True
+            else:
+                job.status = JOB_FAILED
+                job.finished_at = now
+                logger.error(f"Job {job_id} failed permanently after {job.attempts} attempts: {error}")
+                retry = False
+
+            db.commit()
+            return retry
+        finally:
+            db.close()
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt count.
+
+        Args:
+            attempts: Number of attempts already made
+
+        Returns:
+            Delay in seconds
+        """
+        delay = self.backoff_seconds * (2 ** max(attempts - 1, 0))
+        delay = min(delay, self.backoff_max_seconds)
+        return delay + random.uniform(0, self.backoff_seconds / 2)
+
+    def reap_exhausted(self) -> int:
+        """Fail running jobs whose lease expired with no attempts left.
+
+        Such jobs are no longer claimable, so without reaping they would
+        stay ``running`` forever after their worker crashed.
+
+        Returns:
+            Number of jobs marked as failed
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            result = db.execute(
+                update(Job)
+                .where(
+                    Job.status == JOB_RUNNING,
+                    Job.lease_expires_at < now,
+                    Job.attempts >= Job.max_attempts
+                )
+                .values(
+                    status=JOB_FAILED,
+                    last_error="Lease expired after final attempt",
+                    finished_at=now,
+                    updated_at=now
+                )
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    def queue_depth(self) -> Dict[str, Dict[str, int]]:
+        """Count jobs per stage and status.
+
+        Returns:
+            Dict of {stage: {status: count}}
+        """
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(Job.stage, Job.status, func.count(Job.id))
+                .group_by(Job.stage, Job.status)
+                .all()
+            )
+            depth = {stage: {} for stage in JOB_STAGES}
+            for stage, status, count in rows:
+                depth.setdefault(stage, {})[status] = count
+            return depth
+        finally:
+            db.close()
+
+
+# Singleton instance
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create job queue instance.
+
+    Returns:
+        JobQueue instance
+    """
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
@@ -0,0 +1,304 @@
+"""Incremental transcription of live audio streams.
+
+Audio arrives as small frames and accumulates in a ring buffer. Whisper
+runs on the uncommitted tail at regular intervals. While a speaker is
+talking the result is only a partial hypothesis. When a pause is
+detected (or the window fills up) the audio up to the pause is
+transcribed one last time, its segments become final and the buffer
+moves past them.
+"""
+import logging
+import wave
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config import get_settings
+from .audio import SAMPLE_RATE, frame_energy_db
+from .transcription import get_transcription_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+FORMAT_PCM16 = "pcm16"
+FORMAT_OPUS = "opus"
+FRAME_MS = 30
+
+
+class RingBuffer:
+    """Fixed-capacity sample buffer addressed by absolute sample index."""
+
+    def __init__(self, capacity: int):
+        """Initialize ring buffer.
+
+        Args:
+            capacity: Number of samples kept
+        """
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self.total = 0  # samples written since the start
+        self.start = 0  # oldest absolute index still available
+
+    def append(self, samples: np.ndarray) -> None:
+        """Write samples, overwriting the oldest ones when full."""
+        n = len(samples)
+        samples = samples[-self.capacity:]
+        pos = (self.total + n - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.total += n
+        self.start = max(self.start, self.total - self.capacity)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy samples [start, end) (absolute indices)."""
+        start = max(start, self.start)
+        end = min(end, self.total)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        indices = np.arange(start, end) % self.capacity
+        return self._data[indices]
+
+    def discard_before(self, index: int) -> None:
+        """Mark samples before ``index`` as no longer needed."""
+        self.start = min(max(self.start, index), self.total)
+
+
+class PCM16Decoder:
+    """Little-endian 16-bit mono PCM frames, resampled to 16 kHz."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+
+    def decode(self, frame: bytes) -> np.ndarray:
+        samples = np.frombuffer(frame[:len(frame) - len(frame) % 2], dtype="<i2").astype(np.float32) / 32768.0
+        if self.sample_rate == SAMPLE_RATE or len(samples) == 0:
+            return samples
+        n_out = int(round(len(samples) * SAMPLE_RATE / self.sample_rate))
+        positions = np.linspace(0, len(samples) - 1, n_out)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class OpusDecoder:
+    """Raw Opus packets (one per message), decoded directly at 16 kHz.
+
+    Requires the optional ``opuslib`` package and libopus.
+    """
+
+    def __init__(self):
+        try:
+            import opuslib
+        except ImportError:
+            raise RuntimeError("Opus frames require the opuslib package (pip install opuslib)")
+        self._decoder = opuslib.Decoder(SAMPLE_RATE, 1)
+        self._frame_size = SAMPLE_RATE * 120 // 1000  # largest Opus frame (120 ms)
+
+    def decode(self, frame: bytes) -> np.ndarray:
+        pcm = self._decoder.decode(frame, self._frame_size)
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def create_decoder(audio_format: str, sample_rate: int = SAMPLE_RATE):
+    """Build a frame decoder.
+
+    Args:
+        audio_format: 'pcm16' or 'opus'
+        sample_rate: Input rate of PCM frames
+
+    Returns:
+        Object with a ``decode(bytes) -> np.ndarray`` method
+    """
+    if audio_format == FORMAT_PCM16:
+        return PCM16Decoder(sample_rate)
+    if audio_format == FORMAT_OPUS:
+        return OpusDecoder()
+    raise ValueError(f"Unsupported audio format: {audio_format}")
+
+
+def find_commit_point(
+    audio: np.ndarray,
+    silence_db: float,
+    min_silence_ms: int,
+    min_offset: int = 0
+) -> Optional[int]:
+    """Find the last pause in ``audio``, to commit everything before it.
+
+    Args:
+        audio: Uncommitted samples
+        silence_db: Frames below this energy (dBFS) count as silence
+        min_silence_ms: Minimum pause length
+        min_offset: Ignore pauses ending before this sample
+
+    Returns:
+        Sample offset in the middle of the last pause, or None
+    """
+    energy = frame_energy_db(audio, FRAME_MS)
+    frame_len = SAMPLE_RATE * FRAME_MS // 1000
+    needed = max(min_silence_ms // FRAME_MS, 1)
+
+    run_end = None
+    run = 0
+    # Scan backwards for the last run of silent frames long enough
+    for i in range(len(energy) - 1, -1, -1):
+        if energy[i] < silence_db:
+            if run == 0:
+                run_end = i + 1
+            run += 1
+            if run >= needed and i > 0:
+                # Extend to the start of the pause
+                start = i
+                while start > 0 and energy[start - 1] < silence_db:
+                    start -= 1
+                point = (start + run_end) // 2 * frame_len
+                return point if point >= min_offset else None
+        else:
+            run = 0
+    return None
+
+
+@dataclass
+class LiveTranscript:
+    """Committed segments of a live session."""
+    segments: List[Dict] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(s["text"] for s in self.segments).strip()
+
+
+class LiveTranscriber:
+    """Sliding-window Whisper transcription with VAD-gated commits."""
+
+    def __init__(
+        self,
+        language: str = "en",
+        model_size: Optional[str] = None,
+        window_seconds: Optional[float] = None,
+        step_seconds: Optional[float] = None
+    ):
+        """Initialize live transcriber.
+
+        Args:
+            language: Language code
+            model_size: Whisper model (defaults to settings.live_whisper_model or whisper_model)
+            window_seconds: Longest uncommitted span before a forced commit
+            step_seconds: New audio needed before the next Whisper pass
+        """
+        self.language = language
+        self.service = get_transcription_service(model_size or settings.live_whisper_model or None)
+        self.window = int((window_seconds or settings.live_window_seconds) * SAMPLE_RATE)
+        self.step = int((step_seconds or settings.live_step_seconds) * SAMPLE_RATE)
+        self.buffer = RingBuffer(self.window * 2)
+        self.committed = 0  # absolute sample index up to which text is final
+        self.last_pass = 0  # buffer.total at the previous Whisper pass
+        self.transcript = LiveTranscript()
+
+    def append(self, samples: np.ndarray) -> None:
+        """Add decoded samples."""
+        self.buffer.append(samples)
+
+    def ready(self) -> bool:
+        """Whether enough new audio arrived for another pass."""
+        return self.buffer.total - self.last_pass >= self.step
+
+    def step_once(self) -> List[Dict]:
+        """Run one incremental pass (blocking, call from a worker thread).
+
+        Returns:
+            Events: {'type': 'final', 'segments', 'text'} and/or
+            {'type': 'partial', 'text', 'start', 'end'}
+        """
+        total = self.buffer.total
+        self.last_pass = total
+        if self.buffer.start > self.committed:
+            # Whisper fell behind by more than the buffer holds; the WAV still has it all
+            logger.warning(f"Live transcription dropped {(self.buffer.start - self.committed) / SAMPLE_RATE:.1f}s of audio")
+            self.committed = self.buffer.start
+        pending = self.buffer.read(self.committed, total)
+        if len(pending) == 0:
+            return []
+
+        events = []
+        point = find_commit_point(
+            pending,
+            settings.live_silence_db,
+            settings.live_min_silence_ms,
+            min_offset=SAMPLE_RATE  # commit at least one second at a time
+        )
+        if point is None and len(pending) >= self.window:
+            point = self.window  # nobody paused: force a commit
+
+        if point is not None:
+            events.append(self._commit(pending[:point]))
+            pending = pending[point:]
+
+        if len(pending) >= SAMPLE_RATE // 2:
+            result = self.service.transcribe_samples(pending, self.language, initial_prompt=self._context())
+            text = result["text"].strip()
+            if text:
+                events.append({
+                    "type": "partial",
+                    "text": text,
+                    "start": self.committed / SAMPLE_RATE,
+                    "end": total / SAMPLE_RATE,
+                })
+        return events
+
+    def flush(self) -> Optional[Dict]:
+        """Commit all remaining audio (end of session).
+
+        Returns:
+            Final event, or None when nothing was pending
+        """
+        pending = self.buffer.read(self.committed, self.buffer.total)
+        if len(pending) < SAMPLE_RATE // 10:
+            return None
+        return self._commit(pending)
+
+    def _commit(self, audio: np.ndarray) -> Dict:
+        """Transcribe audio starting at ``self.committed`` as final text."""
+        offset = self.committed / SAMPLE_RATE
+        result = self.service.transcribe_samples(audio, self.language, initial_prompt=self._context())
+        segments = [
+            {
+                "start": offset + s["start"],
+                "end": offset + s["end"],
+                "text": s["text"].strip(),
+            }
+            for s in result.get("segments", [])
+            if s["text"].strip()
+        ]
+        self.transcript.segments.extend(segments)
+        self.committed += len(audio)
+        self.buffer.discard_before(self.committed)
+        return {"type": "final", "segments": segments, "text": " ".join(s["text"] for s in segments)}
+
+    def _context(self) -> Optional[str]:
+        """Tail of the committed text, passed as Whisper's prompt."""
+        text = self.transcript.text
+        return text[-200:] if text else None
+
+
+class WavWriter:
+    """Appends 16 kHz mono samples to a 16-bit WAV file as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(SAMPLE_RATE)
+        self.samples = 0
+
+    def write(self, samples: np.ndarray) -> None:
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+        self._wav.writeframes(pcm.tobytes())
+        self.samples += len(samples)
+
+    def close(self) -> None:
+        self._wav.close()
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.samples / SAMPLE_RATE
@@ -0,0 +1,255 @@
+"""Response cache for LLM completions (in-memory and SQLite backends)."""
+import abc
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ResponseCache(abc.ABC):
+    """Base class for LLM response caches.
+
+    Keys cover everything that determines a completion: model, system
+    prompt, user prompt and sampling options. Entries expire after
+    ``ttl_seconds`` and the least recently used ones are evicted beyond
+    ``max_entries``.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        """Initialize response cache.
+
+        Args:
+            ttl_seconds: Entry lifetime (0 disables expiry)
+            max_entries: Maximum number of entries kept
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: Optional[str],
+        prompt: str,
+        options: Dict[str, Any],
+        format: Optional[Any] = None
+    ) -> str:
+        """Build a cache key for a completion request.
+
+        Args:
+            model: Model name
+            system_prompt: System prompt (or None)
+            prompt: User prompt
+            options: Sampling options sent to the model
+            format: Structured output format ("json" or a JSON schema), if any
+
+        Returns:
+            Hex cache key
+        """
+        request = {"model": model, "system": system_prompt, "prompt": prompt, "options": options}
+        if format is not None:
+            request["format"] = format
+        payload = json.dumps(
+            request,
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        """Whether an entry created at ``created_at`` is past its TTL."""
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def _record(self, hit: bool) -> None:
+        """Update hit/miss counters."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response (None on miss or expiry)."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for this process.
+
+        Returns:
+            Dict with hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Process-local LRU cache."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self._record(entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache persisted in a SQLite file, shared across processes and restarts."""
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        """Initialize SQLite cache.
+
+        Args:
+            path: Database file path
+            ttl_seconds: Entry lifetime (0 disables expiry)
+            max_entries: Maximum number of entries kept
+        """
+        super().__init__(ttl_seconds, max_entries)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1]):
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                value = json.loads(row[0])
+        self._record(value is not None)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), now, now)
+            )
+            # Evict least recently used entries beyond the limit
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                " SELECT key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+
+def create_response_cache(
+    backend: str,
+    path: Optional[str] = None,
+    ttl_seconds: int = 0,
+    max_entries: int = 1000
+) -> Optional[ResponseCache]:
+    """Build a response cache from its backend name.
+
+    Args:
+        backend: 'sqlite', 'memory' or 'none'
+        path: SQLite file path (sqlite backend only)
+        ttl_seconds: Entry lifetime (0 disables expiry)
+        max_entries: Maximum number of entries kept
+
+    Returns:
+        Cache instance, or None when caching is disabled
+    """
+    backend = (backend or "none").lower()
+    if backend == "sqlite":
+        return SQLiteResponseCache(path, ttl_seconds, max_entries)
+    if backend == "memory":
+        return InMemoryResponseCache(ttl_seconds, max_entries)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+_response_cache_initialized = False
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get or create the configured response cache.
+
+    Returns:
+        ResponseCache instance, or None when settings.llm_cache_backend is 'none'
+    """
+    global _response_cache, _response_cache_initialized
+    if not _response_cache_initialized:
+        _response_cache = create_response_cache(
+            settings.llm_cache_backend,
+            path=settings.llm_cache_path,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_entries=settings.llm_cache_max_entries
+        )
+        _response_cache_initialized = True
+    return _response_cache
@@ -1,12 +1,34 @@
 """Medical note generation service using local Llama/Mistral."""
+import asyncio
 import json
 import logging
 import time
-from typing import Dict, Optional, List
+from concurrent.futures import as_completed
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
 
-from .ollama_service import get_ollama_service
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.medical_note import MedicalNote
+from ..schemas.medical_note import SOAPNoteOutput
+from ..utils.json_stream import SchemaViolation, StreamingSchemaValidator
+from ..utils.tokens import estimate_tokens
+from .metrics import get_metrics
+from .ollama_service import get_ollama_service, get_async_ollama_service, get_client_loop
+from .soap_map_reduce import (
+    FACTS_SCHEMA,
+    MAP_SYSTEM_PROMPT,
+    build_map_prompt,
+    build_reduce_prompt,
+    chunk_transcript,
+    merge_facts,
+    validate_facts,
+    single_pass_fits,
+)
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 MEDICAL_SCRIBE_SYSTEM_PROMPT = """You are an expert medical scribe assistant. Your role is to convert doctor-patient conversations into structured, professional medical notes.
@@ -29,24 +51,82 @@ Output Format: JSON with these fields:
 - medications: List of medications discussed (empty list if none)"""
 
 
+# JSON schema passed to Ollama to constrain SOAP note decoding
+SOAP_NOTE_SCHEMA = SOAPNoteOutput.model_json_schema()
+
+
+ENTITY_EXTRACTION_SYSTEM_PROMPT = """Extract medical entities from the conversation given by the user.
+
+List:
+1. Symptoms mentioned
+2. Medications discussed
+3. Allergies mentioned
+4. Medical conditions
+
+Format as JSON with keys: symptoms, medications, allergies, conditions"""
+
+
+class StructuredOutputStats:
+    """Schema validity of generated SOAP notes, across the API and worker processes.
+    
+    Counts live in the scribe_soap_attempts_total counter of the metrics
+    registry, whose snapshots merge the notes generated by every process.
+    """
+    
+    def record(self, attempts: int, valid: bool) -> None:
+        """Count one generated note.
+        
+        Args:
+            attempts: LLM calls made for the note
+            valid: Whether the last call matched the schema
+        """
+        get_metrics().soap_attempts.inc(attempt=attempts, valid=str(valid).lower())
+    
+    def stats(self) -> Dict[str, float]:
+        """Return counters and the first-attempt success rate.
+        
+        Returns:
+            Dict with notes, first_attempt, retried, fallbacks and first_attempt_rate
+        """
+        counts = {"notes": 0, "first_attempt": 0, "retried": 0, "fallbacks": 0}
+        attempts = get_metrics().merged_snapshot().get("scribe_soap_attempts_total", {"values": []})
+        for (attempt, valid), value in attempts["values"]:
+            value = int(value)
+            counts["notes"] += value
+            if valid == "true" and attempt == "1":
+                counts["first_attempt"] += value
+            elif valid == "true":
+                counts["retried"] += value
+            else:
+                counts["fallbacks"] += value
+        notes = counts["notes"]
+        return {**counts, "first_attempt_rate": counts["first_attempt"] / notes if notes else 0.0}
+
+
+structured_output_stats = StructuredOutputStats()
+
+
 class MedicalNoteService:
     """Service for generating medical notes from transcripts."""
     
     def __init__(self):
         """Initialize medical note service."""
         self.ollama = get_ollama_service()
+        self.async_ollama = get_async_ollama_service()
         logger.info("Medical note service initialized")
     
     def generate_soap_note(
         self,
         transcript: str,
-        patient_context: Optional[Dict] = None
+        patient_context: Optional[Dict] = None,
+        force_regenerate: bool = False
     ) -> Dict[str, any]:
         """Generate SOAP note from transcript.
         
         Args:
             transcript: Transcribed conversation
             patient_context: Optional patient context (age, gender, etc.)
+            force_regenerate: Bypass the LLM response cache
             
         Returns:
             Dict with SOAP note and metadata
@@ -54,36 +134,478 @@ class MedicalNoteService:
         try:
             start_time = time.time()
             
-            # Build prompt
-            prompt = self._build_soap_prompt(transcript, patient_context)
+            request = self._soap_request(transcript, patient_context, force_regenerate)
+            
+            if not self._fits_single_pass(request):
+                # Run the whole map-reduce on the client loop so the map calls overlap
+                return get_client_loop().submit(
+                    self._amap_reduce_soap(transcript, patient_context, force_regenerate, start_time)
+                ).result()
             
             logger.info("Generating SOAP note with Llama/Mistral")
             
-            # Generate with Ollama
-            response = self.ollama.generate(
-                prompt=prompt,
-                system_prompt=MEDICAL_SCRIBE_SYSTEM_PROMPT,
-                temperature=0.3,  # Lower temperature for consistency
-                max_tokens=1500
+            # Generate with Ollama (retries run on the client loop too)
+            response, soap_note = get_client_loop().submit(self._agenerate_validated(request)).result()
+            
+            return self._soap_result(response, start_time, soap_note)
+            
+        except Exception as e:
+            logger.error(f"SOAP note generation failed: {e}")
+            raise Exception(f"Failed to generate SOAP note: {str(e)}")
+    
+    async def agenerate_soap_note(
+        self,
+        transcript: str,
+        patient_context: Optional[Dict] = None,
+        force_regenerate: bool = False
+    ) -> Dict[str, any]:
+        """Generate SOAP note without blocking the event loop.
+        
+        Same as generate_soap_note, for async route handlers.
+        
+        Args:
+            transcript: Transcribed conversation
+            patient_context: Optional patient context (age, gender, etc.)
+            force_regenerate: Bypass the LLM response cache
+            
+        Returns:
+            Dict with SOAP note and metadata
+        """
+        try:
+            start_time = time.time()
+            
+            request = self._soap_request(transcript, patient_context, force_regenerate)
+            
+            if not self._fits_single_pass(request):
+                return await self._amap_reduce_soap(transcript, patient_context, force_regenerate, start_time)
+            
+            logger.info("Generating SOAP note with Llama/Mistral (async)")
+            
+            response, soap_note = await self._agenerate_validated(request)
+            
+            return self._soap_result(response, start_time, soap_note)
+            
+        except Exception as e:
+            logger.error(f"SOAP note generation failed: {e}")
+            raise Exception(f"Failed to generate SOAP note: {str(e)}")
+    
+    def _soap_request(
+        self,
+        transcript: str,
+        patient_context: Optional[Dict],
+        force_regenerate: bool
+    ) -> Dict[str, any]:
+        """Build the Ollama request arguments for a SOAP note.
+        
+        Args:
+            transcript: Conversation transcript
+            patient_context: Optional patient information
+            force_regenerate: Bypass the LLM response cache
+            
+        Returns:
+            Keyword arguments for OllamaService.generate
+        """
+        request = {
+            "prompt": self._build_soap_prompt(transcript, patient_context),
+            "system_prompt": MEDICAL_SCRIBE_SYSTEM_PROMPT,
+            "temperature": 0.3,  # Lower temperature for consistency
+            "max_tokens": 1500,
+            "use_cache": not force_regenerate,
+        }
+        if settings.soap_structured_output:
+            request["format"] = SOAP_NOTE_SCHEMA
+        return request
+    
+    async def _agenerate_until_valid(
+        self,
+        request: Dict[str, any],
+        validate: Callable[[str], Optional[Dict[str, any]]],
+        what: str
+    ) -> Tuple[Dict[str, any], Optional[Dict[str, any]]]:
+        """Run a request until ``validate`` accepts the answer.
+        
+        Up to settings.soap_max_attempts calls are made; retries bypass the
+        response cache, and rejected answers are never cached. Token counts
+        of the returned response cover all attempts.
+        
+        Args:
+            request: Keyword arguments for OllamaService.generate
+            validate: Returns the parsed answer, or None if it is invalid
+            what: Name of the answer, for logs
+            
+        Returns:
+            Tuple of (last Ollama response with 'attempts', parsed answer or None)
+        """
+        prompt_tokens = completion_tokens = 0
+        for attempt in range(1, settings.soap_max_attempts + 1):
+            response = await self.async_ollama.generate(
+                **{**request, "use_cache": request["use_cache"] and attempt == 1},
+                validate=lambda text: validate(text) is not None
             )
+            prompt_tokens += response.get('prompt_eval_count') or 0
+            completion_tokens += response.get('eval_count') or 0
+            response = {
+                **response,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": completion_tokens,
+                "attempts": attempt,
+            }
+            
+            parsed = validate(response['response'])
+            if parsed is not None:
+                return response, parsed
+            logger.warning(f"{what} attempt {attempt} does not match the schema")
+        
+        return response, None
+    
+    async def _agenerate_validated(self, request: Dict[str, any]) -> Tuple[Dict[str, any], Dict[str, any]]:
+        """Run a SOAP request until the answer matches SOAPNoteOutput.
+        
+        See _agenerate_until_valid. When every attempt fails validation,
+        the last answer goes through the lenient _parse_soap_response fallback.
+        
+        Args:
+            request: Keyword arguments for OllamaService.generate
             
-            generation_time = time.time() - start_time
+        Returns:
+            Tuple of (last Ollama response, parsed SOAP note)
+        """
+        response, soap_note = await self._agenerate_until_valid(request, self._validate_soap_response, "SOAP note")
+        if soap_note is not None:
+            structured_output_stats.record(response["attempts"], valid=True)
+            return response, soap_note
+        
+        structured_output_stats.record(response["attempts"], valid=False)
+        logger.warning(f"Falling back to lenient SOAP parsing ({structured_output_stats.stats()})")
+        return response, self._parse_soap_response(response['response'])
+    
+    def _validate_soap_response(self, response: str) -> Optional[Dict[str, any]]:
+        """Validate an LLM answer against SOAPNoteOutput.
+        
+        Args:
+            response: Raw LLM response
             
-            # Parse response
+        Returns:
+            SOAP note dict, or None if the answer does not match the schema
+        """
+        start_idx = response.find('{')
+        end_idx = response.rfind('}') + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            return None
+        try:
+            return SOAPNoteOutput.model_validate_json(response[start_idx:end_idx]).model_dump()
+        except ValidationError:
+            return None
+    
+    def _fits_single_pass(self, request: Dict[str, any]) -> bool:
+        """Whether a SOAP request fits the model context without truncation."""
+        return single_pass_fits(request["prompt"], request["system_prompt"], request["max_tokens"])
+    
+    def _map_request(
+        self,
+        chunk: str,
+        index: int,
+        total: int,
+        patient_context: Optional[Dict],
+        force_regenerate: bool
+    ) -> Dict[str, any]:
+        """Build the Ollama request extracting partial facts from one chunk."""
+        request = {
+            "prompt": build_map_prompt(chunk, index, total, patient_context),
+            "system_prompt": MAP_SYSTEM_PROMPT,
+            "temperature": 0.2,
+            "max_tokens": 600,
+            "use_cache": not force_regenerate,
+        }
+        if settings.soap_structured_output:
+            request["format"] = FACTS_SCHEMA
+        return request
+    
+    def _reduce_request(
+        self,
+        partials: List[Dict[str, List[str]]],
+        patient_context: Optional[Dict],
+        force_regenerate: bool
+    ) -> Dict[str, any]:
+        """Build the Ollama request merging partial facts into the SOAP note.
+        
+        When the per-chunk facts are too long to merge in one prompt, their
+        de-duplicated union is sent instead.
+        """
+        request = {
+            **self._soap_request("", patient_context, force_regenerate),
+            "prompt": build_reduce_prompt(partials, patient_context),
+        }
+        if len(partials) > 1 and not self._fits_single_pass(request):
+            logger.warning(f"Facts of {len(partials)} chunks exceed the context, merging them before reduce")
+            request["prompt"] = build_reduce_prompt([merge_facts(partials)], patient_context)
+        return request
+    
+    async def _amap_chunk(
+        self,
+        chunk: str,
+        index: int,
+        total: int,
+        patient_context: Optional[Dict],
+        force_regenerate: bool
+    ) -> Tuple[Dict[str, List[str]], Dict[str, any]]:
+        """Map step: extract the partial facts of one chunk.
+        
+        Answers are validated against the facts schema like SOAP notes
+        (_agenerate_until_valid). There is no lenient fallback: dropping an
+        excerpt's findings silently would corrupt the note, so the
+        generation fails instead.
+        
+        Returns:
+            Tuple of (partial facts, step metadata)
+            
+        Raises:
+            ValueError: If no attempt matches the facts schema
+        """
+        step_start = time.time()
+        response, facts = await self._agenerate_until_valid(
+            self._map_request(chunk, index, total, patient_context, force_regenerate),
+            validate_facts,
+            f"Map answer for chunk {index + 1}/{total}"
+        )
+        if facts is None:
+            raise ValueError(
+                f"Map answer for chunk {index + 1}/{total} does not match the facts schema "
+                f"after {response['attempts']} attempts"
+            )
+        step = self._step_metadata(
+            "map", response, time.time() - step_start,
+            chunk=index, attempts=response["attempts"], input_tokens_estimate=estimate_tokens(chunk)
+        )
+        return facts, step
+    
+    async def _amap_reduce_soap(
+        self,
+        transcript: str,
+        patient_context: Optional[Dict],
+        force_regenerate: bool,
+        start_time: float
+    ) -> Dict[str, any]:
+        """Generate a SOAP note too long for one prompt with map-reduce.
+        
+        The transcript is split into sentence-aligned chunks of
+        settings.soap_chunk_tokens, the chunks are mapped to partial facts
+        concurrently (bounded by the Ollama concurrency cap), and one
+        reduce call merges the facts into the note.
+        
+        Args:
+            transcript: Conversation transcript
+            patient_context: Optional patient information
+            force_regenerate: Bypass the LLM response cache
+            start_time: Generation start (time.time())
+            
+        Returns:
+            Same dict as generate_soap_note, plus ``map_reduce`` metadata
+        """
+        chunks = chunk_transcript(transcript, settings.soap_chunk_tokens)
+        logger.info(f"Transcript exceeds the context window, generating SOAP note from {len(chunks)} chunks")
+        
+        mapped = await asyncio.gather(*(
+            self._amap_chunk(chunk, i, len(chunks), patient_context, force_regenerate)
+            for i, chunk in enumerate(chunks)
+        ))
+        partials = [facts for facts, _ in mapped]
+        steps = [step for _, step in mapped]
+        
+        reduce_start = time.time()
+        response, soap_note = await self._agenerate_validated(
+            self._reduce_request(partials, patient_context, force_regenerate)
+        )
+        steps.append(self._step_metadata("reduce", response, time.time() - reduce_start, attempts=response["attempts"]))
+        
+        result = self._soap_result(response, start_time, soap_note)
+        return self._with_map_reduce(result, transcript, chunks, steps)
+    
+    def _step_metadata(self, step: str, response: Dict[str, any], seconds: float, **extra) -> Dict[str, any]:
+        """Metadata of one map or reduce call."""
+        return {
+            "step": step,
+            **extra,
+            "prompt_tokens": response.get('prompt_eval_count') or 0,
+            "completion_tokens": response.get('eval_count') or 0,
+            "seconds": round(seconds, 3),
+            "cached": bool(response.get('cached')),
+            "prompt_eval_saved_seconds_estimate": (response.get('prompt_cache') or {}).get('saved_seconds_estimate'),
+        }
+    
+    def _with_map_reduce(
+        self,
+        result: Dict[str, any],
+        transcript: str,
+        chunks: List[str],
+        steps: List[Dict[str, any]]
+    ) -> Dict[str, any]:
+        """Add map-reduce metadata to a SOAP result, with token counts summed over all calls."""
+        result["prompt_tokens"] = sum(step["prompt_tokens"] for step in steps)
+        result["completion_tokens"] = sum(step["completion_tokens"] for step in steps)
+        result["map_reduce"] = {
+            "chunks": len(chunks),
+            "chunk_tokens": settings.soap_chunk_tokens,
+            "transcript_tokens_estimate": estimate_tokens(transcript),
+            "steps": steps,
+        }
+        return result
+    
+    def _soap_result(
+        self,
+        response: Dict[str, any],
+        start_time: float,
+        soap_note: Optional[Dict[str, any]] = None
+    ) -> Dict[str, any]:
+        """Turn an Ollama response into a SOAP note result.
+        
+        Args:
+            response: Result of OllamaService.generate (or _agenerate_validated)
+            start_time: Generation start (time.time())
+            soap_note: Already validated note (parsed from the response otherwise)
+            
+        Returns:
+            Dict with SOAP note and metadata
+        """
+        generation_time = time.time() - start_time
+        
+        # Parse response
+        if soap_note is None:
             soap_note = self._parse_soap_response(response['response'])
+        
+        return {
+            "soap_note": soap_note,
+            "model_used": response['model'],
+            "generation_time_seconds": generation_time,
+            "prompt_tokens": response.get('prompt_eval_count', 0),
+            "completion_tokens": response.get('eval_count', 0),
+            "attempts": response.get('attempts', 1),
+            "prompt_cache": response.get('prompt_cache'),
+            "raw_response": response['response']
+        }
+    
+    def generate_soap_note_stream(
+        self,
+        transcript: str,
+        patient_context: Optional[Dict] = None
+    ) -> Iterator[Dict[str, any]]:
+        """Generate SOAP note while streaming progress.
+        
+        Yields events as dicts with an ``event`` name and ``data`` payload:
+        ``token`` for every fragment received from the model, ``section``
+        whenever a top-level field of the JSON note is complete, and a
+        final ``done`` carrying the same result as generate_soap_note.
+        A member that breaks SOAPNoteOutput aborts the stream and, while
+        attempts remain, yields ``retry`` before streaming a new answer
+        (clients should discard the tokens and sections received so far).
+        Transcripts too long for one prompt first yield a ``map`` event per
+        chunk summarized; the reduce call is then streamed as usual.
+        
+        Args:
+            transcript: Transcribed conversation
+            patient_context: Optional patient context (age, gender, etc.)
             
-            return {
+        Yields:
+            Stream events
+        """
+        try:
+            start_time = time.time()
+            first_token_time = None
+            request = self._soap_request(transcript, patient_context, False)
+            chunks: List[str] = []
+            steps: List[Dict[str, any]] = []
+            
+            if not self._fits_single_pass(request):
+                chunks = chunk_transcript(transcript, settings.soap_chunk_tokens)
+                logger.info(f"Transcript exceeds the context window, streaming SOAP note from {len(chunks)} chunks")
+                
+                client_loop = get_client_loop()
+                futures = [
+                    client_loop.submit(self._amap_chunk(chunk, i, len(chunks), patient_context, False))
+                    for i, chunk in enumerate(chunks)
+                ]
+                for future in as_completed(futures):
+                    _, step = future.result()
+                    yield {"event": "map", "data": {"chunk": step["chunk"], "chunks": len(chunks)}}
+                
+                mapped = [future.result() for future in futures]
+                steps = [step for _, step in mapped]
+                request = self._reduce_request([facts for facts, _ in mapped], patient_context, False)
+            
+            logger.info("Streaming SOAP note with Llama/Mistral")
+            reduce_start = time.time()
+            prompt_tokens = completion_tokens = 0
+            
+            for attempt in range(1, settings.soap_max_attempts + 1):
+                validator = StreamingSchemaValidator(SOAPNoteOutput)
+                stats: Dict[str, any] = {}
+                stream = self.ollama.generate_stream(
+                    prompt=request["prompt"],
+                    system_prompt=request["system_prompt"],
+                    temperature=request["temperature"],
+                    max_tokens=request["max_tokens"],
+                    stats=stats,
+                    format=request.get("format")
+                )
+                soap_note = None
+                try:
+                    for fragment in stream:
+                        if not fragment:
+                            continue
+                        if first_token_time is None:
+                            first_token_time = time.time() - start_time
+                            logger.info(f"First token after {first_token_time:.2f}s")
+                        
+                        yield {"event": "token", "data": {"text": fragment}}
+                        
+                        for name, value in validator.feed(fragment):
+                            yield {"event": "section", "data": {"name": name, "value": value}}
+                    
+                    soap_note = validator.finish().model_dump()
+                except SchemaViolation as e:
+                    # Stop paying for an answer that cannot be used
+                    logger.warning(f"SOAP note stream attempt {attempt} aborted: {e}")
+                finally:
+                    stream.close()
+                
+                prompt_tokens += stats.get('prompt_eval_count') or 0
+                completion_tokens += stats.get('eval_count') or 0
+                if soap_note is not None:
+                    structured_output_stats.record(attempt, valid=True)
+                    break
+                if attempt < settings.soap_max_attempts:
+                    yield {"event": "retry", "data": {"attempt": attempt + 1, "reason": "Schema violation"}}
+            else:
+                structured_output_stats.record(attempt, valid=False)
+                soap_note = self._parse_soap_response(validator.buffer)
+            
+            raw_response = validator.buffer
+            result = {
                 "soap_note": soap_note,
-                "model_used": response['model'],
-                "generation_time_seconds": generation_time,
-                "prompt_tokens": response.get('prompt_eval_count', 0),
-                "completion_tokens": response.get('eval_count', 0),
-                "raw_response": response['response']
+                "model_used": self.ollama.model,
+                "generation_time_seconds": time.time() - start_time,
+                "time_to_first_token_seconds": first_token_time,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "attempts": attempt,
+                "prompt_cache": stats.get('prompt_cache'),
+                "raw_response": raw_response
             }
+            if chunks:
+                steps.append(self._step_metadata(
+                    "reduce",
+                    {"prompt_eval_count": prompt_tokens, "eval_count": completion_tokens,
+                     "prompt_cache": stats.get('prompt_cache')},
+                    time.time() - reduce_start,
+                    attempts=attempt
+                ))
+                result = self._with_map_reduce(result, transcript, chunks, steps)
+            
+            yield {"event": "done", "data": result}
             
         except Exception as e:
-            logger.error(f"SOAP note generation failed: {e}")
-            raise Exception(f"Failed to generate SOAP note: {str(e)}")
+            logger.error(f"SOAP note streaming failed: {e}")
+            raise Exception(f"Failed to stream SOAP note: {str(e)}")
     
     def _build_soap_prompt(
         self,
@@ -99,7 +621,12 @@ class MedicalNoteService:
         Returns:
             Formatted prompt
         """
-        prompt = "Convert the following doctor-patient conversation into a structured SOAP note.\n\n"
+        # Static instruction first and the transcript last: every request
+        # then starts with the same tokens, which Ollama keeps in its KV cache
+        prompt = (
+            "Convert the following doctor-patient conversation into a structured SOAP note "
+            "in JSON format with the fields specified in the system prompt.\n\n"
+        )
         
         if patient_context:
             prompt += "Patient Context:\n"
@@ -107,8 +634,7 @@ class MedicalNoteService:
                 prompt += f"- {key}: {value}\n"
             prompt += "\n"
         
-        prompt += f"Conversation:\n{transcript}\n\n"
-        prompt += "Generate a structured SOAP note in JSON format with the fields specified in the system prompt."
+        prompt += f"Conversation:\n{transcript}"
         
         return prompt
     
@@ -214,26 +740,17 @@ class MedicalNoteService:
             Dict with extracted entities (symptoms, medications, allergies)
         """
         try:
-            prompt = f"""Extract medical entities from this conversation:
-
-{transcript}
-
-List:
-1. Symptoms mentioned
-2. Medications discussed
-3. Allergies mentioned
-4. Medical conditions
-
-Format as JSON with keys: symptoms, medications, allergies, conditions"""
-            
+            start_time = time.perf_counter()
             response = self.ollama.generate(
-                prompt=prompt,
+                prompt=f"Conversation:\n{transcript}",
+                system_prompt=ENTITY_EXTRACTION_SYSTEM_PROMPT,
                 temperature=0.2,
                 max_tokens=500
             )
             
             # Parse response
             entities = self._parse_entities_response(response['response'])
+            get_metrics().ner_seconds.observe(time.perf_counter() - start_time)
             return entities
             
         except Exception as e:
@@ -274,6 +791,46 @@ Format as JSON with keys: symptoms, medications, allergies, conditions"""
         }
 
 
+def save_medical_note(db: Session, recording_id: int, note_result: Dict[str, any]) -> MedicalNote:
+    """Create or update the medical note of a recording from a generation result.
+    
+    The caller is responsible for committing the session.
+    
+    Args:
+        db: Database session
+        recording_id: Recording ID
+        note_result: Result of MedicalNoteService.generate_soap_note
+        
+    Returns:
+        Persisted (pending commit) medical note
+    """
+    soap_note = note_result['soap_note']
+    fields = {
+        "soap_note": soap_note,
+        "chief_complaint": soap_note.get('chief_complaint', ''),
+        "allergies": soap_note.get('allergies', []),
+        "medications": soap_note.get('medications', []),
+        "model_used": note_result['model_used'],
+        "tokens_used": (note_result.get('prompt_tokens') or 0) + (note_result.get('completion_tokens') or 0),
+        "generation_time_seconds": note_result['generation_time_seconds'],
+    }
+    
+    medical_note = (
+        db.query(MedicalNote)
+        .filter(MedicalNote.recording_id == recording_id)
+        .first()
+    )
+    
+    if medical_note:
+        for key, value in fields.items():
+            setattr(medical_note, key, value)
+    else:
+        medical_note = MedicalNote(recording_id=recording_id, **fields)
+        db.add(medical_note)
+    
+    return medical_note
+
+
 # Singleton instance
 _medical_note_service: Optional[MedicalNoteService] = None
 
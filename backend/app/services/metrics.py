@@ -0,0 +1,220 @@
+"""Pipeline metrics (latency histograms, counters, gauges) in Prometheus format.
+
+Every process records into its own registry. Processes write a snapshot
+of it to settings.metrics_dir every few seconds; ``GET /metrics`` merges
+the other processes' snapshots with the live registry of the process
+answering, so stages that run in the workers (decode, Whisper, note
+generation) are reported next to the API's own (uploads, DB commits).
+Snapshots also carry state a process publishes for the others, such as
+the models resident in a worker (see Metrics.publish).
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import get_settings
+from ..utils.prometheus import (
+    Counter,
+    Gauge,
+    Histogram,
+    PipelineMetrics,
+    merge_snapshots,
+    render_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics(PipelineMetrics):
+    """Registry of the pipeline's collectors for this process.
+
+    Adds the API's own collectors (uploads, DB commits, job queue) to the
+    ones shared with Hypocrate, e.g.
+    ``get_metrics().whisper_seconds.observe(12.3, model="base", backend="openai")``.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """Initialize metrics registry.
+
+        Args:
+            directory: Where process snapshots are written and read
+                (defaults to settings.metrics_dir)
+        """
+        super().__init__()
+        self.directory = Path(directory or settings.metrics_dir)
+        self._published: Dict[str, Callable[[], Any]] = {}
+        self._writer: Optional[threading.Thread] = None
+
+        # Audio intake
+        self.upload_seconds = self._add(Histogram(
+            "scribe_upload_seconds", "Time to receive and store an uploaded recording", ("method",)))
+        self.upload_bytes = self._add(Counter(
+            "scribe_upload_bytes_total", "Bytes of audio stored from uploads", ("method",)))
+
+        # Storage and queue
+        self.db_commit_seconds = self._add(Histogram(
+            "scribe_db_commit_seconds", "Database commit time (flush included)"))
+        self.job_queue_depth = self._add(Gauge(
+            "scribe_job_queue_depth", "Jobs per stage and status", ("stage", "status")))
+
+    def publish(self, name: str, provider: Callable[[], Any]) -> None:
+        """Include ``provider()`` (JSON-serializable) in this process's snapshots.
+
+        Args:
+            name: Section name, read back with published()
+            provider: Called each time a snapshot is written
+        """
+        self._published[name] = provider
+
+    def _published_sections(self) -> Dict[str, Any]:
+        sections = {}
+        for name, provider in self._published.items():
+            try:
+                sections[name] = provider()
+            except Exception as e:
+                logger.warning(f"Failed to publish {name}: {e}")
+        return sections
+
+    def published(self, name: str) -> List[Dict[str, Any]]:
+        """What the live processes published under ``name``, this one included.
+
+        Other processes are seen as of their last snapshot.
+
+        Args:
+            name: Section name given to publish()
+
+        Returns:
+            List of {"pid", "updated", name: data}, this process first
+        """
+        sections = []
+        if name in self._published:
+            sections.append({"pid": os.getpid(), "updated": time.time(), name: self._published[name]()})
+        for data in self._read_snapshots():
+            if name in data.get("published", {}) and _pid_alive(data.get("pid", 0)):
+                sections.append({"pid": data["pid"], "updated": data.get("time"), name: data["published"][name]})
+        return sections
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def write_snapshot(self) -> None:
+        """Write this process's snapshot (atomically) for the other processes."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._snapshot_path(os.getpid())
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({
+                "pid": os.getpid(),
+                "time": time.time(),
+                "metrics": self.snapshot(),
+                "published": self._published_sections(),
+            }))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    def start_snapshot_writer(self, interval: Optional[float] = None) -> None:
+        """Write snapshots periodically (and at exit) from a daemon thread."""
+        if self._writer is not None or not settings.metrics_enabled:
+            return
+        interval = interval or settings.metrics_snapshot_interval_seconds
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot()
+
+        self._writer = threading.Thread(target=_run, name="metrics-snapshot", daemon=True)
+        self._writer.start()
+        atexit.register(self.write_snapshot)
+
+    def _read_snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshot files of the other processes, as written."""
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if data.get("pid") != os.getpid():
+                snapshots.append(data)
+        return snapshots
+
+    def _other_snapshots(self) -> List[Dict[str, Any]]:
+        """Registry snapshots of the other processes; gauges of dead ones are dropped."""
+        snapshots = []
+        for data in self._read_snapshots():
+            metrics = data.get("metrics", {})
+            if not _pid_alive(data.get("pid", 0)):
+                metrics = {name: m for name, m in metrics.items() if m["kind"] != "gauge"}
+            snapshots.append(metrics)
+        return snapshots
+
+    def prune_snapshots(self) -> int:
+        """Remove the snapshots of processes that are gone (on startup).
+
+        Their counters restart from zero, which Prometheus treats as a reset.
+
+        Returns:
+            Number of files removed
+        """
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                pid = int(path.stem)
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _pid_alive(pid):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def merged_snapshot(self) -> Dict[str, Any]:
+        """Snapshot of this process merged with the other processes' last snapshots."""
+        return merge_snapshots([self.snapshot(), *self._other_snapshots()])
+
+    def render(self) -> str:
+        """Merged metrics of all processes, in Prometheus text format."""
+        try:
+            from .job_queue import get_job_queue
+            for stage, statuses in get_job_queue().queue_depth().items():
+                for status, count in statuses.items():
+                    self.job_queue_depth.set(count, stage=stage, status=status)
+        except Exception as e:
+            logger.error(f"Failed to read job queue depth: {e}")
+
+        return render_snapshot(self.merged_snapshot())
+
+
+# Singleton instance
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Get or create the metrics registry of this process.
+
+    Returns:
+        Metrics instance
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,283 @@
+"""Registry of resident models with startup preloading and a RAM budget.
+
+Services ask the registry for a model by kind and name instead of holding
+it themselves, so several variants (e.g. Whisper base and small) can stay
+loaded side by side. The least recently used ones are dropped when the
+total exceeds the configured budget.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from .cpu_config import inference_threads
+from .metrics import get_metrics
+from .whisper_backend import BACKEND_OPENAI, load_whisper_model
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+KIND_WHISPER = "whisper"
+KIND_OLLAMA = "ollama"
+
+
+def rss_bytes() -> int:
+    """Resident set size of the current process (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def torch_module_bytes(model: Any) -> int:
+    """Memory held by a torch module's parameters and buffers."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@dataclass
+class ResidentModel:
+    """A loaded model and its bookkeeping."""
+    kind: str
+    name: str
+    model: Any
+    size_bytes: int
+    load_seconds: float
+    last_used: float
+
+
+class ModelRegistry:
+    """Keeps loaded models resident and evicts them LRU under a RAM budget."""
+
+    def __init__(self, budget_bytes: int):
+        """Initialize model registry.
+
+        Args:
+            budget_bytes: Total size of resident models before eviction
+                (0 disables eviction)
+        """
+        self.budget_bytes = budget_bytes
+        self._loaders: Dict[str, Tuple[Callable[[str], Any], Optional[Callable[[Any], int]]]] = {}
+        self._models: "OrderedDict[Tuple[str, str], ResidentModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def register_loader(
+        self,
+        kind: str,
+        loader: Callable[[str], Any],
+        sizer: Optional[Callable[[Any], int]] = None
+    ) -> None:
+        """Register how to load models of a given kind.
+
+        Args:
+            kind: Model kind (e.g. 'whisper')
+            loader: Called with the model name, returns the loaded model
+            sizer: Returns a loaded model's size in bytes. Without one the
+                process RSS growth during the load is used, which is only
+                approximate when several loads run at once.
+        """
+        self._loaders[kind] = (loader, sizer)
+
+    def get(self, kind: str, name: str) -> Any:
+        """Return a resident model, loading it if needed.
+
+        Args:
+            kind: Model kind
+            name: Model name (e.g. 'base')
+
+        Returns:
+            The loaded model
+        """
+        key = (kind, name)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry.last_used = time.time()
+                self._models.move_to_end(key)
+                return entry.model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # One load per model; different models load concurrently
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+            if entry is not None:
+                return entry.model
+
+            if kind not in self._loaders:
+                raise KeyError(f"No loader registered for model kind: {kind}")
+            loader, sizer = self._loaders[kind]
+
+            logger.info(f"Loading {kind} model: {name}")
+            rss_before = rss_bytes()
+            start_time = time.time()
+            model = loader(name)
+            load_time = time.time() - start_time
+            size = sizer(model) if sizer else max(rss_bytes() - rss_before, 0)
+            logger.info(f"{kind} model {name} loaded in {load_time:.2f}s ({size / 2**20:.0f} MiB)")
+            get_metrics().model_loads.inc(kind=kind, model=name)
+            get_metrics().model_load_seconds.observe(load_time, kind=kind, model=name)
+
+            with self._lock:
+                self._models[key] = ResidentModel(kind, name, model, size, load_time, time.time())
+                self._enforce_budget(keep=key)
+        return model
+
+    def _enforce_budget(self, keep: Tuple[str, str]) -> None:
+        """Evict least recently used models until under budget (lock held)."""
+        if not self.budget_bytes:
+            return
+        total = sum(m.size_bytes for m in self._models.values())
+        for key in list(self._models):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            evicted = self._models.pop(key)
+            total -= evicted.size_bytes
+            logger.info(f"Evicted {evicted.kind} model {evicted.name} ({evicted.size_bytes / 2**20:.0f} MiB)")
+        if total > self.budget_bytes:
+            logger.warning(
+                f"Resident models use {total / 2**20:.0f} MiB, over the "
+                f"{self.budget_bytes / 2**20:.0f} MiB budget"
+            )
+
+    def evict(self, kind: str, name: str) -> bool:
+        """Drop a model from the registry.
+
+        Memory is released once no caller holds a reference to it anymore.
+
+        Returns:
+            True if the model was resident
+        """
+        with self._lock:
+            return self._models.pop((kind, name), None) is not None
+
+    def preload(self, specs: List[Tuple[str, str]], max_workers: int = 4) -> Dict[str, Optional[str]]:
+        """Load several models in parallel.
+
+        Args:
+            specs: (kind, name) pairs to load
+            max_workers: Concurrent loads
+
+        Returns:
+            Dict mapping 'kind:name' to None on success or the error message
+        """
+        def _load(spec: Tuple[str, str]) -> Optional[str]:
+            try:
+                self.get(*spec)
+                return None
+            except Exception as e:
+                logger.error(f"Failed to preload {spec[0]} model {spec[1]}: {e}")
+                return str(e)
+
+        if not specs:
+            return {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preload") as pool:
+            results = list(pool.map(_load, specs))
+        return {f"{kind}:{name}": error for (kind, name), error in zip(specs, results)}
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe resident models, most recently used last.
+
+        Returns:
+            Dict with budget, total and per-model size and load time
+        """
+        with self._lock:
+            models = [
+                {
+                    "kind": m.kind,
+                    "name": m.name,
+                    "size_mb": round(m.size_bytes / 2**20, 1),
+                    "load_seconds": round(m.load_seconds, 2),
+                    "last_used": m.last_used,
+                }
+                for m in self._models.values()
+            ]
+            total = sum(m.size_bytes for m in self._models.values())
+        return {
+            "budget_mb": round(self.budget_bytes / 2**20, 1),
+            "resident_mb": round(total / 2**20, 1),
+            "process_rss_mb": round(rss_bytes() / 2**20, 1),
+            "models": models,
+        }
+
+
+def _load_whisper(name: str) -> Any:
+    """Load a Whisper model by size with the configured backend."""
+    return load_whisper_model(name, num_threads=inference_threads())
+
+
+def _split(value: str) -> List[str]:
+    """Parse a comma-separated setting."""
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def preload_models(whisper: bool = True, ollama: bool = True) -> Dict[str, Optional[str]]:
+    """Load the configured Whisper models and warm the Ollama models.
+
+    Whisper models become resident in this process. Ollama models live in
+    the Ollama server, so they are only loaded there (with keep_alive) and
+    reported by OllamaService.resident_models.
+
+    Args:
+        whisper: Load Whisper models (processes that transcribe)
+        ollama: Warm Ollama models (processes that generate notes)
+
+    Returns:
+        Dict mapping 'kind:name' to None on success or the error message
+    """
+    whisper_models = (_split(settings.preload_whisper_models) or [settings.whisper_model]) if whisper else []
+    ollama_models = (_split(settings.preload_ollama_models) or [settings.ollama_model]) if ollama else []
+
+    def _warm_ollama(name: str) -> Optional[str]:
+        from .ollama_service import get_ollama_service
+        try:
+            get_ollama_service().warm_up(name)
+            return None
+        except Exception as e:
+            logger.error(f"Failed to warm Ollama model {name}: {e}")
+            return str(e)
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max(len(ollama_models), 1), thread_name_prefix="warm") as pool:
+        ollama_results = pool.map(_warm_ollama, ollama_models)
+        results = get_model_registry().preload([(KIND_WHISPER, name) for name in whisper_models])
+        results.update({f"{KIND_OLLAMA}:{name}": error for name, error in zip(ollama_models, ollama_results)})
+    logger.info(f"Model preload finished in {time.time() - start_time:.2f}s: {results}")
+    return results
+
+
+# Singleton instance
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the model registry.
+
+    Returns:
+        ModelRegistry instance with the Whisper loader registered
+    """
+    global _model_registry
+    with _model_registry_lock:
+        if _model_registry is None:
+            _model_registry = ModelRegistry(settings.model_ram_budget_mb * 1024 * 1024)
+            # CTranslate2 weights live outside torch: measured from RSS growth instead
+            sizer = torch_module_bytes if settings.whisper_backend == BACKEND_OPENAI else None
+            _model_registry.register_loader(KIND_WHISPER, _load_whisper, sizer)
+            # Whisper loads in the workers: their snapshots let /health/models list it
+            get_metrics().publish("models", _model_registry.stats)
+    return _model_registry
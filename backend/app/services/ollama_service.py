@@ -1,172 +1,659 @@
 """Ollama service for local LLM inference."""
 import ollama
-from typing import Dict, Any, Optional
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, List, Optional, Set, Tuple, Union
 import logging
 
+import httpx
+
 from ..config import get_settings
+from ..utils.prometheus import OLLAMA_LOAD_EVENT_SECONDS
+from ..utils.tokens import estimate_tokens
+from .llm_cache import get_response_cache, ResponseCache
+from .metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
-class OllamaService:
-    """Service for interacting with local Ollama models."""
-    
+class _ClientLoop:
+    """Event loop thread owning the shared Ollama client and concurrency cap.
+
+    All requests, whether issued from async route handlers, sync services
+    or worker threads, run on this one loop. That way a single pooled
+    ``ollama.AsyncClient`` and a single semaphore cover every caller in the
+    process instead of one per event loop.
+    """
+
+    def __init__(self, host: str, max_concurrency: int, timeout: float):
+        """Start the loop thread.
+
+        Args:
+            host: Ollama server URL
+            max_concurrency: Maximum in-flight requests (match OLLAMA_NUM_PARALLEL)
+            timeout: Per-request timeout in seconds
+        """
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="ollama-client", daemon=True)
+        self._thread.start()
+
+        async def _setup():
+            client = ollama.AsyncClient(
+                host=host,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=max_concurrency * 2,
+                    max_keepalive_connections=max_concurrency
+                )
+            )
+            return client, asyncio.Semaphore(max_concurrency)
+
+        self.client, self.semaphore = self.submit(_setup()).result()
+        logger.info(f"Ollama client pool ready: {host}, {max_concurrency} concurrent requests")
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the client loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run(self, coro):
+        """Await a coroutine on the client loop from another event loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+
+_client_loop: Optional[_ClientLoop] = None
+_client_loop_lock = threading.Lock()
+
+
+def get_client_loop() -> _ClientLoop:
+    """Get or start the shared client loop (lazily, so each process gets its own)."""
+    global _client_loop
+    with _client_loop_lock:
+        if _client_loop is None:
+            _client_loop = _ClientLoop(
+                settings.ollama_base_url,
+                settings.ollama_max_concurrency,
+                settings.ollama_timeout_seconds
+            )
+    return _client_loop
+
+
+def _build_messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+    """Build the chat message list."""
+    messages = []
+
+    if system_prompt:
+        messages.append({
+            "role": "system",
+            "content": system_prompt
+        })
+
+    messages.append({
+        "role": "user",
+        "content": prompt
+    })
+
+    return messages
+
+
+def _request_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the context size shared by every request.
+
+    Ollama reloads the model, and drops its KV cache, whenever num_ctx
+    differs from the previous request: all callers must agree on it.
+    """
+    return {"num_ctx": settings.ollama_context_tokens, **options}
+
+
+# (model, system prompt) pairs this process already sent: Ollama may hold their prefix
+_sent_prefixes: Set[Tuple[str, Optional[str]]] = set()
+_sent_prefixes_lock = threading.Lock()
+
+
+def prompt_cache_report(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    prompt_eval_count: Optional[int],
+    prompt_eval_duration: Optional[int],
+    load_duration: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Estimate the prompt evaluation saved by Ollama's KV cache for one call.
+
+    Ollama only evaluates (and counts in prompt_eval_count) the tokens
+    after the longest prefix it still holds from a previous request, so
+    the difference with the prompt size is what the cache saved. The
+    prompt size is itself an estimate (estimate_tokens runs high), so a
+    saving is only reported when a warm prefix can exist: this process
+    already sent the same model and system prompt, and Ollama did not
+    (re)load the model for this call. Otherwise it is 0.
+
+    Args:
+        model: Ollama model
+        prompt: User prompt
+        system_prompt: System prompt (or None)
+        prompt_eval_count: Tokens evaluated by Ollama
+        prompt_eval_duration: Time spent evaluating them, in nanoseconds
+        load_duration: Model load time reported by Ollama, in nanoseconds
+
+    Returns:
+        Dict with warm_prefix, prompt_tokens_estimate, evaluated_tokens,
+        reused_tokens_estimate, prompt_eval_seconds and
+        saved_seconds_estimate, or None without counters
+    """
+    if not prompt_eval_count or prompt_eval_duration is None:
+        return None
+
+    with _sent_prefixes_lock:
+        warm = (model, system_prompt) in _sent_prefixes
+        _sent_prefixes.add((model, system_prompt))
+    if (load_duration or 0) / 1e9 >= OLLAMA_LOAD_EVENT_SECONDS:
+        # A freshly loaded model starts with an empty KV cache
+        warm = False
+
+    total = estimate_tokens(system_prompt or "") + estimate_tokens(prompt)
+    reused = max(total - prompt_eval_count, 0) if warm else 0
+    seconds_per_token = prompt_eval_duration / 1e9 / prompt_eval_count
+    return {
+        "warm_prefix": warm,
+        "prompt_tokens_estimate": total,
+        "evaluated_tokens": prompt_eval_count,
+        "reused_tokens_estimate": reused,
+        "prompt_eval_seconds": round(prompt_eval_duration / 1e9, 3),
+        "saved_seconds_estimate": round(reused * seconds_per_token, 3),
+    }
+
+
+class AsyncOllamaService:
+    """Async service for local Ollama models with pooled connections."""
+
     def __init__(self, model: Optional[str] = None):
-        """Initialize Ollama service.
-        
+        """Initialize async Ollama service.
+
         Args:
             model: Model name to use (defaults to settings.ollama_model)
         """
         self.model = model or settings.ollama_model
         self.base_url = settings.ollama_base_url
-        logger.info(f"Initialized Ollama service with model: {self.model}")
-    
-    def generate(
+
+    async def _generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        options: Dict[str, Any],
+        use_cache: bool,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        validate: Optional[Callable[[str], bool]] = None
+    ) -> Dict[str, Any]:
+        """Run a completion on the client loop (cache lookup included)."""
+        options = _request_options(options)
+        client_loop = get_client_loop()
+        loop = asyncio.get_running_loop()
+
+        cache = get_response_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = ResponseCache.make_key(self.model, system_prompt, prompt, options, format)
+            if use_cache:
+                # Cache backends may do disk I/O: keep it off the loop
+                cached = await loop.run_in_executor(None, cache.get, cache_key)
+                if cached is not None and validate is not None and not validate(cached["response"]):
+                    cached = None
+                if cached is not None:
+                    logger.info(f"LLM response cache hit for {self.model} ({cache.stats()})")
+                    return {**cached, "cached": True}
+
+        logger.info(f"Generating with {self.model}, temp={options.get('temperature')}")
+
+        metrics = get_metrics()
+        metrics.llm_waiting.inc(model=self.model)
+        queued_at = time.perf_counter()
+        try:
+            await client_loop.semaphore.acquire()
+        finally:
+            metrics.llm_waiting.dec(model=self.model)
+        started_at = time.perf_counter()
+        metrics.llm_queue_seconds.observe(started_at - queued_at, model=self.model)
+        metrics.llm_in_flight.inc(model=self.model)
+        try:
+            response = await client_loop.client.chat(
+                model=self.model,
+                messages=_build_messages(prompt, system_prompt),
+                format=format,
+                options=options,
+                keep_alive=settings.ollama_keep_alive
+            )
+        finally:
+            client_loop.semaphore.release()
+            metrics.llm_in_flight.dec(model=self.model)
+        metrics.llm_request_seconds.observe(time.perf_counter() - started_at, model=self.model, mode="chat")
+
+        result = {
+            "response": response['message']['content'],
+            "model": self.model,
+            "done": response.get('done', True),
+            "total_duration": response.get('total_duration'),
+            "load_duration": response.get('load_duration'),
+            "prompt_eval_count": response.get('prompt_eval_count'),
+            "prompt_eval_duration": response.get('prompt_eval_duration'),
+            "eval_count": response.get('eval_count'),
+            "eval_duration": response.get('eval_duration'),
+            "prompt_cache": prompt_cache_report(
+                self.model, prompt, system_prompt,
+                response.get('prompt_eval_count'), response.get('prompt_eval_duration'),
+                response.get('load_duration')
+            ),
+        }
+        if result["prompt_cache"]:
+            logger.info(
+                f"Prompt eval: {result['prompt_cache']['evaluated_tokens']} tokens evaluated, "
+                f"~{result['prompt_cache']['reused_tokens_estimate']} reused from the KV cache "
+                f"(~{result['prompt_cache']['saved_seconds_estimate']:.2f}s saved, estimated)"
+            )
+        metrics.observe_llm_response(self.model, "chat", result)
+
+        # Answers the caller will reject must not be served again from the cache
+        if cache_key is not None and (validate is None or validate(result["response"])):
+            await loop.run_in_executor(None, cache.set, cache_key, result)
+
+        return result
+
+    async def generate(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        use_cache: bool = True,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        validate: Optional[Callable[[str], bool]] = None,
         **kwargs
     ) -> Dict[str, Any]:
-        """Generate text using Ollama.
-        
+        """Generate text using Ollama without blocking the caller's event loop.
+
+        Identical requests (model, prompts and options) are served from the
+        response cache unless ``use_cache`` is False.
+
         Args:
             prompt: User prompt
             system_prompt: System prompt for context
             temperature: Sampling temperature (0.0 to 1.0)
             max_tokens: Maximum tokens to generate
+            use_cache: Read from the response cache (False forces regeneration;
+                the fresh response is still stored)
+            format: Constrain the output: "json" or a JSON schema the
+                response must match (Ollama structured outputs)
+            validate: Only answers it accepts are read from or stored in
+                the response cache (e.g. schema validation)
             **kwargs: Additional Ollama parameters
-            
+
         Returns:
             Dict with 'response' and metadata
         """
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
-            
-            logger.info(f"Generating with {self.model}, temp={temperature}")
-            
-            response = ollama.chat(
-                model=self.model,
-                messages=messages,
-                options={
-                    "temperature": temperature,
-                    "num_predict": max_tokens,
-                    **kwargs
-                }
-            )
-            
-            return {
-                "response": response['message']['content'],
-                "model": self.model,
-                "done": response.get('done', True),
-                "total_duration": response.get('total_duration'),
-                "load_duration": response.get('load_duration'),
-                "prompt_eval_count": response.get('prompt_eval_count'),
-                "eval_count": response.get('eval_count'),
+            options = {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                **kwargs
             }
-            
+            return await get_client_loop().run(
+                self._generate(prompt, system_prompt, options, use_cache, format, validate)
+            )
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
             raise Exception(f"Failed to generate with Ollama: {str(e)}")
-    
-    def generate_stream(
+
+    async def _stream_into(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        options: Dict[str, Any],
+        push: Callable[[Any], None],
+        stats: Optional[Dict[str, Any]],
+        format: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> None:
+        """Stream a completion on the client loop, handing fragments to ``push``.
+
+        An exception instance signals a failure and ``None`` always marks
+        the end of the stream, even when the stream is cancelled.
+        """
+        client_loop = get_client_loop()
+        metrics = get_metrics()
+        in_flight = False
+        try:
+            metrics.llm_waiting.inc(model=self.model)
+            queued_at = time.perf_counter()
+            try:
+                await client_loop.semaphore.acquire()
+            finally:
+                metrics.llm_waiting.dec(model=self.model)
+            started_at = time.perf_counter()
+            metrics.llm_queue_seconds.observe(started_at - queued_at, model=self.model)
+            metrics.llm_in_flight.inc(model=self.model)
+            in_flight = True
+
+            stream = await client_loop.client.chat(
+                model=self.model,
+                messages=_build_messages(prompt, system_prompt),
+                stream=True,
+                format=format,
+                options=_request_options(options),
+                keep_alive=settings.ollama_keep_alive
+            )
+            first_token = True
+            async for chunk in stream:
+                if first_token and chunk['message']['content']:
+                    first_token = False
+                    metrics.llm_ttft_seconds.observe(
+                        time.perf_counter() - started_at, model=self.model, mode="stream"
+                    )
+                if chunk.get('done'):
+                    final = {
+                        key: chunk.get(key) for key in (
+                            "total_duration", "load_duration", "prompt_eval_count",
+                            "prompt_eval_duration", "eval_count", "eval_duration"
+                        )
+                    }
+                    metrics.llm_request_seconds.observe(
+                        time.perf_counter() - started_at, model=self.model, mode="stream"
+                    )
+                    metrics.observe_llm_response(self.model, "stream", final)
+                    if stats is not None:
+                        stats.update(final)
+                        stats["prompt_cache"] = prompt_cache_report(
+                            self.model, prompt, system_prompt,
+                            chunk.get('prompt_eval_count'), chunk.get('prompt_eval_duration'),
+                            chunk.get('load_duration')
+                        )
+                push(chunk['message']['content'])
+        except Exception as e:
+            push(e)
+        finally:
+            if in_flight:
+                client_loop.semaphore.release()
+                metrics.llm_in_flight.dec(model=self.model)
+            push(None)
+
+    async def generate_stream(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
         **kwargs
-    ):
+    ) -> AsyncIterator[str]:
         """Generate text with streaming response.
-        
+
         Args:
             prompt: User prompt
             system_prompt: System prompt
             temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            stats: Optional dict filled with Ollama's final counters
+                (total_duration, prompt_eval_count, eval_count, ...) when the stream ends
+            format: Constrain the output: "json" or a JSON schema
             **kwargs: Additional parameters
-            
+
         Yields:
             Response chunks
         """
+        options = {"temperature": temperature, **kwargs}
+        if max_tokens is not None:
+            options["num_predict"] = max_tokens
+
+        loop = asyncio.get_running_loop()
+        sink: "asyncio.Queue" = asyncio.Queue()
+        future = get_client_loop().submit(self._stream_into(
+            prompt, system_prompt, options,
+            lambda item: loop.call_soon_threadsafe(sink.put_nowait, item),
+            stats,
+            format
+        ))
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
-            
-            stream = ollama.chat(
-                model=self.model,
-                messages=messages,
-                stream=True,
-                options={
-                    "temperature": temperature,
-                    **kwargs
-                }
-            )
-            
-            for chunk in stream:
-                yield chunk['message']['content']
-                
+            while True:
+                item = await sink.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
         except Exception as e:
             logger.error(f"Ollama streaming failed: {e}")
             raise Exception(f"Failed to stream with Ollama: {str(e)}")
-    
-    def check_model_available(self) -> bool:
+        finally:
+            future.cancel()
+
+    async def check_model_available(self) -> bool:
         """Check if the configured model is available.
-        
+
         Returns:
             True if model is available, False otherwise
         """
         try:
-            models_response = ollama.list()
+            client_loop = get_client_loop()
+            models_response = await client_loop.run(client_loop.client.list())
             available_models = [m.model for m in models_response.models]
             return self.model in available_models
         except Exception as e:
             logger.error(f"Failed to check model availability: {e}")
             return False
-    
-    def pull_model(self) -> bool:
+
+    async def pull_model(self) -> bool:
         """Pull the model if not available.
-        
+
         Returns:
             True if successful, False otherwise
         """
         try:
             logger.info(f"Pulling model: {self.model}")
-            ollama.pull(self.model)
+            client_loop = get_client_loop()
+            await client_loop.run(client_loop.client.pull(self.model))
             return True
         except Exception as e:
             logger.error(f"Failed to pull model: {e}")
             return False
 
+    async def warm_up(self, model: Optional[str] = None) -> None:
+        """Load a model into the Ollama server's memory.
 
-# Singleton instance
+        An empty prompt makes Ollama load the model without generating, and
+        keep_alive keeps it resident between consultations.
+
+        Args:
+            model: Model to load (defaults to the configured model)
+        """
+        client_loop = get_client_loop()
+        model = model or self.model
+        response = await client_loop.run(client_loop.client.generate(
+            model=model,
+            prompt="",
+            options=_request_options({}),  # load with the context size requests will use
+            keep_alive=settings.ollama_keep_alive
+        ))
+        load_seconds = (response.get('load_duration') or 0) / 1e9
+        if load_seconds >= OLLAMA_LOAD_EVENT_SECONDS:
+            metrics = get_metrics()
+            metrics.model_loads.inc(kind="ollama", model=model)
+            metrics.model_load_seconds.observe(load_seconds, kind="ollama", model=model)
+
+    async def resident_models(self) -> List[Dict[str, Any]]:
+        """List models currently loaded in the Ollama server.
+
+        Returns:
+            List of dicts with name and size_mb (empty if unavailable)
+        """
+        try:
+            client_loop = get_client_loop()
+            response = await client_loop.run(client_loop.client.ps())
+            return [
+                {"name": m["name"], "size_mb": round(m.get("size", 0) / 2**20, 1)}
+                for m in response["models"]
+            ]
+        except Exception as e:
+            logger.error(f"Failed to list resident Ollama models: {e}")
+            return []
+
+
+class OllamaService:
+    """Service for interacting with local Ollama models.
+
+    Synchronous facade over AsyncOllamaService for code that is not async
+    (worker processes, threadpool endpoints). Calls share the same
+    connection pool and concurrency cap as async callers.
+    """
+
+    def __init__(self, model: Optional[str] = None):
+        """Initialize Ollama service.
+
+        Args:
+            model: Model name to use (defaults to settings.ollama_model)
+        """
+        self.model = model or settings.ollama_model
+        self.base_url = settings.ollama_base_url
+        self._async = AsyncOllamaService(self.model)
+        logger.info(f"Initialized Ollama service with model: {self.model}")
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        validate: Optional[Callable[[str], bool]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Generate text using Ollama.
+
+        Identical requests (model, prompts and options) are served from the
+        response cache unless ``use_cache`` is False.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt for context
+            temperature: Sampling temperature (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            use_cache: Read from the response cache (False forces regeneration;
+                the fresh response is still stored)
+            format: Constrain the output: "json" or a JSON schema the
+                response must match (Ollama structured outputs)
+            validate: Only answers it accepts are read from or stored in
+                the response cache (e.g. schema validation)
+            **kwargs: Additional Ollama parameters
+
+        Returns:
+            Dict with 'response' and metadata
+        """
+        try:
+            options = {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                **kwargs
+            }
+            return get_client_loop().submit(
+                self._async._generate(prompt, system_prompt, options, use_cache, format, validate)
+            ).result()
+        except Exception as e:
+            logger.error(f"Ollama generation failed: {e}")
+            raise Exception(f"Failed to generate with Ollama: {str(e)}")
+
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Generate text with streaming response.
+
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            stats: Optional dict filled with Ollama's final counters
+                (total_duration, prompt_eval_count, eval_count, ...) when the stream ends
+            format: Constrain the output: "json" or a JSON schema
+            **kwargs: Additional parameters
+
+        Yields:
+            Response chunks
+        """
+        options = {"temperature": temperature, **kwargs}
+        if max_tokens is not None:
+            options["num_predict"] = max_tokens
+
+        sink: "queue.Queue" = queue.Queue()
+        future = get_client_loop().submit(
+            self._async._stream_into(prompt, system_prompt, options, sink.put, stats, format)
+        )
+        try:
+            while True:
+                item = sink.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        except Exception as e:
+            logger.error(f"Ollama streaming failed: {e}")
+            raise Exception(f"Failed to stream with Ollama: {str(e)}")
+        finally:
+            # Consumer went away (e.g. client disconnected): stop generating
+            future.cancel()
+
+    def check_model_available(self) -> bool:
+        """Check if the configured model is available.
+
+        Returns:
+            True if model is available, False otherwise
+        """
+        return get_client_loop().submit(self._async.check_model_available()).result()
+
+    def pull_model(self) -> bool:
+        """Pull the model if not available.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        return get_client_loop().submit(self._async.pull_model()).result()
+
+    def warm_up(self, model: Optional[str] = None) -> None:
+        """Load a model into the Ollama server's memory.
+
+        Args:
+            model: Model to load (defaults to the configured model)
+        """
+        get_client_loop().submit(self._async.warm_up(model)).result()
+
+    def resident_models(self) -> List[Dict[str, Any]]:
+        """List models currently loaded in the Ollama server.
+
+        Returns:
+            List of dicts with name and size_mb (empty if unavailable)
+        """
+        return get_client_loop().submit(self._async.resident_models()).result()
+
+
+# Singleton instances
 _ollama_service: Optional[OllamaService] = None
+_async_ollama_service: Optional[AsyncOllamaService] = None
 
 
 def get_ollama_service() -> OllamaService:
     """Get or create Ollama service instance.
-    
+
     Returns:
         OllamaService instance
     """
@@ -174,3 +661,15 @@ def get_ollama_service() -> OllamaService:
     if _ollama_service is None:
         _ollama_service = OllamaService()
     return _ollama_service
+
+
+def get_async_ollama_service() -> AsyncOllamaService:
+    """Get or create async Ollama service instance.
+
+    Returns:
+        AsyncOllamaService instance
+    """
+    global _async_ollama_service
+    if _async_ollama_service is None:
+        _async_ollama_service = AsyncOllamaService()
+    return _async_ollama_service
@@ -0,0 +1,348 @@
+"""Chunked Whisper transcription: one window at a time, or fanned out to processes.
+
+Recordings are cut at silences into windows of settings.whisper_chunk_seconds.
+Only the window being transcribed is converted to float32, so memory
+stays bounded by the window length rather than the recording length,
+both in a single process and in the pool. With VAD, each window is
+compacted to its own speech regions just before Whisper runs on it.
+"""
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from .audio import SAMPLE_RATE, AudioChunk, find_split_points, plan_chunks, to_float32
+from .audio_ingest import open_pcm
+from .cpu_config import apply_cpu_plan, available_cores, inference_threads, plan_cpu, slot_counter, take_pool_slot
+from .vad import SpeechTimeline, clip_regions, compact_speech, remap_segments
+from .whisper_backend import load_whisper_model
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Whisper model owned by a pool process (set by _init_worker)
+_worker_model = None
+
+
+def _init_worker(model_size: str, workers: int, num_threads: int, slots) -> None:
+    """Apply this process's share of the CPU, then load the Whisper model once."""
+    global _worker_model
+    apply_cpu_plan(plan_cpu(workers, take_pool_slot(slots, workers), threads=num_threads))
+    _worker_model = load_whisper_model(model_size, num_threads=num_threads)
+
+
+def window_samples(
+    samples: np.ndarray,
+    regions: Optional[List[Tuple[int, int]]] = None
+) -> Tuple[np.ndarray, Optional[SpeechTimeline]]:
+    """Float32 samples of one window, compacted to its speech when VAD regions are given.
+
+    Args:
+        samples: The window's samples (float32, or int16 PCM memmap slice)
+        regions: Speech regions relative to the window (see clip_regions), or None
+
+    Returns:
+        (float32 samples for Whisper, timeline back to window time or None)
+    """
+    if regions is None:
+        return to_float32(samples), None
+    return compact_speech(samples, regions)
+
+
+def transcribe_window(
+    model,
+    audio: np.ndarray,
+    language: Optional[str],
+    task: str,
+    timeline: Optional[SpeechTimeline] = None,
+    **options
+) -> Dict:
+    """Transcribe one window of float32 samples with a loaded Whisper model.
+
+    Segment timestamps are relative to the window; with a timeline from
+    compact_speech they are mapped back from compacted time first.
+    """
+    if len(audio) == 0:
+        return {"language": language, "segments": []}
+
+    result = model.transcribe(
+        audio,
+        language=language,
+        task=task,
+        fp16=False,  # Use FP32 for CPU compatibility
+        **options
+    )
+    segments = result.get("segments", [])
+    if timeline is not None:
+        segments = remap_segments(segments, timeline)
+    return {
+        "language": result.get("language", language),
+        "segments": segments,
+    }
+
+
+def _transcribe_chunk(
+    audio: np.ndarray,
+    timeline: Optional[SpeechTimeline],
+    language: Optional[str],
+    task: str
+) -> Dict:
+    """Transcribe one chunk inside a pool process."""
+    return transcribe_window(_worker_model, audio, language, task, timeline)
+
+
+def _transcribe_pcm_chunk(
+    pcm_path: str,
+    start: int,
+    end: int,
+    regions: Optional[List[Tuple[int, int]]],
+    language: Optional[str],
+    task: str
+) -> Dict:
+    """Transcribe samples [start, end) of an ingested PCM file inside a pool process.
+
+    The process maps the file itself, so only offsets (and the window's
+    speech regions) cross the process boundary and only this window,
+    or its speech, is converted to float32.
+    """
+    audio, timeline = window_samples(open_pcm(Path(pcm_path))[start:end], regions)
+    return _transcribe_chunk(audio, timeline, language, task)
+
+
+def stitch_segments(chunks: List[AudioChunk], results: List[Dict]) -> List[Dict]:
+    """Merge per-chunk segments into a single timeline.
+
+    Segment timestamps are shifted by their chunk offset. A segment is kept
+    only if its midpoint falls in the chunk's ``keep`` region, so text
+    transcribed twice in an overlap appears exactly once. Segments are
+    renumbered in order, which makes the output independent of the order
+    in which chunks finished.
+
+    Args:
+        chunks: Planned chunks
+        results: Per-chunk results, in the same order as ``chunks``
+
+    Returns:
+        Segments in Whisper's format with global timestamps
+    """
+    stitched = []
+    for chunk, result in zip(chunks, results):
+        offset = chunk.start / SAMPLE_RATE
+        keep_start = chunk.keep_start / SAMPLE_RATE
+        keep_end = chunk.keep_end / SAMPLE_RATE
+
+        for segment in result["segments"]:
+            start = segment["start"] + offset
+            end = segment["end"] + offset
+            midpoint = (start + end) / 2
+            if not keep_start <= midpoint < keep_end:
+                continue
+
+            shifted = dict(segment)
+            shifted["start"] = start
+            shifted["end"] = end
+            if segment.get("words"):
+                shifted["words"] = [
+                    {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                    for word in segment["words"]
+                ]
+            stitched.append(shifted)
+
+    for i, segment in enumerate(stitched):
+        segment["id"] = i
+
+    return stitched
+
+
+def plan_windows(audio: np.ndarray, chunk_seconds: float, overlap_seconds: float) -> List[AudioChunk]:
+    """Cut a recording into silence-aligned, overlapping windows.
+
+    Args:
+        audio: Mono samples at SAMPLE_RATE (float32, or int16 PCM)
+        chunk_seconds: Target window length
+        overlap_seconds: Context added on each side of a boundary
+
+    Returns:
+        Windows in timeline order
+    """
+    splits = find_split_points(audio, chunk_seconds)
+    return plan_chunks(len(audio), splits, int(overlap_seconds * SAMPLE_RATE))
+
+
+def assemble_result(chunks: List[AudioChunk], results: List[Dict], language: Optional[str]) -> Dict[str, any]:
+    """Stitch per-window results into one result shaped like whisper's transcribe."""
+    segments = stitch_segments(chunks, results)
+    return {
+        "text": "".join(segment["text"] for segment in segments).strip(),
+        # Windows without speech were skipped and detected nothing
+        "language": language or next((result["language"] for result in results if result["language"]), None),
+        "segments": segments,
+    }
+
+
+def transcribe_sequential(
+    model,
+    audio: np.ndarray,
+    language: Optional[str] = "en",
+    task: str = "transcribe",
+    chunk_seconds: Optional[float] = None,
+    overlap_seconds: Optional[float] = None,
+    regions: Optional[List[Tuple[int, int]]] = None,
+    **options
+) -> Dict[str, any]:
+    """Transcribe a recording window by window in this process.
+
+    Each window is converted to float32 (only its speech, with VAD) just
+    before Whisper runs on it, so a memory-mapped recording is never
+    copied whole.
+
+    Args:
+        model: Loaded Whisper model
+        audio: Mono samples at SAMPLE_RATE (float32, or int16 PCM memmap)
+        language: Language code, or None to auto-detect
+        task: 'transcribe' or 'translate'
+        chunk_seconds: Target window length (defaults to settings.whisper_chunk_seconds)
+        overlap_seconds: Context on each side of a boundary
+            (defaults to settings.whisper_chunk_overlap_seconds)
+        regions: Speech regions of the whole recording from
+            detect_speech_regions; only those are transcribed
+        **options: Extra whisper transcribe options (e.g. word_timestamps)
+
+    Returns:
+        Dict with 'text', 'language' and 'segments' like whisper's transcribe
+    """
+    chunks = plan_windows(
+        audio,
+        chunk_seconds or settings.whisper_chunk_seconds,
+        overlap_seconds if overlap_seconds is not None else settings.whisper_chunk_overlap_seconds
+    )
+    results = []
+    for chunk in chunks:
+        window_regions = clip_regions(regions, chunk.start, chunk.end) if regions is not None else None
+        window, timeline = window_samples(audio[chunk.start:chunk.end], window_regions)
+        results.append(transcribe_window(model, window, language, task, timeline, **options))
+    return assemble_result(chunks, results, language)
+
+
+class ParallelTranscriber:
+    """Transcribe long audio by fanning silence-aligned chunks out to a process pool."""
+
+    def __init__(
+        self,
+        model_size: Optional[str] = None,
+        workers: Optional[int] = None,
+        chunk_seconds: Optional[float] = None,
+        overlap_seconds: Optional[float] = None
+    ):
+        """Initialize parallel transcriber.
+
+        Args:
+            model_size: Whisper model size (defaults to settings.whisper_model)
+            workers: Pool size (defaults to settings.whisper_parallel_workers)
+            chunk_seconds: Target chunk length
+            overlap_seconds: Context added on each side of a chunk boundary
+        """
+        self.model_size = model_size or settings.whisper_model
+        # Cores (and thread budget) of this process, already reduced if it is pinned
+        cpu_count = inference_threads() or len(available_cores())
+        self.workers = workers or settings.whisper_parallel_workers or max(cpu_count // 2, 1)
+        self.chunk_seconds = chunk_seconds or settings.whisper_chunk_seconds
+        self.overlap_seconds = (
+            overlap_seconds if overlap_seconds is not None else settings.whisper_chunk_overlap_seconds
+        )
+        # Split the cores between processes instead of letting each use them all
+        self.threads_per_worker = max(cpu_count // self.workers, 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the pool lazily; models stay loaded between recordings."""
+        if self._pool is None:
+            logger.info(
+                f"Starting Whisper pool: {self.workers} processes x {self.threads_per_worker} threads "
+                f"({self.model_size})"
+            )
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.model_size, self.workers, self.threads_per_worker, slot_counter(context))
+            )
+        return self._pool
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = "en",
+        task: str = "transcribe",
+        pcm_path: Optional[Path] = None,
+        regions: Optional[List[Tuple[int, int]]] = None
+    ) -> Dict[str, any]:
+        """Transcribe decoded audio in parallel chunks.
+
+        Args:
+            audio: Mono samples at SAMPLE_RATE (float32, or int16 PCM)
+            language: Language code, or None to auto-detect
+            task: 'transcribe' or 'translate'
+            pcm_path: Ingested PCM file that ``audio`` maps; workers then
+                map it too instead of receiving pickled copies of their chunk
+            regions: Speech regions of the whole recording from
+                detect_speech_regions; each worker compacts its own window
+
+        Returns:
+            Dict with 'text', 'language' and 'segments' like whisper's transcribe
+        """
+        start_time = time.time()
+
+        chunks = plan_windows(audio, self.chunk_seconds, self.overlap_seconds)
+        logger.info(f"Transcribing {len(audio) / SAMPLE_RATE:.0f}s of audio in {len(chunks)} chunks")
+
+        pool = self._get_pool()
+        futures = []
+        for chunk in chunks:
+            window_regions = clip_regions(regions, chunk.start, chunk.end) if regions is not None else None
+            if window_regions == []:
+                # No speech in this window: nothing to send
+                futures.append(None)
+            elif pcm_path is not None:
+                futures.append(pool.submit(
+                    _transcribe_pcm_chunk, str(pcm_path), chunk.start, chunk.end, window_regions, language, task
+                ))
+            else:
+                window, timeline = window_samples(audio[chunk.start:chunk.end], window_regions)
+                futures.append(pool.submit(_transcribe_chunk, window, timeline, language, task))
+        results = [
+            future.result() if future is not None else {"language": language, "segments": []}
+            for future in futures
+        ]
+
+        logger.info(f"Parallel transcription completed in {time.time() - start_time:.2f}s")
+
+        return assemble_result(chunks, results, language)
+
+    def shutdown(self) -> None:
+        """Stop the process pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# Singleton instance
+_parallel_transcriber: Optional[ParallelTranscriber] = None
+
+
+def get_parallel_transcriber() -> ParallelTranscriber:
+    """Get or create parallel transcriber instance.
+
+    Returns:
+        ParallelTranscriber instance
+    """
+    global _parallel_transcriber
+    if _parallel_transcriber is None:
+        _parallel_transcriber = ParallelTranscriber()
+    return _parallel_transcriber
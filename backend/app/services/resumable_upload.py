@@ -0,0 +1,299 @@
+"""Resumable uploads: create, send chunks at any offset, finalize.
+
+Each upload is a directory holding its metadata and a data file
+preallocated to the announced length. Chunks are written in place at
+their offset, so they can arrive out of order and over parallel
+connections. A marker file per chunk records which byte ranges are
+on disk, which is all a client needs to resume after a failure.
+Every chunk refreshes the metadata file's mtime, which is what expiry
+is measured from: an upload is removed after a period without activity.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import get_settings
+from .audio_upload import StoredUpload, store_audio_file
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+META_FILE = "meta.json"
+DATA_FILE = "data"
+RANGES_DIR = "ranges"
+
+
+class UploadNotFoundError(LookupError):
+    """Raised when an upload does not exist or belongs to another user."""
+
+
+class UploadConflictError(ValueError):
+    """Raised when a chunk or finalize request does not fit the upload state."""
+
+
+@dataclass
+class ResumableUpload:
+    """Metadata of a resumable upload."""
+    upload_id: str
+    user_id: int
+    filename: str
+    length: int
+    created_at: float
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent [start, end) ranges.
+
+    Args:
+        ranges: Byte ranges in any order
+
+    Returns:
+        Sorted, disjoint ranges
+    """
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(received: List[Tuple[int, int]], length: int) -> List[Tuple[int, int]]:
+    """Byte ranges of [0, length) not covered by ``received`` (merged)."""
+    missing = []
+    position = 0
+    for start, end in received:
+        if start > position:
+            missing.append((position, start))
+        position = max(position, end)
+    if position < length:
+        missing.append((position, length))
+    return missing
+
+
+def _write_at(path: Path, offset: int, chunk: bytes) -> None:
+    """Write a chunk at an offset of an existing file (runs in the thread pool)."""
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(chunk)
+
+
+def _touch(path: Path) -> None:
+    """Set an existing file's mtime to now (no-op if it is gone)."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+class ResumableUploadStore:
+    """On-disk state of resumable uploads."""
+
+    def __init__(self, root: Path, max_size: int, expiry_seconds: float):
+        """Initialize upload store.
+
+        Args:
+            root: Directory holding one subdirectory per upload
+            max_size: Largest accepted upload in bytes
+            expiry_seconds: Inactivity after which unfinished uploads are removed
+        """
+        self.root = root
+        self.max_size = max_size
+        self.expiry_seconds = expiry_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, upload_id: str) -> Path:
+        return self.root / upload_id
+
+    def create(self, user_id: int, filename: str, length: int) -> ResumableUpload:
+        """Start an upload of ``length`` bytes.
+
+        Raises:
+            UploadConflictError: If the length is invalid or above the limit
+        """
+        if length <= 0:
+            raise UploadConflictError("Upload length must be positive")
+        if length > self.max_size:
+            raise UploadConflictError(f"File too large. Maximum size: {self.max_size / 1024 / 1024}MB")
+
+        self.purge_expired()
+
+        upload = ResumableUpload(
+            upload_id=uuid.uuid4().hex,
+            user_id=user_id,
+            filename=filename,
+            length=length,
+            created_at=time.time()
+        )
+        upload_dir = self._dir(upload.upload_id)
+        (upload_dir / RANGES_DIR).mkdir(parents=True)
+        # Sparse on most filesystems: disk is only used as chunks arrive
+        with open(upload_dir / DATA_FILE, "wb") as f:
+            f.truncate(length)
+        (upload_dir / META_FILE).write_text(json.dumps(asdict(upload)))
+
+        logger.info(f"Resumable upload {upload.upload_id} created: {filename} ({length} bytes)")
+        return upload
+
+    def get(self, upload_id: str, user_id: int) -> ResumableUpload:
+        """Load an upload owned by ``user_id``.
+
+        Raises:
+            UploadNotFoundError: If it does not exist for this user
+        """
+        if not upload_id.isalnum():
+            raise UploadNotFoundError(upload_id)
+        try:
+            meta = json.loads((self._dir(upload_id) / META_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            raise UploadNotFoundError(upload_id)
+        upload = ResumableUpload(**meta)
+        if upload.user_id != user_id:
+            raise UploadNotFoundError(upload_id)
+        return upload
+
+    def received_ranges(self, upload: ResumableUpload) -> List[Tuple[int, int]]:
+        """Byte ranges written so far (merged)."""
+        ranges = []
+        for marker in (self._dir(upload.upload_id) / RANGES_DIR).iterdir():
+            start, _, end = marker.name.partition("-")
+            ranges.append((int(start), int(end)))
+        return merge_ranges(ranges)
+
+    def offset(self, upload: ResumableUpload) -> int:
+        """Number of contiguous bytes received from the start."""
+        ranges = self.received_ranges(upload)
+        return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+    async def write_chunk(
+        self,
+        upload: ResumableUpload,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        declared_length: Optional[int] = None
+    ) -> int:
+        """Write one chunk at ``offset``.
+
+        Whatever part of the chunk reached the disk is recorded, even when
+        the connection drops midway, so the client only resends the rest.
+
+        Args:
+            upload: Target upload
+            offset: Byte offset of the chunk
+            chunks: Chunk content
+            declared_length: Content-Length of the request, checked up front
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            UploadConflictError: If the chunk falls outside the upload
+        """
+        if offset < 0 or offset >= upload.length:
+            raise UploadConflictError(f"Offset {offset} outside upload of {upload.length} bytes")
+        if declared_length is not None and offset + declared_length > upload.length:
+            raise UploadConflictError("Chunk extends past the end of the upload")
+
+        upload_dir = self._dir(upload.upload_id)
+        data_path = upload_dir / DATA_FILE
+        # Activity keeps the upload from expiring, also while a long chunk streams in
+        _touch(upload_dir / META_FILE)
+        written = 0
+        try:
+            async for chunk in chunks:
+                if offset + written + len(chunk) > upload.length:
+                    raise UploadConflictError("Chunk extends past the end of the upload")
+                await run_in_threadpool(_write_at, data_path, offset + written, chunk)
+                written += len(chunk)
+        finally:
+            if written and upload_dir.exists():
+                (upload_dir / RANGES_DIR / f"{offset:015d}-{offset + written:015d}").touch()
+                _touch(upload_dir / META_FILE)
+        return written
+
+    async def finalize(self, upload: ResumableUpload, directory: Path) -> StoredUpload:
+        """Turn a complete upload into a stored audio file.
+
+        Args:
+            upload: Upload to finalize
+            directory: Destination directory of the audio file
+
+        Returns:
+            Stored audio file (hash, format and duration included)
+
+        Raises:
+            UploadConflictError: If bytes are missing or finalize is already running
+            InvalidAudioError: If the content is not audio (the upload is discarded)
+        """
+        upload_dir = self._dir(upload.upload_id)
+        missing = missing_ranges(self.received_ranges(upload), upload.length)
+        if missing:
+            raise UploadConflictError(f"Upload incomplete, missing byte ranges: {missing[:10]}")
+
+        # Claim the data file so a concurrent finalize cannot adopt it twice
+        claimed = upload_dir / f"{DATA_FILE}.finalizing"
+        try:
+            os.rename(upload_dir / DATA_FILE, claimed)
+        except FileNotFoundError:
+            raise UploadConflictError("Upload is already being finalized")
+
+        try:
+            stored = await store_audio_file(claimed, directory)
+        finally:
+            await run_in_threadpool(shutil.rmtree, upload_dir, True)
+
+        # Creation to finalize: the whole transfer, pauses and retries included
+        get_metrics().upload_seconds.observe(time.time() - upload.created_at, method="resumable")
+        get_metrics().upload_bytes.inc(stored.size, method="resumable")
+        logger.info(f"Resumable upload {upload.upload_id} finalized: {stored.path}")
+        return stored
+
+    def abort(self, upload: ResumableUpload) -> None:
+        """Discard an upload and its data."""
+        shutil.rmtree(self._dir(upload.upload_id), ignore_errors=True)
+        logger.info(f"Resumable upload {upload.upload_id} aborted")
+
+    def purge_expired(self) -> int:
+        """Remove uploads without activity (created or chunk received) for the expiry.
+
+        Returns:
+            Number of uploads removed
+        """
+        cutoff = time.time() - self.expiry_seconds
+        removed = 0
+        for upload_dir in self.root.iterdir():
+            try:
+                if upload_dir.is_dir() and (upload_dir / META_FILE).stat().st_mtime < cutoff:
+                    shutil.rmtree(upload_dir, ignore_errors=True)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info(f"Removed {removed} expired resumable uploads")
+        return removed
+
+
+# Global store instance
+_resumable_upload_store: Optional[ResumableUploadStore] = None
+
+
+def get_resumable_upload_store() -> ResumableUploadStore:
+    """Get or create the resumable upload store."""
+    global _resumable_upload_store
+    if _resumable_upload_store is None:
+        _resumable_upload_store = ResumableUploadStore(
+            Path(settings.resumable_upload_dir),
+            settings.resumable_upload_max_mb * 1024 * 1024,
+            settings.resumable_upload_expiry_hours * 3600
+        )
+    return _resumable_upload_store
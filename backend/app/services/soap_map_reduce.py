@@ -0,0 +1,191 @@
+"""Map-reduce helpers for SOAP notes of long consultations.
+
+A transcript that does not fit the model context is split into chunks of
+whole sentences. Each chunk is reduced to partial SOAP facts (map, run
+concurrently), and the partial facts are merged into the final note
+(reduce). Every prompt stays within the context window, and prompt
+evaluation grows linearly with the transcript rather than quadratically.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError, create_model
+
+from ..config import get_settings
+from ..utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+settings = get_settings()
+
+# Keys of the partial facts extracted from each chunk
+FACT_KEYS = ("subjective", "objective", "assessment", "plan", "chief_complaint", "allergies", "medications")
+
+# Map answer model, and its JSON schema constraining Ollama (structured outputs)
+SOAPFactsOutput = create_model(
+    "SOAPFactsOutput",
+    **{key: (List[str], ...) for key in FACT_KEYS}
+)
+FACTS_SCHEMA = SOAPFactsOutput.model_json_schema()
+
+MAP_SYSTEM_PROMPT = """You are an expert medical scribe assistant. You read one excerpt of a longer doctor-patient conversation and extract the clinical facts it contains.
+
+Guidelines:
+1. Extract only information explicitly stated in the excerpt
+2. Use proper medical terminology
+3. Keep each fact short; do not write prose
+4. Use an empty list when the excerpt says nothing for a field
+
+Output Format: JSON where every field is a list of short facts:
+- subjective: complaints and history
+- objective: observable findings and vital signs
+- assessment: diagnoses or clinical impressions
+- plan: treatments, prescriptions and follow-up
+- chief_complaint: reasons for the visit
+- allergies: allergies mentioned
+- medications: medications discussed"""
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_units(transcript: str) -> List[str]:
+    """Split a transcript into lines, and lines into sentences.
+
+    Whisper segments end on sentence boundaries, so chunks made of whole
+    sentences stay aligned to segments.
+    """
+    units = []
+    for line in transcript.splitlines():
+        units.extend(sentence for sentence in _SENTENCE_END.split(line.strip()) if sentence)
+    return units
+
+
+def chunk_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """Group whole sentences into chunks of at most ``max_tokens``.
+
+    A single sentence longer than the budget is cut between words.
+
+    Args:
+        transcript: Full transcript
+        max_tokens: Token budget of one chunk
+
+    Returns:
+        Chunks in transcript order
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    for unit in split_units(transcript):
+        pieces = [unit]
+        if len(unit) > max_chars:
+            pieces, piece = [], ""
+            for word in unit.split():
+                if piece and len(piece) + len(word) + 1 > max_chars:
+                    pieces.append(piece)
+                    piece = ""
+                piece = f"{piece} {word}" if piece else word
+            pieces.append(piece)
+
+        for piece in pieces:
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def single_pass_fits(prompt: str, system_prompt: str, max_tokens: int) -> bool:
+    """Whether a prompt and its answer fit the model context in one request."""
+    needed = estimate_tokens(system_prompt) + estimate_tokens(prompt) + max_tokens
+    return needed <= settings.ollama_context_tokens
+
+
+def build_map_prompt(chunk: str, index: int, total: int, patient_context: Optional[Dict] = None) -> str:
+    """Build the prompt extracting partial facts from one chunk.
+
+    Args:
+        chunk: Transcript excerpt
+        index: Position of the chunk (0-based)
+        total: Number of chunks
+        patient_context: Optional patient information
+
+    Returns:
+        Formatted prompt
+    """
+    # Static instruction first so consecutive calls share a cached prefix
+    prompt = "Extract the clinical facts of the excerpt below in JSON format with the fields specified in the system prompt.\n\n"
+
+    if patient_context:
+        prompt += "Patient Context:\n"
+        for key, value in patient_context.items():
+            prompt += f"- {key}: {value}\n"
+        prompt += "\n"
+
+    prompt += f"Excerpt {index + 1} of {total}:\n{chunk}"
+    return prompt
+
+
+def build_reduce_prompt(partials: List[Dict[str, Any]], patient_context: Optional[Dict] = None) -> str:
+    """Build the prompt merging partial facts into one SOAP note.
+
+    Args:
+        partials: Facts extracted from each chunk, in transcript order
+        patient_context: Optional patient information
+
+    Returns:
+        Formatted prompt
+    """
+    prompt = (
+        "The following facts were extracted, in order, from consecutive excerpts "
+        "of one doctor-patient conversation. Merge them into a single structured SOAP note "
+        "in JSON format with the fields specified in the system prompt. "
+        "Remove duplicates and keep later information when excerpts contradict each other.\n\n"
+    )
+
+    if patient_context:
+        prompt += "Patient Context:\n"
+        for key, value in patient_context.items():
+            prompt += f"- {key}: {value}\n"
+        prompt += "\n"
+
+    prompt += "\n\n".join(
+        f"Excerpt {i + 1} facts:\n{json.dumps(facts, ensure_ascii=False)}"
+        for i, facts in enumerate(partials)
+    )
+    return prompt
+
+
+def validate_facts(response: str) -> Optional[Dict[str, List[str]]]:
+    """Validate the partial facts returned for a chunk against SOAPFactsOutput.
+
+    An answer cut off by the token limit, or missing a field, is invalid:
+    accepting it would silently drop the facts of a whole excerpt.
+
+    Returns:
+        Facts per key (empty items dropped), or None if the answer is invalid
+    """
+    start_idx = response.find('{')
+    end_idx = response.rfind('}') + 1
+    if start_idx == -1 or end_idx <= start_idx:
+        return None
+    try:
+        facts = SOAPFactsOutput.model_validate_json(response[start_idx:end_idx]).model_dump()
+    except ValidationError:
+        return None
+    return {key: [item for item in facts[key] if item] for key in FACT_KEYS}
+
+
+def merge_facts(partials: List[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """Concatenate partial facts, dropping exact duplicates."""
+    merged: Dict[str, List[str]] = {key: [] for key in FACT_KEYS}
+    for facts in partials:
+        for key in FACT_KEYS:
+            for item in facts.get(key, []):
+                if item not in merged[key]:
+                    merged[key].append(item)
+    return merged
@@ -0,0 +1,179 @@
+"""Content-addressed on-disk cache of transcription results."""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_audio_hash(audio_path: str) -> str:
+    """Compute the SHA-256 of an audio file.
+
+    Args:
+        audio_path: Path to audio file
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Transcripts keyed by audio content and transcription parameters.
+
+    Entries are JSON files named after the cache key. The file mtime is
+    bumped on every hit, so evicting the oldest mtimes first gives LRU
+    behaviour once the directory exceeds its size budget.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """Initialize transcript cache.
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Total size budget before evicting
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(audio_hash: str, model: str, language: Optional[str], task: str, *extra) -> str:
+        """Build a cache key from the audio hash and everything affecting the output.
+
+        Args:
+            audio_hash: SHA-256 of the audio bytes
+            model: Whisper model size
+            language: Language code (None for auto-detection)
+            task: 'transcribe' or 'translate'
+            *extra: Additional parameters that change the result
+
+        Returns:
+            Hex cache key
+        """
+        parts = [audio_hash, model, language or "auto", task, *[str(e) for e in extra]]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """Location of an entry (sharded by key prefix)."""
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up a transcript.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached result, or None on miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Store a transcript and evict old entries if over budget.
+
+        Args:
+            key: Cache key from make_key
+            result: JSON-serializable transcription result
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=float)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to write transcript cache entry: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until under the size budget.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+                if total <= self.max_bytes:
+                    break
+            logger.info(f"Transcript cache evicted {removed} entries")
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for this process.
+
+        Returns:
+            Dict with hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Singleton instance
+_transcript_cache: Optional[TranscriptCache] = None
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """Get or create transcript cache instance.
+
+    Returns:
+        TranscriptCache instance
+    """
+    global _transcript_cache
+    if _transcript_cache is None:
+        _transcript_cache = TranscriptCache(
+            settings.transcript_cache_dir,
+            settings.transcript_cache_max_mb * 1024 * 1024
+        )
+    return _transcript_cache
@@ -1,11 +1,17 @@
 """Transcription service using local Whisper."""
-import whisper
 import logging
 from pathlib import Path
 from typing import Dict, Optional
 import time
 
 from ..config import get_settings
+from .audio import SAMPLE_RATE
+from .audio_ingest import open_decoded_audio, pcm_duration, pcm_path_for
+from .metrics import get_metrics
+from .model_registry import get_model_registry, KIND_WHISPER
+from .transcript_cache import compute_audio_hash, get_transcript_cache, TranscriptCache
+from .vad import detect_speech_regions
+from .whisper_backend import BACKEND_OPENAI
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -21,23 +27,27 @@ class TranscriptionService:
             model_size: Whisper model size (tiny, base, small, medium, large)
         """
         self.model_size = model_size or settings.whisper_model
-        self.model = None
-        logger.info(f"Initializing Whisper transcription service with model: {self.model_size}")
+        self.backend = settings.whisper_backend
+        logger.info(
+            f"Initializing Whisper transcription service with model: {self.model_size} ({self.backend} backend)"
+        )
     
     def _load_model(self):
-        """Load Whisper model lazily."""
-        if self.model is None:
-            logger.info(f"Loading Whisper model: {self.model_size}")
-            start_time = time.time()
-            self.model = whisper.load_model(self.model_size)
-            load_time = time.time() - start_time
-            logger.info(f"Whisper model loaded in {load_time:.2f}s")
+        """Get the Whisper model from the model registry (loaded on first use).
+        
+        The model is not kept on the service so that the registry can evict it.
+        """
+        return get_model_registry().get(KIND_WHISPER, self.model_size)
     
     def transcribe_audio(
         self,
         audio_path: str,
         language: str = "en",
-        task: str = "transcribe"
+        task: str = "transcribe",
+        parallel: Optional[bool] = None,
+        audio_hash: Optional[str] = None,
+        use_cache: bool = True,
+        vad: Optional[bool] = None
     ) -> Dict[str, any]:
         """Transcribe audio file using Whisper.
         
@@ -45,41 +55,118 @@ class TranscriptionService:
             audio_path: Path to audio file
             language: Language code (e.g., 'en', 'es', 'fr')
             task: 'transcribe' or 'translate'
+            parallel: Force chunked multi-process transcription on/off
+                (defaults to settings.whisper_parallel for long recordings)
+            audio_hash: SHA-256 of the file if already known (computed otherwise)
+            use_cache: Consult and fill the transcript cache
+            vad: Transcribe only detected speech regions (defaults to settings.vad_enabled);
+                timestamps still refer to the full recording
             
         Returns:
             Dict with transcription results
         """
         try:
-            # Load model if not already loaded
-            self._load_model()
-            
             # Validate file exists
             if not Path(audio_path).exists():
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
+            if vad is None:
+                vad = settings.vad_enabled
+            
+            cache_key = None
+            if use_cache and settings.transcript_cache_enabled:
+                cache = get_transcript_cache()
+                cache_key = TranscriptCache.make_key(
+                    audio_hash or compute_audio_hash(audio_path),
+                    self.model_size,
+                    language,
+                    task,
+                    *((f"vad={settings.vad_threshold_db}:{settings.vad_min_speech_ms}:"
+                       f"{settings.vad_min_silence_ms}:{settings.vad_pad_ms}:{settings.vad_gap_ms}",)
+                      if vad else ()),
+                    *((f"backend={self.backend}:{settings.whisper_compute_type}",)
+                      if self.backend != BACKEND_OPENAI else ())
+                )
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Transcript cache hit for {audio_path} ({cache.stats()})")
+                    return {**cached, "cached": True}
+            
             logger.info(f"Transcribing audio: {audio_path}")
             start_time = time.time()
             
-            # Transcribe
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                task=task,
-                fp16=False  # Use FP32 for CPU compatibility
-            )
+            # Ingested recordings are mapped from their PCM file, others decoded with ffmpeg
+            audio, pcm_path = open_decoded_audio(audio_path, audio_hash)
+            audio_seconds = len(audio) / SAMPLE_RATE
+            
+            regions = None
+            speech_seconds = audio_seconds
+            if vad:
+                # Only speech goes to Whisper; each window is compacted from the mapped file
+                regions = detect_speech_regions(audio)
+                if regions:
+                    speech_seconds = sum(end - start for start, end in regions) / SAMPLE_RATE
+                    logger.info(f"VAD kept {speech_seconds:.0f}s of speech out of {audio_seconds:.0f}s")
+                else:
+                    # A quiet or low-gain recording can stay below the fixed threshold
+                    # throughout: let Whisper hear all of it rather than return nothing
+                    logger.warning(
+                        f"VAD found no speech above {settings.vad_threshold_db} dBFS, "
+                        f"transcribing the full {audio_seconds:.0f}s"
+                    )
+                    regions = None
+            
+            if parallel is None:
+                parallel = (
+                    settings.whisper_parallel
+                    and speech_seconds >= settings.whisper_parallel_min_seconds
+                )
+            
+            inference_start = time.time()
+            if len(audio) == 0:
+                result = {"text": "", "language": language, "segments": []}
+            elif parallel:
+                from .parallel_transcription import get_parallel_transcriber
+                result = get_parallel_transcriber().transcribe(
+                    audio, language=language, task=task, pcm_path=pcm_path, regions=regions
+                )
+            else:
+                # One window at a time: only the window in flight is converted to float32
+                from .parallel_transcription import transcribe_sequential
+                result = transcribe_sequential(
+                    self._load_model(), audio, language=language, task=task, regions=regions
+                )
             
             transcription_time = time.time() - start_time
             
+            if len(audio):
+                inference_time = time.time() - inference_start
+                metrics = get_metrics()
+                metrics.whisper_seconds.observe(inference_time, model=self.model_size, backend=self.backend)
+                metrics.whisper_realtime_factor.observe(
+                    inference_time / audio_seconds, model=self.model_size, backend=self.backend
+                )
+            
             logger.info(f"Transcription completed in {transcription_time:.2f}s")
             
-            return {
+            transcription = {
                 "text": result["text"].strip(),
                 "language": result.get("language", language),
                 "segments": result.get("segments", []),
                 "duration": transcription_time,
-                "model": self.model_size
+                "model": self.model_size,
+                "backend": self.backend,
+                "speech_seconds": speech_seconds if regions is not None else None
             }
             
+            # An empty transcript after VAD may only mean the threshold missed the
+            # speech: keep it out of the cache so a retry with other settings can fix it
+            vad_emptied = regions is not None and not transcription["text"]
+            if cache_key is not None and not vad_emptied:
+                get_transcript_cache().put(cache_key, transcription)
+            
+            return transcription
+            
         except FileNotFoundError as e:
             logger.error(f"File not found: {e}")
             raise
@@ -87,31 +174,59 @@ class TranscriptionService:
             logger.error(f"Transcription failed: {e}")
             raise Exception(f"Failed to transcribe audio: {str(e)}")
     
+    def transcribe_samples(
+        self,
+        audio,
+        language: str = "en",
+        task: str = "transcribe",
+        initial_prompt: Optional[str] = None
+    ) -> Dict[str, any]:
+        """Transcribe in-memory samples (no cache, no chunking).
+        
+        Used for short windows, e.g. live sessions.
+        
+        Args:
+            audio: 16 kHz mono float32 samples
+            language: Language code
+            task: 'transcribe' or 'translate'
+            initial_prompt: Preceding text, for continuity across windows
+            
+        Returns:
+            Raw Whisper result (text, segments with window-relative times)
+        """
+        return self._load_model().transcribe(
+            audio,
+            language=language,
+            task=task,
+            initial_prompt=initial_prompt,
+            condition_on_previous_text=False,
+            fp16=False
+        )
+    
     def transcribe_with_timestamps(
         self,
         audio_path: str,
-        language: str = "en"
+        language: str = "en",
+        audio_hash: Optional[str] = None
     ) -> Dict[str, any]:
         """Transcribe with detailed timestamps.
         
         Args:
             audio_path: Path to audio file
             language: Language code
+            audio_hash: SHA-256 of the file, to use its ingested PCM
             
         Returns:
             Dict with transcription and segment timestamps
         """
         try:
-            self._load_model()
+            model = self._load_model()
             
             logger.info(f"Transcribing with timestamps: {audio_path}")
             
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                word_timestamps=True,
-                fp16=False
-            )
+            audio, _ = open_decoded_audio(audio_path, audio_hash)
+            from .parallel_transcription import transcribe_sequential
+            result = transcribe_sequential(model, audio, language=language, word_timestamps=True)
             
             # Format segments with timestamps
             formatted_segments = []
@@ -134,15 +249,18 @@ class TranscriptionService:
             logger.error(f"Transcription with timestamps failed: {e}")
             raise Exception(f"Failed to transcribe with timestamps: {str(e)}")
     
-    def get_audio_duration(self, audio_path: str) -> float:
+    def get_audio_duration(self, audio_path: str, audio_hash: Optional[str] = None) -> float:
         """Get audio file duration in seconds.
         
         Args:
             audio_path: Path to audio file
+            audio_hash: SHA-256 of the file; ingested recordings skip decoding
             
         Returns:
             Duration in seconds
         """
+        if audio_hash and pcm_path_for(audio_hash).exists():
+            return pcm_duration(pcm_path_for(audio_hash))
         try:
             import librosa
             duration = librosa.get_duration(path=audio_path)
@@ -157,17 +275,20 @@ class TranscriptionService:
             return 0.0
 
 
-# Singleton instance
-_transcription_service: Optional[TranscriptionService] = None
+# Service instances per model size (models themselves live in the registry)
+_transcription_services: Dict[str, TranscriptionService] = {}
 
 
-def get_transcription_service() -> TranscriptionService:
+def get_transcription_service(model_size: Optional[str] = None) -> TranscriptionService:
     """Get or create transcription service instance.
     
+    Args:
+        model_size: Whisper model size (defaults to settings.whisper_model)
+    
     Returns:
         TranscriptionService instance
     """
-    global _transcription_service
-    if _transcription_service is None:
-        _transcription_service = TranscriptionService()
-    return _transcription_service
+    model_size = model_size or settings.whisper_model
+    if model_size not in _transcription_services:
+        _transcription_services[model_size] = TranscriptionService(model_size)
+    return _transcription_services[model_size]
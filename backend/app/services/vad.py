@@ -0,0 +1,191 @@
+"""Voice activity detection: skip silence before Whisper.
+
+Consultations contain long stretches without speech (examination,
+typing, waiting). Whisper still decodes every 30 s window of them and
+its no-speech check only discards the text afterwards. An energy VAD
+finds the speech regions first; only those are concatenated and
+transcribed, and segment timestamps are mapped back to the recording.
+
+Regions are detected once on the whole recording (blockwise, so a
+memory-mapped recording is not copied) and compacted one transcription
+window at a time with clip_regions.
+"""
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from .audio import SAMPLE_RATE, frame_energy_db, to_float32
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+VAD_FRAME_MS = 30
+
+
+@dataclass
+class SpeechTimeline:
+    """Where each speech region of a recording sits in the compacted audio."""
+    regions: List[Tuple[int, int]]  # sample ranges in the original recording
+    offsets: List[int]  # start of each region in the compacted audio
+    total_samples: int  # length of the original recording
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.regions) / SAMPLE_RATE
+
+    @property
+    def total_seconds(self) -> float:
+        return self.total_samples / SAMPLE_RATE
+
+    def to_original(self, seconds: float) -> float:
+        """Map a time in the compacted audio to the original recording.
+
+        Times falling in the gap after a region map to the end of that region.
+        """
+        if not self.regions:
+            return seconds
+        position = int(round(seconds * SAMPLE_RATE))
+        i = max(bisect.bisect_right(self.offsets, position) - 1, 0)
+        start, end = self.regions[i]
+        return (start + min(max(position - self.offsets[i], 0), end - start)) / SAMPLE_RATE
+
+
+def detect_speech_regions(
+    audio: np.ndarray,
+    threshold_db: Optional[float] = None,
+    min_speech_ms: Optional[int] = None,
+    min_silence_ms: Optional[int] = None,
+    pad_ms: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """Find the regions of a recording that contain speech.
+
+    Frames louder than the threshold count as speech. Pauses shorter than
+    ``min_silence_ms`` are bridged so sentences stay whole, bursts shorter
+    than ``min_speech_ms`` (clicks, bumps) are dropped, and every region
+    is padded so word onsets and endings are not clipped.
+
+    Args:
+        audio: Mono samples at SAMPLE_RATE (float, or int16 PCM)
+        threshold_db: Speech threshold in dBFS (defaults to settings.vad_threshold_db)
+        min_speech_ms: Shortest region kept
+        min_silence_ms: Shortest pause that splits two regions
+        pad_ms: Context added on each side of a region
+
+    Returns:
+        Sorted, disjoint (start, end) sample ranges
+    """
+    threshold_db = threshold_db if threshold_db is not None else settings.vad_threshold_db
+    min_speech_ms = min_speech_ms if min_speech_ms is not None else settings.vad_min_speech_ms
+    min_silence_ms = min_silence_ms if min_silence_ms is not None else settings.vad_min_silence_ms
+    pad_ms = pad_ms if pad_ms is not None else settings.vad_pad_ms
+
+    energy = frame_energy_db(audio, VAD_FRAME_MS)
+    if len(energy) == 0:
+        return []
+
+    # Runs of speech frames as [start, end) frame indices
+    speech = np.concatenate(([False], energy > threshold_db, [False]))
+    edges = np.flatnonzero(speech[1:] != speech[:-1]).reshape(-1, 2)
+
+    runs: List[List[int]] = []
+    for start, end in edges:
+        if runs and (start - runs[-1][1]) * VAD_FRAME_MS < min_silence_ms:
+            runs[-1][1] = int(end)
+        else:
+            runs.append([int(start), int(end)])
+
+    frame_len = SAMPLE_RATE * VAD_FRAME_MS // 1000
+    pad = SAMPLE_RATE * pad_ms // 1000
+    regions: List[Tuple[int, int]] = []
+    for start, end in runs:
+        if (end - start) * VAD_FRAME_MS < min_speech_ms:
+            continue
+        region_start = max(start * frame_len - pad, 0)
+        region_end = min(end * frame_len + pad, len(audio))
+        if regions and region_start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], region_end)
+        else:
+            regions.append((region_start, region_end))
+    return regions
+
+
+def compact_speech(
+    audio: np.ndarray,
+    regions: List[Tuple[int, int]],
+    gap_ms: Optional[int] = None
+) -> Tuple[np.ndarray, SpeechTimeline]:
+    """Concatenate speech regions, separated by short silent gaps.
+
+    The gaps keep Whisper from gluing the last word of one region to the
+    first word of the next.
+
+    Args:
+        audio: Mono samples at SAMPLE_RATE (float, or int16 PCM)
+        regions: Speech regions from detect_speech_regions
+        gap_ms: Silence inserted between regions (defaults to settings.vad_gap_ms)
+
+    Returns:
+        (float32 samples of the speech only, timeline to map times back)
+    """
+    gap_ms = gap_ms if gap_ms is not None else settings.vad_gap_ms
+    gap = np.zeros(SAMPLE_RATE * gap_ms // 1000, dtype=np.float32)
+
+    pieces = []
+    offsets = []
+    position = 0
+    for i, (start, end) in enumerate(regions):
+        if i:
+            pieces.append(gap)
+            position += len(gap)
+        offsets.append(position)
+        pieces.append(to_float32(audio[start:end]))
+        position += end - start
+
+    samples = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return samples, SpeechTimeline(regions=list(regions), offsets=offsets, total_samples=len(audio))
+
+
+def clip_regions(regions: List[Tuple[int, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Restrict speech regions to the window [start, end) of a recording.
+
+    Args:
+        regions: Speech regions of the whole recording
+        start: First sample of the window
+        end: Sample after the window
+
+    Returns:
+        Regions overlapping the window, as sample ranges relative to ``start``
+    """
+    return [
+        (max(region_start, start) - start, min(region_end, end) - start)
+        for region_start, region_end in regions
+        if region_start < end and region_end > start
+    ]
+
+
+def remap_segments(segments: List[Dict], timeline: SpeechTimeline) -> List[Dict]:
+    """Move Whisper segments (and words) from compacted to original time.
+
+    Args:
+        segments: Segments of the compacted audio
+        timeline: Timeline returned by compact_speech
+
+    Returns:
+        Segments with timestamps on the original recording
+    """
+    remapped = []
+    for segment in segments:
+        shifted = dict(segment)
+        shifted["start"] = timeline.to_original(segment["start"])
+        shifted["end"] = timeline.to_original(segment["end"])
+        if segment.get("words"):
+            shifted["words"] = [
+                {**word, "start": timeline.to_original(word["start"]), "end": timeline.to_original(word["end"])}
+                for word in segment["words"]
+            ]
+        remapped.append(shifted)
+    return remapped
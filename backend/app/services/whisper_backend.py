@@ -0,0 +1,147 @@
+"""Whisper inference backends behind one interface.
+
+``openai`` runs the reference PyTorch implementation (FP32 on CPU).
+``faster`` runs faster-whisper on CTranslate2, with int8 weights by
+default, which is several times faster on CPU for the same models.
+
+Loaded models of both backends expose openai-whisper's
+``transcribe(audio, **options)`` and return its result schema (text,
+language, segments with optional words), so services do not need to
+know which one is in use.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+BACKEND_OPENAI = "openai"
+BACKEND_FASTER = "faster"
+WHISPER_BACKENDS = (BACKEND_OPENAI, BACKEND_FASTER)
+
+
+class FasterWhisperModel:
+    """faster-whisper model with openai-whisper's ``transcribe`` signature."""
+
+    backend = BACKEND_FASTER
+
+    def __init__(self, model: Any, compute_type: str):
+        self.model = model
+        self.compute_type = compute_type
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+        initial_prompt: Optional[str] = None,
+        condition_on_previous_text: bool = True,
+        temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        compression_ratio_threshold: Optional[float] = 2.4,
+        logprob_threshold: Optional[float] = -1.0,
+        no_speech_threshold: Optional[float] = 0.6,
+        beam_size: Optional[int] = None,
+        best_of: Optional[int] = None,
+        **ignored
+    ) -> Dict[str, Any]:
+        """Transcribe 16 kHz mono float32 samples.
+
+        Decoding options default to openai-whisper's ``transcribe`` (greedy
+        search, temperature fallback), so both backends decode the same
+        way. PyTorch-only options such as ``fp16`` and ``verbose`` are
+        ignored.
+
+        Returns:
+            Dict with 'text', 'language' and 'segments' like openai-whisper
+        """
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            beam_size=beam_size or 1,
+            best_of=best_of or 5,
+            word_timestamps=word_timestamps,
+            initial_prompt=initial_prompt,
+            condition_on_previous_text=condition_on_previous_text,
+            temperature=temperature,
+            compression_ratio_threshold=compression_ratio_threshold,
+            log_prob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            vad_filter=False  # silence is removed upstream (app.services.vad)
+        )
+        # Segments are generated lazily: decoding happens while iterating
+        converted = [_convert_segment(segment) for segment in segments]
+        return {
+            "text": "".join(segment["text"] for segment in converted),
+            "language": info.language,
+            "segments": converted,
+        }
+
+
+def _convert_segment(segment: Any) -> Dict[str, Any]:
+    """faster-whisper Segment -> openai-whisper segment dict."""
+    converted = {
+        "id": segment.id,
+        "seek": segment.seek,
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+        "tokens": list(segment.tokens),
+        "temperature": segment.temperature,
+        "avg_logprob": segment.avg_logprob,
+        "compression_ratio": segment.compression_ratio,
+        "no_speech_prob": segment.no_speech_prob,
+    }
+    if segment.words:
+        converted["words"] = [
+            {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+            for word in segment.words
+        ]
+    return converted
+
+
+def load_whisper_model(
+    model_size: str,
+    backend: Optional[str] = None,
+    num_threads: int = 0,
+    device: Optional[str] = None
+) -> Any:
+    """Load a Whisper model with the given backend.
+
+    Args:
+        model_size: Model size (tiny, base, small, medium, large...)
+        backend: 'openai' or 'faster' (defaults to settings.whisper_backend)
+        num_threads: CPU threads for inference (0 = library default)
+        device: 'cpu' or 'cuda' (auto-detected if None)
+
+    Returns:
+        Model exposing openai-whisper's ``transcribe``
+    """
+    backend = backend or settings.whisper_backend
+    if backend == BACKEND_OPENAI:
+        import torch
+        import whisper
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        return whisper.load_model(model_size, device=device)
+
+    if backend == BACKEND_FASTER:
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("faster-whisper is not installed (pip install faster-whisper)")
+        model = WhisperModel(
+            model_size,
+            device=device or "auto",
+            compute_type=settings.whisper_compute_type,
+            cpu_threads=num_threads
+        )
+        return FasterWhisperModel(model, settings.whisper_compute_type)
+
+    raise ValueError(f"Unknown Whisper backend: {backend} (expected one of {', '.join(WHISPER_BACKENDS)})")
+
@@ -0,0 +1,180 @@
+"""Incremental parsing of JSON objects produced token by token."""
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+class IncrementalJSONObjectParser:
+    """Emit the top-level members of a JSON object as soon as each one closes.
+
+    LLMs stream their answer a few characters at a time. Feeding those
+    fragments to this parser yields ``(key, value)`` pairs the moment a
+    member's value is complete (at the following ``,`` or the closing
+    ``}``), without waiting for the whole document. Text before the first
+    ``{`` (e.g. "Here is the note:") is ignored, as is anything after the
+    object closes.
+    """
+
+    def __init__(self):
+        """Initialize parser state."""
+        self.buffer = ""
+        self.done = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume a fragment of the stream.
+
+        Args:
+            text: Next fragment
+
+        Returns:
+            Members completed by this fragment, in document order
+        """
+        self.buffer += text
+        members = []
+
+        while self._pos < len(self.buffer) and not self.done:
+            ch = self.buffer[self._pos]
+
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._depth = 1
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._expecting_key():
+                        self._key = json.loads(self.buffer[self._key_start:self._pos + 1])
+                self._pos += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._expecting_key():
+                    self._key_start = self._pos
+            elif ch == ':' and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = self._pos + 1
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_member(members)
+                    self.done = True
+            elif ch == ',' and self._depth == 1:
+                self._close_member(members)
+
+            self._pos += 1
+
+        return members
+
+    def _expecting_key(self) -> bool:
+        """True when the parser sits between members of the top-level object."""
+        return self._depth == 1 and self._key is None and self._value_start is None
+
+    def _close_member(self, members: List[Tuple[str, Any]]) -> None:
+        """Decode the value ending at the current position and reset member state."""
+        if self._key is not None and self._value_start is not None:
+            raw = self.buffer[self._value_start:self._pos].strip()
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                value = raw
+            members.append((self._key, value))
+
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+
+class SchemaViolation(ValueError):
+    """Raised when streamed JSON cannot match the expected schema."""
+
+
+class StreamingSchemaValidator:
+    """Check a streamed JSON object against a pydantic model as it arrives.
+
+    Each top-level member is validated the moment the underlying
+    IncrementalJSONObjectParser closes it, so a wrong value type is
+    caught mid-generation and the caller can abort and retry instead of
+    paying for the rest of the answer. Unknown keys are ignored, as
+    pydantic does when the full object is validated at once.
+    """
+
+    def __init__(self, model: Type[BaseModel], max_preamble_chars: int = 200):
+        """Initialize validator.
+
+        Args:
+            model: Pydantic model the object must match
+            max_preamble_chars: Text tolerated before the opening ``{``
+        """
+        self.model = model
+        self.max_preamble_chars = max_preamble_chars
+        self.parser = IncrementalJSONObjectParser()
+        self.values: Dict[str, Any] = {}
+        self._adapters = {
+            name: TypeAdapter(field.annotation)
+            for name, field in model.model_fields.items()
+        }
+
+    @property
+    def buffer(self) -> str:
+        """Raw text received so far."""
+        return self.parser.buffer
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume a fragment of the stream.
+
+        Args:
+            text: Next fragment
+
+        Returns:
+            Members completed by this fragment, in document order
+
+        Raises:
+            SchemaViolation: The object can no longer match the schema
+        """
+        members = self.parser.feed(text)
+        if not self.parser._started and len(self.parser.buffer) > self.max_preamble_chars:
+            raise SchemaViolation("No JSON object in the response")
+
+        for name, value in members:
+            adapter = self._adapters.get(name)
+            if adapter is None:
+                continue
+            try:
+                self.values[name] = adapter.validate_python(value)
+            except ValidationError as e:
+                raise SchemaViolation(f"Invalid field '{name}': {e.errors()[0]['msg']}")
+        return members
+
+    def finish(self) -> BaseModel:
+        """Validate the complete object once the stream has ended.
+
+        Returns:
+            Model instance
+
+        Raises:
+            SchemaViolation: The object is incomplete or missing fields
+        """
+        if not self.parser.done:
+            raise SchemaViolation("JSON object not closed (response truncated?)")
+        try:
+            return self.model.model_validate(self.values)
+        except ValidationError as e:
+            raise SchemaViolation(f"Invalid note: {e.errors()[0]['msg']} ({e.errors()[0]['loc']})")
@@ -0,0 +1,296 @@
+"""Prometheus metric types shared by the API and Hypocrate.
+
+Both applications record the same pipeline collectors (Whisper, NER,
+SOAP, Ollama, model loads) under the same ``scribe_*`` names, so one
+dashboard covers both. Each application subclasses PipelineMetrics to
+add its own collectors and decides how the registry is exported.
+"""
+import json
+import logging
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets (seconds unless stated otherwise)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 100, 150, 200)
+REALTIME_FACTOR_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5)
+
+# Ollama reports a few milliseconds of load_duration for a resident model:
+# anything above this means the request loaded (or reloaded) the model
+OLLAMA_LOAD_EVENT_SECONDS = 0.5
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    """Render ``{name="value",...}`` (empty when there are no labels)."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value (integers without a trailing .0)."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named metric and its values per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        """Initialize metric.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names, given as keyword arguments when recording
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def values(self) -> Dict[LabelValues, Any]:
+        """Copy of the values per label combination."""
+        with self._lock:
+            return dict(self._values)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state, for snapshot files."""
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.documentation, "labelnames": list(self.labelnames), "values": values}
+
+
+class Counter(Metric):
+    """Monotonic total (requests, tokens, model loads)."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Current value (in-flight requests, queue depth)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observations (latencies, speeds) over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine registry snapshots of several processes.
+
+    Counters, histograms and gauges are summed per label combination
+    (gauges count things like in-flight requests, which add up across
+    processes).
+
+    Args:
+        snapshots: Registry snapshots ({metric name: metric snapshot})
+
+    Returns:
+        One snapshot of the same shape
+    """
+    merged: Dict[str, Any] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "values": {}})
+            if metric["kind"] == "histogram" and metric.get("buckets") != target.get("buckets"):
+                logger.warning(f"Skipping {name} snapshot with different buckets")
+                continue
+            for key, value in metric["values"]:
+                key = tuple(key)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = json.loads(json.dumps(value))
+                elif metric["kind"] == "histogram":
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                    current[2] += value[2]
+                else:
+                    target["values"][key] = current + value
+    for metric in merged.values():
+        metric["values"] = [[list(key), value] for key, value in metric["values"].items()]
+    return merged
+
+
+def render_snapshot(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labelnames = metric["labelnames"]
+        for key, value in sorted(metric["values"], key=lambda item: item[0]):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(metric["buckets"], counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, inf)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class PipelineMetrics:
+    """Registry holding the collectors common to both applications.
+
+    Collectors are attributes, e.g.
+    ``metrics.whisper_seconds.observe(12.3, model="base", backend="openai")``.
+    """
+
+    def __init__(self):
+        """Initialize the shared collectors."""
+        self._metrics: Dict[str, Metric] = {}
+
+        # Audio, transcription and extraction
+        self.decode_seconds = self._add(Histogram(
+            "scribe_audio_decode_seconds", "ffmpeg decode of a recording to 16 kHz PCM"))
+        self.whisper_seconds = self._add(Histogram(
+            "scribe_whisper_seconds", "Whisper inference time per recording", ("model", "backend")))
+        self.whisper_realtime_factor = self._add(Histogram(
+            "scribe_whisper_realtime_factor", "Whisper inference time divided by audio duration",
+            ("model", "backend"), REALTIME_FACTOR_BUCKETS))
+        self.ner_seconds = self._add(Histogram(
+            "scribe_ner_seconds", "Medical entity extraction time per transcript"))
+        self.soap_attempts = self._add(Counter(
+            "scribe_soap_attempts_total",
+            "SOAP notes by LLM calls made and whether the last one matched the schema",
+            ("attempt", "valid")))
+
+        # LLM (Ollama)
+        self.llm_request_seconds = self._add(Histogram(
+            "scribe_llm_request_seconds", "Ollama request time, queueing excluded", ("model", "mode")))
+        self.llm_queue_seconds = self._add(Histogram(
+            "scribe_llm_queue_seconds", "Wait for a free Ollama request slot", ("model",)))
+        self.llm_ttft_seconds = self._add(Histogram(
+            "scribe_llm_time_to_first_token_seconds",
+            "Time to first token: measured when streaming, Ollama load + prompt evaluation otherwise",
+            ("model", "mode")))
+        self.llm_tokens_per_second = self._add(Histogram(
+            "scribe_llm_tokens_per_second", "Generation speed reported by Ollama (eval_count / eval_duration)",
+            ("model",), TOKENS_PER_SECOND_BUCKETS))
+        self.llm_tokens = self._add(Counter(
+            "scribe_llm_tokens_total", "Tokens evaluated (prompt) and generated (completion) by Ollama",
+            ("model", "type")))
+        self.llm_in_flight = self._add(Gauge(
+            "scribe_llm_requests_in_flight", "Ollama requests being generated", ("model",)))
+        self.llm_waiting = self._add(Gauge(
+            "scribe_llm_requests_waiting", "Ollama requests waiting for a slot", ("model",)))
+
+        # Models
+        self.model_loads = self._add(Counter(
+            "scribe_model_loads_total", "Model loads (Whisper in a process, LLM in Ollama)", ("kind", "model")))
+        self.model_load_seconds = self._add(Histogram(
+            "scribe_model_load_seconds", "Model load time", ("kind", "model")))
+
+    def _add(self, metric: Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State of every collector of this registry."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def observe_llm_response(self, model: str, mode: str, response: Dict[str, Any]) -> None:
+        """Record Ollama's counters for one request.
+
+        Args:
+            model: Model name
+            mode: 'chat' or 'stream'
+            response: Final response (or stream stats) with Ollama's *_duration
+                (nanoseconds) and *_count fields
+        """
+        load = (response.get("load_duration") or 0) / 1e9
+        prompt_eval = (response.get("prompt_eval_duration") or 0) / 1e9
+        eval_seconds = (response.get("eval_duration") or 0) / 1e9
+        eval_count = response.get("eval_count") or 0
+
+        if mode != "stream":
+            self.llm_ttft_seconds.observe(load + prompt_eval, model=model, mode=mode)
+        if eval_count and eval_seconds:
+            self.llm_tokens_per_second.observe(eval_count / eval_seconds, model=model)
+        self.llm_tokens.inc(response.get("prompt_eval_count") or 0, model=model, type="prompt")
+        self.llm_tokens.inc(eval_count, model=model, type="completion")
+        if load >= OLLAMA_LOAD_EVENT_SECONDS:
+            self.model_loads.inc(kind="ollama", model=model)
+            self.model_load_seconds.observe(load, kind="ollama", model=model)
+
+    def render(self) -> str:
+        """This registry in the Prometheus text exposition format."""
+        return render_snapshot(self.snapshot())
@@ -0,0 +1,10 @@
+"""Token count estimates for prompts sent to the local LLM."""
+import math
+
+# Rough size of a Llama/Mistral token in English text; errs on the large side
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,351 @@
+"""Worker pool processing queued transcription and note generation jobs.
+
+Run alongside the API server:
+
+    cd backend && python -m app.worker
+
+Each stage gets its own set of processes so that slow Whisper jobs never
+starve note generation (and vice versa). Every process owns its database
+session, its models and its own lease heartbeat.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Callable, Dict, List
+
+from .config import get_settings
+from .database import SessionLocal, init_db
+from .models.job import Job
+from .models.recording import Recording
+from .services.cpu_config import apply_cpu_plan, plan_cpu
+from .services.metrics import get_metrics
+from .services.model_registry import preload_models
+from .services.job_queue import (
+    get_job_queue,
+    STAGE_TRANSCRIPTION,
+    STAGE_NOTE_GENERATION,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class JobAbandoned(Exception):
+    """Raised when a worker loses the lease on the job it is running."""
+
+
+def handle_transcription(
+    db,
+    recording: Recording,
+    commit_progress: Callable[[], None],
+    commit_result: Callable[[], None]
+) -> None:
+    """Ingest and transcribe a recording, then queue its note generation.
+
+    Args:
+        db: Database session owned by the worker
+        recording: Recording to transcribe
+        commit_progress: Commits the session while the job's lease is
+            held (raises JobAbandoned if it was lost)
+        commit_result: Commits the session together with the job's
+            completion (raises JobAbandoned if the lease was lost)
+    """
+    from .services.audio_ingest import ingest_recording
+    from .services.transcription import get_transcription_service
+
+    recording.status = "transcribing"
+    recording.error_message = None
+    commit_progress()
+
+    # Decode once to PCM (and archive as Opus if enabled); sets the real duration
+    ingest_recording(db, recording, commit=commit_progress)
+
+    transcription_service = get_transcription_service()
+    result = transcription_service.transcribe_audio(
+        recording.audio_file_path,
+        language="en",
+        audio_hash=recording.audio_sha256
+    )
+
+    recording.transcript = result['text']
+    recording.transcript_language = result['language']
+    recording.status = "transcribed"
+    get_job_queue().enqueue(db, recording.id, STAGE_NOTE_GENERATION)
+    commit_result()
+
+    logger.info(f"Transcription completed for recording {recording.id}")
+
+
+def handle_note_generation(
+    db,
+    recording: Recording,
+    commit_progress: Callable[[], None],
+    commit_result: Callable[[], None]
+) -> None:
+    """Generate and persist the SOAP note of a transcribed recording.
+
+    Args:
+        db: Database session owned by the worker
+        recording: Recording with a transcript
+        commit_progress: Commits the session while the job's lease is
+            held (raises JobAbandoned if it was lost)
+        commit_result: Commits the session together with the job's
+            completion (raises JobAbandoned if the lease was lost)
+    """
+    from .services.medical_notes import get_medical_note_service, save_medical_note
+
+    if not recording.transcript:
+        raise ValueError("Recording has no transcript")
+
+    recording.status = "processing"
+    commit_progress()
+
+    medical_service = get_medical_note_service()
+    note_result = medical_service.generate_soap_note(recording.transcript)
+
+    save_medical_note(db, recording.id, note_result)
+    recording.status = "completed"
+    commit_result()
+
+    logger.info(f"Medical note generated for recording {recording.id}")
+
+
+STAGE_HANDLERS: Dict[str, Callable] = {
+    STAGE_TRANSCRIPTION: handle_transcription,
+    STAGE_NOTE_GENERATION: handle_note_generation,
+}
+
+
+def _heartbeat_loop(job_id: int, worker_id: str, stop: threading.Event, lost: threading.Event) -> None:
+    """Keep the lease of a running job alive until ``stop`` is set."""
+    queue = get_job_queue()
+    interval = max(queue.lease_seconds / 3, 1)
+    while not stop.wait(interval):
+        if not queue.heartbeat(job_id, worker_id):
+            logger.warning(f"Worker {worker_id} lost lease on job {job_id}")
+            lost.set()
+            return
+
+
+def run_job(job_id: int, worker_id: str) -> None:
+    """Run one claimed job to completion, recording success or failure.
+
+    Args:
+        job_id: Claimed job ID
+        worker_id: Worker holding the lease
+    """
+    queue = get_job_queue()
+    stop_heartbeat = threading.Event()
+    lease_lost = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat_loop,
+        args=(job_id, worker_id, stop_heartbeat, lease_lost),
+        daemon=True
+    )
+    heartbeat.start()
+
+    db = SessionLocal()
+    recording = None
+
+    def commit_progress() -> None:
+        # Intermediate writes go through the lease too: once another
+        # worker owns the job, this one must not touch the recording
+        if lease_lost.is_set() or not queue.hold_in_session(db, job_id, worker_id):
+            raise JobAbandoned(f"Lease on job {job_id} lost while running")
+        db.commit()
+
+    def commit_result() -> None:
+        # Results and completion share one transaction: a worker that lost
+        # its lease commits nothing, the worker now owning the job does
+        if lease_lost.is_set() or not queue.complete_in_session(db, job_id, worker_id):
+            raise JobAbandoned(f"Lease on job {job_id} lost while running")
+        db.commit()
+
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        recording = db.query(Recording).filter(Recording.id == job.recording_id).first()
+        if not recording:
+            raise ValueError(f"Recording {job.recording_id} not found")
+
+        STAGE_HANDLERS[job.stage](db, recording, commit_progress, commit_result)
+
+    except JobAbandoned as e:
+        # Another worker owns the job now: discard this attempt's results
+        logger.error(str(e))
+        db.rollback()
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        db.rollback()
+        will_retry = queue.fail(job_id, worker_id, str(e))
+        if will_retry is None:
+            # The job was reclaimed: its recording belongs to the new owner
+            logger.error(f"Lease on job {job_id} lost, leaving recording untouched")
+        elif recording is not None:
+            recording.status = "queued" if will_retry else "failed"
+            recording.error_message = str(e)
+            db.commit()
+    finally:
+        stop_heartbeat.set()
+        heartbeat.join(timeout=5)
+        db.close()
+
+
+def worker_loop(stage: str, slot: int, workers: int, stop_event) -> None:
+    """Main loop of a worker process: claim, run, repeat until stopped.
+
+    Args:
+        stage: Job stage handled by this process
+        slot: Index of this process within its stage
+        workers: Number of processes of this stage
+        stop_event: Shared event signalling shutdown
+    """
+    # Let the supervisor handle Ctrl+C; children stop via stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{stage}-{slot}"
+    queue = get_job_queue()
+    logger.info(f"Worker {worker_id} started")
+
+    if stage == STAGE_TRANSCRIPTION:
+        # Share the cores between transcription processes before any model loads
+        apply_cpu_plan(plan_cpu(workers, slot))
+
+    # The API's /metrics merges this process's snapshots
+    get_metrics().start_snapshot_writer()
+
+    if settings.model_preload_on_startup:
+        # Load this stage's models before claiming, so no job pays the load time
+        preload_models(
+            whisper=stage == STAGE_TRANSCRIPTION,
+            ollama=stage == STAGE_NOTE_GENERATION
+        )
+
+    while not stop_event.is_set():
+        try:
+            job_id = queue.claim(stage, worker_id)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} failed to claim job: {e}")
+            job_id = None
+
+        if job_id is None:
+            stop_event.wait(settings.job_poll_interval_seconds)
+            continue
+
+        run_job(job_id, worker_id)
+
+    get_metrics().write_snapshot()
+    logger.info(f"Worker {worker_id} stopped")
+
+
+class WorkerPool:
+    """Supervisor spawning and restarting per-stage worker processes."""
+
+    def __init__(self, concurrency: Dict[str, int]):
+        """Initialize worker pool.
+
+        Args:
+            concurrency: Number of processes per job stage
+        """
+        self.concurrency = concurrency
+        # spawn: each process loads its own models, no fork-inherited torch state
+        self.context = multiprocessing.get_context("spawn")
+        self.stop_event = self.context.Event()
+        self.processes: Dict[tuple, multiprocessing.Process] = {}
+
+    def _spawn(self, stage: str, slot: int) -> None:
+        """Start the worker process for a (stage, slot) pair."""
+        process = self.context.Process(
+            target=worker_loop,
+            args=(stage, slot, self.concurrency[stage], self.stop_event),
+            name=f"worker-{stage}-{slot}",
+            daemon=False
+        )
+        process.start()
+        self.processes[(stage, slot)] = process
+
+    def start(self) -> None:
+        """Start all worker processes."""
+        for stage, count in self.concurrency.items():
+            for slot in range(count):
+                self._spawn(stage, slot)
+        logger.info(f"Worker pool started: {self.concurrency}")
+
+    def supervise(self) -> None:
+        """Restart crashed workers and reap dead jobs until stopped."""
+        queue = get_job_queue()
+        while not self.stop_event.is_set():
+            for (stage, slot), process in list(self.processes.items()):
+                if not process.is_alive():
+                    logger.warning(f"Worker {process.name} exited with code {process.exitcode}, restarting")
+                    self._spawn(stage, slot)
+            try:
+                reaped = queue.reap_exhausted()
+                if reaped:
+                    logger.warning(f"Marked {reaped} abandoned job(s) as failed")
+            except Exception as e:
+                logger.error(f"Failed to reap jobs: {e}")
+            self.stop_event.wait(5)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Signal workers to stop and wait for their current job to finish."""
+        self.stop_event.set()
+        deadline = time.time() + timeout
+        for process in self.processes.values():
+            process.join(timeout=max(deadline - time.time(), 0))
+            if process.is_alive():
+                logger.warning(f"Terminating worker {process.name}")
+                process.terminate()
+
+
+def main(argv: List[str] = None) -> None:
+    """Entry point for ``python -m app.worker``."""
+    parser = argparse.ArgumentParser(description="Medical Scribe job worker pool")
+    parser.add_argument(
+        "--transcription",
+        type=int,
+        default=settings.worker_transcription_concurrency,
+        help="Number of transcription worker processes"
+    )
+    parser.add_argument(
+        "--notes",
+        type=int,
+        # One in-flight Ollama request per process: match OLLAMA_NUM_PARALLEL by default
+        default=settings.worker_note_concurrency or settings.ollama_max_concurrency,
+        help="Number of note generation worker processes"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    init_db()
+
+    pool = WorkerPool({
+        STAGE_TRANSCRIPTION: args.transcription,
+        STAGE_NOTE_GENERATION: args.notes,
+    })
+
+    def _shutdown(signum, frame):
+        logger.info("Shutting down worker pool...")
+        pool.stop_event.set()
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+
+    pool.start()
+    pool.supervise()
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark: peak memory of concurrent single-pass transcription workers,
+whole-recording float32 vs window-by-window from memory-mapped PCM
+
+Each worker runs the single-pass path of TranscriptionService.transcribe_audio
+on its own ingested (int16 PCM) recording:
+
+  whole     the previous single-pass path: the whole memmap converted to
+            float32 and handed to the model in one call
+  windowed  transcribe_sequential, the current single-pass path: split
+            points found blockwise on the memmap, then one
+            settings.whisper_chunk_seconds window converted at a time
+
+By default the model is a stand-in that walks its input in 30 s windows
+like Whisper but runs no inference, so only the audio buffers are
+measured; pass --whisper-model to run a real model (its own memory then
+adds the same amount to both modes). The parallel path is covered by
+bench_parallel_transcription.py.
+
+Usage:
+    python benchmarks/bench_audio_memmap.py --workers 4 --minutes 30
+    python benchmarks/bench_audio_memmap.py --workers 2 --minutes 10 --whisper-model tiny
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import numpy as np
+
+from app.services.audio import SAMPLE_RATE, frame_energy_db, to_float32
+from app.services.audio_ingest import open_pcm
+from app.services.parallel_transcription import transcribe_sequential, transcribe_window
+
+MB = 1024 * 1024
+
+# Whisper's input window
+WHISPER_WINDOW = 30 * SAMPLE_RATE
+
+
+def read_memory() -> dict:
+    """Current and peak memory of this process in bytes"""
+    values = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "VmHWM", "RssAnon", "RssFile"):
+                    values[key] = int(rest.split()[0]) * 1024
+    except OSError:
+        # No /proc (macOS): only the overall peak is available
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        values["VmHWM"] = peak if sys.platform == "darwin" else peak * 1024
+    return values
+
+
+class PeakSampler(threading.Thread):
+    """Samples anonymous and file-backed RSS to record their peaks"""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_anon = 0
+        self.peak_file = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            memory = read_memory()
+            self.peak_anon = max(self.peak_anon, memory.get("RssAnon", 0))
+            self.peak_file = max(self.peak_file, memory.get("RssFile", 0))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class WindowWalker:
+    """Stand-in for a Whisper model: reads its input 30 s at a time, no inference"""
+
+    def transcribe(self, audio, language=None, task="transcribe", **options):
+        for offset in range(0, len(audio), WHISPER_WINDOW):
+            frame_energy_db(audio[offset:offset + WHISPER_WINDOW])
+        return {"language": language, "segments": []}
+
+
+def worker(mode: str, path: str, whisper_model: str, results) -> None:
+    """Transcribe one recording with the given single-pass mode"""
+    if whisper_model:
+        from app.services.whisper_backend import load_whisper_model
+        model = load_whisper_model(whisper_model)
+    else:
+        model = WindowWalker()
+
+    # Measured from here: the model is already resident in both modes
+    baseline = read_memory()
+    sampler = PeakSampler()
+    sampler.start()
+    t0 = time.perf_counter()
+
+    audio = open_pcm(Path(path))
+    if mode == "whole":
+        transcribe_window(model, to_float32(audio), "en", "transcribe")
+    else:
+        transcribe_sequential(model, audio, language="en")
+
+    elapsed = time.perf_counter() - t0
+    sampler.stop()
+    memory = read_memory()
+    results.put({
+        "elapsed": elapsed,
+        "peak_rss": memory["VmHWM"] - baseline.get("VmRSS", 0),
+        "peak_anon": sampler.peak_anon - baseline.get("RssAnon", 0),
+        "peak_file": sampler.peak_file - baseline.get("RssFile", 0),
+    })
+
+
+def write_recording(path: Path, seconds: int, seed: int) -> None:
+    """Synthetic 16 kHz int16 recording, written a minute at a time"""
+    rng = np.random.default_rng(seed)
+    with open(path, "wb") as f:
+        for first in range(0, seconds, 60):
+            n = min(60, seconds - first) * SAMPLE_RATE
+            (rng.standard_normal(n) * 3000).astype("<i2").tofile(f)
+
+
+def run(mode: str, paths: list, whisper_model: str, context) -> dict:
+    """Start all workers at once and aggregate their measurements"""
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(mode, path, whisper_model, results))
+        for path in paths
+    ]
+    t0 = time.perf_counter()
+    for process in processes:
+        process.start()
+    measurements = []
+    while len(measurements) < len(processes):
+        try:
+            measurements.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                raise RuntimeError("A worker exited without reporting")
+    for process in processes:
+        process.join()
+    wall = time.perf_counter() - t0
+
+    return {
+        "wall": wall,
+        "peak_rss": sum(m["peak_rss"] for m in measurements),
+        "peak_anon": sum(m["peak_anon"] for m in measurements),
+        "peak_file": sum(m["peak_file"] for m in measurements),
+        "max_worker_rss": max(m["peak_rss"] for m in measurements),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent worker processes")
+    parser.add_argument("--minutes", type=float, default=30.0, help="Length of each recording")
+    parser.add_argument("--whisper-model", default="",
+                        help="Whisper model size to run (default: stand-in without inference)")
+    parser.add_argument("--dir", help="Where to write the synthetic PCM files (default: temp dir)")
+    args = parser.parse_args()
+
+    from app.config import get_settings
+    settings = get_settings()
+
+    print("⏱️  Single-pass transcription memory: whole float32 vs windowed memmap")
+    print("=" * 60)
+
+    seconds = int(args.minutes * 60)
+    n_samples = seconds * SAMPLE_RATE
+    workdir = Path(args.dir or tempfile.mkdtemp(prefix="bench_memmap_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for i in range(args.workers):
+        path = workdir / f"recording_{i}.pcm"
+        if not path.exists() or path.stat().st_size != n_samples * 2:
+            write_recording(path, seconds, seed=i)
+        paths.append(str(path))
+
+    print(f"🎧 {args.workers} recordings of {args.minutes:.0f} min, one per worker")
+    print(f"📁 PCM: {n_samples * 2 / MB:.0f} MB per recording, float32 in memory: {n_samples * 4 / MB:.0f} MB")
+    print(f"🪟 Window: {settings.whisper_chunk_seconds:.0f}s "
+          f"({settings.whisper_chunk_seconds * SAMPLE_RATE * 4 / MB:.0f} MB float32)")
+    print(f"🤖 Model: {args.whisper_model or 'stand-in (audio buffers only)'}")
+
+    context = multiprocessing.get_context("spawn")
+    summary = {}
+    for mode, icon in (("whole", "📦"), ("windowed", "🪟")):
+        stats = run(mode, paths, args.whisper_model, context)
+        summary[mode] = stats
+        print(f"\n{icon} {mode}: {stats['wall']:.1f}s")
+        print(f"   Peak RSS (sum over workers): {stats['peak_rss'] / MB:.0f} MB "
+              f"(largest worker {stats['max_worker_rss'] / MB:.0f} MB)")
+        print(f"   Anonymous memory: {stats['peak_anon'] / MB:.0f} MB")
+        print(f"   File-backed (page cache, shared and reclaimable): {stats['peak_file'] / MB:.0f} MB")
+
+    whole, windowed = summary["whole"], summary["windowed"]
+    print("\n" + "=" * 60)
+    if windowed["peak_anon"] > 0:
+        print(f"🚀 Anonymous memory: {whole['peak_anon'] / windowed['peak_anon']:.1f}x less windowed")
+    print(f"💾 Peak RSS: {whole['peak_rss'] / MB:.0f} MB -> {windowed['peak_rss'] / MB:.0f} MB")
+
+if __name__ == "__main__":
+    main()
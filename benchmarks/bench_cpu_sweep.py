@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark: transcription throughput for workers x threads combinations
+
+Every combination starts `workers` processes that apply the CPU plan of
+app.services.cpu_config (threads per process, optionally pinned cores),
+load their model, then pull recordings from a shared queue. Model load
+is excluded; throughput is reported in recordings per hour.
+
+Without --audio each "recording" is a synthetic encoder-sized workload
+(float32 matrix products through numpy's BLAS). With --audio every
+recording is a real Whisper transcription of that file.
+
+Usage:
+    python benchmarks/bench_cpu_sweep.py
+    python benchmarks/bench_cpu_sweep.py --workers 1 2 4 --threads 1 2 4 8 --pin
+    python benchmarks/bench_cpu_sweep.py --audio consult.wav --model base --recordings 16
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+# numpy is imported by the workers after their thread variables are set
+from app.services.cpu_config import apply_cpu_plan, available_cores, plan_cpu
+
+
+def synthetic_recording(steps: int, seed: int):
+    """Matrix products shaped like a Whisper base encoder layer (1500 frames x 512)"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((1500, 512), dtype=np.float32)
+    w1 = rng.standard_normal((512, 2048), dtype=np.float32) * 0.02
+    w2 = rng.standard_normal((2048, 512), dtype=np.float32) * 0.02
+    for _ in range(steps):
+        x = np.tanh((x @ w1) @ w2)
+    return float(x.sum())
+
+
+def worker(slot: int, workers: int, threads: int, pin: bool, args, jobs, barrier, results) -> None:
+    """Apply the CPU plan, load, then process recordings until the queue is empty"""
+    apply_cpu_plan(plan_cpu(workers, slot, threads=threads, pin=pin))
+
+    if args.audio:
+        from app.services.audio import load_audio
+        from app.services.whisper_backend import load_whisper_model
+        audio = load_audio(args.audio)
+        model = load_whisper_model(args.model, backend=args.backend, num_threads=threads, device="cpu")
+        model.transcribe(audio[:16000], language=args.language, fp16=False)
+
+        def process(job):
+            model.transcribe(audio, language=args.language, fp16=False)
+    else:
+        synthetic_recording(1, seed=slot)
+
+        def process(job):
+            synthetic_recording(args.steps, seed=job)
+
+    barrier.wait()
+    done = 0
+    while True:
+        try:
+            job = jobs.get(timeout=0.1)
+        except queue.Empty:
+            break
+        process(job)
+        done += 1
+    results.put(done)
+
+
+def run(workers: int, threads: int, pin: bool, args, context) -> float:
+    """Wall time for all recordings with this combination (load excluded)"""
+    jobs = context.Queue()
+    for job in range(args.recordings):
+        jobs.put(job)
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(slot, workers, threads, pin, args, jobs, barrier, results))
+        for slot in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    done = sum(results.get() for _ in processes)
+    wall = time.perf_counter() - t0
+    for process in processes:
+        process.join()
+    if done != args.recordings:
+        raise RuntimeError(f"Only {done}/{args.recordings} recordings processed")
+    return wall
+
+
+def powers_of_two(limit: int) -> list:
+    values = [1]
+    while values[-1] * 2 <= limit:
+        values.append(values[-1] * 2)
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts (default: powers of two up to cores)")
+    parser.add_argument("--threads", type=int, nargs="+", help="Threads per worker (default: powers of two)")
+    parser.add_argument("--pin", action="store_true", help="Also run every combination with pinned cores")
+    parser.add_argument("--recordings", type=int, default=8, help="Recordings processed per combination")
+    parser.add_argument("--steps", type=int, default=20, help="Synthetic workload size per recording")
+    parser.add_argument("--audio", help="Transcribe this file instead of the synthetic workload")
+    parser.add_argument("--model", default="base", help="Whisper model size (with --audio)")
+    parser.add_argument("--backend", default=None, help="Whisper backend: openai or faster (with --audio)")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    cores = len(available_cores())
+    worker_counts = args.workers or powers_of_two(cores)
+    thread_counts = args.threads or powers_of_two(cores)
+    # Keep oversubscribed combinations (up to 2x the cores) to show the collapse
+    combinations = [
+        (w, t, pin)
+        for w in worker_counts
+        for t in thread_counts
+        if w * t <= 2 * cores or (args.workers and args.threads)
+        for pin in ((False, True) if args.pin else (False,))
+    ]
+
+    print("⏱️  CPU sweep: workers x threads per worker")
+    print("=" * 60)
+    workload = f"Whisper {args.model} on {args.audio}" if args.audio else f"synthetic ({args.steps} steps)"
+    print(f"🖥️  {cores} cores available, {args.recordings} recordings per run, workload: {workload}")
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for workers, threads, pin in combinations:
+        wall = run(workers, threads, pin, args, context)
+        per_hour = args.recordings / wall * 3600
+        rows.append((workers, threads, pin, wall, per_hour))
+        flag = " (oversubscribed)" if workers * threads > cores else ""
+        print(f"   {workers:>2} workers x {threads:>2} threads{' pinned' if pin else '':7}: "
+              f"{wall:6.1f}s, {per_hour:8.0f} recordings/hour{flag}")
+
+    best = max(rows, key=lambda row: row[4])
+    worst = min(rows, key=lambda row: row[4])
+    print("\n" + "=" * 60)
+    print(f"🚀 Best: {best[0]} workers x {best[1]} threads{' pinned' if best[2] else ''} "
+          f"({best[4]:.0f} recordings/hour, {best[4] / worst[4]:.1f}x the worst)")
+    print(f"💡 WORKER_TRANSCRIPTION_CONCURRENCY={best[0]} CPU_THREADS_PER_WORKER={best[1]}"
+          f"{' CPU_PIN_WORKERS=True' if best[2] else ''}")
+
+
+if __name__ == "__main__":
+    main()
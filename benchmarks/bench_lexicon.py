@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: medication lookup with substring scans vs the compiled lexicon
+
+The previous extractor ran `term in text` for every lexicon entry, which
+is O(terms x text). The Aho-Corasick lexicon makes one pass over the text
+whatever the number of terms.
+
+Usage:
+    python benchmarks/bench_lexicon.py --terms 10000 --words 1500
+    python benchmarks/bench_lexicon.py --lexicon medications_full.tsv
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add hypocrate to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'hypocrate'))
+
+SYLLABLES = ["pa", "ra", "cé", "ta", "mol", "ibu", "pro", "fè", "ne", "amo", "xi", "cil",
+             "line", "oxa", "zé", "pam", "tri", "flu", "vir", "dol", "mab", "zole", "sar", "tan"]
+FILLER = ("le patient signale une douleur depuis trois jours avec fièvre et fatigue "
+          "on note une tension correcte et un examen clinique rassurant").split()
+
+
+def synthetic_terms(n: int, rng: random.Random) -> list:
+    """Noms de médicaments synthétiques uniques"""
+    terms = set()
+    while len(terms) < n:
+        terms.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    return sorted(terms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lexicon", help="Lexicon file (term[<TAB>canonical] per line) instead of synthetic terms")
+    parser.add_argument("--terms", type=int, default=10000, help="Synthetic lexicon size")
+    parser.add_argument("--words", type=int, default=1500, help="Words per transcript")
+    parser.add_argument("--transcripts", type=int, default=20)
+    parser.add_argument("--mentions", type=int, default=10, help="Drug mentions per transcript")
+    args = parser.parse_args()
+
+    from services.lexicon import Lexicon, read_lexicon_file
+
+    rng = random.Random(0)
+    if args.lexicon:
+        entries = read_lexicon_file(args.lexicon)
+    else:
+        entries = [(term, term) for term in synthetic_terms(args.terms, rng)]
+    terms = [term.lower() for term, _ in entries]
+
+    texts = []
+    for _ in range(args.transcripts):
+        words = [rng.choice(FILLER) for _ in range(args.words)]
+        for _ in range(args.mentions):
+            words[rng.randrange(len(words))] = rng.choice(terms)
+        texts.append(" ".join(words))
+
+    print("⏱️  Lexicon matching benchmark")
+    print("=" * 60)
+    print(f"📚 Terms: {len(terms)} - 📄 {len(texts)} transcripts x {args.words} words")
+
+    start = time.perf_counter()
+    lexicon = Lexicon(entries)
+    compile_time = time.perf_counter() - start
+    print(f"\n🔧 Automaton compiled once in {compile_time * 1000:.0f}ms")
+
+    start = time.perf_counter()
+    scan_found = []
+    for text in texts:
+        text_lower = text.lower()
+        scan_found.append({term for term in terms if term in text_lower})
+    scan_time = time.perf_counter() - start
+    print(f"1️⃣  Substring scan: {scan_time * 1000 / len(texts):.1f}ms per transcript")
+
+    start = time.perf_counter()
+    ac_found = [{match.canonical.lower() for match in lexicon.find(text)} for text in texts]
+    ac_time = time.perf_counter() - start
+    print(f"🚀 Aho-Corasick:    {ac_time * 1000 / len(texts):.1f}ms per transcript (x{scan_time / ac_time:.1f})")
+
+    # The scan also reports terms embedded in longer words; the lexicon only whole words
+    extra = sum(len(s - a) for s, a in zip(scan_found, ac_found))
+    missing = sum(len(a - s) for s, a in zip(scan_found, ac_found))
+    print(f"\n🔍 Matches only found by the substring scan (inside other words): {extra}")
+    print(f"🔍 Matches only found by the lexicon: {missing}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Hypocrate NER one text at a time vs nlp.pipe batches
+
+Usage:
+    python benchmarks/bench_ner_batch.py --transcripts archive/ --processes 1 2 4
+    python benchmarks/bench_ner_batch.py --synthetic 500
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add hypocrate to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'hypocrate'))
+
+SAMPLE_TRANSCRIPT = (
+    "Bonjour docteur, j'ai de la fièvre depuis trois jours et une toux sèche. "
+    "Je suis allergique à la pénicilline. Température 38,5, tension 13/8, pouls 92. "
+    "Je prends du paracétamol le soir. Le patient présente une pneumonie probable, "
+    "on va prescrire de l'azithromycine 500mg."
+)
+
+
+def load_texts(args) -> list:
+    """Transcriptions d'un répertoire (.txt) ou corpus synthétique"""
+    if args.transcripts:
+        return [p.read_text(encoding="utf-8") for p in sorted(Path(args.transcripts).glob("*.txt"))]
+    return [f"{SAMPLE_TRANSCRIPT} Consultation {i}." for i in range(args.synthetic)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcripts", help="Directory of .txt transcripts")
+    parser.add_argument("--synthetic", type=int, default=200, help="Synthetic documents when no directory is given")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--language", default="fr")
+    args = parser.parse_args()
+
+    from services.ner_medical import MedicalNERService
+
+    texts = load_texts(args)
+    print("⏱️  NER batch benchmark")
+    print("=" * 60)
+    print(f"📄 Documents: {len(texts)}")
+
+    service = MedicalNERService(language=args.language)
+    service._load_models()  # Load time excluded
+
+    start = time.perf_counter()
+    sequential = [service.extract_entities(text) for text in texts]
+    sequential_time = time.perf_counter() - start
+    print(f"\n1️⃣  One text at a time: {sequential_time:.2f}s ({len(texts) / sequential_time:.1f} docs/s)")
+
+    for n_process in args.processes:
+        batched = service.extract_entities_batch(texts, n_process=n_process, batch_size=args.batch_size)
+        stats = service.last_batch_stats
+        identical = sum(
+            {k: sorted(v) if isinstance(v, list) else v for k, v in a.items()}
+            == {k: sorted(v) if isinstance(v, list) else v for k, v in b.items()}
+            for a, b in zip(sequential, batched)
+        )
+        print(
+            f"🚀 nlp.pipe, {n_process} process(es): {stats['seconds']:.2f}s "
+            f"({stats['docs_per_second']:.1f} docs/s, x{sequential_time / stats['seconds']:.2f}) "
+            f"- {identical}/{len(texts)} identical"
+        )
+    print("\n(multi-process timings include spawning workers and loading their models)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass vs chunked parallel Whisper transcription
+
+Usage:
+    python benchmarks/bench_parallel_transcription.py path/to/consult.wav \
+        --model base --workers 4 --chunk-seconds 120
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+
+def warm_up_chunk(language: str) -> int:
+    """Transcribe one second of silence in a pool process and return its pid"""
+    import numpy as np
+    from app.services.audio import SAMPLE_RATE
+    from app.services.parallel_transcription import _transcribe_chunk
+    _transcribe_chunk(np.zeros(SAMPLE_RATE, dtype=np.float32), None, language, "transcribe")
+    return os.getpid()
+
+
+def warm_up_pool(transcriber, language: str) -> None:
+    """
+    Run warm-up chunks until every pool process has answered
+
+    With spawn, each process loads its model when it starts: a single
+    chunk would leave the others loading during the timed run.
+    """
+    pool = transcriber._get_pool()
+    ready = set()
+    while len(ready) < transcriber.workers:
+        futures = [pool.submit(warm_up_chunk, language) for _ in range(transcriber.workers)]
+        ready.update(future.result() for future in futures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Audio file to transcribe (long recordings show the difference)")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--workers", type=int, default=0, help="Pool size (0 = half the cores)")
+    parser.add_argument("--chunk-seconds", type=float, default=300.0)
+    parser.add_argument("--overlap-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    from app.services.audio import SAMPLE_RATE, load_audio
+    from app.services.transcription import TranscriptionService
+    from app.services.parallel_transcription import ParallelTranscriber, transcribe_sequential
+
+    print("⏱️  Whisper single-pass vs parallel benchmark")
+    print("=" * 60)
+
+    audio = load_audio(args.audio)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    print(f"🎧 Audio: {args.audio} ({audio_seconds:.1f}s)")
+
+    # Single pass, the same windows one after the other (model load excluded from timing)
+    service = TranscriptionService(model_size=args.model)
+    model = service._load_model()
+    start = time.perf_counter()
+    single = transcribe_sequential(
+        model,
+        audio,
+        language=args.language,
+        chunk_seconds=args.chunk_seconds,
+        overlap_seconds=args.overlap_seconds
+    )
+    single_time = time.perf_counter() - start
+    print(f"\n1️⃣  Single pass: {single_time:.1f}s (RTF {single_time / audio_seconds:.3f})")
+
+    # Parallel (pool warm-up excluded: models load once per process, in every process)
+    transcriber = ParallelTranscriber(
+        model_size=args.model,
+        workers=args.workers or None,
+        chunk_seconds=args.chunk_seconds,
+        overlap_seconds=args.overlap_seconds
+    )
+    warm_up_pool(transcriber, args.language)
+    start = time.perf_counter()
+    parallel = transcriber.transcribe(audio, language=args.language)
+    parallel_time = time.perf_counter() - start
+    transcriber.shutdown()
+    print(f"2️⃣  Parallel ({transcriber.workers} workers x {transcriber.threads_per_worker} threads): "
+          f"{parallel_time:.1f}s (RTF {parallel_time / audio_seconds:.3f})")
+
+    similarity = difflib.SequenceMatcher(None, single["text"].split(), parallel["text"].split()).ratio()
+
+    print("\n" + "=" * 60)
+    print(f"🚀 Speedup: {single_time / parallel_time:.2f}x")
+    print(f"📝 Word-level similarity to single pass: {similarity:.3f}")
+    print(f"🧩 Segments: {len(single.get('segments', []))} single / {len(parallel['segments'])} parallel")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end Hypocrate pipeline on a synthetic consult corpus
+
+For every synthetic consultation (synthetic_consults.py: tone-based audio
+plus a French dialogue of the same length) runs the four stages of the
+pipeline, in-process:
+
+    transcription   Whisper on the WAV (real-time factor = time / audio length)
+    ner             entity extraction on the transcript
+    soap            SOAP note (map-reduce when the consult exceeds the context)
+    letter          referral letter from the SOAP note
+
+LLM stages talk to a stub Ollama server (stub_ollama.py) started on a
+free port, so the numbers measure the pipeline itself (prompting, JSON
+validation, caching, HTTP) rather than the model; pass --ollama-host to
+measure a real server instead. Stages whose dependencies are missing
+(Whisper, ffmpeg, spaCy models) are reported as skipped or degraded and
+the following stages use the synthetic transcript.
+
+Reports p50/p95/mean latency, real-time factor and resident memory per
+stage, and writes the whole report as JSON (default:
+benchmarks/results/pipeline-<timestamp>.json) for trend tracking.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --consults 10 --minutes 15 --whisper-model base
+    python benchmarks/bench_pipeline.py --ollama-host http://localhost:11434 --model mistral:7b-instruct
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_ollama import start_stub_server
+from synthetic_consults import make_consult
+
+STAGES = ("transcription", "ner", "soap", "letter")
+
+
+def read_rss_mb() -> float:
+    """Resident memory of this process (psutil, else /proc, else peak RSS)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemorySampler:
+    """Peak RSS while a stage runs, sampled by a background thread"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.start_mb = self.peak_mb = read_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, read_rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, read_rss_mb())
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 4) if values else None
+
+
+class StageRecorder:
+    """Timings, real-time factors and memory of every run of every stage"""
+
+    def __init__(self):
+        self.runs: Dict[str, List[Dict]] = {stage: [] for stage in STAGES}
+        self.skipped: Dict[str, str] = {}
+        self.notes: Dict[str, str] = {}
+
+    def run(self, stage: str, func: Callable, audio_seconds: Optional[float] = None):
+        """Run one stage; returns its result, or None when the stage is skipped"""
+        if stage in self.skipped:
+            return None
+        try:
+            with MemorySampler() as memory:
+                start = time.perf_counter()
+                result = func()
+                seconds = time.perf_counter() - start
+        except Exception as e:
+            self.skipped[stage] = f"{type(e).__name__}: {e}"
+            print(f"   ⚠️  {stage} skipped ({self.skipped[stage]})")
+            return None
+
+        self.runs[stage].append({
+            "seconds": seconds,
+            "rtf": seconds / audio_seconds if audio_seconds else None,
+            "rss_peak_mb": memory.peak_mb,
+            "rss_delta_mb": memory.peak_mb - memory.start_mb,
+        })
+        return result
+
+    def summary(self) -> Dict[str, Dict]:
+        report = {}
+        for stage, runs in self.runs.items():
+            seconds = [run["seconds"] for run in runs]
+            rtf = [run["rtf"] for run in runs if run["rtf"] is not None]
+            report[stage] = {
+                "count": len(runs),
+                "p50_s": percentile(seconds, 50),
+                "p95_s": percentile(seconds, 95),
+                "mean_s": round(float(np.mean(seconds)), 4) if seconds else None,
+                "rtf_p50": percentile(rtf, 50),
+                "rtf_p95": percentile(rtf, 95),
+                "rss_peak_mb": round(max(run["rss_peak_mb"] for run in runs), 1) if runs else None,
+                "rss_delta_mb": round(max(run["rss_delta_mb"] for run in runs), 1) if runs else None,
+                "skipped": self.skipped.get(stage),
+                "note": self.notes.get(stage),
+            }
+        return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consults", type=int, default=5, help="Synthetic consultations")
+    parser.add_argument("--minutes", type=float, default=3.0, help="Audio length per consultation")
+    parser.add_argument("--words", type=int, default=0, help="Transcript length (default: follows --minutes)")
+    parser.add_argument("--whisper-model", default="tiny")
+    parser.add_argument("--model", default="llama2:latest", help="Ollama model")
+    parser.add_argument("--ollama-host", help="Real Ollama server (default: in-process stub)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stub generation speed (0 = instant)")
+    parser.add_argument("--ttft", type=float, default=0.0, help="Stub seconds before the first token")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    stub = None
+    if args.ollama_host:
+        os.environ["OLLAMA_HOST"] = args.ollama_host
+    else:
+        stub, os.environ["OLLAMA_HOST"] = start_stub_server(
+            models=(args.model,), tokens_per_second=args.tokens_per_second, ttft=args.ttft)
+    # Every consultation must reach the LLM, not the response cache
+    os.environ["HYPOCRATE_LLM_CACHE"] = "none"
+
+    # Hypocrate reads its configuration at import time: import after the environment is set
+    sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'hypocrate'))
+    from services.letter_generator import LetterGenerator
+    from services.ner_medical import get_medical_ner_service
+    from services.soap_generator import SOAPGenerator
+    from services.transcription_hypocrate import HypocrateTranscriptionService
+
+    print("⏱️  End-to-end pipeline benchmark")
+    print("=" * 60)
+    print(f"📄 {args.consults} consultations of {args.minutes:g} min, Whisper {args.whisper_model}, "
+          f"Ollama {os.environ['OLLAMA_HOST']}{' (stub)' if stub else ''}")
+
+    recorder = StageRecorder()
+    try:
+        transcriber = HypocrateTranscriptionService(args.whisper_model)
+    except ImportError as e:
+        recorder.skipped["transcription"] = f"{type(e).__name__}: {e}"
+    ner = get_medical_ner_service("fr")
+    soap_generator = SOAPGenerator(args.model)
+    letter_generator = LetterGenerator(args.model)
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as corpus_dir:
+        for i in range(args.consults):
+            consult = make_consult(corpus_dir, i, args.minutes, args.words)
+            print(f"\n🚀 Consultation {i + 1}/{args.consults}")
+
+            recorder.run(
+                "transcription",
+                lambda: transcriber.transcribe_audio(consult["audio_path"], language="fr", use_cache=False),
+                audio_seconds=consult["audio_seconds"]
+            )
+            # Tones carry no words: NER and the LLM stages always work on the synthetic dialogue
+            text, segments = consult["transcript"], consult["segments"]
+
+            entities = recorder.run("ner", lambda: ner.extract_entities(text)) or {}
+            if ner._unavailable:
+                recorder.notes["ner"] = f"spaCy models unavailable ({', '.join(sorted(ner._unavailable))}), lexicons only"
+
+            soap = recorder.run("soap", lambda: soap_generator.generate_soap_note(
+                text, entities, segments=segments, force_regenerate=True))
+
+            recorder.run("letter", lambda: letter_generator.generate_referral_letter(
+                soap["soap_note"], force_regenerate=True)) if soap else None
+
+            print("   " + ", ".join(f"{stage} {recorder.runs[stage][-1]['seconds']:.2f}s"
+                                    for stage in STAGES if len(recorder.runs[stage]) > i))
+
+    if stub:
+        stub.shutdown()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "config": {
+            "consults": args.consults, "minutes": args.minutes, "words": args.words,
+            "whisper_model": args.whisper_model, "model": args.model,
+            "ollama": args.ollama_host or "stub",
+            "stub_tokens_per_second": args.tokens_per_second, "stub_ttft": args.ttft,
+        },
+        "environment": {
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "stages": recorder.summary(),
+    }
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 60)
+    print(f"{'stage':<15}{'p50':>9}{'p95':>9}{'RTF p50':>9}{'RSS peak':>11}")
+    for stage, stats in report["stages"].items():
+        if stats["skipped"] or not stats["count"]:
+            print(f"{stage:<15}  skipped: {stats['skipped']}")
+            continue
+        rtf = f"{stats['rtf_p50']:.3f}" if stats["rtf_p50"] is not None else "-"
+        print(f"{stage:<15}{stats['p50_s']:>8.3f}s{stats['p95_s']:>8.3f}s{rtf:>9}{stats['rss_peak_mb']:>9.0f}MB")
+    print(f"\n📄 Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
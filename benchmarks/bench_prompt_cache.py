@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prompt evaluation reused from Ollama's KV cache
+
+Sends a series of SOAP prompts for different consultations to a running
+Ollama server, twice: once with the previous layout (instructions after
+the transcript) and once with the current one (static instructions
+first, transcript last). Ollama only evaluates the tokens after the
+prefix it already holds, so the second layout re-evaluates only the
+consultation. Prints prompt_eval_count per call: the steady-state
+prompt evaluation time is the measured result; the time saved per call
+is only an estimate (app.services.ollama_service.prompt_cache_report).
+
+Requires `ollama serve` with the configured model pulled. Responses are
+capped at a few tokens: only prompt evaluation is measured.
+
+Usage:
+    python benchmarks/bench_prompt_cache.py
+    python benchmarks/bench_prompt_cache.py --calls 8 --model mistral:7b-instruct
+"""
+import argparse
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('LLM_CACHE_BACKEND', 'none')
+
+from app.services.medical_notes import MEDICAL_SCRIBE_SYSTEM_PROMPT, MedicalNoteService
+from app.services.ollama_service import OllamaService
+
+COMPLAINTS = ["a dry cough", "lower back pain", "headaches", "a sore throat", "knee swelling",
+              "chest tightness", "a skin rash", "dizziness", "abdominal pain", "insomnia"]
+
+
+def consultation(i: int) -> str:
+    """A short synthetic consultation, different for every call"""
+    complaint = COMPLAINTS[i % len(COMPLAINTS)]
+    return (
+        f"Doctor: What brings you in today?\n"
+        f"Patient: I've had {complaint} for about {i + 2} days.\n"
+        f"Doctor: Any allergies or medications?\n"
+        f"Patient: No allergies. I took ibuprofen {i % 3 + 1} times.\n"
+        f"Doctor: Let's examine you and plan a follow-up in {i % 4 + 1} weeks."
+    )
+
+
+def legacy_prompt(transcript: str) -> str:
+    """Previous layout: variable transcript before the static instructions"""
+    return (
+        "Convert the following doctor-patient conversation into a structured SOAP note.\n\n"
+        f"Conversation:\n{transcript}\n\n"
+        "Generate a structured SOAP note in JSON format with the fields specified in the system prompt."
+    )
+
+
+def run(ollama: OllamaService, build_prompt, calls: int) -> list:
+    """prompt_cache report of every call (the first one warms the cache)"""
+    reports = []
+    for i in range(calls):
+        response = ollama.generate(
+            prompt=build_prompt(consultation(i)),
+            system_prompt=MEDICAL_SCRIBE_SYSTEM_PROMPT,
+            temperature=0.3,
+            max_tokens=4,
+            use_cache=False
+        )
+        reports.append(response.get("prompt_cache") or {})
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=6, help="SOAP prompts per layout")
+    parser.add_argument("--model", default=None, help="Ollama model (default: settings.ollama_model)")
+    args = parser.parse_args()
+
+    ollama = OllamaService(args.model)
+    notes = MedicalNoteService()
+
+    print("⏱️  Prompt evaluation with Ollama's KV cache")
+    print("=" * 60)
+    print(f"🤖 Model: {ollama.model}, {args.calls} consultations per layout")
+    ollama.warm_up()
+
+    totals = {}
+    for name, build_prompt in (("transcript first", legacy_prompt), ("static first", notes._build_soap_prompt)):
+        reports = run(ollama, build_prompt, args.calls)
+        print(f"\n📄 Layout: {name}")
+        for i, report in enumerate(reports):
+            print(f"   call {i + 1}: {report.get('evaluated_tokens', 0):>5} / ~{report.get('prompt_tokens_estimate', 0):>5} "
+                  f"tokens evaluated in {report.get('prompt_eval_seconds', 0):.2f}s, "
+                  f"~{report.get('saved_seconds_estimate', 0):.2f}s saved (estimate)")
+        # Skip the first call: it fills the cache for the layout
+        steady = reports[1:] or reports
+        totals[name] = sum(report.get("prompt_eval_seconds", 0) for report in steady) / len(steady)
+
+    print("\n" + "=" * 60)
+    legacy, current = totals["transcript first"], totals["static first"]
+    print(f"🚀 Prompt eval per call: {legacy:.2f}s -> {current:.2f}s"
+          + (f" ({legacy / current:.1f}x faster)" if current else ""))
+
+
+if __name__ == "__main__":
+    main()
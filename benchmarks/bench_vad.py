@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark: voice activity detection before Whisper
+
+Builds a synthetic corpus with known silence ratios: speech-like bursts
+(syllable-modulated noise, or slices of --speech) separated by room
+noise. For each ratio the VAD is scored against the ground truth and the
+audio Whisper would have to decode is compared with and without VAD.
+
+Without --model the Whisper cost is estimated from its 30 s windows;
+with --model every recording is transcribed both ways and timed.
+
+Usage:
+    python benchmarks/bench_vad.py
+    python benchmarks/bench_vad.py --minutes 10 --ratios 0.2 0.5 0.8
+    python benchmarks/bench_vad.py --speech dictation.wav --model base
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import wave
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+import numpy as np
+
+from app.services.audio import SAMPLE_RATE
+from app.services.vad import compact_speech, detect_speech_regions
+
+WHISPER_WINDOW_SECONDS = 30
+
+
+def synthetic_speech(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Noise shaped by a ~4 Hz syllable envelope, around -20 dBFS"""
+    t = np.arange(n) / SAMPLE_RATE
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t + rng.uniform(0, 2 * np.pi))
+    return (rng.standard_normal(n) * 0.1 * envelope).astype(np.float32)
+
+
+def load_speech(path: str) -> np.ndarray:
+    """16 kHz mono 16-bit WAV used as the source of speech bursts"""
+    with wave.open(path, "rb") as f:
+        if f.getframerate() != SAMPLE_RATE or f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise SystemExit("--speech must be a 16 kHz mono 16-bit WAV")
+        return np.frombuffer(f.readframes(f.getnframes()), np.int16).astype(np.float32) / 32768
+
+
+def make_recording(seconds: float, silence_ratio: float, rng: np.random.Generator, speech_source=None):
+    """
+    Alternate speech bursts and silences until the recording is full
+
+    Returns:
+        (float32 samples, boolean mask of the true speech samples)
+    """
+    n_samples = int(seconds * SAMPLE_RATE)
+    # Room noise at about -60 dBFS everywhere
+    audio = (rng.standard_normal(n_samples) * 0.001).astype(np.float32)
+    truth = np.zeros(n_samples, dtype=bool)
+
+    mean_speech = 8.0
+    mean_silence = mean_speech * silence_ratio / max(1 - silence_ratio, 1e-6)
+    position = int(rng.exponential(mean_silence) * SAMPLE_RATE) if silence_ratio > 0 else 0
+    while position < n_samples:
+        length = min(int(rng.uniform(0.5, 1.5) * mean_speech * SAMPLE_RATE), n_samples - position)
+        if speech_source is not None and len(speech_source) > length:
+            offset = int(rng.integers(0, len(speech_source) - length))
+            burst = speech_source[offset:offset + length]
+        else:
+            burst = synthetic_speech(length, rng)
+        audio[position:position + length] += burst
+        truth[position:position + length] = True
+        position += length
+        if silence_ratio > 0:
+            # Silences long enough to be cut (shorter pauses are bridged)
+            position += int(max(rng.exponential(mean_silence), 1.5) * SAMPLE_RATE)
+    return np.clip(audio, -1, 1), truth
+
+
+def whisper_windows(seconds: float) -> int:
+    """Number of 30 s windows Whisper decodes for this much audio"""
+    return math.ceil(seconds / WHISPER_WINDOW_SECONDS)
+
+
+def transcribe_seconds(model, audio: np.ndarray) -> float:
+    t0 = time.perf_counter()
+    model.transcribe(audio, language="fr", fp16=False, verbose=None, temperature=0.0)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=20.0, help="Length of each recording")
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.1, 0.3, 0.5, 0.7],
+                        help="Silence ratios to test")
+    parser.add_argument("--speech", help="16 kHz mono WAV to draw speech bursts from")
+    parser.add_argument("--model", help="Whisper model to time real transcriptions (e.g. tiny, base)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("⏱️  VAD benchmark: skipping silence before Whisper")
+    print("=" * 60)
+
+    speech_source = load_speech(args.speech) if args.speech else None
+    model = None
+    if args.model:
+        try:
+            import whisper
+        except ImportError:
+            raise SystemExit("openai-whisper is not installed, run without --model")
+        print(f"📥 Loading Whisper {args.model}...")
+        model = whisper.load_model(args.model, device="cpu")
+
+    seconds = args.minutes * 60
+    print(f"🎧 {args.minutes:.0f} min per recording, "
+          f"{'speech from ' + args.speech if args.speech else 'synthetic speech'}")
+
+    for ratio in args.ratios:
+        rng = np.random.default_rng(args.seed)
+        audio, truth = make_recording(seconds, ratio, rng, speech_source)
+        pcm = (audio * 32767).astype(np.int16)
+
+        t0 = time.perf_counter()
+        regions = detect_speech_regions(pcm)
+        compacted, timeline = compact_speech(pcm, regions)
+        vad_seconds = time.perf_counter() - t0
+
+        detected = np.zeros(len(pcm), dtype=bool)
+        for start, end in regions:
+            detected[start:end] = True
+        recall = (detected & truth).sum() / max(truth.sum(), 1)
+        silence_removed = (~detected & ~truth).sum() / max((~truth).sum(), 1)
+
+        kept = len(compacted) / SAMPLE_RATE
+        before, after = whisper_windows(seconds), whisper_windows(kept)
+        print(f"\n🔇 Silence ratio {ratio:.0%} (measured {1 - truth.mean():.0%})")
+        print(f"   VAD: {len(regions)} regions in {vad_seconds * 1000:.0f} ms "
+              f"({seconds / vad_seconds:.0f}x real time)")
+        print(f"   Speech recall: {recall:.1%}, silence removed: {silence_removed:.1%}")
+        print(f"   Audio sent to Whisper: {seconds:.0f}s -> {kept:.0f}s "
+              f"({before} -> {after} windows, ~{before / max(after, 1):.2f}x faster)")
+
+        if model is not None:
+            full = transcribe_seconds(model, audio)
+            speech_only = transcribe_seconds(model, compacted) + vad_seconds
+            print(f"   🚀 Whisper {args.model}: {full:.1f}s -> {speech_only:.1f}s "
+                  f"({full / speech_only:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: real-time factor of the Whisper backends
+
+Transcribes the same recording with openai-whisper (PyTorch, FP32) and
+faster-whisper (CTranslate2, int8 by default) and compares speed and
+output. RTF = transcription time / audio duration (lower is faster,
+below 1 is faster than real time). Model load and a short warm-up pass
+are excluded from the timings.
+
+Usage:
+    python benchmarks/bench_whisper_backends.py path/to/consult.wav --model base
+    python benchmarks/bench_whisper_backends.py consult.wav --model small \
+        --threads 8 --compute-type int8 --repeat 3
+"""
+import argparse
+import difflib
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Audio file to transcribe")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--backends", nargs="+", default=["openai", "faster"], help="Backends to compare")
+    parser.add_argument("--compute-type", default="int8", help="faster-whisper weight type")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads (0 = library default)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per backend (median reported)")
+    args = parser.parse_args()
+
+    # Settings are read once, at first import
+    os.environ["WHISPER_COMPUTE_TYPE"] = args.compute_type
+
+    from app.services.audio import SAMPLE_RATE, load_audio
+    from app.services.whisper_backend import BACKEND_FASTER, load_whisper_model
+
+    print("⏱️  Whisper backend benchmark (real-time factor)")
+    print("=" * 60)
+
+    audio = load_audio(args.audio)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    print(f"🎧 Audio: {args.audio} ({audio_seconds:.1f}s), model {args.model}, "
+          f"{args.threads or 'default'} threads")
+
+    results = {}
+    for backend in args.backends:
+        label = f"{backend} ({args.compute_type})" if backend == BACKEND_FASTER else f"{backend} (fp32)"
+        try:
+            start = time.perf_counter()
+            model = load_whisper_model(args.model, backend=backend, num_threads=args.threads, device="cpu")
+            load_time = time.perf_counter() - start
+        except (ImportError, RuntimeError) as e:
+            print(f"\n⚠️  {label}: skipped ({e})")
+            continue
+
+        model.transcribe(audio[:SAMPLE_RATE], language=args.language, fp16=False)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = model.transcribe(audio, language=args.language, fp16=False)
+            timings.append(time.perf_counter() - start)
+        elapsed = statistics.median(timings)
+        results[backend] = (elapsed, result)
+
+        print(f"\n🔧 {label}: loaded in {load_time:.1f}s")
+        print(f"   Transcription: {elapsed:.1f}s (RTF {elapsed / audio_seconds:.3f}, "
+              f"{audio_seconds / elapsed:.1f}x real time)")
+        print(f"   Segments: {len(result['segments'])}, characters: {len(result['text'].strip())}")
+
+    if len(results) < 2:
+        return
+
+    (ref_name, (ref_time, ref)), *others = results.items()
+    print("\n" + "=" * 60)
+    for name, (elapsed, result) in others:
+        similarity = difflib.SequenceMatcher(None, ref["text"].split(), result["text"].split()).ratio()
+        missing = set(ref["segments"][0]) - set(result["segments"][0]) if ref["segments"] and result["segments"] else set()
+        print(f"🚀 {name} vs {ref_name}: {ref_time / elapsed:.2f}x faster")
+        print(f"📝 Word-level similarity: {similarity:.3f}")
+        print(f"🧩 Segment schema: {'identical' if not missing else 'missing ' + ', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
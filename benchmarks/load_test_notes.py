@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent note generation through the API against a stub Ollama
+
+Starts stub_ollama.py with the given generation speed, time-to-first-token
+and inference slots, points the backend at it (OLLAMA_BASE_URL), creates
+a throwaway SQLite database with one transcribed recording per consult,
+then fires every consult at once through the FastAPI app in-process:
+
+    regenerate   POST /api/recordings/{id}/regenerate-note?force=true
+    stream       GET  /api/recordings/{id}/note/stream (SSE; TTFT = first token event)
+
+Reports latency percentiles, time to first token, throughput and errors,
+plus what the stub saw: peak requests generating at once (must not
+exceed OLLAMA_MAX_CONCURRENCY nor --slots) and peak requests queued in
+Ollama. Nothing needs a GPU or a model: 100+ concurrent consults run on a
+laptop in seconds to minutes depending on --tokens-per-second.
+
+Usage:
+    python benchmarks/load_test_notes.py
+    python benchmarks/load_test_notes.py --consults 200 --mode stream --tokens-per-second 40 --ttft 0.3
+    python benchmarks/load_test_notes.py --slots 8 --client-concurrency 8 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np
+
+from stub_ollama import start_stub_server
+from synthetic_consults import make_transcript
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    return {f"p{q}_s": round(float(np.percentile(values, q)), 3) for q in (50, 95, 99)}
+
+
+async def regenerate(client, recording_id: int, headers: dict) -> dict:
+    start = time.perf_counter()
+    response = await client.post(f"/api/recordings/{recording_id}/regenerate-note",
+                                 params={"force": "true"}, headers=headers)
+    return {"seconds": time.perf_counter() - start, "ok": response.status_code == 200,
+            "error": None if response.status_code == 200 else f"HTTP {response.status_code}: {response.text[:200]}"}
+
+
+async def stream(app, recording_id: int, headers: dict) -> dict:
+    """SSE request straight through ASGI: httpx's ASGITransport buffers whole bodies, hiding the first token"""
+    start = time.perf_counter()
+    result = {"ttft": None, "ok": True, "error": None}
+    done = asyncio.Event()
+
+    async def receive():
+        if not done.is_set():
+            done.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            result.update(ok=False, error=f"HTTP {message['status']}")
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"").decode()
+            if result["ttft"] is None and "event: token" in body:
+                result["ttft"] = time.perf_counter() - start
+            if "event: error" in body:
+                result.update(ok=False, error=body[:200])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": f"/api/recordings/{recording_id}/note/stream", "raw_path": b"",
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 0), "server": ("api", 80),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    await app(scope, receive, send)
+    return {"seconds": time.perf_counter() - start, **result}
+
+
+async def run_load(app, recording_ids: list, token: str, mode: str) -> tuple:
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None) as client:
+        start = time.perf_counter()
+        if mode == "regenerate":
+            calls = [regenerate(client, rid, headers) for rid in recording_ids]
+        else:
+            calls = [stream(app, rid, headers) for rid in recording_ids]
+        results = await asyncio.gather(*calls)
+        return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consults", type=int, default=100, help="Concurrent note requests")
+    parser.add_argument("--words", type=int, default=450, help="Transcript length")
+    parser.add_argument("--mode", choices=["regenerate", "stream"], default="regenerate")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Stub generation speed")
+    parser.add_argument("--ttft", type=float, default=0.3, help="Stub seconds before the first token")
+    parser.add_argument("--slots", type=int, default=4, help="Stub parallel requests (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--max-queue", type=int, default=512, help="Stub queue before 503s (OLLAMA_MAX_QUEUE)")
+    parser.add_argument("--client-concurrency", type=int, default=0,
+                        help="Backend OLLAMA_MAX_CONCURRENCY (default: --slots)")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    model = "llama2:latest"
+    stub, url = start_stub_server(models=(model,), tokens_per_second=args.tokens_per_second,
+                                  ttft=args.ttft, slots=args.slots, max_queue=args.max_queue)
+    workdir = tempfile.mkdtemp(prefix="load_test_notes_")
+
+    # The backend reads its settings at import time: configure it first
+    os.environ.update({
+        "SECRET_KEY": "load-test",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+        "OLLAMA_BASE_URL": url,
+        "OLLAMA_MODEL": model,
+        "OLLAMA_MAX_CONCURRENCY": str(args.client_concurrency or args.slots),
+        "LLM_CACHE_BACKEND": "none",
+        "MODEL_PRELOAD_ON_STARTUP": "false",
+    })
+    sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+    from app.config import get_settings
+    from app.database import SessionLocal, init_db
+    from app.main import app
+    from app.models.recording import Recording
+    from app.models.user import User
+    from app.utils.auth import create_access_token
+
+    settings = get_settings()
+    init_db()
+    db = SessionLocal()
+    user = User(email="load-test@example.com", hashed_password="!", full_name="Load test")
+    db.add(user)
+    db.commit()
+    recordings = []
+    for i in range(args.consults):
+        transcript, _ = make_transcript(args.words, seed=i)
+        recordings.append(Recording(user_id=user.id, audio_file_path=f"consult_{i}.wav",
+                                    original_filename=f"consult_{i}.wav", transcript=transcript,
+                                    transcript_language="fr", status="transcribed"))
+    db.add_all(recordings)
+    db.commit()
+    recording_ids = [recording.id for recording in recordings]
+    # python-jose only accepts string subjects
+    token = create_access_token(data={"sub": str(user.id)})
+    db.close()
+
+    print("⏱️  Note generation load test")
+    print("=" * 60)
+    print(f"🚀 {args.consults} concurrent consults ({args.mode}), {args.words} words each")
+    print(f"🤖 Stub: {args.tokens_per_second:g} tokens/s, TTFT {args.ttft:g}s, {args.slots} slots; "
+          f"backend OLLAMA_MAX_CONCURRENCY={settings.ollama_max_concurrency}")
+
+    results, wall = asyncio.run(run_load(app, recording_ids, token, args.mode))
+    stub.shutdown()
+
+    ok = [r for r in results if r["ok"]]
+    errors = [r["error"] for r in results if not r["ok"]]
+    ttfts = [r["ttft"] for r in ok if r.get("ttft") is not None]
+    stub_stats = stub.state.stats()
+    report = {
+        "config": vars(args),
+        "backend_ollama_max_concurrency": settings.ollama_max_concurrency,
+        "wall_seconds": round(wall, 2),
+        "succeeded": len(ok),
+        "failed": len(errors),
+        "errors": sorted(set(errors))[:10],
+        "notes_per_minute": round(len(ok) / wall * 60, 1) if wall else None,
+        "latency": percentiles([r["seconds"] for r in ok]),
+        "ttft": percentiles(ttfts),
+        "stub": stub_stats,
+    }
+
+    print("\n" + "=" * 60)
+    print(f"✅ {len(ok)}/{args.consults} notes in {wall:.1f}s ({report['notes_per_minute']} notes/min)")
+    if report["latency"]:
+        print(f"   latency p50 {report['latency']['p50_s']}s, p95 {report['latency']['p95_s']}s, "
+              f"p99 {report['latency']['p99_s']}s")
+    if report["ttft"]:
+        print(f"   time to first token p50 {report['ttft']['p50_s']}s, p95 {report['ttft']['p95_s']}s")
+    print(f"   Ollama saw at most {stub_stats['max_active']} requests generating "
+          f"({stub_stats['slots']} slots) and {stub_stats['max_queued']} queued, "
+          f"{stub_stats['rejected']} rejected")
+    for error in report["errors"]:
+        print(f"   ❌ {error}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
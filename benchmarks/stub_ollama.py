@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Stub Ollama server for benchmarks and load tests
+
+Stands in for `ollama serve` on localhost without loading any model:
+
+    /api/chat       streamed (NDJSON) or not; answers follow the JSON schema
+                    sent as `format`, SOAP requests without a schema get a
+                    canned SOAP note, anything else a canned French paragraph
+    /api/generate   model load (warm-up with an empty prompt)
+    /api/tags       installed models
+    /api/ps         loaded models
+    /api/pull       installs a model (streamed progress or not)
+    /stub/stats     requests served, peak concurrency, peak queue, rejections
+
+Timing follows a real server: a model is loaded on first use
+(--load-seconds), each request waits for one of --slots inference slots
+(OLLAMA_NUM_PARALLEL), spends --ttft evaluating the prompt, then emits
+--tokens-per-second. Waiting requests beyond --max-queue get a 503, like
+OLLAMA_MAX_QUEUE. Ollama's counters (prompt_eval_count, eval_count,
+*_duration) match the simulated timings, so callers measure the stub
+exactly as they would measure a real server.
+
+Usage:
+    python benchmarks/stub_ollama.py --port 11434 --tokens-per-second 30 --ttft 0.4 --slots 4
+    from stub_ollama import start_stub_server   # in-process, free port
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+CANNED_TEXT = (
+    "Patient vu en consultation pour une toux sèche évoluant depuis cinq jours, "
+    "sans fièvre ni dyspnée. Examen pulmonaire normal. Rhinopharyngite probable, "
+    "traitement symptomatique et réévaluation dans une semaine si persistance."
+)
+
+# Canned notes for SOAP requests sent without a schema (backend and Hypocrate field names)
+CANNED_SOAP = {
+    "subjective": "Dry cough for five days, no fever, no shortness of breath.",
+    "objective": "Temperature 37.2 C, BP 125/80, HR 78. Lungs clear on auscultation.",
+    "assessment": "Viral upper respiratory tract infection.",
+    "plan": "Symptomatic treatment, follow-up in one week if symptoms persist.",
+    "chief_complaint": "Dry cough",
+    "allergies": ["penicillin"],
+    "medications": ["acetaminophen"],
+}
+CANNED_SOAP_FR = {
+    "subjectif": "Toux sèche depuis cinq jours, sans fièvre ni dyspnée.",
+    "objectif": "Température 37,2 °C, TA 12/8, FC 78. Auscultation pulmonaire normale.",
+    "analyse": "Infection virale des voies aériennes supérieures.",
+    "plan": "Traitement symptomatique, réévaluation dans une semaine si persistance.",
+    "chief_complaint": "Toux sèche",
+    "allergies": ["pénicilline"],
+    "medications": ["paracétamol"],
+    "vital_signs": {"temperature": "37,2 °C", "blood_pressure": "12/8", "heart_rate": "78"},
+}
+
+
+def canned_value(schema: Dict[str, Any]) -> Any:
+    """A value matching a (simple) JSON schema"""
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: canned_value(sub) for name, sub in properties.items()}
+    if kind == "array":
+        return [canned_value(schema.get("items", {"type": "string"}))]
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    return CANNED_TEXT
+
+
+def canned_response(request: Dict[str, Any]) -> str:
+    """Answer of a chat request: JSON when a format or a SOAP note is requested, text otherwise"""
+    fmt = request.get("format")
+    if isinstance(fmt, dict):
+        return json.dumps(canned_value(fmt), ensure_ascii=False)
+
+    messages = request.get("messages", [])
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    prompt = messages[-1].get("content", "") if messages else ""
+    if "SOAP" in prompt:
+        if '"subjectif"' in system:
+            return json.dumps(CANNED_SOAP_FR, ensure_ascii=False)
+        if "subjective:" in system:
+            return json.dumps(CANNED_SOAP)
+    if fmt == "json":
+        return json.dumps({"text": CANNED_TEXT}, ensure_ascii=False)
+    return CANNED_TEXT
+
+
+def count_tokens(text: str) -> int:
+    """Same 3.5 chars/token estimate as app.utils.tokens"""
+    return math.ceil(len(text) / 3.5)
+
+
+def split_tokens(text: str) -> List[str]:
+    """Stream fragments: one word (with its leading space) per token"""
+    words = text.split(" ")
+    return [words[0]] + [" " + word for word in words[1:]]
+
+
+class StubState:
+    """Simulation settings, installed/loaded models and load statistics"""
+
+    def __init__(
+        self,
+        models: Tuple[str, ...],
+        tokens_per_second: float,
+        ttft: float,
+        slots: int,
+        max_queue: int,
+        load_seconds: float,
+        pull_seconds: float
+    ):
+        self.tokens_per_second = tokens_per_second
+        self.ttft = ttft
+        self.max_queue = max_queue
+        self.load_seconds = load_seconds
+        self.pull_seconds = pull_seconds
+        self.installed = list(models)
+        self.loaded: Dict[str, float] = {}  # model -> load time
+        self._slots = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.counters = {"slots": slots, "requests": 0, "active": 0, "max_active": 0,
+                         "queued": 0, "max_queued": 0, "rejected": 0, "model_loads": 0}
+
+    def _update(self, **deltas) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+            self.counters["max_active"] = max(self.counters["max_active"], self.counters["active"])
+            self.counters["max_queued"] = max(self.counters["max_queued"], self.counters["queued"])
+
+    def acquire(self) -> bool:
+        """Wait for an inference slot; False when the queue is full"""
+        with self._lock:
+            if self.counters["queued"] >= self.max_queue:
+                self.counters["rejected"] += 1
+                return False
+        self._update(queued=1)
+        self._slots.acquire()
+        self._update(queued=-1, active=1, requests=1)
+        return True
+
+    def release(self) -> None:
+        self._update(active=-1)
+        self._slots.release()
+
+    def ensure_loaded(self, model: str) -> float:
+        """Load a model on first use; returns the load time spent by this request"""
+        if model in self.loaded:
+            return 0.0
+        # Requests arriving during the load wait for it, as on a real server
+        with self._load_lock:
+            if model in self.loaded:
+                return 0.0
+            time.sleep(self.load_seconds)
+            with self._lock:
+                self.loaded[model] = time.time()
+                self.counters["model_loads"] += 1
+        return self.load_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, loaded=sorted(self.loaded))
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Request handler; state lives on the server instance"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_ndjson(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_line(self, payload: Dict[str, Any]) -> None:
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_ndjson(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _model_entry(self, name: str) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        return {"name": name, "model": name, "size": 4 * 2**30, "digest": "stub",
+                "modified_at": now.isoformat(), "expires_at": (now + timedelta(minutes=30)).isoformat(),
+                "size_vram": 0, "details": {"format": "gguf", "family": "stub"}}
+
+    def _not_found(self, model: str) -> None:
+        self._send_json({"error": f'model "{model}" not found, try pulling it first'}, 404)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [self._model_entry(m) for m in self.state.installed]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [self._model_entry(m) for m in sorted(self.state.loaded)]})
+        elif self.path == "/stub/stats":
+            self._send_json(self.state.stats())
+        elif self.path in ("/", "/api/version"):
+            self._send_json({"version": "0.0.0-stub"})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        request = self._read_json()
+        if self.path == "/api/chat":
+            self._chat(request)
+        elif self.path == "/api/generate":
+            self._generate(request)
+        elif self.path == "/api/pull":
+            self._pull(request)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _generate(self, request: Dict[str, Any]) -> None:
+        # Only warm-up is supported: empty prompt, nothing generated
+        model = request.get("model")
+        if model not in self.state.installed:
+            return self._not_found(model)
+        load = self.state.ensure_loaded(model)
+        self._send_json({"model": model, "response": "", "done": True, "done_reason": "load",
+                         "created_at": datetime.now(timezone.utc).isoformat(),
+                         "load_duration": int(load * 1e9), "total_duration": int(load * 1e9)})
+
+    def _pull(self, request: Dict[str, Any]) -> None:
+        model = request.get("model") or request.get("name")
+        statuses = [{"status": "pulling manifest"},
+                    {"status": "pulling stub", "digest": "stub", "total": 4 * 2**30, "completed": 4 * 2**30},
+                    {"status": "verifying sha256 digest"},
+                    {"status": "writing manifest"},
+                    {"status": "success"}]
+        time.sleep(self.state.pull_seconds)
+        if model not in self.state.installed:
+            self.state.installed.append(model)
+        if not request.get("stream", True):
+            return self._send_json(statuses[-1])
+        self._start_ndjson()
+        for status in statuses:
+            self._write_line(status)
+        self._end_ndjson()
+
+    def _chat(self, request: Dict[str, Any]) -> None:
+        model = request.get("model")
+        if model not in self.state.installed:
+            return self._not_found(model)
+        if not self.state.acquire():
+            return self._send_json({"error": "server busy, please try again.  maximum pending requests exceeded"}, 503)
+
+        try:
+            state = self.state
+            load = state.ensure_loaded(model)
+            prompt = "".join(message.get("content", "") for message in request.get("messages", []))
+            fragments = split_tokens(canned_response(request))
+            token_seconds = 1 / state.tokens_per_second if state.tokens_per_second else 0.0
+            eval_seconds = len(fragments) * token_seconds
+            base = {"model": model, "created_at": datetime.now(timezone.utc).isoformat()}
+            counters = {
+                "prompt_eval_count": count_tokens(prompt),
+                "eval_count": len(fragments),
+                "total_duration": int((load + state.ttft + eval_seconds) * 1e9),
+                "load_duration": int(load * 1e9),
+                "prompt_eval_duration": int(state.ttft * 1e9),
+                "eval_duration": int(eval_seconds * 1e9),
+            }
+
+            # Prompt evaluation: nothing is emitted before the first token
+            time.sleep(state.ttft)
+
+            if not request.get("stream", True):
+                time.sleep(eval_seconds)
+                self._send_json({**base, "message": {"role": "assistant", "content": "".join(fragments)},
+                                 "done": True, "done_reason": "stop", **counters})
+                return
+
+            # Streamed answer: one NDJSON line per token, then the final counters
+            self._start_ndjson()
+            for fragment in fragments:
+                self._write_line({**base, "message": {"role": "assistant", "content": fragment}, "done": False})
+                time.sleep(token_seconds)
+            self._write_line({**base, "message": {"role": "assistant", "content": ""},
+                              "done": True, "done_reason": "stop", **counters})
+            self._end_ndjson()
+        finally:
+            self.state.release()
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    """One thread per connection, like Ollama's HTTP front-end"""
+
+    daemon_threads = True
+    request_queue_size = 1024  # accept bursts of hundreds of clients
+
+    def __init__(self, address: Tuple[str, int], state: StubState):
+        super().__init__(address, StubOllamaHandler)
+        self.state = state
+
+
+def start_stub_server(
+    port: int = 0,
+    models: Tuple[str, ...] = ("llama2:latest",),
+    tokens_per_second: float = 0.0,
+    ttft: float = 0.0,
+    slots: int = 4,
+    max_queue: int = 512,
+    load_seconds: float = 0.0,
+    pull_seconds: float = 0.0
+) -> Tuple[StubOllamaServer, str]:
+    """
+    Start the stub in a daemon thread
+
+    Args:
+        port: Port to listen on (0 = any free port)
+        models: Installed models (others must be pulled first)
+        tokens_per_second: Generation speed (0 = instant)
+        ttft: Seconds of prompt evaluation before the first token
+        slots: Requests generated at once (OLLAMA_NUM_PARALLEL)
+        max_queue: Requests waiting for a slot before 503s (OLLAMA_MAX_QUEUE)
+        load_seconds: Load time of a model on first use
+        pull_seconds: Duration of /api/pull
+
+    Returns:
+        (server, base URL); server.state.stats() gives the load statistics,
+        server.shutdown() stops it
+    """
+    state = StubState(models, tokens_per_second, ttft, slots, max_queue, load_seconds, pull_seconds)
+    server = StubOllamaServer(("127.0.0.1", port), state)
+    threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", nargs="+", default=["llama2:latest"], help="Installed models")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--ttft", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--slots", type=int, default=4, help="Parallel requests (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--max-queue", type=int, default=512, help="Waiting requests before 503 (OLLAMA_MAX_QUEUE)")
+    parser.add_argument("--load-seconds", type=float, default=2.0, help="Model load time on first use")
+    parser.add_argument("--pull-seconds", type=float, default=1.0, help="Duration of /api/pull")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(
+        args.port, tuple(args.models), args.tokens_per_second, args.ttft,
+        args.slots, args.max_queue, args.load_seconds, args.pull_seconds
+    )
+    print(f"🤖 Stub Ollama listening on {url} (models: {', '.join(args.models)})")
+    print(f"   {args.tokens_per_second:g} tokens/s, TTFT {args.ttft:g}s, {args.slots} slots, "
+          f"queue {args.max_queue}, load {args.load_seconds:g}s")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\n📄 {json.dumps(server.state.stats())}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Synthetic consultation corpus for benchmarks
+
+Audio: voiced tones (a pitch with harmonics, modulated by a ~4 Hz syllable
+envelope) separated by pauses and room noise, written as 16 kHz mono
+16-bit WAV. No TTS: Whisper gets the same decode and inference load as
+real speech without depending on a voice engine.
+
+Transcripts: French doctor/patient dialogues of a given length, built
+from consultation templates (symptoms, medications, allergies, vitals)
+so NER and SOAP generation see realistic entities. Whisper-like segments
+({"start", "end", "text"}) are returned alongside for map-reduce chunking.
+
+Usage:
+    python benchmarks/synthetic_consults.py --out corpus/ --consults 5 --minutes 3
+"""
+import argparse
+import json
+import os
+import random
+import wave
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+WORDS_PER_MINUTE = 150  # speaking rate of a consultation
+
+SYMPTOMS = ["une toux sèche", "de la fièvre", "des maux de tête", "une douleur lombaire",
+            "des vertiges", "une douleur abdominale", "une fatigue persistante", "des nausées",
+            "un mal de gorge", "une gêne thoracique"]
+MEDICATIONS = ["du paracétamol", "de l'ibuprofène", "de l'amoxicilline", "de la metformine",
+               "de l'oméprazole", "du ramipril", "de la lévothyroxine"]
+ALLERGIES = ["la pénicilline", "l'aspirine", "les sulfamides", "aucun médicament connu"]
+DURATIONS = ["deux jours", "trois jours", "une semaine", "dix jours", "un mois"]
+
+TEMPLATES = [
+    ("Médecin", "Bonjour, qu'est-ce qui vous amène aujourd'hui ?"),
+    ("Patient", "Bonjour docteur, j'ai {symptom} depuis {duration}."),
+    ("Médecin", "Est-ce que la douleur ou la gêne augmente la nuit ou à l'effort ?"),
+    ("Patient", "Surtout le soir, et j'ai aussi {symptom2} depuis hier."),
+    ("Médecin", "Avez-vous des allergies connues ?"),
+    ("Patient", "Je suis allergique à {allergy}."),
+    ("Médecin", "Prenez-vous des médicaments en ce moment ?"),
+    ("Patient", "Je prends {medication} le matin, et parfois {medication2} quand j'ai mal."),
+    ("Médecin", "Je vais vous examiner. Tension {systolic}/{diastolic}, pouls {pulse}, température {temperature}."),
+    ("Médecin", "L'auscultation pulmonaire est normale, l'abdomen est souple et indolore."),
+    ("Patient", "Est-ce que c'est grave docteur ?"),
+    ("Médecin", "Cela ressemble à une infection virale, je vous prescris {medication} pendant {duration}."),
+    ("Médecin", "Si les symptômes persistent, on fera une prise de sang et on se revoit dans {duration}."),
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        symptom=rng.choice(SYMPTOMS), symptom2=rng.choice(SYMPTOMS),
+        duration=rng.choice(DURATIONS), allergy=rng.choice(ALLERGIES),
+        medication=rng.choice(MEDICATIONS), medication2=rng.choice(MEDICATIONS),
+        systolic=rng.randint(11, 15), diastolic=rng.randint(6, 9),
+        pulse=rng.randint(60, 100), temperature=f"{rng.uniform(36.5, 39.0):.1f}".replace(".", ","),
+    )
+
+
+def make_transcript(words: int, seed: int = 0) -> Tuple[str, List[Dict]]:
+    """
+    Dialogue of about `words` words and its Whisper-like segments
+
+    Segment timings follow WORDS_PER_MINUTE with a short pause between turns.
+
+    Returns:
+        (transcript text, segments)
+    """
+    rng = random.Random(seed)
+    lines: List[str] = []
+    segments: List[Dict] = []
+    count, clock = 0, 0.0
+    while count < words:
+        for speaker, template in TEMPLATES:
+            text = _fill(template, rng)
+            n = len(text.split())
+            duration = n * 60 / WORDS_PER_MINUTE
+            lines.append(f"{speaker}: {text}")
+            segments.append({"start": round(clock, 2), "end": round(clock + duration, 2), "text": text})
+            clock += duration + 0.6
+            count += n
+            if count >= words:
+                break
+    return "\n".join(lines), segments
+
+
+def voiced_tone(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Pitch and harmonics under a syllable envelope, around -20 dBFS"""
+    t = np.arange(n) / SAMPLE_RATE
+    pitch = rng.uniform(100, 220)
+    signal = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t + rng.uniform(0, 2 * np.pi))
+    return (signal * envelope * 0.06).astype(np.float32)
+
+
+def make_audio(seconds: float, seed: int = 0, silence_ratio: float = 0.25) -> np.ndarray:
+    """
+    Alternate voiced bursts (1-6 s) and pauses (0.3-2 s) over room noise
+
+    Returns:
+        float32 samples at SAMPLE_RATE
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(seconds * SAMPLE_RATE)
+    audio = (rng.standard_normal(n_samples) * 0.001).astype(np.float32)
+    position = 0
+    while position < n_samples:
+        burst = int(rng.uniform(1, 6) * SAMPLE_RATE)
+        end = min(position + burst, n_samples)
+        audio[position:end] += voiced_tone(end - position, rng)
+        pause = burst * silence_ratio / (1 - silence_ratio) * rng.uniform(0.5, 1.5)
+        position = end + int(min(max(pause, 0.3 * SAMPLE_RATE), 2 * SAMPLE_RATE))
+    return audio
+
+
+def write_wav(path: str, audio: np.ndarray) -> None:
+    """16 kHz mono 16-bit WAV"""
+    samples = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+
+
+def make_consult(directory: str, index: int, minutes: float, words: int = 0) -> Dict:
+    """
+    Write consult_<index>.wav and return its transcript and segments
+
+    Args:
+        directory: Output directory
+        index: Consultation number (also the random seed)
+        minutes: Audio length
+        words: Transcript length (default: minutes * WORDS_PER_MINUTE)
+
+    Returns:
+        Dict with audio_path, audio_seconds, transcript, segments
+    """
+    words = words or int(minutes * WORDS_PER_MINUTE)
+    transcript, segments = make_transcript(words, seed=index)
+    audio_path = os.path.join(directory, f"consult_{index:03d}.wav")
+    write_wav(audio_path, make_audio(minutes * 60, seed=index))
+    return {"audio_path": audio_path, "audio_seconds": minutes * 60,
+            "transcript": transcript, "segments": segments}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--consults", type=int, default=5)
+    parser.add_argument("--minutes", type=float, default=3.0, help="Audio length per consultation")
+    parser.add_argument("--words", type=int, default=0, help="Transcript length (default: follows --minutes)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for i in range(args.consults):
+        consult = make_consult(args.out, i, args.minutes, args.words)
+        stem = os.path.splitext(consult["audio_path"])[0]
+        with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+            f.write(consult["transcript"])
+        with open(f"{stem}.segments.json", "w", encoding="utf-8") as f:
+            json.dump(consult["segments"], f, ensure_ascii=False, indent=2)
+        print(f"📄 {consult['audio_path']} ({args.minutes:g} min, {len(consult['transcript'].split())} words)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from .prompts import (
     LETTER_GENERATION_PROMPT,
     build_soap_prompt,
     build_letter_prompt,
+    build_system_prompt,
     get_specialty_context
 )
 
@@ -17,5 +18,6 @@ __all__ = [
     'LETTER_GENERATION_PROMPT',
     'build_soap_prompt',
     'build_letter_prompt',
+    'build_system_prompt',
     'get_specialty_context',
 ]
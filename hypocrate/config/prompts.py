@@ -1,6 +1,7 @@
 """
 Prompts pour la génération de contenu médical avec LLM
 """
+import json
 
 MEDICAL_SCRIBE_SYSTEM_PROMPT = """Tu es Hypocrate, un assistant médical expert spécialisé dans la rédaction de documents cliniques.
 
@@ -31,38 +32,95 @@ Génère un document JSON avec ces champs obligatoires:
 }
 """
 
-SOAP_GENERATION_PROMPT = """Analyse la consultation médicale suivante et génère un compte-rendu SOAP structuré.
+# Schéma JSON imposé au modèle (format d'Ollama), identique au FORMAT DE SORTIE ci-dessus
+SOAP_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "subjectif": {"type": "string"},
+        "objectif": {"type": "string"},
+        "analyse": {"type": "string"},
+        "plan": {"type": "string"},
+        "chief_complaint": {"type": "string"},
+        "allergies": {"type": "array", "items": {"type": "string"}},
+        "medications": {"type": "array", "items": {"type": "string"}},
+        "vital_signs": {"type": "object", "additionalProperties": {"type": "string"}},
+    },
+    "required": ["subjectif", "objectif", "analyse", "plan", "chief_complaint", "allergies", "medications"],
+}
+
+# Les prompts commencent par leur partie fixe et finissent par les données de
+# la consultation: le préfixe commun (prompt système, spécialité, consignes)
+# reste dans le cache KV d'Ollama d'un appel à l'autre.
+
+SOAP_GENERATION_PROMPT = """Analyse la consultation médicale ci-dessous et génère un compte-rendu SOAP structuré.
+
+INSTRUCTIONS:
+- Génère un compte-rendu SOAP complet et professionnel
+- Intègre toutes les entités médicales détectées
+- Respecte le format JSON spécifié
+- Sois factuel et précis
+- Signale toute information critique (allergies, contre-indications)
 
 CONTEXTE PATIENT:
 {patient_context}
 
+ENTITÉS MÉDICALES DÉTECTÉES:
+{entities}
+
 TRANSCRIPTION DE LA CONSULTATION:
 {transcript}
+"""
 
-ENTITÉS MÉDICALES DÉTECTÉES:
-{entities}
+SOAP_MAP_SYSTEM_PROMPT = """Tu es Hypocrate, un assistant médical expert. Tu lis UN extrait d'une consultation plus longue et tu en relèves les faits cliniques.
+
+RÈGLES IMPORTANTES:
+1. Relève UNIQUEMENT les informations explicitement mentionnées dans l'extrait
+2. Utilise une terminologie médicale appropriée
+3. Un fait = une phrase courte, pas de rédaction
+4. Liste vide si l'extrait ne dit rien pour un champ
+5. Réponds TOUJOURS en français
+
+FORMAT DE SORTIE:
+Génère un document JSON dont chaque champ est une liste de faits courts:
+{
+  "subjectif": ["plaintes et historique"],
+  "objectif": ["observations cliniques, examens, constantes"],
+  "analyse": ["diagnostics ou impressions cliniques"],
+  "plan": ["traitements, prescriptions, suivi"],
+  "chief_complaint": ["motifs de consultation"],
+  "allergies": ["allergies mentionnées"],
+  "medications": ["médicaments discutés"]
+}
+"""
+
+SOAP_MAP_PROMPT = """Relève les faits cliniques de l'extrait de consultation ci-dessous au format JSON.
+
+EXTRAIT {index} SUR {total}:
+{chunk}
+"""
+
+SOAP_REDUCE_PROMPT = """Les faits ci-dessous ont été relevés, dans l'ordre, sur les extraits successifs d'une même consultation médicale.
+Fusionne-les en un compte-rendu SOAP structuré unique.
 
 INSTRUCTIONS:
-- Génère un compte-rendu SOAP complet et professionnel
+- Supprime les doublons
+- En cas de contradiction entre extraits, garde l'information la plus récente
 - Intègre toutes les entités médicales détectées
 - Respecte le format JSON spécifié
-- Sois factuel et précis
-- Signale toute information critique (allergies, contre-indications)
 
-Génère maintenant le compte-rendu au format JSON:
-"""
+CONTEXTE PATIENT:
+{patient_context}
 
-LETTER_GENERATION_PROMPT = """Rédige une lettre d'adressage médicale professionnelle basée sur ce compte-rendu SOAP.
+ENTITÉS MÉDICALES DÉTECTÉES:
+{entities}
 
-COMPTE-RENDU SOAP:
-{soap_note}
+FAITS PAR EXTRAIT:
+{facts}
+"""
 
-INFORMATIONS DESTINATAIRE:
-Spécialité: {specialty}
-Type de lettre: {letter_type}
+LETTER_SYSTEM_PROMPT = "Tu es un assistant médical expert en rédaction de correspondance médicale professionnelle."
 
-PATIENT:
-{patient_info}
+LETTER_GENERATION_PROMPT = """Rédige une lettre d'adressage médicale professionnelle basée sur le compte-rendu SOAP ci-dessous.
 
 INSTRUCTIONS:
 - Rédige une lettre formelle et professionnelle
@@ -73,7 +131,15 @@ INSTRUCTIONS:
 - Termine par une formule de politesse appropriée
 - Signe "Dr. [Nom du médecin traitant]"
 
-Rédige maintenant la lettre:
+INFORMATIONS DESTINATAIRE:
+Spécialité: {specialty}
+Type de lettre: {letter_type}
+
+PATIENT:
+{patient_info}
+
+COMPTE-RENDU SOAP:
+{soap_note}
 """
 
 ENTITY_EXTRACTION_PROMPT = """Extrais les entités médicales de cette transcription.
@@ -106,6 +172,13 @@ Format JSON:
 }
 """
 
+CHIEF_COMPLAINT_PROMPT = """Résume en une ou deux phrases le motif principal de cette consultation.
+Réponds uniquement par le motif, sans introduction.
+
+TRANSCRIPTION:
+{transcript}
+"""
+
 VALIDATION_PROMPT = """Vérifie la cohérence et la sécurité de ce compte-rendu médical.
 
 COMPTE-RENDU:
@@ -158,21 +231,47 @@ def get_specialty_context(specialty: str) -> str:
     context = SPECIALTY_PROMPTS.get(specialty, SPECIALTY_PROMPTS["Généraliste"])
     return f"\nCONTEXTE SPÉCIALITÉ: {context['focus']}\n"
 
-def build_soap_prompt(transcript: str, entities: dict, patient_context: str = "", specialty: str = "Généraliste") -> str:
-    """Construit le prompt complet pour génération SOAP"""
-    specialty_ctx = get_specialty_context(specialty)
+def build_system_prompt(specialty: str = "Généraliste", base: str = MEDICAL_SCRIBE_SYSTEM_PROMPT) -> str:
+    """
+    Prompt système d'une spécialité: préfixe fixe de tous ses appels
     
-    entities_str = "\n".join([
+    Identique d'un appel à l'autre pour un même modèle et une même
+    spécialité, il est évalué une fois puis repris du cache KV d'Ollama.
+    """
+    return base + get_specialty_context(specialty)
+
+def _format_entities(entities: dict) -> str:
+    """Liste des entités médicales pour les prompts SOAP"""
+    return "\n".join([
         f"- Symptômes: {', '.join(entities.get('symptoms', []))}",
         f"- Diagnostics: {', '.join(entities.get('diagnoses', []))}",
         f"- Médicaments: {', '.join(entities.get('medications', []))}",
         f"- Allergies: {', '.join(entities.get('allergies', []))}",
     ])
-    
+
+def build_soap_prompt(transcript: str, entities: dict, patient_context: str = "") -> str:
+    """Construit le prompt de génération SOAP (spécialité: voir build_system_prompt)"""
     return SOAP_GENERATION_PROMPT.format(
-        patient_context=patient_context + specialty_ctx,
+        patient_context=patient_context,
         transcript=transcript,
-        entities=entities_str
+        entities=_format_entities(entities)
+    )
+
+def build_soap_map_prompt(chunk: str, index: int, total: int) -> str:
+    """Construit le prompt d'extraction des faits d'un extrait (index à partir de 0)"""
+    return SOAP_MAP_PROMPT.format(index=index + 1, total=total, chunk=chunk)
+
+def build_soap_reduce_prompt(facts: list, entities: dict, patient_context: str = "") -> str:
+    """Construit le prompt de fusion des faits de chaque extrait en compte-rendu SOAP"""
+    facts_str = "\n".join(
+        f"Extrait {i + 1}: {json.dumps(chunk_facts, ensure_ascii=False)}"
+        for i, chunk_facts in enumerate(facts)
+    )
+    
+    return SOAP_REDUCE_PROMPT.format(
+        patient_context=patient_context,
+        facts=facts_str,
+        entities=_format_entities(entities)
     )
 
 def build_letter_prompt(soap_note: dict, specialty: str, patient_info: str, letter_type: str = "adressage") -> str:
@@ -49,9 +49,6 @@ echo "5️⃣ Téléchargement modèles spaCy..."
 $PYTHON_PATH -m spacy download fr_core_news_md 2>/dev/null || \
     $PYTHON_PATH -m pip install https://github.com/explosion/spacy-models/releases/download/fr_core_news_md-3.7.0/fr_core_news_md-3.7.0-py3-none-any.whl
 
-$PYTHON_PATH -m spacy download en_core_web_sm 2>/dev/null || \
-    $PYTHON_PATH -m pip install https://github.com/explosion/spacy-models/releases/download/en_core_web_sm-3.7.0/en_core_web_sm-3.7.0-py3-none-any.whl
-
 echo ""
 echo "6️⃣ Installation scispaCy..."
 $PYTHON_PATH -m pip install scispacy
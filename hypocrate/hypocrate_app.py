@@ -7,6 +7,8 @@ import logging
 from pathlib import Path
 import tempfile
 import time
+import hashlib
+import threading
 
 # Configuration logging
 logging.basicConfig(
@@ -100,6 +102,24 @@ from services.transcription_hypocrate import get_hypocrate_transcription_service
 from services.ner_medical import get_medical_ner_service
 from services.soap_generator import get_soap_generator
 from services.letter_generator import get_letter_generator
+from services.model_registry import get_model_registry, preload_models
+from services.pipeline import Pipeline, Stage
+from services.ollama_client import resident_models
+from services.metrics import start_metrics_server
+
+
+@st.cache_resource
+def start_model_preload() -> threading.Thread:
+    """Lance une seule fois par serveur le préchargement des modèles en arrière-plan"""
+    thread = threading.Thread(target=preload_models, name="model-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Lance une seule fois par serveur l'endpoint /metrics (si HYPOCRATE_METRICS_PORT est défini)"""
+    return start_metrics_server()
 
 
 def init_session_state():
@@ -112,6 +132,10 @@ def init_session_state():
         st.session_state.soap_note = None
     if 'letter' not in st.session_state:
         st.session_state.letter = None
+    if 'chief_complaint' not in st.session_state:
+        st.session_state.chief_complaint = None
+    if 'pipeline_timings' not in st.session_state:
+        st.session_state.pipeline_timings = None
     if 'processing' not in st.session_state:
         st.session_state.processing = False
 
@@ -174,6 +198,15 @@ def display_sidebar():
         st.subheader("👨‍⚕️ Médecin")
         doctor_name = st.text_input("Nom du médecin", "Dr. Médecin Traitant")
         
+        # Modèles résidents
+        with st.expander("🧠 Modèles en mémoire"):
+            stats = get_model_registry().stats()
+            st.caption(f"{stats['resident_mb']:.0f} / {stats['budget_mb']:.0f} Mo (RSS processus: {stats['process_rss_mb']:.0f} Mo)")
+            for model in stats["models"]:
+                st.markdown(f"- {model['kind']} `{model['name']}`: {model['size_mb']:.0f} Mo")
+            for model in resident_models():
+                st.markdown(f"- ollama `{model['name']}`: {model['size_mb']:.0f} Mo")
+        
         # À propos
         st.markdown("---")
         st.markdown("### 📚 À propos")
@@ -200,79 +233,114 @@ def display_sidebar():
     }
 
 
+PIPELINE_LABELS = {
+    "transcript": "🎤 Transcription",
+    "entities": "🔍 Extraction des entités médicales",
+    "chief_complaint": "🩺 Motif de consultation",
+    "soap_note": "📝 Compte-rendu SOAP",
+    "letter": "📧 Lettre d'adressage",
+}
+
+
+def build_consultation_pipeline(tmp_path: str, audio_hash: str, config) -> Pipeline:
+    """
+    Construit le graphe de traitement d'une consultation
+    
+    Entités et motif de consultation partent dès la transcription; la lettre
+    dès que le SOAP est prêt.
+    """
+    transcription_service = get_hypocrate_transcription_service(config["whisper_model"])
+    ner_service = get_medical_ner_service(config["language"])
+    soap_generator = get_soap_generator()
+    letter_generator = get_letter_generator()
+    
+    patient_context = f"Patient: {config['patient_name']}, {config['patient_age']} ans"
+    if config['patient_sex'] != "Non spécifié":
+        patient_context += f", {config['patient_sex']}"
+    
+    return Pipeline([
+        Stage("transcript", lambda: transcription_service.transcribe_audio(
+            tmp_path,
+            language=config["language"],
+            with_timestamps=True,
+            audio_hash=audio_hash
+        )),
+        Stage("entities", lambda transcript: ner_service.extract_entities(transcript['text']),
+              deps=("transcript",)),
+        Stage("chief_complaint", lambda transcript: soap_generator.draft_chief_complaint(transcript['text']),
+              deps=("transcript",)),
+        Stage("soap_note", lambda transcript, entities: soap_generator.generate_soap_note(
+            transcript=transcript['text'],
+            entities=entities,
+            patient_context=patient_context,
+            specialty=config['specialty'],
+            segments=transcript.get('segments')
+        ), deps=("transcript", "entities")),
+        Stage("letter", lambda soap_note: letter_generator.generate_referral_letter(
+            soap_note=soap_note['soap_note'],
+            specialty=config['specialty'],
+            patient_name=config['patient_name'],
+            doctor_name=config['doctor_name']
+        ), deps=("soap_note",)),
+    ])
+
+
 def process_audio(audio_file, config):
     """Traite un fichier audio complet"""
     try:
         st.session_state.processing = True
+        for key in PIPELINE_LABELS:
+            st.session_state[key] = None
         
         # Sauvegarde temporaire
+        audio_bytes = audio_file.getvalue()
         with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio_file.name).suffix) as tmp_file:
-            tmp_file.write(audio_file.getvalue())
+            tmp_file.write(audio_bytes)
             tmp_path = tmp_file.name
         
-        # Étape 1: Transcription
-        with st.spinner("🎤 Transcription en cours..."):
-            transcription_service = get_hypocrate_transcription_service(config["whisper_model"])
-            
-            # Estime le temps
-            duration = transcription_service.get_audio_duration(tmp_path)
-            estimated_time = transcription_service.estimate_processing_time(duration)
-            
-            st.info(f"⏱️ Durée audio: {duration:.1f}s - Temps estimé: {estimated_time:.1f}s")
+        # Estime le temps (le décodage PCM sert ensuite à la transcription)
+        audio_hash = hashlib.sha256(audio_bytes).hexdigest()
+        transcription_service = get_hypocrate_transcription_service(config["whisper_model"])
+        duration = transcription_service.get_audio_duration(tmp_path, audio_hash)
+        estimated_time = transcription_service.estimate_processing_time(duration)
+        st.info(f"⏱️ Durée audio: {duration:.1f}s - Temps estimé transcription: {estimated_time:.1f}s")
+        
+        pipeline = build_consultation_pipeline(tmp_path, audio_hash, config)
+        
+        # Les résultats arrivent dans l'ordre de fin des étapes
+        success = True
+        with st.status("⚙️ Analyse de la consultation...", expanded=True) as status:
+            for result in pipeline.run():
+                label = PIPELINE_LABELS[result.name]
+                if result.skipped:
+                    st.warning(f"⏭️ {label}: étape sautée")
+                    success = False
+                    continue
+                if result.error is not None:
+                    st.error(f"❌ {label}: {result.error}")
+                    success = False
+                    continue
+                
+                st.session_state[result.name] = result.value
+                if result.value.get('cached'):
+                    st.success(f"✅ {label} (cache)")
+                else:
+                    st.success(f"✅ {label} en {result.duration:.1f}s")
+                if result.name == "chief_complaint":
+                    st.info(f"🩺 {result.value['chief_complaint']}")
             
-            transcript_result = transcription_service.transcribe_audio(
-                tmp_path,
-                language=config["language"],
-                with_timestamps=True
+            st.session_state.pipeline_timings = pipeline.timings
+            status.update(
+                label=f"{'✅' if success else '⚠️'} Analyse terminée en {pipeline.timings['total']:.1f}s",
+                state="complete" if success else "error",
+                expanded=not success
             )
-            
-            st.session_state.transcript = transcript_result
-            st.success(f"✅ Transcription terminée en {transcript_result['duration_seconds']:.1f}s")
-        
-        # Étape 2: Extraction entités
-        with st.spinner("🔍 Extraction des entités médicales..."):
-            ner_service = get_medical_ner_service(config["language"])
-            entities = ner_service.extract_entities(transcript_result['text'])
-            st.session_state.entities = entities
-            st.success("✅ Entités médicales extraites")
-        
-        # Étape 3: Génération SOAP
-        with st.spinner("📝 Génération du compte-rendu SOAP..."):
-            soap_generator = get_soap_generator()
-            
-            patient_context = f"Patient: {config['patient_name']}, {config['patient_age']} ans"
-            if config['patient_sex'] != "Non spécifié":
-                patient_context += f", {config['patient_sex']}"
-            
-            soap_result = soap_generator.generate_soap_note(
-                transcript=transcript_result['text'],
-                entities=entities,
-                patient_context=patient_context,
-                specialty=config['specialty']
-            )
-            
-            st.session_state.soap_note = soap_result
-            st.success(f"✅ SOAP généré en {soap_result['generation_time_seconds']:.1f}s")
-        
-        # Étape 4: Génération lettre
-        with st.spinner("📧 Génération de la lettre d'adressage..."):
-            letter_generator = get_letter_generator()
-            
-            letter_result = letter_generator.generate_referral_letter(
-                soap_note=soap_result['soap_note'],
-                specialty=config['specialty'],
-                patient_name=config['patient_name'],
-                doctor_name=config['doctor_name']
-            )
-            
-            st.session_state.letter = letter_result
-            st.success(f"✅ Lettre générée en {letter_result['generation_time_seconds']:.1f}s")
         
         # Nettoyage
         Path(tmp_path).unlink(missing_ok=True)
         
         st.session_state.processing = False
-        return True
+        return success
         
     except Exception as e:
         st.error(f"❌ Erreur lors du traitement: {str(e)}")
@@ -347,6 +415,10 @@ def display_results():
                 with vs_cols[i]:
                     st.metric(key.replace('_', ' ').title(), value)
     
+    # Motif de consultation (premier aperçu)
+    if st.session_state.chief_complaint:
+        st.markdown(f'<div class="info-box">🩺 <b>Motif:</b> {st.session_state.chief_complaint["chief_complaint"]}</div>', unsafe_allow_html=True)
+    
     # Compte-rendu SOAP
     if st.session_state.soap_note:
         st.markdown('<div class="section-header">📋 Compte-Rendu SOAP</div>', unsafe_allow_html=True)
@@ -395,6 +467,15 @@ def display_results():
         if st.button("📧 Copier la lettre"):
             st.code(letter_data['letter'], language=None)
             st.success("✅ Lettre prête à copier")
+    
+    # Temps par étape
+    if st.session_state.pipeline_timings:
+        with st.expander("⏱️ Temps par étape"):
+            timings = st.session_state.pipeline_timings
+            for name, label in PIPELINE_LABELS.items():
+                if name in timings:
+                    st.markdown(f"- {label}: {timings[name]:.1f}s")
+            st.markdown(f"- **Total (étapes en parallèle): {timings['total']:.1f}s**")
 
 
 def display_preparation_consultation():
@@ -683,6 +764,8 @@ def display_accounting():
 
 def main():
     """Fonction principale"""
+    start_model_preload()
+    start_metrics_endpoint()
     init_session_state()
     display_header()
     config = display_sidebar()
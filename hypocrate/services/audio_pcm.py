@@ -0,0 +1,124 @@
+"""
+Audio décodé une seule fois en PCM 16 kHz mono, relu par memory-mapping
+"""
+import logging
+import os
+import subprocess
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Whisper travaille sur de l'audio 16 kHz mono
+SAMPLE_RATE = 16000
+PCM_DTYPE = "<i2"
+PCM_BYTES_PER_SAMPLE = 2
+
+# Répertoire et budget par défaut (surchargeables par variables d'environnement)
+PCM_DIR = os.getenv("HYPOCRATE_PCM_DIR", str(Path(__file__).parent.parent / "cache" / "pcm"))
+PCM_CACHE_MAX_MB = int(os.getenv("HYPOCRATE_PCM_CACHE_MAX_MB", "2048"))
+
+
+def pcm_path_for(audio_hash: str) -> Path:
+    """Chemin du PCM décodé d'un fichier audio (identifié par son SHA-256)"""
+    return Path(PCM_DIR) / f"{audio_hash}.pcm"
+
+
+def decode_to_pcm(audio_path: str, audio_hash: str) -> Path:
+    """
+    Décode un fichier audio en PCM int16 16 kHz mono (une seule fois par contenu)
+
+    Mêmes options ffmpeg que whisper.load_audio: la transcription est identique.
+
+    Args:
+        audio_path: Fichier audio d'origine
+        audio_hash: SHA-256 du fichier (nomme le PCM)
+
+    Returns:
+        Chemin du fichier PCM
+    """
+    pcm_path = pcm_path_for(audio_hash)
+    if pcm_path.exists():
+        os.utime(pcm_path)  # Marque comme récemment utilisé (LRU)
+        return pcm_path
+
+    pcm_path.parent.mkdir(parents=True, exist_ok=True)
+    # Nom temporaire: un autre processus ne voit jamais un fichier incomplet
+    tmp_path = pcm_path.with_name(f"{pcm_path.name}.{uuid.uuid4().hex}.tmp")
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-threads", "0",
+        "-i", audio_path,
+        "-map", "0:a:0", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", str(tmp_path),
+    ]
+    try:
+        start_time = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        get_metrics().decode_seconds.observe(time.perf_counter() - start_time)
+        os.replace(tmp_path, pcm_path)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg n'est pas installé")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Échec du décodage audio: {e.stderr.decode(errors='replace').strip()}")
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    logger.info(f"Audio décodé: {pcm_duration(pcm_path):.1f}s -> {pcm_path.name}")
+    evict_pcm_cache()
+    return pcm_path
+
+
+def open_pcm(path: Path) -> np.ndarray:
+    """
+    Projette un fichier PCM en mémoire sans le lire
+
+    Les pages restent dans le cache du système, partagées entre processus.
+
+    Returns:
+        Tableau int16 en lecture seule adossé au fichier
+    """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(path, dtype=PCM_DTYPE, mode="r")
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """Échantillons int16 -> float32 dans [-1, 1] (une seule allocation)"""
+    if samples.dtype == np.int16:
+        return np.multiply(samples, np.float32(1 / 32768), dtype=np.float32)
+    return np.asarray(samples, dtype=np.float32)
+
+
+def pcm_duration(path: Path) -> float:
+    """Durée en secondes d'un fichier PCM"""
+    return os.path.getsize(path) / PCM_BYTES_PER_SAMPLE / SAMPLE_RATE
+
+
+def evict_pcm_cache(max_bytes: int = PCM_CACHE_MAX_MB * 1024 * 1024) -> int:
+    """Supprime les PCM les moins récemment utilisés au-delà du budget"""
+    entries = []
+    total = 0
+    for path in Path(PCM_DIR).glob("*.pcm"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    removed = 0
+    if total > max_bytes:
+        # Le plus récent est toujours conservé, même au-delà du budget
+        for _, size, path in sorted(entries)[:-1]:
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            if total <= max_bytes:
+                break
+        logger.info(f"Cache PCM: {removed} fichiers évincés")
+    return removed
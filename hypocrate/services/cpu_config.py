@@ -0,0 +1,149 @@
+"""
+Répartition du CPU entre processus d'inférence (threads, épinglage des cœurs)
+"""
+import logging
+import multiprocessing
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration par variables d'environnement
+CPU_THREADS = int(os.getenv("HYPOCRATE_CPU_THREADS", "0"))  # threads par processus (0 = cœurs / processus)
+CPU_PIN = os.getenv("HYPOCRATE_CPU_PIN", "0") == "1"  # cœurs dédiés à chaque processus
+CPU_CORES = os.getenv("HYPOCRATE_CPU_CORES", "")  # cœurs utilisables, ex. "0-7" (défaut: tous)
+
+# Lues par les pools de threads natifs à leur initialisation
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+@dataclass
+class CpuPlan:
+    """Ressources d'exécution d'un processus"""
+    threads: int
+    cores: Optional[List[int]] = None  # None = non épinglé
+
+
+def parse_cores(spec: str) -> List[int]:
+    """Liste de cœurs "0-3,8" -> [0, 1, 2, 3, 8]"""
+    cores = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cores.update(range(int(first), int(last or first) + 1))
+    return sorted(cores)
+
+
+def available_cores() -> List[int]:
+    """Cœurs autorisés pour ce processus (restreints par HYPOCRATE_CPU_CORES)"""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    if CPU_CORES:
+        allowed = set(parse_cores(CPU_CORES))
+        cores = [core for core in cores if core in allowed] or cores
+    return cores
+
+
+def plan_cpu(workers: int, slot: int, threads: Optional[int] = None, pin: Optional[bool] = None) -> CpuPlan:
+    """
+    Threads et cœurs d'un processus parmi `workers`
+
+    Args:
+        workers: Nombre de processus qui se partagent les cœurs
+        slot: Rang de ce processus
+        threads: Threads par processus (HYPOCRATE_CPU_THREADS, sinon part égale des cœurs)
+        pin: Épingler le processus sur ses propres cœurs (HYPOCRATE_CPU_PIN)
+
+    Returns:
+        Plan du processus (cœurs consécutifs, partagés si workers x threads dépasse le total)
+    """
+    cores = available_cores()
+    threads = threads or CPU_THREADS or max(len(cores) // max(workers, 1), 1)
+    pin = CPU_PIN if pin is None else pin
+    if not pin:
+        return CpuPlan(threads=threads)
+
+    first = (slot * threads) % len(cores)
+    assigned = [cores[(first + i) % len(cores)] for i in range(min(threads, len(cores)))]
+    return CpuPlan(threads=threads, cores=sorted(assigned))
+
+
+def limit_threads(threads: int) -> None:
+    """Limite les pools de threads déjà chargés (torch, BLAS de numpy)"""
+    if not threads:
+        return
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+
+# Plan appliqué à ce processus (None tant qu'apply_cpu_plan n'a pas été appelé)
+_applied_plan: Optional[CpuPlan] = None
+
+
+def apply_cpu_plan(plan: CpuPlan) -> None:
+    """
+    Applique un plan au processus courant, avant le chargement des modèles
+
+    Les variables d'environnement valent pour les bibliothèques chargées
+    ensuite, limit_threads pour celles déjà importées.
+    """
+    global _applied_plan
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(plan.threads)
+    if plan.cores is not None:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, plan.cores)
+        else:
+            logger.warning("Épinglage des cœurs non supporté sur cette plateforme")
+    limit_threads(plan.threads)
+    _applied_plan = plan
+    logger.info(
+        f"Plan CPU: {plan.threads} threads"
+        + (f", cœurs {plan.cores}" if plan.cores is not None else "")
+    )
+
+
+def inference_threads() -> int:
+    """Threads des modèles de ce processus (0 = valeur par défaut des bibliothèques)"""
+    if _applied_plan is not None:
+        return _applied_plan.threads
+    return CPU_THREADS
+
+
+def slot_counter(context=None):
+    """
+    Compteur partagé qui distribue les rangs d'un pool
+
+    À passer dans les initargs du pool, puis take_pool_slot dans
+    l'initialiseur: chaque processus reçoit son propre rang, y compris
+    pour un pool lancé depuis un processus qui est lui-même un worker.
+
+    Args:
+        context: Contexte multiprocessing du pool (défaut: contexte global)
+    """
+    return (context or multiprocessing).Value("i", 0)
+
+
+def take_pool_slot(counter, workers: int) -> int:
+    """Réserve le rang suivant d'un pool (dans son initialiseur), dans [0, workers)"""
+    with counter.get_lock():
+        slot = counter.value % max(workers, 1)
+        counter.value += 1
+    return slot
@@ -1,7 +1,6 @@
 """
 Générateur de lettres d'adressage médical
 """
-import ollama
 import logging
 import time
 from typing import Dict, Optional
@@ -10,7 +9,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config.prompts import build_letter_prompt, MEDICAL_SCRIBE_SYSTEM_PROMPT
+from config.prompts import build_letter_prompt, LETTER_SYSTEM_PROMPT, MEDICAL_SCRIBE_SYSTEM_PROMPT
+from .ollama_client import chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +34,8 @@ class LetterGenerator:
         specialty: str = "Spécialiste",
         patient_name: str = "Patient",
         doctor_name: str = "Dr. Médecin Traitant",
-        letter_type: str = "adressage"
+        letter_type: str = "adressage",
+        force_regenerate: bool = False
     ) -> Dict:
         """
         Génère une lettre d'adressage
@@ -45,6 +46,7 @@ class LetterGenerator:
             patient_name: Nom du patient
             doctor_name: Nom du médecin
             letter_type: Type de lettre
+            force_regenerate: Ignore le cache des réponses LLM
             
         Returns:
             Dict avec la lettre et métadonnées
@@ -67,29 +69,22 @@ class LetterGenerator:
             
             logger.info(f"Génération lettre d'adressage pour {specialty}...")
             
-            # Génération avec Ollama
-            response = ollama.chat(
+            # Génération avec Ollama (réponses identiques servies par le cache)
+            response = chat_completion(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Tu es un assistant médical expert en rédaction de correspondance médicale professionnelle."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                prompt=prompt,
+                system_prompt=LETTER_SYSTEM_PROMPT,
                 options={
                     "temperature": 0.4,
                     "num_predict": 1500,
-                }
+                },
+                use_cache=not force_regenerate
             )
             
             generation_time = time.time() - start_time
             
             # Formate la lettre
-            letter_text = response['message']['content'].strip()
+            letter_text = response['content'].strip()
             
             # Ajoute signature si absente
             if not any(sig in letter_text.lower() for sig in ["cordialement", "salutations", "bien à vous"]):
@@ -0,0 +1,191 @@
+"""
+Lexiques médicaux (médicaments, symptômes) compilés en automate Aho-Corasick
+"""
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEXICON_DIR = Path(__file__).parent.parent / "config" / "lexicons"
+
+# Lexiques par défaut (surchargeables par variables d'environnement)
+MEDICATION_LEXICON_PATH = os.getenv("HYPOCRATE_MEDICATION_LEXICON", str(LEXICON_DIR / "medications.tsv"))
+SYMPTOM_LEXICON_PATH = os.getenv("HYPOCRATE_SYMPTOM_LEXICON", str(LEXICON_DIR / "symptoms.tsv"))
+
+
+@dataclass(frozen=True)
+class LexiconMatch:
+    """Occurrence d'un terme du lexique dans un texte"""
+    start: int
+    end: int
+    term: str
+    canonical: str
+
+
+def _normalize(text: str) -> str:
+    """Minuscules en conservant les positions (un caractère pour un caractère)"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(c: str) -> bool:
+    """Caractère faisant partie d'un mot (limites de tokens)"""
+    return c.isalnum() or c == "_"
+
+
+class Lexicon:
+    """Lexique compilé: toutes les occurrences en un seul passage linéaire"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]], name: str = "lexique"):
+        """
+        Compile le lexique
+
+        Args:
+            entries: Couples (terme, forme canonique)
+            name: Nom pour les logs
+        """
+        self.name = name
+        self.canonical: Dict[str, str] = {}
+        for term, canonical in entries:
+            term = _normalize(term.strip())
+            if term:
+                self.canonical[term] = canonical.strip() or term
+
+        # Automate: transitions, liens d'échec et termes reconnus par état
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for term in self.canonical:
+            self._add(term)
+        self._build_failure_links()
+
+        logger.info(f"Lexique {name}: {len(self.canonical)} termes, {len(self._goto)} états")
+
+    def __len__(self) -> int:
+        return len(self.canonical)
+
+    def __contains__(self, term: str) -> bool:
+        return _normalize(term) in self.canonical
+
+    def _add(self, term: str) -> None:
+        """Ajoute un terme au trie"""
+        state = 0
+        for c in term:
+            nxt = self._goto[state].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(term)
+
+    def _build_failure_links(self) -> None:
+        """Calcule les liens d'échec par parcours en largeur"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(c, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[LexiconMatch]:
+        """
+        Trouve les termes du lexique présents dans le texte
+
+        Les correspondances respectent les limites de mots; en cas de
+        chevauchement, la plus à gauche puis la plus longue est retenue.
+
+        Args:
+            text: Texte à analyser
+
+        Returns:
+            Occurrences, dans l'ordre du texte
+        """
+        normalized = _normalize(text)
+        n = len(normalized)
+        candidates = []
+        state = 0
+        for i, c in enumerate(normalized):
+            while state and c not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(c, 0)
+            for term in self._out[state]:
+                start = i - len(term) + 1
+                if (start == 0 or not _is_word_char(normalized[start - 1])) and \
+                        (i + 1 == n or not _is_word_char(normalized[i + 1])):
+                    candidates.append((start, i + 1, term))
+
+        matches = []
+        last_end = 0
+        for start, end, term in sorted(candidates, key=lambda m: (m[0], m[0] - m[1])):
+            if start >= last_end:
+                matches.append(LexiconMatch(start, end, text[start:end], self.canonical[term]))
+                last_end = end
+        return matches
+
+
+def read_lexicon_file(path: str) -> List[Tuple[str, str]]:
+    """
+    Lit un lexique: une entrée par ligne, 'terme' ou 'terme<TAB>canonique'
+
+    Les lignes vides et commençant par '#' sont ignorées.
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            term, _, canonical = line.partition("\t")
+            entries.append((term, canonical or term))
+    return entries
+
+
+# Lexiques compilés, partagés par tout le processus (clé: chemin et date de modification)
+_lexicons: Dict[Tuple[str, float], Lexicon] = {}
+_lexicons_lock = threading.Lock()
+
+
+def load_lexicon(path: str) -> Lexicon:
+    """
+    Charge et compile un lexique (une seule fois tant que le fichier ne change pas)
+
+    Args:
+        path: Fichier du lexique
+
+    Returns:
+        Lexique compilé
+    """
+    key = (str(Path(path).resolve()), os.path.getmtime(path))
+    with _lexicons_lock:
+        lexicon = _lexicons.get(key)
+        if lexicon is None:
+            lexicon = Lexicon(read_lexicon_file(path), name=Path(path).stem)
+            # Une ancienne version du même fichier n'est plus utile
+            for old_key in [k for k in _lexicons if k[0] == key[0]]:
+                del _lexicons[old_key]
+            _lexicons[key] = lexicon
+    return lexicon
+
+
+def get_medication_lexicon() -> Lexicon:
+    """Lexique des médicaments configuré"""
+    return load_lexicon(MEDICATION_LEXICON_PATH)
+
+
+def get_symptom_lexicon() -> Lexicon:
+    """Lexique des symptômes configuré"""
+    return load_lexicon(SYMPTOM_LEXICON_PATH)
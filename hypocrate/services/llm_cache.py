@@ -0,0 +1,241 @@
+"""
+Cache des réponses LLM (backends mémoire et SQLite)
+"""
+import abc
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration par variables d'environnement
+LLM_CACHE_BACKEND = os.getenv("HYPOCRATE_LLM_CACHE", "sqlite")  # sqlite, memory, none
+LLM_CACHE_PATH = os.getenv(
+    "HYPOCRATE_LLM_CACHE_PATH",
+    str(Path(__file__).parent.parent / "cache" / "llm_responses.sqlite3")
+)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("HYPOCRATE_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("HYPOCRATE_LLM_CACHE_MAX_ENTRIES", "1000"))
+
+
+class ResponseCache(abc.ABC):
+    """Classe de base: clé = (modèle, prompt système, prompt utilisateur, options)"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        """
+        Initialise le cache
+
+        Args:
+            ttl_seconds: Durée de vie d'une entrée (0 = illimitée)
+            max_entries: Nombre maximal d'entrées (éviction LRU)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        system_prompt: Optional[str],
+        prompt: str,
+        options: Dict[str, Any],
+        format: Optional[Any] = None
+    ) -> str:
+        """Construit la clé de cache d'une requête (format: "json" ou schéma JSON imposé)"""
+        request = {"model": model, "system": system_prompt, "prompt": prompt, "options": options}
+        if format is not None:
+            request["format"] = format
+        payload = json.dumps(
+            request,
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        """Indique si une entrée a dépassé sa durée de vie"""
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def _record(self, hit: bool) -> None:
+        """Met à jour les compteurs hits/misses"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retourne la réponse en cache, ou None"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Enregistre une réponse"""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Vide le cache"""
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs hits/misses du processus courant"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Cache LRU en mémoire (survit aux reruns Streamlit, pas aux redémarrages)"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self._record(entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache persistant dans un fichier SQLite"""
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1]):
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                value = json.loads(row[0])
+        self._record(value is not None)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), now, now)
+            )
+            # Éviction LRU au-delà de la limite
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                " SELECT key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+
+def create_response_cache(
+    backend: str,
+    path: Optional[str] = None,
+    ttl_seconds: int = 0,
+    max_entries: int = 1000
+) -> Optional[ResponseCache]:
+    """
+    Construit un cache à partir du nom de backend
+
+    Args:
+        backend: 'sqlite', 'memory' ou 'none'
+        path: Fichier SQLite (backend sqlite)
+        ttl_seconds: Durée de vie des entrées
+        max_entries: Nombre maximal d'entrées
+
+    Returns:
+        Instance du cache, ou None si désactivé
+    """
+    backend = (backend or "none").lower()
+    if backend == "sqlite":
+        return SQLiteResponseCache(path, ttl_seconds, max_entries)
+    if backend == "memory":
+        return InMemoryResponseCache(ttl_seconds, max_entries)
+    if backend == "none":
+        return None
+    raise ValueError(f"Backend de cache LLM inconnu: {backend}")
+
+
+# Instance singleton
+_response_cache: Optional[ResponseCache] = None
+_response_cache_initialized = False
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Obtient le cache de réponses configuré
+
+    Returns:
+        Instance du cache, ou None si HYPOCRATE_LLM_CACHE=none
+    """
+    global _response_cache, _response_cache_initialized
+
+    if not _response_cache_initialized:
+        _response_cache = create_response_cache(
+            LLM_CACHE_BACKEND,
+            path=LLM_CACHE_PATH,
+            ttl_seconds=LLM_CACHE_TTL_SECONDS,
+            max_entries=LLM_CACHE_MAX_ENTRIES
+        )
+        _response_cache_initialized = True
+
+    return _response_cache
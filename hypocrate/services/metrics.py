@@ -0,0 +1,113 @@
+"""
+Métriques du pipeline (latences, tokens, chargements de modèles) au format Prometheus
+
+Les types de métriques et les collecteurs communs (scribe_*) viennent du
+module partagé avec l'API (backend/app/utils/prometheus.py): un même
+tableau de bord couvre les deux applications. Hypocrate tourne dans un
+seul processus; l'export se fait par un petit serveur HTTP
+(HYPOCRATE_METRICS_PORT).
+"""
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+# Le paquet app du backend fournit les types partagés
+BACKEND_DIR = str(Path(__file__).resolve().parent.parent.parent / "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from app.utils.prometheus import OLLAMA_LOAD_EVENT_SECONDS, PipelineMetrics  # noqa: E402,F401 (OLLAMA_* réexporté)
+
+logger = logging.getLogger(__name__)
+
+# Port de l'endpoint /metrics (vide: pas de serveur)
+METRICS_PORT = os.getenv("HYPOCRATE_METRICS_PORT", "")
+METRICS_HOST = os.getenv("HYPOCRATE_METRICS_HOST", "127.0.0.1")
+
+
+class Metrics(PipelineMetrics):
+    """
+    Collecteurs du pipeline Hypocrate
+
+    Hypocrate n'enregistre que les collecteurs communs à l'API.
+
+    Exemple: get_metrics().whisper_seconds.observe(12.3, model="base", backend="openai")
+    """
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Une ligne par scrape noierait les journaux
+        pass
+
+
+# Instances uniques
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def get_metrics() -> Metrics:
+    """
+    Obtient les métriques du processus (singleton)
+
+    Returns:
+        Instance des métriques
+    """
+    global _metrics
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+    return _metrics
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[int]:
+    """
+    Démarre l'endpoint /metrics dans un thread (une seule fois par processus)
+
+    Streamlit ré-exécute le script à chaque interaction: les appels suivants
+    ne font rien.
+
+    Args:
+        port: Port d'écoute (défaut: HYPOCRATE_METRICS_PORT; aucun serveur s'il est vide)
+
+    Returns:
+        Port d'écoute, ou None si l'export est désactivé ou impossible
+    """
+    global _server
+
+    with _metrics_lock:
+        if _server is not None:
+            return _server.server_address[1]
+        if port is None:
+            if not METRICS_PORT:
+                return None
+            port = int(METRICS_PORT)
+        try:
+            _server = ThreadingHTTPServer((METRICS_HOST, port), _MetricsHandler)
+        except OSError as e:
+            logger.error(f"Endpoint /metrics indisponible sur le port {port}: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+
+    logger.info(f"Métriques Prometheus sur http://{METRICS_HOST}:{_server.server_address[1]}/metrics")
+    return _server.server_address[1]
@@ -0,0 +1,299 @@
+"""
+Registre des modèles résidents (préchargement au démarrage, budget RAM)
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cpu_config import inference_threads, limit_threads
+from .metrics import get_metrics
+from .whisper_backend import BACKEND_OPENAI, WHISPER_BACKEND, load_whisper_model
+
+logger = logging.getLogger(__name__)
+
+KIND_WHISPER = "whisper"
+KIND_SPACY = "spacy"
+
+# Configuration par variables d'environnement
+MODEL_RAM_BUDGET_MB = int(os.getenv("HYPOCRATE_MODEL_RAM_BUDGET_MB", "4096"))  # 0 = illimité
+PRELOAD_WHISPER_MODELS = os.getenv("HYPOCRATE_PRELOAD_WHISPER", "base")
+PRELOAD_SPACY_MODELS = os.getenv("HYPOCRATE_PRELOAD_SPACY", "fr_core_news_md,en_ner_bc5cdr_md")
+PRELOAD_OLLAMA_MODELS = os.getenv("HYPOCRATE_PRELOAD_OLLAMA", "llama2:latest")
+
+
+def rss_bytes() -> int:
+    """Mémoire résidente du processus (0 si inconnue)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def torch_module_bytes(model: Any) -> int:
+    """Mémoire occupée par les paramètres et buffers d'un module torch"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def detect_device() -> str:
+    """Détecte le meilleur device PyTorch disponible"""
+    import torch
+    if torch.cuda.is_available():
+        return "cuda"
+    # MPS (Apple Silicon) a des problèmes de compatibilité avec Whisper
+    return "cpu"
+
+
+def whisper_model_name(model_size: str, device: str) -> str:
+    """Nom d'un modèle Whisper dans le registre (taille et device)"""
+    return f"{model_size}@{device}"
+
+
+@dataclass
+class ResidentModel:
+    """Modèle chargé et ses métadonnées"""
+    kind: str
+    name: str
+    model: Any
+    size_bytes: int
+    load_seconds: float
+    last_used: float
+
+
+class ModelRegistry:
+    """Garde les modèles chargés en mémoire, éviction LRU au-delà du budget"""
+
+    def __init__(self, budget_bytes: int):
+        """
+        Initialise le registre
+
+        Args:
+            budget_bytes: Taille totale des modèles avant éviction (0 = illimitée)
+        """
+        self.budget_bytes = budget_bytes
+        self._loaders: Dict[str, Tuple[Callable[[str], Any], Optional[Callable[[Any], int]]]] = {}
+        self._models: "OrderedDict[Tuple[str, str], ResidentModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def register_loader(
+        self,
+        kind: str,
+        loader: Callable[[str], Any],
+        sizer: Optional[Callable[[Any], int]] = None
+    ) -> None:
+        """
+        Enregistre la fonction de chargement d'un type de modèle
+
+        Args:
+            kind: Type de modèle (whisper, spacy)
+            loader: Charge un modèle à partir de son nom
+            sizer: Taille en octets d'un modèle chargé (sinon: hausse de la
+                RSS pendant le chargement, approximative en parallèle)
+        """
+        self._loaders[kind] = (loader, sizer)
+
+    def get(self, kind: str, name: str) -> Any:
+        """
+        Retourne un modèle résident, en le chargeant si besoin
+
+        Args:
+            kind: Type de modèle
+            name: Nom du modèle
+
+        Returns:
+            Le modèle chargé
+        """
+        key = (kind, name)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry.last_used = time.time()
+                self._models.move_to_end(key)
+                return entry.model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Un seul chargement par modèle, modèles différents en parallèle
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+            if entry is not None:
+                return entry.model
+
+            if kind not in self._loaders:
+                raise KeyError(f"Aucun chargeur pour le type de modèle: {kind}")
+            loader, sizer = self._loaders[kind]
+
+            logger.info(f"Chargement du modèle {kind} {name}...")
+            rss_before = rss_bytes()
+            start_time = time.time()
+            model = loader(name)
+            load_time = time.time() - start_time
+            size = sizer(model) if sizer else max(rss_bytes() - rss_before, 0)
+            logger.info(f"Modèle {kind} {name} chargé en {load_time:.2f}s ({size / 2**20:.0f} Mo)")
+            get_metrics().model_loads.inc(kind=kind, model=name)
+            get_metrics().model_load_seconds.observe(load_time, kind=kind, model=name)
+
+            with self._lock:
+                self._models[key] = ResidentModel(kind, name, model, size, load_time, time.time())
+                self._enforce_budget(keep=key)
+        return model
+
+    def _enforce_budget(self, keep: Tuple[str, str]) -> None:
+        """Évince les modèles les moins récemment utilisés (verrou tenu)"""
+        if not self.budget_bytes:
+            return
+        total = sum(m.size_bytes for m in self._models.values())
+        for key in list(self._models):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            evicted = self._models.pop(key)
+            total -= evicted.size_bytes
+            logger.info(f"Modèle {evicted.kind} {evicted.name} évincé ({evicted.size_bytes / 2**20:.0f} Mo)")
+        if total > self.budget_bytes:
+            logger.warning(
+                f"Modèles résidents: {total / 2**20:.0f} Mo, "
+                f"au-delà du budget de {self.budget_bytes / 2**20:.0f} Mo"
+            )
+
+    def evict(self, kind: str, name: str) -> bool:
+        """Retire un modèle du registre (libéré quand plus personne ne le référence)"""
+        with self._lock:
+            return self._models.pop((kind, name), None) is not None
+
+    def preload(self, specs: List[Tuple[str, str]], max_workers: int = 4) -> Dict[str, Optional[str]]:
+        """
+        Charge plusieurs modèles en parallèle
+
+        Args:
+            specs: Couples (type, nom) à charger
+            max_workers: Chargements simultanés
+
+        Returns:
+            Dict 'type:nom' -> None si succès, sinon message d'erreur
+        """
+        def _load(spec: Tuple[str, str]) -> Optional[str]:
+            try:
+                self.get(*spec)
+                return None
+            except Exception as e:
+                logger.error(f"Échec préchargement {spec[0]} {spec[1]}: {e}")
+                return str(e)
+
+        if not specs:
+            return {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preload") as pool:
+            results = list(pool.map(_load, specs))
+        return {f"{kind}:{name}": error for (kind, name), error in zip(specs, results)}
+
+    def stats(self) -> Dict[str, Any]:
+        """Modèles résidents et mémoire occupée (le plus récemment utilisé en dernier)"""
+        with self._lock:
+            models = [
+                {
+                    "kind": m.kind,
+                    "name": m.name,
+                    "size_mb": round(m.size_bytes / 2**20, 1),
+                    "load_seconds": round(m.load_seconds, 2),
+                    "last_used": m.last_used,
+                }
+                for m in self._models.values()
+            ]
+            total = sum(m.size_bytes for m in self._models.values())
+        return {
+            "budget_mb": round(self.budget_bytes / 2**20, 1),
+            "resident_mb": round(total / 2**20, 1),
+            "process_rss_mb": round(rss_bytes() / 2**20, 1),
+            "models": models,
+        }
+
+
+def _load_whisper(name: str) -> Any:
+    """Charge un modèle Whisper ('taille@device') avec le moteur configuré"""
+    model_size, _, device = name.partition("@")
+    return load_whisper_model(model_size, device=device or None, num_threads=inference_threads())
+
+
+def _load_spacy(name: str) -> Any:
+    """Charge un modèle spaCy/scispaCy (threads limités au plan CPU du processus)"""
+    import spacy
+    nlp = spacy.load(name)
+    limit_threads(inference_threads())
+    return nlp
+
+
+def _split(value: str) -> List[str]:
+    """Découpe une liste séparée par des virgules"""
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def preload_models() -> Dict[str, Optional[str]]:
+    """
+    Précharge en parallèle les modèles Whisper, spaCy et Ollama configurés
+
+    Les modèles Ollama vivent dans le serveur Ollama: ils y sont seulement
+    chargés (avec keep_alive), sans compter dans le budget du registre.
+
+    Returns:
+        Dict 'type:nom' -> None si succès, sinon message d'erreur
+    """
+    from .ollama_client import warm_up
+
+    device = detect_device()
+    specs = [(KIND_WHISPER, whisper_model_name(size, device)) for size in _split(PRELOAD_WHISPER_MODELS)]
+    specs += [(KIND_SPACY, name) for name in _split(PRELOAD_SPACY_MODELS)]
+    ollama_models = _split(PRELOAD_OLLAMA_MODELS)
+
+    def _warm_ollama(name: str) -> Optional[str]:
+        try:
+            warm_up(name)
+            return None
+        except Exception as e:
+            logger.error(f"Échec préchargement Ollama {name}: {e}")
+            return str(e)
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max(len(ollama_models), 1), thread_name_prefix="warm") as pool:
+        ollama_results = pool.map(_warm_ollama, ollama_models)
+        results = get_model_registry().preload(specs)
+        results.update({f"ollama:{name}": error for name, error in zip(ollama_models, ollama_results)})
+    logger.info(f"Préchargement terminé en {time.time() - start_time:.2f}s: {results}")
+    return results
+
+
+# Instance singleton
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Obtient le registre des modèles
+
+    Returns:
+        Instance du registre (chargeurs Whisper et spaCy enregistrés)
+    """
+    global _model_registry
+
+    with _model_registry_lock:
+        if _model_registry is None:
+            _model_registry = ModelRegistry(MODEL_RAM_BUDGET_MB * 1024 * 1024)
+            # Poids CTranslate2 hors de torch: taille mesurée par la croissance du RSS
+            sizer = torch_module_bytes if WHISPER_BACKEND == BACKEND_OPENAI else None
+            _model_registry.register_loader(KIND_WHISPER, _load_whisper, sizer)
+            _model_registry.register_loader(KIND_SPACY, _load_spacy)
+
+    return _model_registry
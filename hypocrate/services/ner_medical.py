@@ -2,14 +2,62 @@
 Service d'extraction d'entités médicales (NER) pour Hypocrate
 Utilise scispaCy pour la détection d'entités biomédicales
 """
-import spacy
 import re
 import logging
-from typing import Dict, List, Set, Optional
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterable, List, Set, Optional
 from collections import defaultdict
 
+from .cpu_config import apply_cpu_plan, plan_cpu, slot_counter, take_pool_slot
+from .lexicon import get_medication_lexicon, get_symptom_lexicon
+from .metrics import get_metrics
+from .model_registry import get_model_registry, KIND_SPACY
+
 logger = logging.getLogger(__name__)
 
+SPACY_MODEL_FR = "fr_core_news_md"
+SPACY_MODEL_SCI = "en_ner_bc5cdr_md"
+
+# Composants réellement utilisés: entités pour scispaCy, lemmes pour le français
+SCI_PIPES = {"ner"}
+FR_PIPES = {"morphologizer", "attribute_ruler", "lemmatizer"}
+
+# Expressions régulières compilées une seule fois
+ALLERGY_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [
+        r"allergi(?:que|e)?\s+(?:à|au|aux)\s+([a-zéèêàâôù\s-]+)",
+        r"allergi(?:que|e)?\s*:\s*([a-zéèêàâôù\s,-]+)",
+        r"ne\s+(?:peut|doit)\s+pas\s+prendre\s+(?:de|d')?\s*([a-zéèêàâôù\s-]+)",
+        r"intoléran(?:ce|t)\s+(?:à|au|aux)\s+([a-zéèêàâôù\s-]+)",
+    ]
+]
+TEMPERATURE_PATTERN = re.compile(r"(?:température|temp|T°?)\s*:?\s*(\d+(?:[.,]\d+)?)\s*°?C?", re.IGNORECASE)
+BLOOD_PRESSURE_PATTERN = re.compile(r"(?:tension|TA|PA)\s*:?\s*(\d+)\s*/\s*(\d+)", re.IGNORECASE)
+HEART_RATE_PATTERN = re.compile(r"(?:fréquence cardiaque|FC|pouls)\s*:?\s*(\d+)", re.IGNORECASE)
+SPO2_PATTERN = re.compile(r"(?:saturation|SpO2|SaO2)\s*:?\s*(\d+)\s*%?", re.IGNORECASE)
+MEDICATION_DOSAGE_PATTERN = re.compile(
+    r"(?:prendre|prescrire|donner)\s+(?:de|du|des)?\s*([A-ZÉÈa-zéèêàâôù]+(?:\s+\d+(?:mg|g|ml)?)?)",
+    re.IGNORECASE
+)
+
+
+def unused_pipes(nlp, needed: Set[str]) -> List[str]:
+    """
+    Composants d'un pipeline spaCy inutiles pour obtenir `needed`
+    
+    Les tok2vec partagés écoutés par un composant utile sont conservés.
+    """
+    keep = set(needed)
+    for name in nlp.pipe_names:
+        listeners = getattr(nlp.get_pipe(name), "listening_components", [])
+        if keep & set(listeners):
+            keep.add(name)
+    return [name for name in nlp.pipe_names if name not in keep]
+
 
 class MedicalNERService:
     """Service d'extraction d'entités médicales"""
@@ -22,32 +70,38 @@ class MedicalNERService:
             language: Langue du modèle (fr ou en)
         """
         self.language = language
-        self.nlp_fr = None
-        self.nlp_en = None
-        self.nlp_sci = None
+        self._unavailable: Set[str] = set()
+        self.last_batch_stats: Dict[str, float] = {}
         
         logger.info(f"Initialisation NER médical (langue: {language})")
     
-    def _load_models(self):
-        """Charge les modèles spaCy (lazy loading)"""
+    def _get_model(self, name: str):
+        """Obtient un modèle spaCy depuis le registre (None s'il ne peut être chargé)"""
+        if name in self._unavailable:
+            return None
         try:
-            if self.nlp_fr is None and self.language == "fr":
-                logger.info("Chargement modèle spaCy français...")
-                self.nlp_fr = spacy.load("fr_core_news_md")
-            
-            if self.nlp_en is None:
-                logger.info("Chargement modèle spaCy anglais...")
-                self.nlp_en = spacy.load("en_core_web_sm")
-            
-            if self.nlp_sci is None:
-                logger.info("Chargement modèle scispaCy médical...")
-                self.nlp_sci = spacy.load("en_ner_bc5cdr_md")
-            
-            logger.info("Modèles NER chargés avec succès")
-            
+            return get_model_registry().get(KIND_SPACY, name)
         except Exception as e:
-            logger.error(f"Erreur chargement modèles NER: {e}")
+            logger.error(f"Erreur chargement modèle NER {name}: {e}")
             logger.warning("Certaines fonctionnalités NER seront limitées")
+            self._unavailable.add(name)
+            return None
+    
+    @property
+    def nlp_fr(self):
+        """Modèle spaCy français"""
+        return self._get_model(SPACY_MODEL_FR) if self.language == "fr" else None
+    
+    @property
+    def nlp_sci(self):
+        """Modèle scispaCy médical"""
+        return self._get_model(SPACY_MODEL_SCI)
+    
+    def _load_models(self):
+        """Charge les modèles spaCy dans le registre (lazy loading)"""
+        self._get_model(SPACY_MODEL_SCI)
+        if self.language == "fr":
+            self._get_model(SPACY_MODEL_FR)
     
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """
@@ -59,8 +113,95 @@ class MedicalNERService:
         Returns:
             Dict avec les entités par catégorie
         """
-        self._load_models()
+        start_time = time.perf_counter()
+        entities = self._extract_docs([text], batch_size=1)[0]
+        get_metrics().ner_seconds.observe(time.perf_counter() - start_time)
         
+        logger.info(f"Entités extraites: {sum(len(v) if isinstance(v, list) else len(v) for v in entities.values())} au total")
+        
+        return entities
+    
+    def extract_entities_batch(
+        self,
+        texts: List[str],
+        n_process: int = 1,
+        batch_size: int = 32
+    ) -> List[Dict[str, List[str]]]:
+        """
+        Extrait les entités d'un lot de textes (ré-extraction d'archives)
+        
+        Les textes passent par nlp.pipe, composants inutiles désactivés.
+        Avec n_process > 1, un pool de processus partagé traite des tranches
+        de textes avec les deux modèles (scispaCy et français), chargés une
+        seule fois par processus.
+        
+        Args:
+            texts: Textes des consultations
+            n_process: Nombre de processus (1 = dans le processus courant)
+            batch_size: Taille des lots passés à nlp.pipe
+            
+        Returns:
+            Liste des entités, dans l'ordre des textes
+        """
+        start_time = time.time()
+        
+        if n_process <= 1 or len(texts) <= batch_size:
+            results = self._extract_docs(texts, batch_size)
+        else:
+            # Tranches assez petites pour équilibrer la charge entre processus
+            chunk_size = max(batch_size, -(-len(texts) // (n_process * 4)))
+            chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=n_process,
+                mp_context=context,
+                initializer=_init_batch_worker,
+                initargs=(self.language, n_process, slot_counter(context))
+            ) as pool:
+                results = [
+                    entities
+                    for chunk_result in pool.map(_extract_batch_chunk, chunks, repeat(batch_size))
+                    for entities in chunk_result
+                ]
+        
+        elapsed = time.time() - start_time
+        self.last_batch_stats = {
+            "documents": len(texts),
+            "seconds": elapsed,
+            "docs_per_second": len(texts) / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            f"NER par lot: {len(texts)} documents en {elapsed:.2f}s "
+            f"({self.last_batch_stats['docs_per_second']:.1f} docs/s, {n_process} processus)"
+        )
+        
+        return results
+    
+    def _extract_docs(self, texts: List[str], batch_size: int) -> List[Dict[str, List[str]]]:
+        """Passe les textes dans les modèles (un seul nlp.pipe par modèle) puis combine"""
+        nlp_sci = self.nlp_sci
+        nlp_fr = self.nlp_fr
+        
+        sci_docs: Iterable = repeat(None)
+        fr_docs: Iterable = repeat(None)
+        try:
+            if nlp_sci:
+                sci_docs = list(nlp_sci.pipe(texts, batch_size=batch_size, disable=unused_pipes(nlp_sci, SCI_PIPES)))
+        except Exception as e:
+            logger.error(f"Erreur scispaCy: {e}")
+        try:
+            if nlp_fr:
+                fr_docs = list(nlp_fr.pipe(texts, batch_size=batch_size, disable=unused_pipes(nlp_fr, FR_PIPES)))
+        except Exception as e:
+            logger.error(f"Erreur spaCy: {e}")
+        
+        return [
+            self._combine_entities(text, sci_doc, fr_doc)
+            for text, sci_doc, fr_doc in zip(texts, sci_docs, fr_docs)
+        ]
+    
+    def _combine_entities(self, text: str, sci_doc, fr_doc) -> Dict[str, List[str]]:
+        """Combine règles et documents spaCy en entités par catégorie"""
         entities = {
             "symptoms": [],
             "diagnoses": [],
@@ -77,14 +218,14 @@ class MedicalNERService:
         entities["medications"] = self._extract_medications(text)
         
         # Extraction avec scispaCy (maladies et substances chimiques)
-        if self.nlp_sci:
-            sci_entities = self._extract_with_scispacy(text)
+        if sci_doc is not None:
+            sci_entities = self._extract_with_scispacy(sci_doc)
             entities["diagnoses"].extend(sci_entities.get("diseases", []))
             entities["medications"].extend(sci_entities.get("chemicals", []))
         
         # Extraction avec spaCy standard
-        if self.language == "fr" and self.nlp_fr:
-            fr_entities = self._extract_with_spacy(text, self.nlp_fr)
+        if fr_doc is not None:
+            fr_entities = self._extract_with_spacy(fr_doc)
             entities["symptoms"].extend(fr_entities.get("symptoms", []))
         
         # Déduplique et nettoie
@@ -92,27 +233,16 @@ class MedicalNERService:
             if isinstance(entities[key], list):
                 entities[key] = list(set([e.strip() for e in entities[key] if e.strip()]))
         
-        logger.info(f"Entités extraites: {sum(len(v) if isinstance(v, list) else len(v) for v in entities.values())} au total")
-        
         return entities
     
     def _extract_allergies(self, text: str) -> List[str]:
         """Extrait les allergies avec des règles"""
         allergies = []
         
-        # Patterns pour détecter les allergies
-        patterns = [
-            r"allergi(?:que|e)?\s+(?:à|au|aux)\s+([a-zéèêàâôù\s-]+)",
-            r"allergi(?:que|e)?\s*:\s*([a-zéèêàâôù\s,-]+)",
-            r"ne\s+(?:peut|doit)\s+pas\s+prendre\s+(?:de|d')?\s*([a-zéèêàâôù\s-]+)",
-            r"intoléran(?:ce|t)\s+(?:à|au|aux)\s+([a-zéèêàâôù\s-]+)",
-        ]
-        
         text_lower = text.lower()
         
-        for pattern in patterns:
-            matches = re.finditer(pattern, text_lower, re.IGNORECASE)
-            for match in matches:
+        for pattern in ALLERGY_PATTERNS:
+            for match in pattern.finditer(text_lower):
                 allergy = match.group(1).strip()
                 # Nettoie et capitalise
                 allergy = allergy.split(',')[0].split('et')[0].strip()
@@ -126,26 +256,22 @@ class MedicalNERService:
         vital_signs = {}
         
         # Température
-        temp_pattern = r"(?:température|temp|T°?)\s*:?\s*(\d+(?:[.,]\d+)?)\s*°?C?"
-        temp_match = re.search(temp_pattern, text, re.IGNORECASE)
+        temp_match = TEMPERATURE_PATTERN.search(text)
         if temp_match:
             vital_signs["temperature"] = f"{temp_match.group(1)}°C"
         
         # Tension artérielle
-        bp_pattern = r"(?:tension|TA|PA)\s*:?\s*(\d+)\s*/\s*(\d+)"
-        bp_match = re.search(bp_pattern, text, re.IGNORECASE)
+        bp_match = BLOOD_PRESSURE_PATTERN.search(text)
         if bp_match:
             vital_signs["blood_pressure"] = f"{bp_match.group(1)}/{bp_match.group(2)} mmHg"
         
         # Fréquence cardiaque
-        hr_pattern = r"(?:fréquence cardiaque|FC|pouls)\s*:?\s*(\d+)"
-        hr_match = re.search(hr_pattern, text, re.IGNORECASE)
+        hr_match = HEART_RATE_PATTERN.search(text)
         if hr_match:
             vital_signs["heart_rate"] = f"{hr_match.group(1)} bpm"
         
         # Saturation O2
-        spo2_pattern = r"(?:saturation|SpO2|SaO2)\s*:?\s*(\d+)\s*%?"
-        spo2_match = re.search(spo2_pattern, text, re.IGNORECASE)
+        spo2_match = SPO2_PATTERN.search(text)
         if spo2_match:
             vital_signs["oxygen_saturation"] = f"{spo2_match.group(1)}%"
         
@@ -153,77 +279,43 @@ class MedicalNERService:
     
     def _extract_medications(self, text: str) -> List[str]:
         """Extrait les médicaments mentionnés"""
-        medications = []
-        
-        # Liste de médicaments courants (à étendre)
-        common_meds = [
-            "paracétamol", "ibuprofène", "aspirine", "doliprane",
-            "amoxicilline", "pénicilline", "antibiotique",
-            "anti-inflammatoire", "antalgique", "corticoïde"
-        ]
-        
-        text_lower = text.lower()
-        
-        for med in common_meds:
-            if med in text_lower:
-                medications.append(med.capitalize())
+        # Lexique compilé: un seul passage sur le texte, quelle que soit sa taille
+        medications = [match.canonical.capitalize() for match in get_medication_lexicon().find(text)]
         
         # Pattern pour médicaments avec posologie
-        med_pattern = r"(?:prendre|prescrire|donner)\s+(?:de|du|des)?\s*([A-ZÉÈa-zéèêàâôù]+(?:\s+\d+(?:mg|g|ml)?)?)"
-        matches = re.finditer(med_pattern, text, re.IGNORECASE)
-        
-        for match in matches:
+        for match in MEDICATION_DOSAGE_PATTERN.finditer(text):
             med = match.group(1).strip()
             if len(med) > 3 and not med.lower() in ["fois", "jour", "soir", "matin"]:
                 medications.append(med.capitalize())
         
         return medications
     
-    def _extract_with_scispacy(self, text: str) -> Dict[str, List[str]]:
-        """Extrait entités avec scispaCy (maladies et substances)"""
+    def _extract_with_scispacy(self, doc) -> Dict[str, List[str]]:
+        """Extrait entités d'un document scispaCy (maladies et substances)"""
         entities = defaultdict(list)
         
-        if not self.nlp_sci:
-            return entities
-        
-        try:
-            doc = self.nlp_sci(text)
-            
-            for ent in doc.ents:
-                if ent.label_ == "DISEASE":
-                    entities["diseases"].append(ent.text)
-                elif ent.label_ == "CHEMICAL":
-                    entities["chemicals"].append(ent.text)
-            
-        except Exception as e:
-            logger.error(f"Erreur scispaCy: {e}")
+        for ent in doc.ents:
+            if ent.label_ == "DISEASE":
+                entities["diseases"].append(ent.text)
+            elif ent.label_ == "CHEMICAL":
+                entities["chemicals"].append(ent.text)
         
         return dict(entities)
     
-    def _extract_with_spacy(self, text: str, nlp) -> Dict[str, List[str]]:
-        """Extrait entités avec spaCy standard"""
+    def _extract_with_spacy(self, doc) -> Dict[str, List[str]]:
+        """Extrait entités d'un document spaCy standard"""
         entities = defaultdict(list)
         
-        try:
-            doc = nlp(text)
-            
-            # Mots-clés symptômes
-            symptom_keywords = [
-                "douleur", "mal", "fièvre", "toux", "fatigue",
-                "nausée", "vomissement", "diarrhée", "constipation",
-                "vertige", "maux de tête", "migraine"
-            ]
-            
-            for token in doc:
-                if token.lemma_ in symptom_keywords:
-                    # Capture le contexte (2 mots avant et après)
-                    start = max(0, token.i - 2)
-                    end = min(len(doc), token.i + 3)
-                    symptom = doc[start:end].text
-                    entities["symptoms"].append(symptom)
-            
-        except Exception as e:
-            logger.error(f"Erreur spaCy: {e}")
+        # Mots-clés symptômes
+        symptom_lexicon = get_symptom_lexicon()
+        
+        for token in doc:
+            if token.lemma_ in symptom_lexicon:
+                # Capture le contexte (2 mots avant et après)
+                start = max(0, token.i - 2)
+                end = min(len(doc), token.i + 3)
+                symptom = doc[start:end].text
+                entities["symptoms"].append(symptom)
         
         return dict(entities)
     
@@ -256,8 +348,25 @@ class MedicalNERService:
         return "\n".join(lines) if lines else "Aucune entité médicale détectée"
 
 
-# Instance singleton
-_ner_service: Optional[MedicalNERService] = None
+# Service du processus de travail (extract_entities_batch avec n_process > 1)
+_batch_worker_service: Optional[MedicalNERService] = None
+
+
+def _init_batch_worker(language: str, n_process: int, slots) -> None:
+    """Initialise un processus de travail: sa part du CPU, puis les modèles une seule fois"""
+    global _batch_worker_service
+    apply_cpu_plan(plan_cpu(n_process, take_pool_slot(slots, n_process)))
+    _batch_worker_service = MedicalNERService(language=language)
+    _batch_worker_service._load_models()
+
+
+def _extract_batch_chunk(texts: List[str], batch_size: int) -> List[Dict[str, List[str]]]:
+    """Traite une tranche de textes dans un processus de travail"""
+    return _batch_worker_service._extract_docs(texts, batch_size)
+
+
+# Services par langue (les modèles eux-mêmes vivent dans le registre)
+_ner_services: Dict[str, MedicalNERService] = {}
 
 
 def get_medical_ner_service(language: str = "fr") -> MedicalNERService:
@@ -270,9 +379,7 @@ def get_medical_ner_service(language: str = "fr") -> MedicalNERService:
     Returns:
         Instance du service
     """
-    global _ner_service
-    
-    if _ner_service is None or _ner_service.language != language:
-        _ner_service = MedicalNERService(language=language)
+    if language not in _ner_services:
+        _ner_services[language] = MedicalNERService(language=language)
     
-    return _ner_service
+    return _ner_services[language]
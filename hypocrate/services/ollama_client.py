@@ -0,0 +1,249 @@
+"""
+Point d'accès unique à Ollama pour les générateurs Hypocrate
+"""
+import ollama
+import httpx
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from .llm_cache import get_response_cache, ResponseCache
+from .metrics import get_metrics, OLLAMA_LOAD_EVENT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Configuration par variables d'environnement
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# Requêtes simultanées vers Ollama (aligner sur OLLAMA_NUM_PARALLEL côté serveur)
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("HYPOCRATE_OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_TIMEOUT_SECONDS = float(os.getenv("HYPOCRATE_OLLAMA_TIMEOUT", "300"))
+# Durée de maintien en mémoire des modèles (et de leur cache KV) après une requête
+OLLAMA_KEEP_ALIVE = os.getenv("HYPOCRATE_OLLAMA_KEEP_ALIVE", "30m")
+# num_ctx de toutes les requêtes: Ollama recharge le modèle (et vide son cache KV) s'il change
+LLM_CONTEXT_TOKENS = int(os.getenv("HYPOCRATE_LLM_CONTEXT_TOKENS", "4096"))
+
+# Taille moyenne d'un token Llama/Mistral en français (estimation prudente)
+CHARS_PER_TOKEN = 3.5
+
+# Client partagé (pool de connexions HTTP keep-alive) et limite de concurrence
+_client: Optional[ollama.Client] = None
+_client_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(OLLAMA_MAX_CONCURRENCY)
+# Couples (modèle, prompt système) déjà envoyés: Ollama peut en garder le préfixe
+_sent_prefixes: Set[Tuple[str, Optional[str]]] = set()
+_sent_prefixes_lock = threading.Lock()
+
+
+def get_client() -> ollama.Client:
+    """
+    Obtient le client Ollama partagé
+
+    Un seul client pour tout le processus: les connexions HTTP sont
+    réutilisées d'un appel à l'autre au lieu d'être rouvertes à chaque requête.
+
+    Returns:
+        Instance du client
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = ollama.Client(
+                host=OLLAMA_HOST,
+                timeout=OLLAMA_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=OLLAMA_MAX_CONCURRENCY,
+                    max_keepalive_connections=OLLAMA_MAX_CONCURRENCY
+                )
+            )
+    return _client
+
+
+def list_models() -> List[str]:
+    """Liste les modèles installés sur le serveur Ollama"""
+    return [m.model for m in get_client().list().models]
+
+
+def pull_model(model: str) -> None:
+    """Télécharge un modèle sur le serveur Ollama"""
+    get_client().pull(model)
+
+
+def warm_up(model: str) -> None:
+    """Charge un modèle dans la mémoire du serveur Ollama (prompt vide, sans génération)"""
+    # Même num_ctx que les requêtes, sinon la première recharge le modèle
+    response = get_client().generate(
+        model=model,
+        prompt="",
+        options={"num_ctx": LLM_CONTEXT_TOKENS},
+        keep_alive=OLLAMA_KEEP_ALIVE
+    )
+    load_seconds = (response.get('load_duration') or 0) / 1e9
+    if load_seconds >= OLLAMA_LOAD_EVENT_SECONDS:
+        get_metrics().model_loads.inc(kind="ollama", model=model)
+        get_metrics().model_load_seconds.observe(load_seconds, kind="ollama", model=model)
+
+
+def resident_models() -> List[Dict[str, Any]]:
+    """Modèles actuellement chargés par Ollama (liste vide si indisponible)"""
+    try:
+        return [
+            {"name": m["name"], "size_mb": round(m.get("size", 0) / 2**20, 1)}
+            for m in get_client().ps()["models"]
+        ]
+    except Exception as e:
+        logger.error(f"Erreur lecture des modèles Ollama chargés: {e}")
+        return []
+
+
+def estimate_tokens(text: str) -> int:
+    """Nombre approximatif de tokens d'un texte"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def prompt_cache_report(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    prompt_eval_count: Optional[int],
+    prompt_eval_duration: Optional[int],
+    load_duration: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Estime l'évaluation de prompt évitée par le cache KV d'Ollama
+
+    Ollama n'évalue (et ne compte dans prompt_eval_count) que les tokens
+    qui suivent le plus long préfixe déjà en cache: l'écart avec la taille
+    du prompt est le travail économisé. Cette taille n'est qu'une
+    estimation (CHARS_PER_TOKEN surestime): l'économie vaut 0 tant
+    qu'aucun préfixe ne peut être en cache, c'est-à-dire au premier envoi
+    du couple (modèle, prompt système) ou quand Ollama a (re)chargé le modèle.
+
+    Returns:
+        Dict warm_prefix, prompt_tokens_estimate, evaluated_tokens,
+        reused_tokens_estimate, prompt_eval_seconds, saved_seconds_estimate
+        (None sans compteurs)
+    """
+    if not prompt_eval_count or prompt_eval_duration is None:
+        return None
+
+    with _sent_prefixes_lock:
+        warm = (model, system_prompt) in _sent_prefixes
+        _sent_prefixes.add((model, system_prompt))
+    if (load_duration or 0) / 1e9 >= OLLAMA_LOAD_EVENT_SECONDS:
+        # Un modèle tout juste chargé part d'un cache KV vide
+        warm = False
+
+    total = estimate_tokens(system_prompt or "") + estimate_tokens(prompt)
+    reused = max(total - prompt_eval_count, 0) if warm else 0
+    seconds_per_token = prompt_eval_duration / 1e9 / prompt_eval_count
+    return {
+        "warm_prefix": warm,
+        "prompt_tokens_estimate": total,
+        "evaluated_tokens": prompt_eval_count,
+        "reused_tokens_estimate": reused,
+        "prompt_eval_seconds": round(prompt_eval_duration / 1e9, 3),
+        "saved_seconds_estimate": round(reused * seconds_per_token, 3),
+    }
+
+
+def chat_completion(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    validate: Optional[Callable[[str], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Envoie une requête chat à Ollama, avec cache des réponses
+
+    Args:
+        model: Modèle Ollama
+        prompt: Prompt utilisateur
+        system_prompt: Prompt système
+        options: Options d'échantillonnage (temperature, num_predict, ...)
+        use_cache: Lire le cache (False force la régénération; la nouvelle
+            réponse est tout de même enregistrée)
+        format: Contraint la sortie: "json" ou un schéma JSON (sorties structurées Ollama)
+        validate: Seules les réponses qu'il accepte sont lues depuis le cache
+            ou enregistrées (validation du schéma par exemple)
+
+    Returns:
+        Dict avec 'content', 'model' et les compteurs Ollama
+    """
+    options = {"num_ctx": LLM_CONTEXT_TOKENS, **(options or {})}
+
+    cache = get_response_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = ResponseCache.make_key(model, system_prompt, prompt, options, format)
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None and validate is not None and not validate(cached["content"]):
+                cached = None
+            if cached is not None:
+                logger.info(f"Réponse LLM trouvée en cache ({cache.stats()})")
+                return {**cached, "cached": True}
+
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+
+    # Au-delà de la limite, les appels attendent ici plutôt que dans la file d'Ollama
+    metrics = get_metrics()
+    metrics.llm_waiting.inc(model=model)
+    queued_at = time.perf_counter()
+    try:
+        _slots.acquire()
+    finally:
+        metrics.llm_waiting.dec(model=model)
+    started_at = time.perf_counter()
+    metrics.llm_queue_seconds.observe(started_at - queued_at, model=model)
+    metrics.llm_in_flight.inc(model=model)
+    try:
+        response = get_client().chat(
+            model=model,
+            messages=messages,
+            format=format,
+            options=options,
+            keep_alive=OLLAMA_KEEP_ALIVE  # le modèle et son cache KV restent chargés
+        )
+    finally:
+        _slots.release()
+        metrics.llm_in_flight.dec(model=model)
+    metrics.llm_request_seconds.observe(time.perf_counter() - started_at, model=model, mode="chat")
+
+    result = {
+        "content": response['message']['content'],
+        "model": model,
+        "total_duration": response.get('total_duration'),
+        "load_duration": response.get('load_duration'),
+        "prompt_eval_count": response.get('prompt_eval_count'),
+        "prompt_eval_duration": response.get('prompt_eval_duration'),
+        "eval_count": response.get('eval_count'),
+        "eval_duration": response.get('eval_duration'),
+        "prompt_cache": prompt_cache_report(
+            model, prompt, system_prompt,
+            response.get('prompt_eval_count'), response.get('prompt_eval_duration'),
+            response.get('load_duration')
+        ),
+    }
+    if result["prompt_cache"]:
+        logger.info(
+            f"Évaluation du prompt: {result['prompt_cache']['evaluated_tokens']} tokens évalués, "
+            f"~{result['prompt_cache']['reused_tokens_estimate']} repris du cache KV "
+            f"(~{result['prompt_cache']['saved_seconds_estimate']:.2f}s économisées, estimation)"
+        )
+    metrics.observe_llm_response(model, "chat", result)
+
+    # Une réponse que l'appelant rejette ne doit pas être resservie par le cache
+    if cache_key is not None and (validate is None or validate(result["content"])):
+        cache.set(cache_key, result)
+
+    return result
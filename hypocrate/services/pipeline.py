@@ -0,0 +1,147 @@
+"""
+Exécuteur de pipeline en graphe (DAG): étapes indépendantes en parallèle
+"""
+import logging
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """Étape du pipeline: appelée avec les résultats de ses dépendances (kwargs)"""
+    name: str
+    func: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageResult:
+    """Résultat d'une étape"""
+    name: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    skipped: bool = False
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Étape terminée sans erreur"""
+        return self.error is None and not self.skipped
+
+    @property
+    def duration(self) -> float:
+        """Durée d'exécution en secondes"""
+        return self.finished_at - self.started_at
+
+
+def _timed(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Any, float, float]:
+    """Exécute une étape en mesurant son début et sa fin (fonction picklable pour un pool de processus)"""
+    started_at = time.time()
+    value = func(**kwargs)
+    return value, started_at, time.time()
+
+
+class Pipeline:
+    """Pipeline d'étapes avec dépendances, exécutées dès que possible"""
+
+    def __init__(self, stages: List[Stage]):
+        """
+        Initialise le pipeline
+
+        Args:
+            stages: Étapes (les dépendances doivent désigner des étapes existantes)
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Noms d'étapes en double")
+        for stage in stages:
+            unknown = set(stage.deps) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Étape {stage.name}: dépendances inconnues {sorted(unknown)}")
+        self._check_acyclic()
+        self.timings: Dict[str, float] = {}
+
+    def _check_acyclic(self) -> None:
+        """Vérifie l'absence de cycle (tri topologique)"""
+        remaining = {name: set(stage.deps) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Cycle dans le pipeline: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def run(self, executor: Optional[Executor] = None, max_workers: int = 4) -> Iterator[StageResult]:
+        """
+        Exécute le pipeline et produit les résultats au fil de l'eau
+
+        Les résultats sont produits dans le thread appelant (le thread du
+        script Streamlit), qui peut donc mettre à jour st.session_state.
+        Une étape en échec fait sauter ses dépendants, pas les autres branches.
+
+        Args:
+            executor: Pool à utiliser (ThreadPoolExecutor créé sinon; un
+                ProcessPoolExecutor exige des étapes picklables)
+            max_workers: Taille du pool créé
+
+        Yields:
+            StageResult de chaque étape, dans l'ordre de fin
+        """
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+
+        results: Dict[str, StageResult] = {}
+        running: Dict[Future, str] = {}
+        self.timings = {}
+        start_time = time.time()
+
+        try:
+            while len(results) < len(self.stages):
+                # Lance ou saute les étapes dont les dépendances sont résolues
+                for name, stage in self.stages.items():
+                    if name in results or name in running.values():
+                        continue
+                    if any(dep not in results for dep in stage.deps):
+                        continue
+                    if any(not results[dep].ok for dep in stage.deps):
+                        now = time.time()
+                        results[name] = StageResult(name, skipped=True, started_at=now, finished_at=now)
+                        logger.info(f"Étape {name} sautée (dépendance en échec)")
+                        yield results[name]
+                        continue
+                    kwargs = {dep: results[dep].value for dep in stage.deps}
+                    running[executor.submit(_timed, stage.func, kwargs)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        value, started_at, finished_at = future.result()
+                        result = StageResult(name, value=value, started_at=started_at, finished_at=finished_at)
+                        self.timings[name] = result.duration
+                        logger.info(f"Étape {name} terminée en {result.duration:.2f}s")
+                    except Exception as e:
+                        now = time.time()
+                        result = StageResult(name, error=e, started_at=now, finished_at=now)
+                        logger.error(f"Étape {name} en échec: {e}")
+                    results[name] = result
+                    yield result
+        finally:
+            for future in running:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        self.timings["total"] = time.time() - start_time
+        logger.info(f"Pipeline terminé en {self.timings['total']:.2f}s: {self.timings}")
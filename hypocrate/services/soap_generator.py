@@ -1,12 +1,13 @@
 """
 Générateur de comptes-rendus SOAP avec Llama2 local via Ollama
 """
-import ollama
 import json
 import logging
+import os
 import time
 import re
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 import sys
 from pathlib import Path
@@ -14,12 +15,100 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.prompts import (
     MEDICAL_SCRIBE_SYSTEM_PROMPT,
+    SOAP_JSON_SCHEMA,
+    SOAP_MAP_SYSTEM_PROMPT,
     build_soap_prompt,
+    build_system_prompt,
+    build_soap_map_prompt,
+    build_soap_reduce_prompt,
+    CHIEF_COMPLAINT_PROMPT,
     VALIDATION_PROMPT
 )
+from .metrics import get_metrics
+from .ollama_client import OLLAMA_MAX_CONCURRENCY, chat_completion, list_models, pull_model
+from .soap_map_reduce import (
+    FACTS_JSON_SCHEMA,
+    SOAP_CHUNK_TOKENS,
+    chunk_transcript,
+    estimate_tokens,
+    merge_facts,
+    single_pass_fits,
+    validate_facts
+)
 
 logger = logging.getLogger(__name__)
 
+# Configuration par variables d'environnement
+SOAP_STRUCTURED_OUTPUT = os.getenv("HYPOCRATE_SOAP_STRUCTURED", "1") == "1"  # schéma JSON imposé (Ollama >= 0.5)
+SOAP_MAX_ATTEMPTS = int(os.getenv("HYPOCRATE_SOAP_MAX_ATTEMPTS", "2"))  # appels avant le parse texte de secours
+if SOAP_MAX_ATTEMPTS < 1:
+    raise ValueError(f"HYPOCRATE_SOAP_MAX_ATTEMPTS doit valoir au moins 1 (reçu {SOAP_MAX_ATTEMPTS})")
+
+# Options d'échantillonnage du compte-rendu SOAP
+SOAP_OPTIONS = {
+    "temperature": 0.3,  # Faible pour cohérence
+    "num_predict": 2000,  # Max tokens
+    "top_p": 0.9,
+}
+
+
+def _step_metadata(step: str, response: Dict, seconds: float, **extra) -> Dict:
+    """Métadonnées d'un appel map ou reduce"""
+    return {
+        "step": step,
+        **extra,
+        "prompt_tokens": response.get('prompt_eval_count') or 0,
+        "completion_tokens": response.get('eval_count') or 0,
+        "seconds": round(seconds, 3),
+        "cached": bool(response.get('cached')),
+        "prompt_eval_saved_seconds_estimate": (response.get('prompt_cache') or {}).get('saved_seconds_estimate'),
+    }
+
+
+def _matches_schema(soap_note: Dict) -> bool:
+    """Le compte-rendu respecte-t-il SOAP_JSON_SCHEMA (champs requis et types) ?"""
+    types = {"string": str, "array": list, "object": dict}
+    properties = SOAP_JSON_SCHEMA["properties"]
+    if any(field not in soap_note for field in SOAP_JSON_SCHEMA["required"]):
+        return False
+    for field, value in soap_note.items():
+        if field not in properties or not isinstance(value, types[properties[field]["type"]]):
+            return False
+        if isinstance(value, list) and not all(isinstance(item, str) for item in value):
+            return False
+    return True
+
+
+def _validate_soap_json(response: str) -> Optional[Dict]:
+    """Compte-rendu JSON extrait de la réponse, None s'il ne respecte pas SOAP_JSON_SCHEMA"""
+    json_match = re.search(r'\{.*\}', response, re.DOTALL)
+    try:
+        soap_note = json.loads(json_match.group()) if json_match else None
+    except json.JSONDecodeError:
+        return None
+    return soap_note if isinstance(soap_note, dict) and _matches_schema(soap_note) else None
+
+
+def _record_output(attempts: int, valid: bool) -> None:
+    """Compte un compte-rendu généré (scribe_soap_attempts_total, comme l'API)"""
+    get_metrics().soap_attempts.inc(attempt=attempts, valid=str(valid).lower())
+
+
+def structured_output_stats() -> Dict:
+    """Compteurs et taux de comptes-rendus valides du premier coup"""
+    counts = {"notes": 0, "first_attempt": 0, "retried": 0, "fallbacks": 0}
+    for (attempt, valid), value in get_metrics().soap_attempts.values().items():
+        value = int(value)
+        counts["notes"] += value
+        if valid == "true" and attempt == "1":
+            counts["first_attempt"] += value
+        elif valid == "true":
+            counts["retried"] += value
+        else:
+            counts["fallbacks"] += value
+    notes = counts["notes"]
+    return {**counts, "first_attempt_rate": counts["first_attempt"] / notes if notes else 0.0}
+
 
 class SOAPGenerator:
     """Générateur de comptes-rendus SOAP avec LLM local"""
@@ -40,13 +129,12 @@ class SOAPGenerator:
     def _check_model_availability(self):
         """Vérifie que le modèle Ollama est disponible"""
         try:
-            models_response = ollama.list()
-            available_models = [m.model for m in models_response.models]
+            available_models = list_models()
             
             if self.model not in available_models:
                 logger.warning(f"Modèle {self.model} non trouvé. Modèles disponibles: {available_models}")
                 logger.info(f"Tentative de pull du modèle {self.model}...")
-                ollama.pull(self.model)
+                pull_model(self.model)
             else:
                 logger.info(f"Modèle {self.model} disponible")
                 
@@ -59,16 +147,23 @@ class SOAPGenerator:
         transcript: str,
         entities: Dict,
         patient_context: str = "",
-        specialty: str = "Généraliste"
+        specialty: str = "Généraliste",
+        force_regenerate: bool = False,
+        segments: Optional[List[Dict]] = None
     ) -> Dict:
         """
         Génère un compte-rendu SOAP à partir d'une transcription
         
+        Une consultation trop longue pour le contexte du modèle passe par
+        _generate_map_reduce (métadonnées dans result['map_reduce']).
+        
         Args:
             transcript: Transcription de la consultation
             entities: Entités médicales extraites
             patient_context: Contexte patient (âge, sexe, etc.)
             specialty: Spécialité médicale
+            force_regenerate: Ignore le cache des réponses LLM
+            segments: Segments Whisper, pour découper les longues consultations
             
         Returns:
             Dict avec le compte-rendu SOAP et métadonnées
@@ -77,40 +172,30 @@ class SOAPGenerator:
             start_time = time.time()
             
             # Construction du prompt
+            # Prompt système fixe par spécialité (préfixe en cache KV), consultation à la fin
+            system_prompt = build_system_prompt(specialty)
             prompt = build_soap_prompt(
                 transcript=transcript,
                 entities=entities,
-                patient_context=patient_context,
-                specialty=specialty
+                patient_context=patient_context
             )
             
-            logger.info(f"Génération SOAP avec {self.model}...")
+            map_reduce = None
             
-            # Génération avec Ollama
-            response = ollama.chat(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": MEDICAL_SCRIBE_SYSTEM_PROMPT
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                options={
-                    "temperature": 0.3,  # Faible pour cohérence
-                    "num_predict": 2000,  # Max tokens
-                    "top_p": 0.9,
-                }
-            )
+            if single_pass_fits(prompt, system_prompt, SOAP_OPTIONS["num_predict"]):
+                logger.info(f"Génération SOAP avec {self.model}...")
+                
+                # Génération avec Ollama (réponses identiques servies par le cache)
+                response, soap_note = self._validated_completion(
+                    prompt, system_prompt, SOAP_OPTIONS, force_regenerate
+                )
+            else:
+                response, soap_note, map_reduce = self._generate_map_reduce(
+                    transcript, entities, patient_context, specialty, force_regenerate, segments
+                )
             
             generation_time = time.time() - start_time
             
-            # Parse la réponse
-            soap_note = self._parse_soap_response(response['message']['content'])
-            
             # Validation
             validation = self._validate_soap_note(soap_note, entities)
             
@@ -119,8 +204,13 @@ class SOAPGenerator:
                 "model_used": self.model,
                 "generation_time_seconds": generation_time,
                 "validation": validation,
-                "raw_response": response['message']['content']
+                "raw_response": response['content'],
+                "cached": response.get('cached', False),
+                "attempts": response['attempts'],
+                "prompt_cache": response.get('prompt_cache')
             }
+            if map_reduce is not None:
+                result["map_reduce"] = map_reduce
             
             logger.info(f"SOAP généré en {generation_time:.2f}s")
             
@@ -130,6 +220,183 @@ class SOAPGenerator:
             logger.error(f"Erreur génération SOAP: {e}")
             raise
     
+    def _generate_map_reduce(
+        self,
+        transcript: str,
+        entities: Dict,
+        patient_context: str,
+        specialty: str,
+        force_regenerate: bool,
+        segments: Optional[List[Dict]]
+    ) -> Tuple[Dict, Dict, Dict]:
+        """
+        SOAP d'une consultation trop longue pour un seul prompt
+        
+        Les extraits (segments entiers, HYPOCRATE_SOAP_CHUNK_TOKENS) sont
+        analysés en parallèle, dans la limite de HYPOCRATE_OLLAMA_MAX_CONCURRENCY,
+        puis un dernier appel fusionne leurs faits.
+        
+        Returns:
+            Tuple (réponse de l'appel de fusion, compte-rendu, métadonnées par étape)
+        """
+        chunks = chunk_transcript(transcript, SOAP_CHUNK_TOKENS, segments)
+        logger.info(f"Consultation trop longue pour le contexte: SOAP en {len(chunks)} extraits")
+        
+        system_prompt = build_system_prompt(specialty)
+        map_system_prompt = build_system_prompt(specialty, SOAP_MAP_SYSTEM_PROMPT)
+        
+        def map_chunk(index: int) -> Tuple[Dict, Dict]:
+            # Pas de parse tolérant: un extrait sans faits fausserait le compte-rendu
+            step_start = time.time()
+            response, chunk_facts = self._completion_until_valid(
+                prompt=build_soap_map_prompt(chunks[index], index, len(chunks)),
+                system_prompt=map_system_prompt,
+                options={"temperature": 0.2, "num_predict": 600},
+                force_regenerate=force_regenerate,
+                format=FACTS_JSON_SCHEMA if SOAP_STRUCTURED_OUTPUT else None,
+                validate=validate_facts,
+                what=f"Faits de l'extrait {index + 1}/{len(chunks)}"
+            )
+            if chunk_facts is None:
+                raise ValueError(
+                    f"Faits de l'extrait {index + 1}/{len(chunks)} non conformes au schéma "
+                    f"après {response['attempts']} tentatives"
+                )
+            step = _step_metadata("map", response, time.time() - step_start, chunk=index,
+                                  attempts=response['attempts'],
+                                  input_tokens_estimate=estimate_tokens(chunks[index]))
+            return chunk_facts, step
+        
+        with ThreadPoolExecutor(max_workers=min(OLLAMA_MAX_CONCURRENCY, len(chunks))) as executor:
+            mapped = list(executor.map(map_chunk, range(len(chunks))))
+        facts = [chunk_facts for chunk_facts, _ in mapped]
+        steps = [step for _, step in mapped]
+        
+        prompt = build_soap_reduce_prompt(facts, entities, patient_context)
+        if len(facts) > 1 and not single_pass_fits(prompt, system_prompt, SOAP_OPTIONS["num_predict"]):
+            logger.warning(f"Faits de {len(facts)} extraits trop longs, fusionnés avant l'appel final")
+            prompt = build_soap_reduce_prompt([merge_facts(facts)], entities, patient_context)
+        
+        reduce_start = time.time()
+        response, soap_note = self._validated_completion(prompt, system_prompt, SOAP_OPTIONS, force_regenerate)
+        steps.append(_step_metadata("reduce", response, time.time() - reduce_start, attempts=response['attempts']))
+        
+        return response, soap_note, {
+            "chunks": len(chunks),
+            "chunk_tokens": SOAP_CHUNK_TOKENS,
+            "transcript_tokens_estimate": estimate_tokens(transcript),
+            "prompt_tokens": sum(step["prompt_tokens"] for step in steps),
+            "completion_tokens": sum(step["completion_tokens"] for step in steps),
+            "steps": steps,
+        }
+    
+    def _validated_completion(
+        self,
+        prompt: str,
+        system_prompt: str,
+        options: Dict,
+        force_regenerate: bool
+    ) -> Tuple[Dict, Dict]:
+        """
+        Génère un compte-rendu jusqu'à ce qu'il respecte SOAP_JSON_SCHEMA
+        
+        Voir _completion_until_valid; si aucun appel ne convient, la dernière
+        réponse passe par le parse tolérant.
+        
+        Returns:
+            Tuple (dernière réponse avec 'attempts', compte-rendu)
+        """
+        response, soap_note = self._completion_until_valid(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            options=options,
+            force_regenerate=force_regenerate,
+            format=SOAP_JSON_SCHEMA if SOAP_STRUCTURED_OUTPUT else None,
+            validate=_validate_soap_json,
+            what="Compte-rendu SOAP"
+        )
+        if soap_note is not None:
+            _record_output(response['attempts'], valid=True)
+            soap_note.setdefault('vital_signs', {})
+            return response, soap_note
+        
+        _record_output(response['attempts'], valid=False)
+        logger.warning(f"Parse texte de secours ({structured_output_stats()})")
+        return response, self._parse_soap_response(response['content'])
+    
+    def _completion_until_valid(
+        self,
+        prompt: str,
+        system_prompt: str,
+        options: Dict,
+        force_regenerate: bool,
+        format: Optional[Dict],
+        validate: Callable[[str], Optional[Dict]],
+        what: str
+    ) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Appelle le modèle jusqu'à ce que validate accepte la réponse
+        
+        Au plus HYPOCRATE_SOAP_MAX_ATTEMPTS appels, les nouvelles tentatives
+        ignorant le cache; les réponses rejetées ne sont jamais mises en cache.
+        Les compteurs de tokens couvrent tous les appels.
+        
+        Returns:
+            Tuple (dernière réponse avec 'attempts', réponse parsée ou None)
+        """
+        prompt_tokens = completion_tokens = 0
+        for attempt in range(1, SOAP_MAX_ATTEMPTS + 1):
+            response = chat_completion(
+                model=self.model,
+                prompt=prompt,
+                system_prompt=system_prompt,
+                options=options,
+                use_cache=not force_regenerate and attempt == 1,
+                format=format,
+                validate=lambda text: validate(text) is not None
+            )
+            prompt_tokens += response.get('prompt_eval_count') or 0
+            completion_tokens += response.get('eval_count') or 0
+            response = {**response, "prompt_eval_count": prompt_tokens,
+                        "eval_count": completion_tokens, "attempts": attempt}
+            
+            parsed = validate(response['content'])
+            if parsed is not None:
+                return response, parsed
+            logger.warning(f"{what}: réponse non conforme au schéma (tentative {attempt})")
+        
+        return response, None
+    
+    def draft_chief_complaint(self, transcript: str, force_regenerate: bool = False) -> Dict:
+        """
+        Rédige rapidement le motif de consultation (premier aperçu avant le SOAP)
+        
+        Args:
+            transcript: Transcription de la consultation
+            force_regenerate: Ignore le cache des réponses LLM
+            
+        Returns:
+            Dict avec le motif et le temps de génération
+        """
+        start_time = time.time()
+        
+        response = chat_completion(
+            model=self.model,
+            prompt=CHIEF_COMPLAINT_PROMPT.format(transcript=transcript),
+            system_prompt=MEDICAL_SCRIBE_SYSTEM_PROMPT,
+            options={
+                "temperature": 0.2,
+                "num_predict": 80,  # Réponse courte
+            },
+            use_cache=not force_regenerate
+        )
+        
+        return {
+            "chief_complaint": response['content'].strip(),
+            "generation_time_seconds": time.time() - start_time,
+            "cached": response.get('cached', False)
+        }
+    
     def _parse_soap_response(self, response: str) -> Dict:
         """Parse la réponse LLM en structure SOAP"""
         try:
@@ -0,0 +1,140 @@
+"""
+Découpage des longues consultations pour la génération SOAP en map-reduce
+
+Une transcription qui dépasse le contexte du modèle est découpée en extraits
+de segments Whisper entiers; les faits de chaque extrait sont relevés en
+parallèle (map) puis fusionnés en un compte-rendu (reduce).
+"""
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from .ollama_client import CHARS_PER_TOKEN, LLM_CONTEXT_TOKENS, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Configuration par variables d'environnement
+SOAP_CHUNK_TOKENS = int(os.getenv("HYPOCRATE_SOAP_CHUNK_TOKENS", "1200"))  # tokens de transcription par extrait
+
+# Champs des faits relevés sur chaque extrait
+FACT_KEYS = ("subjectif", "objectif", "analyse", "plan", "chief_complaint", "allergies", "medications")
+
+# Schéma JSON imposé aux réponses map (format d'Ollama)
+FACTS_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {key: {"type": "array", "items": {"type": "string"}} for key in FACT_KEYS},
+    "required": list(FACT_KEYS),
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def single_pass_fits(prompt: str, system_prompt: str, max_tokens: int) -> bool:
+    """Le prompt et la réponse tiennent-ils dans le contexte en une requête ?"""
+    needed = estimate_tokens(system_prompt) + estimate_tokens(prompt) + max_tokens
+    return needed <= LLM_CONTEXT_TOKENS
+
+
+def split_units(transcript: str, segments: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    """
+    Unités insécables du découpage: segments Whisper, sinon phrases
+
+    Args:
+        transcript: Texte de la transcription
+        segments: Segments Whisper ('text') si disponibles
+
+    Returns:
+        Unités dans l'ordre de la consultation
+    """
+    if segments:
+        return [segment["text"].strip() for segment in segments if segment.get("text", "").strip()]
+
+    units = []
+    for line in transcript.splitlines():
+        units.extend(sentence for sentence in _SENTENCE_END.split(line.strip()) if sentence)
+    return units
+
+
+def chunk_transcript(
+    transcript: str,
+    max_tokens: int = SOAP_CHUNK_TOKENS,
+    segments: Optional[List[Dict[str, Any]]] = None
+) -> List[str]:
+    """
+    Regroupe les segments en extraits d'au plus `max_tokens`
+
+    Un segment plus long que le budget est coupé entre deux mots.
+
+    Args:
+        transcript: Texte de la transcription
+        max_tokens: Budget d'un extrait
+        segments: Segments Whisper si disponibles
+
+    Returns:
+        Extraits dans l'ordre de la consultation
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    for unit in split_units(transcript, segments):
+        pieces = [unit]
+        if len(unit) > max_chars:
+            pieces, piece = [], ""
+            for word in unit.split():
+                if piece and len(piece) + len(word) + 1 > max_chars:
+                    pieces.append(piece)
+                    piece = ""
+                piece = f"{piece} {word}" if piece else word
+            pieces.append(piece)
+
+        for piece in pieces:
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def validate_facts(response: str) -> Optional[Dict[str, List[str]]]:
+    """
+    Valide les faits relevés sur un extrait (FACTS_JSON_SCHEMA)
+
+    Une réponse tronquée par num_predict ou incomplète est rejetée: l'accepter
+    ferait disparaître sans erreur les constatations de tout un extrait.
+
+    Returns:
+        Faits par champ (éléments vides retirés), None si la réponse est invalide
+    """
+    json_match = re.search(r'\{.*\}', response, re.DOTALL)
+    if not json_match:
+        return None
+    try:
+        facts = json.loads(json_match.group())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(facts, dict):
+        return None
+    for key in FACT_KEYS:
+        value = facts.get(key)
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return None
+    return {key: [item for item in facts[key] if item] for key in FACT_KEYS}
+
+
+def merge_facts(facts: List[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """Union des faits de plusieurs extraits, sans doublons exacts"""
+    merged: Dict[str, List[str]] = {key: [] for key in FACT_KEYS}
+    for chunk_facts in facts:
+        for key in FACT_KEYS:
+            for item in chunk_facts.get(key, []):
+                if item not in merged[key]:
+                    merged[key].append(item)
+    return merged
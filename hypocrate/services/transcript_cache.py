@@ -0,0 +1,143 @@
+"""
+Cache disque des transcriptions, adressé par le contenu audio
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Répertoire et budget par défaut (surchargeables par variables d'environnement)
+DEFAULT_CACHE_DIR = os.getenv(
+    "HYPOCRATE_TRANSCRIPT_CACHE_DIR",
+    str(Path(__file__).parent.parent / "cache" / "transcripts")
+)
+DEFAULT_CACHE_MAX_MB = int(os.getenv("HYPOCRATE_TRANSCRIPT_CACHE_MAX_MB", "512"))
+
+
+def compute_audio_hash(audio_path: str) -> str:
+    """Calcule le SHA-256 d'un fichier audio"""
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Cache des transcriptions indexé par (hash audio, modèle, langue, tâche)"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        """
+        Initialise le cache
+
+        Args:
+            cache_dir: Répertoire des entrées
+            max_bytes: Taille maximale avant éviction (LRU)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(audio_hash: str, model: str, language: Optional[str], task: str, *extra) -> str:
+        """Construit la clé à partir du hash audio et des paramètres de transcription"""
+        parts = [audio_hash, model, language or "auto", task, *[str(e) for e in extra]]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """Chemin d'une entrée (répartie par préfixe de clé)"""
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retourne la transcription en cache, ou None"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # Marque comme récemment utilisée (LRU)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Enregistre une transcription puis applique l'éviction"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=float)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Erreur écriture cache transcription: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Supprime les entrées les moins récemment utilisées au-delà du budget"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+                if total <= self.max_bytes:
+                    break
+            logger.info(f"Cache transcription: {removed} entrées évincées")
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs hits/misses du processus courant"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Instance singleton
+_transcript_cache: Optional[TranscriptCache] = None
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """
+    Obtient l'instance du cache de transcriptions
+
+    Returns:
+        Instance du cache
+    """
+    global _transcript_cache
+
+    if _transcript_cache is None:
+        _transcript_cache = TranscriptCache()
+
+    return _transcript_cache
@@ -1,12 +1,17 @@
 """
 Service de transcription audio avec Whisper local pour Hypocrate
 """
-import whisper
 import logging
 from pathlib import Path
 from typing import Dict, Optional, List
 import time
-import torch
+
+from .audio_pcm import SAMPLE_RATE, decode_to_pcm, open_pcm, pcm_duration, to_float32
+from .metrics import get_metrics
+from .model_registry import detect_device, get_model_registry, whisper_model_name, KIND_WHISPER
+from .transcript_cache import compute_audio_hash, get_transcript_cache, TranscriptCache
+from .vad import VAD_ENABLED, VAD_THRESHOLD_DB, compact_speech, detect_speech_regions, remap_segments
+from .whisper_backend import BACKEND_OPENAI, WHISPER_BACKEND, WHISPER_COMPUTE_TYPE
 
 logger = logging.getLogger(__name__)
 
@@ -23,38 +28,22 @@ class HypocrateTranscriptionService:
             device: Device PyTorch (cuda, cpu, mps) - auto-détecté si None
         """
         self.model_size = model_size
-        self.model = None
-        self.device = device or self._detect_device()
+        self.device = device or detect_device()
         
         logger.info(f"Initialisation Whisper {model_size} sur {self.device}")
     
-    def _detect_device(self) -> str:
-        """Détecte le meilleur device disponible"""
-        if torch.cuda.is_available():
-            return "cuda"
-        # MPS (Apple Silicon) a des problèmes de compatibilité avec Whisper
-        # Utilisation forcée du CPU pour éviter les erreurs SparseMPS
-        # elif torch.backends.mps.is_available():
-        #     return "mps"
-        return "cpu"
-    
     def _load_model(self):
-        """Charge le modèle Whisper (lazy loading)"""
-        if self.model is None:
-            logger.info(f"Chargement du modèle Whisper {self.model_size}...")
-            start_time = time.time()
-            
-            self.model = whisper.load_model(self.model_size, device=self.device)
-            
-            load_time = time.time() - start_time
-            logger.info(f"Modèle chargé en {load_time:.2f}s")
+        """Obtient le modèle Whisper depuis le registre (chargé à la première utilisation)"""
+        return get_model_registry().get(KIND_WHISPER, whisper_model_name(self.model_size, self.device))
     
     def transcribe_audio(
         self,
         audio_path: str,
         language: str = "fr",
         task: str = "transcribe",
-        with_timestamps: bool = True
+        with_timestamps: bool = True,
+        audio_hash: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict:
         """
         Transcrit un fichier audio médical
@@ -64,19 +53,41 @@ class HypocrateTranscriptionService:
             language: Langue de l'audio (fr, en, etc.)
             task: 'transcribe' ou 'translate'
             with_timestamps: Inclure les timestamps des segments
+            audio_hash: SHA-256 du contenu audio s'il est déjà connu
+            use_cache: Consulter et alimenter le cache de transcriptions
             
         Returns:
             Dict avec transcription et métadonnées
         """
         try:
-            # Charge le modèle si nécessaire
-            self._load_model()
-            
             # Valide le fichier
             audio_file = Path(audio_path)
             if not audio_file.exists():
                 raise FileNotFoundError(f"Fichier audio introuvable: {audio_path}")
             
+            audio_hash = audio_hash or compute_audio_hash(audio_path)
+            
+            # Cache: même audio + mêmes paramètres = même transcription
+            cache_key = None
+            if use_cache:
+                cache = get_transcript_cache()
+                cache_key = TranscriptCache.make_key(
+                    audio_hash,
+                    self.model_size,
+                    language,
+                    task,
+                    f"timestamps={with_timestamps}",
+                    *([f"vad={VAD_THRESHOLD_DB}"] if VAD_ENABLED else []),
+                    *([f"backend={WHISPER_BACKEND}:{WHISPER_COMPUTE_TYPE}"] if WHISPER_BACKEND != BACKEND_OPENAI else [])
+                )
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Transcription trouvée en cache ({cache.stats()})")
+                    return {**cached, "audio_file": audio_file.name, "cached": True}
+            
+            # Modèle résident (chargé si nécessaire)
+            model = self._load_model()
+            
             logger.info(f"Transcription de {audio_file.name} (langue: {language})")
             start_time = time.time()
             
@@ -94,8 +105,34 @@ class HypocrateTranscriptionService:
                 "no_speech_threshold": 0.6,
             }
             
-            # Transcription
-            result = self.model.transcribe(str(audio_file), **options)
+            # Audio décodé une seule fois, projeté en mémoire (pages partagées entre processus)
+            samples = open_pcm(decode_to_pcm(str(audio_file), audio_hash))
+            audio_seconds = len(samples) / SAMPLE_RATE
+            
+            # Seule la parole est transcrite, les silences sont retirés avant Whisper
+            timeline = None
+            if VAD_ENABLED:
+                samples, timeline = compact_speech(samples, detect_speech_regions(samples))
+                logger.info(
+                    f"VAD: {timeline.speech_seconds:.1f}s de parole sur {timeline.total_seconds:.1f}s"
+                )
+            
+            # Transcription (Whisper attend l'enregistrement entier en float32)
+            if len(samples) == 0:
+                result = {"text": "", "language": language, "segments": []}
+            else:
+                inference_start = time.time()
+                result = model.transcribe(to_float32(samples), **options)
+                inference_time = time.time() - inference_start
+                metrics = get_metrics()
+                metrics.whisper_seconds.observe(inference_time, model=self.model_size, backend=WHISPER_BACKEND)
+                metrics.whisper_realtime_factor.observe(
+                    inference_time / audio_seconds, model=self.model_size, backend=WHISPER_BACKEND
+                )
+            
+            segments = result.get("segments", [])
+            if timeline is not None:
+                segments = remap_segments(segments, timeline)
             
             transcription_time = time.time() - start_time
             
@@ -103,9 +140,10 @@ class HypocrateTranscriptionService:
             formatted_result = {
                 "text": result["text"].strip(),
                 "language": result.get("language", language),
-                "segments": self._format_segments(result.get("segments", [])),
+                "segments": self._format_segments(segments),
                 "duration_seconds": transcription_time,
                 "model": self.model_size,
+                "backend": WHISPER_BACKEND,
                 "device": self.device,
                 "audio_file": audio_file.name
             }
@@ -113,6 +151,9 @@ class HypocrateTranscriptionService:
             logger.info(f"Transcription terminée en {transcription_time:.2f}s")
             logger.info(f"Texte transcrit: {len(formatted_result['text'])} caractères")
             
+            if cache_key is not None:
+                get_transcript_cache().put(cache_key, formatted_result)
+            
             return formatted_result
             
         except Exception as e:
@@ -175,16 +216,25 @@ class HypocrateTranscriptionService:
         secs = int(seconds % 60)
         return f"{minutes:02d}:{secs:02d}"
     
-    def get_audio_duration(self, audio_path: str) -> float:
+    def get_audio_duration(self, audio_path: str, audio_hash: Optional[str] = None) -> float:
         """
         Obtient la durée d'un fichier audio
         
+        Avec le hash, l'audio est décodé en PCM (réutilisé ensuite par la
+        transcription) au lieu d'un décodage séparé par librosa.
+        
         Args:
             audio_path: Chemin vers le fichier
+            audio_hash: SHA-256 du contenu audio
             
         Returns:
             Durée en secondes
         """
+        if audio_hash:
+            try:
+                return pcm_duration(decode_to_pcm(audio_path, audio_hash))
+            except RuntimeError as e:
+                logger.warning(f"Décodage PCM impossible, repli sur librosa: {e}")
         try:
             import librosa
             duration = librosa.get_duration(path=audio_path)
@@ -219,8 +269,8 @@ class HypocrateTranscriptionService:
         return audio_duration * ratio
 
 
-# Instance singleton
-_transcription_service: Optional[HypocrateTranscriptionService] = None
+# Services par taille de modèle (les modèles eux-mêmes vivent dans le registre)
+_transcription_services: Dict[str, HypocrateTranscriptionService] = {}
 
 
 def get_hypocrate_transcription_service(model_size: str = "base") -> HypocrateTranscriptionService:
@@ -233,9 +283,7 @@ def get_hypocrate_transcription_service(model_size: str = "base") -> HypocrateTr
     Returns:
         Instance du service
     """
-    global _transcription_service
-    
-    if _transcription_service is None or _transcription_service.model_size != model_size:
-        _transcription_service = HypocrateTranscriptionService(model_size=model_size)
+    if model_size not in _transcription_services:
+        _transcription_services[model_size] = HypocrateTranscriptionService(model_size=model_size)
     
-    return _transcription_service
+    return _transcription_services[model_size]
@@ -0,0 +1,143 @@
+"""
+Détection d'activité vocale: seules les zones de parole sont transcrites
+"""
+import bisect
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .audio_pcm import SAMPLE_RATE, to_float32
+
+logger = logging.getLogger(__name__)
+
+# Configuration par variables d'environnement
+VAD_ENABLED = os.getenv("HYPOCRATE_VAD", "1") == "1"
+VAD_THRESHOLD_DB = float(os.getenv("HYPOCRATE_VAD_THRESHOLD_DB", "-45"))  # seuil de parole (dBFS)
+VAD_MIN_SPEECH_MS = int(os.getenv("HYPOCRATE_VAD_MIN_SPEECH_MS", "250"))  # clics et chocs ignorés
+VAD_MIN_SILENCE_MS = int(os.getenv("HYPOCRATE_VAD_MIN_SILENCE_MS", "1000"))  # pauses plus courtes conservées
+VAD_PAD_MS = int(os.getenv("HYPOCRATE_VAD_PAD_MS", "300"))  # marge autour de chaque zone
+VAD_GAP_MS = 300  # silence inséré entre deux zones concaténées
+
+FRAME_MS = 30
+BLOCK_FRAMES = 2000  # énergie calculée par blocs (~60 s) pour les PCM projetés en mémoire
+
+
+@dataclass
+class SpeechTimeline:
+    """Position de chaque zone de parole dans l'audio compacté"""
+    regions: List[Tuple[int, int]]  # échantillons dans l'enregistrement d'origine
+    offsets: List[int]  # début de chaque zone dans l'audio compacté
+    total_samples: int
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.regions) / SAMPLE_RATE
+
+    @property
+    def total_seconds(self) -> float:
+        return self.total_samples / SAMPLE_RATE
+
+    def to_original(self, seconds: float) -> float:
+        """Convertit un instant de l'audio compacté en instant de l'enregistrement"""
+        if not self.regions:
+            return seconds
+        position = int(round(seconds * SAMPLE_RATE))
+        i = max(bisect.bisect_right(self.offsets, position) - 1, 0)
+        start, end = self.regions[i]
+        return (start + min(max(position - self.offsets[i], 0), end - start)) / SAMPLE_RATE
+
+
+def frame_energy_db(audio: np.ndarray) -> np.ndarray:
+    """Énergie RMS par trame de FRAME_MS, en dBFS"""
+    frame_len = SAMPLE_RATE * FRAME_MS // 1000
+    n_frames = len(audio) // frame_len
+    energy = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, BLOCK_FRAMES):
+        last = min(first + BLOCK_FRAMES, n_frames)
+        frames = to_float32(audio[first * frame_len:last * frame_len]).reshape(last - first, frame_len)
+        energy[first:last] = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12))
+    return energy
+
+
+def detect_speech_regions(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Trouve les zones de parole d'un enregistrement
+
+    Les pauses courtes sont comblées (phrases entières), les bruits brefs
+    ignorés et chaque zone élargie pour ne pas couper les mots.
+
+    Args:
+        audio: Échantillons 16 kHz (float ou PCM int16)
+
+    Returns:
+        Intervalles (début, fin) en échantillons, triés et disjoints
+    """
+    energy = frame_energy_db(audio)
+    if len(energy) == 0:
+        return []
+
+    speech = np.concatenate(([False], energy > VAD_THRESHOLD_DB, [False]))
+    edges = np.flatnonzero(speech[1:] != speech[:-1]).reshape(-1, 2)
+
+    runs: List[List[int]] = []
+    for start, end in edges:
+        if runs and (start - runs[-1][1]) * FRAME_MS < VAD_MIN_SILENCE_MS:
+            runs[-1][1] = int(end)
+        else:
+            runs.append([int(start), int(end)])
+
+    frame_len = SAMPLE_RATE * FRAME_MS // 1000
+    pad = SAMPLE_RATE * VAD_PAD_MS // 1000
+    regions: List[Tuple[int, int]] = []
+    for start, end in runs:
+        if (end - start) * FRAME_MS < VAD_MIN_SPEECH_MS:
+            continue
+        region_start = max(start * frame_len - pad, 0)
+        region_end = min(end * frame_len + pad, len(audio))
+        if regions and region_start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], region_end)
+        else:
+            regions.append((region_start, region_end))
+    return regions
+
+
+def compact_speech(audio: np.ndarray, regions: List[Tuple[int, int]]) -> Tuple[np.ndarray, SpeechTimeline]:
+    """
+    Concatène les zones de parole, séparées par un court silence
+
+    Returns:
+        (échantillons float32 de la parole seule, correspondance des instants)
+    """
+    gap = np.zeros(SAMPLE_RATE * VAD_GAP_MS // 1000, dtype=np.float32)
+    pieces = []
+    offsets = []
+    position = 0
+    for i, (start, end) in enumerate(regions):
+        if i:
+            pieces.append(gap)
+            position += len(gap)
+        offsets.append(position)
+        pieces.append(to_float32(audio[start:end]))
+        position += end - start
+
+    samples = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return samples, SpeechTimeline(regions=list(regions), offsets=offsets, total_samples=len(audio))
+
+
+def remap_segments(segments: List[Dict], timeline: SpeechTimeline) -> List[Dict]:
+    """Replace les segments (et mots) Whisper sur la chronologie d'origine"""
+    remapped = []
+    for segment in segments:
+        shifted = dict(segment)
+        shifted["start"] = timeline.to_original(segment["start"])
+        shifted["end"] = timeline.to_original(segment["end"])
+        if segment.get("words"):
+            shifted["words"] = [
+                {**word, "start": timeline.to_original(word["start"]), "end": timeline.to_original(word["end"])}
+                for word in segment["words"]
+            ]
+        remapped.append(shifted)
+    return remapped
@@ -0,0 +1,140 @@
+"""
+Moteurs d'inférence Whisper interchangeables (PyTorch ou CTranslate2 int8)
+"""
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_OPENAI = "openai"  # openai-whisper (PyTorch, FP32 sur CPU)
+BACKEND_FASTER = "faster"  # faster-whisper (CTranslate2, poids int8)
+
+# Configuration par variables d'environnement
+WHISPER_BACKEND = os.getenv("HYPOCRATE_WHISPER_BACKEND", BACKEND_OPENAI)
+WHISPER_COMPUTE_TYPE = os.getenv("HYPOCRATE_WHISPER_COMPUTE_TYPE", "int8")
+
+
+class FasterWhisperModel:
+    """Modèle faster-whisper exposant le transcribe() d'openai-whisper"""
+
+    backend = BACKEND_FASTER
+
+    def __init__(self, model: Any, compute_type: str):
+        self.model = model
+        self.compute_type = compute_type
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        word_timestamps: bool = False,
+        initial_prompt: Optional[str] = None,
+        condition_on_previous_text: bool = True,
+        temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        compression_ratio_threshold: Optional[float] = 2.4,
+        logprob_threshold: Optional[float] = -1.0,
+        no_speech_threshold: Optional[float] = 0.6,
+        beam_size: Optional[int] = None,
+        best_of: Optional[int] = None,
+        **ignored
+    ) -> Dict[str, Any]:
+        """
+        Transcrit des échantillons float32 16 kHz mono
+
+        Décodage identique aux valeurs par défaut d'openai-whisper (greedy,
+        repli en température). Les options propres à PyTorch (fp16, verbose)
+        sont ignorées.
+
+        Returns:
+            Dict 'text', 'language', 'segments' au format openai-whisper
+        """
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            task=task,
+            beam_size=beam_size or 1,
+            best_of=best_of or 5,
+            word_timestamps=word_timestamps,
+            initial_prompt=initial_prompt,
+            condition_on_previous_text=condition_on_previous_text,
+            temperature=temperature,
+            compression_ratio_threshold=compression_ratio_threshold,
+            log_prob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            vad_filter=False  # silences déjà retirés (services.vad)
+        )
+        # Les segments sont décodés au fil de l'itération
+        converted = [_convert_segment(segment) for segment in segments]
+        return {
+            "text": "".join(segment["text"] for segment in converted),
+            "language": info.language,
+            "segments": converted,
+        }
+
+
+def _convert_segment(segment: Any) -> Dict[str, Any]:
+    """Segment faster-whisper -> segment openai-whisper"""
+    converted = {
+        "id": segment.id,
+        "seek": segment.seek,
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+        "tokens": list(segment.tokens),
+        "temperature": segment.temperature,
+        "avg_logprob": segment.avg_logprob,
+        "compression_ratio": segment.compression_ratio,
+        "no_speech_prob": segment.no_speech_prob,
+    }
+    if segment.words:
+        converted["words"] = [
+            {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+            for word in segment.words
+        ]
+    return converted
+
+
+def load_whisper_model(
+    model_size: str,
+    device: Optional[str] = None,
+    backend: Optional[str] = None,
+    num_threads: int = 0
+) -> Any:
+    """
+    Charge un modèle Whisper avec le moteur choisi
+
+    Args:
+        model_size: Taille du modèle (tiny, base, small, medium, large)
+        device: cpu ou cuda (auto-détecté si None)
+        backend: openai ou faster (HYPOCRATE_WHISPER_BACKEND par défaut)
+        num_threads: Threads CPU d'inférence (0 = valeur par défaut)
+
+    Returns:
+        Modèle exposant transcribe() au format openai-whisper
+    """
+    backend = backend or WHISPER_BACKEND
+    if backend == BACKEND_OPENAI:
+        import torch
+        import whisper
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        return whisper.load_model(model_size, device=device)
+
+    if backend == BACKEND_FASTER:
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("faster-whisper n'est pas installé (pip install faster-whisper)")
+        model = WhisperModel(
+            model_size,
+            device=device or "auto",
+            compute_type=WHISPER_COMPUTE_TYPE,
+            cpu_threads=num_threads
+        )
+        return FasterWhisperModel(model, WHISPER_COMPUTE_TYPE)
+
+    raise ValueError(f"Moteur Whisper inconnu: {backend} ({BACKEND_OPENAI} ou {BACKEND_FASTER})")
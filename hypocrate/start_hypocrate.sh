@@ -43,11 +43,6 @@ if ! python3 -c "import spacy; spacy.load('fr_core_news_md')" 2>/dev/null; then
     python3 -m spacy download fr_core_news_md
 fi
 
-if ! python3 -c "import spacy; spacy.load('en_core_web_sm')" 2>/dev/null; then
-    echo "📥 Téléchargement modèle spaCy anglais..."
-    python3 -m spacy download en_core_web_sm
-fi
-
 echo ""
 echo "✅ Tous les prérequis sont satisfaits"
 echo ""
@@ -0,0 +1,21 @@
+#!/bin/bash
+# Start Medical Scribe AI job workers (transcription + note generation)
+
+echo "⚙️  Starting Medical Scribe AI workers..."
+echo ""
+
+# Check if .env exists
+if [ ! -f .env ]; then
+    echo "❌ .env file not found!"
+    echo "   Run ./setup_env.sh first to create it"
+    exit 1
+fi
+
+cd backend
+echo "✅ Workers poll the job queue in the configured database"
+echo "   Concurrency: WORKER_TRANSCRIPTION_CONCURRENCY / WORKER_NOTE_CONCURRENCY in .env"
+echo ""
+echo "Press Ctrl+C to stop the workers"
+echo ""
+
+python -m app.worker "$@"